@@ -5,3 +5,5 @@ python scripts/inference/e2e_tick.py --out artifacts/perf/e2e_tick.json
 python scripts/inference/perf_drift_check.py \
   --baseline-e2e docs/perf/baselines/e2e_tick_baseline.json \
   --current-e2e artifacts/perf/e2e_tick.json --max-regress-pct 20
+python scripts/inference/bench_models.py --threads 1 --samples 2000 --max-seconds 30 --gate \
+  --out artifacts/perf/bench_models.json
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Parallel sha256 of many files with a persistent stat-keyed cache.
+
+- sha256_file() streams small files in 1 MiB chunks and mmaps large ones (no Python-side
+  copies); hashlib releases the GIL on big updates, so a thread pool scales with cores.
+  `processes=True` switches to a process pool (e.g. many tiny files on a slow FS).
+- HashCache is an sqlite table (realpath, size, mtime_ns, inode) -> sha256. A file whose
+  stat still matches is never re-read, so re-verifying an unchanged tree only costs a
+  stat per file. Rows are committed every few seconds while hashing, so an interrupted
+  run resumes where it stopped.
+- Files modified within RACY_S of hashing, or that change while being hashed, are hashed
+  but not cached (mtime granularity could hide a later edit).
+
+    from hashcache import hash_files
+    rep = hash_files(paths, cache_path="artifacts/hash_cache.sqlite", workers=8)
+    rep.digests[str(p)], rep.errors, rep.hits, rep.hashed
+
+CLI (sha256sum-style output):  python scripts/datasets/hashcache.py FILE|DIR ... [--workers N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import mmap
+import os
+import sqlite3
+import sys
+import time
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+DEFAULT_CACHE = os.environ.get("NS_HASH_CACHE", "artifacts/hash_cache.sqlite")
+CHUNK = 1 << 20
+MMAP_MIN = 64 << 20
+RACY_S = 2.0
+
+
+def sha256_file(path: str, chunk: int = CHUNK, mmap_min: int = MMAP_MIN) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size and size >= mmap_min:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
+        else:
+            for b in iter(lambda: f.read(chunk), b""):
+                h.update(b)
+    return h.hexdigest()
+
+
+def _key(st: os.stat_result) -> tuple[int, int, int]:
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+class HashCache:
+    """(realpath, size, mtime_ns, inode) -> sha256 in sqlite; path=None keeps it in memory."""
+
+    def __init__(self, path: str | None = DEFAULT_CACHE, commit_every_s: float = 2.0):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path or ":memory:")
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER,"
+            " mtime_ns INTEGER, inode INTEGER, sha256 TEXT)"
+        )
+        self.commit_every_s = commit_every_s
+        self._last_commit = time.monotonic()
+
+    def get(self, real: str, st: os.stat_result) -> str | None:
+        row = self.db.execute(
+            "SELECT size, mtime_ns, inode, sha256 FROM files WHERE path = ?", (real,)
+        ).fetchone()
+        return row[3] if row is not None and tuple(row[:3]) == _key(st) else None
+
+    def put(self, real: str, st: os.stat_result, digest: str) -> None:
+        self.db.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", (real, *_key(st), digest)
+        )
+        if time.monotonic() - self._last_commit >= self.commit_every_s:
+            self.flush()
+
+    def flush(self) -> None:
+        self.db.commit()
+        self._last_commit = time.monotonic()
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def close(self) -> None:
+        self.flush()
+        self.db.close()
+
+    def __enter__(self) -> HashCache:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+@dataclass
+class HashReport:
+    digests: dict[str, str] = field(default_factory=dict)  # input path (as given) -> sha256
+    errors: dict[str, str] = field(default_factory=dict)  # input path -> error message
+    hits: int = 0
+    hashed: int = 0
+    bytes_hashed: int = 0
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        mb_s = self.bytes_hashed / 1e6 / self.seconds if self.seconds else 0.0
+        return (
+            f"files={len(self.digests)} cached={self.hits} hashed={self.hashed} "
+            f"({self.bytes_hashed / 1e6:.1f} MB, {mb_s:.0f} MB/s) errors={len(self.errors)} "
+            f"in {self.seconds:.2f}s"
+        )
+
+
+def hash_files(
+    paths: Iterable,
+    cache_path: str | None = DEFAULT_CACHE,
+    workers: int = 0,
+    processes: bool = False,
+    log_every: int = 0,
+) -> HashReport:
+    """sha256 of every path, reading only files whose cached stat key is stale."""
+    t0 = time.perf_counter()
+    rep = HashReport()
+    workers = workers or min(8, os.cpu_count() or 1)
+    with HashCache(cache_path) as cache:
+        todo: dict[str, tuple[str, os.stat_result]] = {}
+        for p in map(str, paths):
+            try:
+                real = os.path.realpath(p)
+                st = os.stat(real)
+            except OSError as e:
+                rep.errors[p] = str(e)
+                continue
+            digest = cache.get(real, st)
+            if digest is not None:
+                rep.digests[p] = digest
+                rep.hits += 1
+            else:
+                todo[p] = (real, st)
+
+        pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with pool(max_workers=workers) as ex:
+            futs = {ex.submit(sha256_file, real): p for p, (real, _) in todo.items()}
+            for fut in as_completed(futs):
+                p = futs[fut]
+                real, st = todo[p]
+                try:
+                    digest = fut.result()
+                    after = os.stat(real)
+                except OSError as e:
+                    rep.errors[p] = str(e)
+                    continue
+                rep.digests[p] = digest
+                rep.hashed += 1
+                rep.bytes_hashed += st.st_size
+                if _key(after) == _key(st) and time.time() - st.st_mtime >= RACY_S:
+                    cache.put(real, st, digest)
+                if log_every and rep.hashed % log_every == 0:
+                    print(f"[hash] {rep.hashed}/{len(todo)} hashed", file=sys.stderr)
+    rep.seconds = time.perf_counter() - t0
+    return rep
+
+
+def add_cli_args(ap: argparse.ArgumentParser) -> None:
+    """--cache/--no-cache/--workers/--processes, shared by the manifest tools."""
+    ap.add_argument("--cache", default=DEFAULT_CACHE, help="sha256 cache (sqlite)")
+    ap.add_argument("--no-cache", action="store_true", help="hash everything, keep no cache")
+    ap.add_argument("--workers", type=int, default=0, help="hash workers (0 = min(8, cpus))")
+    ap.add_argument("--processes", action="store_true", help="process pool instead of threads")
+
+
+def hash_files_from_args(paths: Iterable, args: argparse.Namespace) -> HashReport:
+    return hash_files(
+        paths,
+        cache_path=None if args.no_cache else args.cache,
+        workers=args.workers,
+        processes=args.processes,
+    )
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="sha256 files/trees with a persistent cache.")
+    ap.add_argument("paths", nargs="+")
+    add_cli_args(ap)
+    args = ap.parse_args(argv)
+    files = []
+    for p in args.paths:
+        if os.path.isdir(p):
+            for dp, _, fns in os.walk(p):
+                files += [os.path.join(dp, fn) for fn in sorted(fns)]
+        else:
+            files.append(p)
+    rep = hash_files_from_args(files, args)
+    for p in files:
+        if p in rep.digests:
+            print(f"{rep.digests[p]}  {p}")
+    for p, e in rep.errors.items():
+        print(f"[hash] {p}: {e}", file=sys.stderr)
+    print(f"[hash] {rep.summary()}", file=sys.stderr)
+    return 1 if rep.errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
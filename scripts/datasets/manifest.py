@@ -1,20 +1,13 @@
 #!/usr/bin/env python3
 import argparse
-import hashlib
 import json
 import os
 import pathlib
 import time
 
-DEF_EXTS = {".json", ".csv", ".npz", ".txt", ".png", ".jpg", ".jpeg", ".bin"}
-
+from hashcache import add_cli_args, hash_files_from_args
 
-def sha256(p, buf=1024 * 1024):
-    h = hashlib.sha256()
-    with open(p, "rb") as f:
-        for chunk in iter(lambda: f.read(buf), b""):
-            h.update(chunk)
-    return h.hexdigest()
+DEF_EXTS = {".json", ".csv", ".npz", ".txt", ".png", ".jpg", ".jpeg", ".bin"}
 
 
 def main():
@@ -23,14 +16,15 @@ def main():
     ap.add_argument("--out", default="datasets/manifest.json")
     ap.add_argument("--max-mb", type=int, default=200)
     ap.add_argument("--exts", nargs="*", default=sorted(DEF_EXTS))
+    add_cli_args(ap)
     args = ap.parse_args()
     root = pathlib.Path(args.root)
     root.mkdir(parents=True, exist_ok=True)
     out_abs = pathlib.Path(args.out).resolve()
     max_bytes = args.max_mb * 1024 * 1024
     items = []
+    to_hash = []
     total = 0
-    hashed = 0
     for dp, _, files in os.walk(root):
         for fn in files:
             p = (pathlib.Path(dp) / fn).resolve()
@@ -39,19 +33,24 @@ def main():
             if args.exts and p.suffix.lower() not in set(args.exts):
                 continue
             total += 1
-            sz = p.stat().st_size
+            st = p.stat()
             rec = {
                 "relpath": str(p.relative_to(root.resolve())),
-                "bytes": sz,
-                "mtime": int(p.stat().st_mtime),
+                "bytes": st.st_size,
+                "mtime": int(st.st_mtime),
+                "sha256": None,
             }
-            if sz <= max_bytes:
-                rec["sha256"] = sha256(p)
-                hashed += 1
+            if st.st_size <= max_bytes:
+                to_hash.append((rec, str(p)))
             else:
-                rec["sha256"] = None
                 rec["skipped_size"] = True
             items.append(rec)
+    rep = hash_files_from_args([p for _, p in to_hash], args)
+    for rec, p in to_hash:
+        rec["sha256"] = rep.digests.get(p)
+    hashed = sum(rec["sha256"] is not None for rec, _ in to_hash)
+    for p, err in rep.errors.items():
+        print(f"[scan] hash failed {p}: {err}")
     man = {
         "meta": {
             "tool": "datasets/manifest.py",
@@ -66,7 +65,7 @@ def main():
     }
     pathlib.Path(args.out).parent.mkdir(parents=True, exist_ok=True)
     json.dump(man, open(args.out, "w"), indent=2, sort_keys=True)
-    print(f"[scan] wrote {args.out} (files={total}, hashed={hashed})")
+    print(f"[scan] wrote {args.out} (files={total}, hashed={hashed}; {rep.summary()})")
 
 
 if __name__ == "__main__":
@@ -1,27 +1,22 @@
 #!/usr/bin/env python3
 import argparse
-import hashlib
 import json
 import pathlib
 import sys
 
-
-def sha256(p, buf=1024 * 1024):
-    h = hashlib.sha256()
-    with open(p, "rb") as f:
-        for chunk in iter(lambda: f.read(buf), b""):
-            h.update(chunk)
-    return h.hexdigest()
+from hashcache import add_cli_args, hash_files_from_args
 
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--root", default="datasets")
     ap.add_argument("--manifest", default="datasets/manifest.json")
+    add_cli_args(ap)
     args = ap.parse_args()
     m = json.load(open(args.manifest))
     root = pathlib.Path(args.root)
     bad = []
+    present = []
     for rec in m.get("files", []):
         if rec.get("sha256") is None:
             continue
@@ -30,14 +25,17 @@ def main():
             print(f"[verify] MISSING {rec['relpath']}")
             bad.append(rec["relpath"])
             continue
-        s = sha256(p)
+        present.append((rec, str(p)))
+    rep = hash_files_from_args([p for _, p in present], args)
+    for rec, p in present:
+        s = rep.digests.get(p, rep.errors.get(p, "unreadable"))
         if s != rec["sha256"]:
             print(f"[verify] SHA MISMATCH {rec['relpath']} {s} != {rec['sha256']}")
             bad.append(rec["relpath"])
     if bad:
-        print(f"[verify] FAILED ({len(bad)} files)")
+        print(f"[verify] FAILED ({len(bad)} files; {rep.summary()})")
         sys.exit(2)
-    print("[verify] OK")
+    print(f"[verify] OK ({rep.summary()})")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark suite for the manifest models with statistical regression gating.
+
+Per model and intra-op thread count:
+- the process is pinned to `--cpus` (sched_setaffinity; ORT's pool inherits it);
+- warmup runs in windows until the window median moves less than `--warmup-tol`;
+- thousands of single-call samples are timed (capped by `--max-seconds`);
+- p50/p95/p99, mean/std, throughput and RSS are reported. The peak-RSS counter is reset
+  before each model (Linux clear_refs), so peak_rss_mb is that model's own high-water
+  mark rather than the process's; rss_delta_mb is the growth from loading and running it.
+
+Gating against stored baselines (docs/perf/baselines/bench_<name>_t<threads>.json, which
+keep the raw samples) uses two tests instead of one p50 ratio:
+- a one-sided Mann-Whitney U test that current latencies are stochastically larger;
+- bootstrap confidence intervals for the current/baseline ratio of each gated percentile.
+A percentile regresses when the CI's lower bound exceeds 1 + --min-effect; for p50 the
+U test must also reject at --alpha. Exit code 2 on any regression, like perf_drift_check.
+
+    python scripts/inference/bench_models.py --threads 1,4 --cpus 0-3 --save-baseline
+    python scripts/inference/bench_models.py --threads 1,4 --cpus 0-3 --gate
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+from collections.abc import Callable
+
+import numpy as np
+import onnxruntime as ort
+from model_registry import (
+    DEF_MANIFEST,
+    entry_shape,
+    get_session,
+    load_manifest,
+    make_feeds,
+    resolve,
+)
+
+DEF_BASELINE_DIR = "docs/perf/baselines"
+
+
+# ---- environment ----
+def parse_cpus(txt: str | None) -> list[int]:
+    """'0-3,6' -> [0, 1, 2, 3, 6]."""
+    out: list[int] = []
+    for part in (txt or "").split(","):
+        if not part.strip():
+            continue
+        a, _, b = part.partition("-")
+        out.extend(range(int(a), int(b or a) + 1))
+    return sorted(set(out))
+
+
+def set_affinity(cpus: list[int] | None) -> list[int] | None:
+    """Pin this process to `cpus` where supported; returns the effective CPU set."""
+    if not hasattr(os, "sched_setaffinity"):
+        return None
+    if cpus:
+        os.sched_setaffinity(0, cpus)
+    return sorted(os.sched_getaffinity(0))
+
+
+def reset_peak_rss() -> bool:
+    """Restart the kernel's peak-RSS counter (Linux >= 4.0); False where unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def rss_mb() -> tuple[float, float]:
+    """(current, peak) resident set size in MiB; 0.0 where the platform lacks the counter.
+
+    The peak is VmHWM (honours reset_peak_rss) or, without /proc, ru_maxrss (process-wide).
+    """
+    cur = peak = 0.0
+    try:
+        with open("/proc/self/statm") as f:
+            cur = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+        with open("/proc/self/status") as f:
+            hwm = next((ln.split()[1] for ln in f if ln.startswith("VmHWM:")), None)
+        if hwm is not None:
+            return cur, max(int(hwm) / 2**10, cur)
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+
+        ru = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = ru / 2**20 if sys.platform == "darwin" else ru / 2**10  # bytes vs KiB
+    except ImportError:
+        pass
+    return cur, max(peak, cur)
+
+
+# ---- timing ----
+def _time_calls(fn: Callable[[], object], n: int) -> np.ndarray:
+    out = np.empty(n, dtype=np.float64)
+    for k in range(n):
+        t0 = time.perf_counter()
+        fn()
+        out[k] = time.perf_counter() - t0
+    return out * 1e3
+
+
+def warmup_until_stable(
+    fn: Callable[[], object], window: int = 20, rel_tol: float = 0.05, max_iters: int = 2000
+) -> int:
+    """Run `fn` in windows until two consecutive window medians agree within rel_tol.
+
+    Returns the number of warmup calls made (max_iters if it never settled).
+    """
+    prev, n = None, 0
+    while n < max_iters:
+        med = float(np.median(_time_calls(fn, window)))
+        n += window
+        if prev is not None and abs(med - prev) <= rel_tol * prev:
+            break
+        prev = med
+    return n
+
+
+def collect(
+    fn: Callable[[], object], samples: int = 2000, max_seconds: float | None = None
+) -> tuple[np.ndarray, float]:
+    """(per-call ms, wall seconds); stops early once max_seconds have elapsed."""
+    if not max_seconds:
+        t0 = time.perf_counter()
+        ms = _time_calls(fn, samples)
+        return ms, time.perf_counter() - t0
+    chunks, n, t0 = [], 0, time.perf_counter()
+    while n < samples and time.perf_counter() - t0 < max_seconds:
+        chunks.append(_time_calls(fn, min(100, samples - n)))
+        n += len(chunks[-1])
+    return np.concatenate(chunks), time.perf_counter() - t0
+
+
+def summarize(ms: np.ndarray, wall_s: float, batch: int = 1) -> dict:
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "n": int(len(ms)),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "mean_ms": float(ms.mean()),
+        "std_ms": float(ms.std()),
+        "min_ms": float(ms.min()),
+        "max_ms": float(ms.max()),
+        "throughput_hz": len(ms) * batch / wall_s if wall_s > 0 else 0.0,
+    }
+
+
+# ---- statistics ----
+def _ranks(a: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(1-based ranks with ties averaged, tie group sizes)."""
+    _, inv, counts = np.unique(a, return_inverse=True, return_counts=True)
+    avg = np.cumsum(counts) - (counts - 1) / 2.0
+    return avg[inv], counts
+
+
+def mann_whitney_greater(base: np.ndarray, cur: np.ndarray) -> tuple[float, float]:
+    """(U, one-sided p) for H1: `cur` is stochastically larger than `base`.
+
+    Normal approximation with tie and continuity correction (fine for n in the hundreds+).
+    """
+    x, y = np.asarray(cur, dtype=np.float64), np.asarray(base, dtype=np.float64)
+    n1, n2 = len(x), len(y)
+    n = n1 + n2
+    ranks, ties = _ranks(np.concatenate([x, y]))
+    u = float(ranks[:n1].sum() - n1 * (n1 + 1) / 2.0)
+    tie_term = float((ties**3 - ties).sum()) / (n * (n - 1))
+    sigma = math.sqrt(n1 * n2 / 12.0 * ((n + 1) - tie_term))
+    if sigma == 0:
+        return u, 1.0
+    z = (u - n1 * n2 / 2.0 - 0.5) / sigma
+    return u, 0.5 * math.erfc(z / math.sqrt(2.0))
+
+
+def bootstrap_ratio(
+    base: np.ndarray,
+    cur: np.ndarray,
+    q: float = 50.0,
+    n_boot: int = 1000,
+    alpha: float = 0.05,
+    seed: int = 0,
+) -> tuple[float, float, float]:
+    """(ratio, lo, hi): percentile-q of cur / base with a (1 - alpha) bootstrap CI."""
+    rng = np.random.default_rng(seed)
+    base, cur = np.asarray(base, np.float64), np.asarray(cur, np.float64)
+    qb = np.percentile(base[rng.integers(0, len(base), (n_boot, len(base)))], q, axis=1)
+    qc = np.percentile(cur[rng.integers(0, len(cur), (n_boot, len(cur)))], q, axis=1)
+    ratios = qc / np.maximum(qb, 1e-12)
+    lo, hi = np.percentile(ratios, [100 * alpha / 2, 100 * (1 - alpha / 2)])
+    return float(np.percentile(cur, q) / max(np.percentile(base, q), 1e-12)), float(lo), float(hi)
+
+
+def gate(
+    base: np.ndarray,
+    cur: np.ndarray,
+    quantiles=(50.0, 99.0),
+    alpha: float = 0.01,
+    min_effect: float = 0.05,
+    n_boot: int = 1000,
+) -> dict:
+    _, p = mann_whitney_greater(base, cur)
+    res = {"mw_p": p, "alpha": alpha, "min_effect": min_effect, "quantiles": {}}
+    regressed = False
+    for q in quantiles:
+        ratio, lo, hi = bootstrap_ratio(base, cur, q, n_boot, alpha)
+        bad = lo > 1.0 + min_effect and (q != 50 or p < alpha)
+        res["quantiles"][f"p{q:g}"] = {"ratio": ratio, "ci": [lo, hi], "regressed": bad}
+        regressed |= bad
+    res["regressed"] = regressed
+    return res
+
+
+# ---- suite ----
+def bench_model(
+    name: str,
+    manifest: str = DEF_MANIFEST,
+    threads: int = 1,
+    inter_threads: int = 0,
+    samples: int = 2000,
+    max_seconds: float | None = 60.0,
+    warmup_window: int = 20,
+    warmup_tol: float = 0.05,
+    warmup_max: int = 2000,
+    shape=None,
+) -> tuple[dict, np.ndarray]:
+    """(summary, per-call ms samples) for one manifest model at one thread setting.
+
+    inter_threads=0 keeps ORT's sequential executor; any other value switches the session
+    to ORT_PARALLEL. peak_rss_mb is None where the peak counter cannot be reset per model.
+    """
+    _, entry = resolve(name, manifest)
+    shape = shape or entry_shape(entry)
+    own_peak = reset_peak_rss()
+    rss0, _ = rss_mb()
+    sess = get_session(name, manifest, threads=threads, inter_threads=inter_threads, warmup_runs=0)
+    feeds = make_feeds(sess, shape, np.random.default_rng(1234))
+    batch = next(iter(feeds.values())).shape[0] if feeds else 1
+
+    def call():
+        sess.run(None, feeds)
+
+    n_warm = warmup_until_stable(call, warmup_window, warmup_tol, warmup_max)
+    ms, wall = collect(call, samples, max_seconds)
+    cur, peak = rss_mb()
+    rep = {
+        "name": name,
+        "threads": threads,
+        "inter_threads": inter_threads,
+        "shape": list(next(iter(feeds.values())).shape) if feeds else [],
+        "warmup_iters": n_warm,
+        "wall_s": round(wall, 4),
+        "rss_mb": round(cur, 1),
+        "rss_delta_mb": round(cur - rss0, 1),
+        "peak_rss_mb": round(peak, 1) if own_peak else None,
+    }
+    rep.update(summarize(ms, wall, batch))
+    return rep, ms
+
+
+def env_info(cpus: list[int] | None) -> dict:
+    return {
+        "host": platform.node(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "affinity": cpus,
+        "onnxruntime": ort.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def baseline_path(baseline_dir: str, name: str, threads: int) -> str:
+    return os.path.join(baseline_dir, f"bench_{name.replace('@', '_')}_t{threads}.json")
+
+
+def save_baseline(path: str, rep: dict, ms: np.ndarray, env: dict, keep: int = 2000) -> None:
+    if len(ms) > keep:
+        ms = np.random.default_rng(0).choice(ms, keep, replace=False)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({**rep, "env": env, "samples_ms": np.round(ms, 5).tolist()}, f, indent=2)
+
+
+def load_baseline(path: str) -> tuple[dict, np.ndarray] | None:
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        b = json.load(f)
+    return b, np.asarray(b.pop("samples_ms"), dtype=np.float64)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark manifest models; gate vs baselines.")
+    ap.add_argument("--manifest", default=DEF_MANIFEST)
+    ap.add_argument("--names", nargs="*", default=None, help="default: every manifest entry")
+    ap.add_argument("--threads", default="1", help="comma list of intra-op thread counts")
+    ap.add_argument(
+        "--inter-threads", type=int, default=0, help="0 = sequential; >0 = ORT_PARALLEL"
+    )
+    ap.add_argument("--cpus", default=None, help="CPU affinity like 0-3,6 (Linux)")
+    ap.add_argument("--samples", type=int, default=2000)
+    ap.add_argument("--max-seconds", type=float, default=60.0, help="per model/thread cap")
+    ap.add_argument("--warmup-window", type=int, default=20)
+    ap.add_argument("--warmup-tol", type=float, default=0.05)
+    ap.add_argument("--warmup-max", type=int, default=2000)
+    ap.add_argument("--baseline-dir", default=DEF_BASELINE_DIR)
+    ap.add_argument("--save-baseline", action="store_true", help="store results as baselines")
+    ap.add_argument("--gate", action="store_true", help="compare to baselines; exit 2 if worse")
+    ap.add_argument("--alpha", type=float, default=0.01)
+    ap.add_argument("--min-effect", type=float, default=0.05, help="ignore slowdowns below")
+    ap.add_argument("--gate-q", default="50,99", help="percentiles to gate")
+    ap.add_argument("--out", default="artifacts/perf/bench_models.json")
+    args = ap.parse_args(argv)
+
+    cpus = set_affinity(parse_cpus(args.cpus))
+    env = env_info(cpus)
+    names = args.names or list(load_manifest(args.manifest))
+    quantiles = [float(q) for q in args.gate_q.split(",") if q]
+    results, failed = [], []
+    for name in names:
+        for t in (int(v) for v in args.threads.split(",") if v):
+            rep, ms = bench_model(
+                name,
+                args.manifest,
+                t,
+                args.inter_threads,
+                args.samples,
+                args.max_seconds,
+                args.warmup_window,
+                args.warmup_tol,
+                args.warmup_max,
+            )
+            print(
+                f"[bench] {name} t={t}: p50={rep['p50_ms']:.3f} p95={rep['p95_ms']:.3f} "
+                f"p99={rep['p99_ms']:.3f} ms  {rep['throughput_hz']:.1f}/s  n={rep['n']} "
+                f"warmup={rep['warmup_iters']}  rss={rep['rss_mb']:.0f}MiB"
+            )
+            bpath = baseline_path(args.baseline_dir, name, t)
+            if args.gate:
+                base = load_baseline(bpath)
+                if base is None:
+                    print(f"[WARN] no baseline {bpath}; not gated")
+                else:
+                    g = gate(base[1], ms, quantiles, args.alpha, args.min_effect)
+                    rep["gate"] = g
+                    for q, r in g["quantiles"].items():
+                        print(
+                            f"[gate] {name} t={t} {q}: x{r['ratio']:.3f} "
+                            f"CI[{r['ci'][0]:.3f}, {r['ci'][1]:.3f}] MW p={g['mw_p']:.2g}  "
+                            f"{'FAIL' if r['regressed'] else 'OK'}"
+                        )
+                    if g["regressed"]:
+                        failed.append(f"{name} t={t}")
+            if args.save_baseline:
+                save_baseline(bpath, rep, ms, env)
+                print(f"[bench] baseline -> {bpath}")
+            results.append(rep)
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump({"env": env, "results": results}, f, indent=2)
+    print(f"[bench] wrote {args.out}")
+    if failed:
+        print(f"\n[ERROR] latency regression: {', '.join(failed)}")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
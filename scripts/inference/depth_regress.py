@@ -7,13 +7,18 @@ import sys
 import time
 
 import numpy as np
-import onnxruntime as ort
+from model_registry import get_session
 
 
 def _stats(a):
     return dict(mean=float(a.mean()), std=float(a.std()), min=float(a.min()), max=float(a.max()))
 
 
+def ramp_input(n: int, c: int, h: int, w: int) -> np.ndarray:
+    """Deterministic regression input shared by depth_regress and optimize_model."""
+    return np.linspace(0.0, 1.0, num=n * c * h * w, dtype=np.float32).reshape(n, c, h, w)
+
+
 def _sha(b: bytes) -> str:
     h = hashlib.sha256()
     h.update(b)
@@ -31,9 +36,9 @@ def main():
     args = ap.parse_args()
 
     n, c, h, w = (int(x) for x in args.shape.lower().split("x"))
-    x = np.linspace(0.0, 1.0, num=n * c * h * w, dtype=np.float32).reshape(n, c, h, w)
+    x = ramp_input(n, c, h, w)
 
-    sess = ort.InferenceSession(args.model, providers=["CPUExecutionProvider"])
+    sess = get_session(args.model)
     in_name = sess.get_inputs()[0].name
     _ = sess.get_outputs()[0].name
     t0 = time.perf_counter()
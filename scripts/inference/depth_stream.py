@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Streaming depth inference over a recorded dataset index.
+
+- Reads an index.csv from sim/scripts/ns_build_index.py (t_rgb, rgb_path, ... relative
+  to the dataset root); frames are processed in index order.
+- PNG decode + resize runs on a thread pool (PIL releases the GIL while decoding) with a
+  bounded lookahead of `prefetch` batches, so decode overlaps inference.
+- Frames are normalised straight into one preallocated [B, 3, H, W] buffer that is
+  IO-bound to the ORT session (ort_runtime.BoundSession); the last batch is zero-padded.
+  A model with a fixed batch of 1 is re-exported with a symbolic batch dim when that is
+  numerically identical (same check as policy_batch).
+- Outputs go to a sink: NpySink writes float32 [N, H, W] into a .npy memmap one batch
+  at a time; PngSink writes 16-bit millimetre PNGs (0..1 output * max_depth_m, as
+  ns_depth_onnx_node.py publishes) on writer threads.
+
+Logs frames/s and the prefetch queue depth (decoded frames ready at each batch start).
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from model_registry import default_cache_dir, file_sha256, get_session
+from ort_runtime import BoundSession, StageTimes
+from PIL import Image
+from policy_batch import fixed_batch, make_dynamic_batch
+
+
+def read_index(path: str, root: str | None = None) -> tuple[Path, list[dict]]:
+    """(dataset root, index rows); root defaults to the index file's directory."""
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    return Path(root or os.path.dirname(os.path.abspath(path))), rows
+
+
+def load_rgb(path: str | Path, size: tuple[int, int]) -> tuple[np.ndarray, bool]:
+    """(uint8 [H, W, 3] RGB resized to size=(W, H) with box filtering, decoded ok?)."""
+    w, h = size
+    try:
+        with Image.open(path) as im:
+            im = im.convert("RGB")
+            if im.size != (w, h):
+                im = im.resize((w, h), Image.Resampling.BOX)
+            return np.asarray(im), True
+    except (OSError, ValueError):  # missing / truncated frame -> black, like the dataset
+        return np.zeros((h, w, 3), np.uint8), False
+
+
+class NpySink:
+    """float32 [N, H, W] .npy memmap filled one batch at a time."""
+
+    def __init__(self, path: str, n: int, hw: tuple[int, int]):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.n = n
+        self.mm = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(n, *hw))
+
+    def write(self, start: int, depth: np.ndarray) -> None:
+        self.mm[start : start + len(depth)] = depth
+
+    def pending(self) -> int:
+        return 0
+
+    def close(self) -> list[str]:
+        """Flush; returns each frame's row in the array."""
+        self.mm.flush()
+        del self.mm
+        return [str(i) for i in range(self.n)]
+
+
+class PngSink:
+    """One 16-bit PNG (millimetres) per frame, encoded on writer threads."""
+
+    def __init__(self, out_dir: str, names: list[str], max_depth_m: float = 20.0, writers: int = 2):
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self.names = names
+        self.scale = max_depth_m * 1000.0
+        self._pool = ThreadPoolExecutor(max(1, writers), thread_name_prefix="png")
+        self._futs: deque[Future] = deque()
+        self._limit = 4 * max(1, writers)
+
+    def _save(self, mm: np.ndarray, name: str) -> None:
+        Image.fromarray(mm).save(os.path.join(self.out_dir, name))
+
+    def write(self, start: int, depth: np.ndarray) -> None:
+        mm = (np.clip(depth, 0.0, 1.0) * self.scale).astype(np.uint16)  # own copy
+        for j in range(len(mm)):
+            self._futs.append(self._pool.submit(self._save, mm[j], self.names[start + j]))
+        while len(self._futs) > self._limit:  # bound memory if encoding falls behind
+            self._futs.popleft().result()
+        while self._futs and self._futs[0].done():
+            self._futs.popleft().result()
+
+    def pending(self) -> int:
+        return len(self._futs)
+
+    def close(self) -> list[str]:
+        """Wait for pending encodes; returns each frame's file name."""
+        try:
+            while self._futs:
+                self._futs.popleft().result()
+        finally:
+            self._pool.shutdown()
+        return list(self.names)
+
+
+def png_names(rows: list[dict]) -> list[str]:
+    return [f"{Path(r['rgb_path']).stem}.png" for r in rows]
+
+
+def write_pred_index(path: str, rows: list[dict], preds: list[str]) -> None:
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["t_rgb", "rgb_path", "pred"])
+        for r, p in zip(rows, preds, strict=True):
+            w.writerow([r.get("t_rgb", ""), r["rgb_path"], p])
+
+
+class DepthStreamer:
+    """Batched depth model over a stream of image paths with prefetching decode workers."""
+
+    def __init__(
+        self,
+        model: str,
+        batch: int = 8,
+        size: tuple[int, int] | None = None,
+        workers: int = 4,
+        prefetch: int = 2,
+        threads: int = 0,
+        dynamic: bool = True,
+        cache_dir: str | None = None,
+    ):
+        cache_dir = str(cache_dir or default_cache_dir())
+        sess = get_session(model, threads=threads, warmup_runs=0, cache_dir=cache_dir)
+        shp = sess.get_inputs()[0].shape
+        h, w = shp[2], shp[3]
+        if size:
+            w, h = size
+        elif not (isinstance(h, int) and isinstance(w, int) and h > 0 and w > 0):
+            h, w = 384, 640
+        self.size = (int(w), int(h))
+        b = fixed_batch(sess)
+        self.reexported = False
+        if b is not None and b != batch and dynamic:
+            out = Path(cache_dir) / f"{Path(model).stem}.{file_sha256(model)[:16]}.dynbatch.onnx"
+            dyn = (
+                str(out)
+                if out.is_file()
+                else make_dynamic_batch(model, str(out), (3, h, w), cache_dir)
+            )
+            if dyn:
+                sess = get_session(
+                    dyn, verify=False, threads=threads, warmup_runs=0, cache_dir=cache_dir
+                )
+                b, self.reexported = None, True
+        self.batch = b or batch
+        in_name = sess.get_inputs()[0].name
+        self.bound = BoundSession(sess, {in_name: (self.batch, 3, int(h), int(w))})
+        out_shape = self.bound.output.shape
+        self.out_hw = (int(out_shape[-2]), int(out_shape[-1]))
+        self.workers = max(1, workers)
+        self.lookahead = max(1, prefetch) * self.batch
+        self.times = StageTimes("decode_wait", "infer", "write")
+        self.q_ready: list[int] = []
+        self.decode_errors = 0
+        self.frames = 0
+        self.wall_s = 0.0
+
+    def run(self, paths: list, sink, log_every: int = 0) -> dict:
+        n, bs = len(paths), self.batch
+        x = self.bound.input
+        inv255 = np.float32(1.0 / 255.0)
+        it = iter(paths)
+        pending: deque[Future] = deque()
+        t_start = time.perf_counter()
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="decode") as pool:
+
+            def refill():
+                while len(pending) < self.lookahead and (p := next(it, None)) is not None:
+                    pending.append(pool.submit(load_rgb, p, self.size))
+
+            for bi, a in enumerate(range(0, n, bs)):
+                k = min(bs, n - a)
+                refill()
+                self.q_ready.append(sum(f.done() for f in pending))
+                t0 = time.perf_counter()
+                for j in range(k):
+                    img, ok = pending.popleft().result()
+                    self.decode_errors += not ok
+                    np.multiply(img.transpose(2, 0, 1), inv255, out=x[j], casting="unsafe")
+                if k < bs:
+                    x[k:] = 0.0
+                refill()  # keep the workers busy while ORT runs
+                t1 = time.perf_counter()
+                y = self.bound.run()
+                t2 = time.perf_counter()
+                sink.write(a, y.reshape(bs, -1, *self.out_hw)[:k, 0])
+                t3 = time.perf_counter()
+                self.times.add("decode_wait", (t1 - t0) * 1e3)
+                self.times.add("infer", (t2 - t1) * 1e3)
+                self.times.add("write", (t3 - t2) * 1e3)
+                self.frames += k
+                if log_every and (bi + 1) % log_every == 0:
+                    el = time.perf_counter() - t_start
+                    print(
+                        f"[depth-stream] {a + k}/{n} frames {(a + k) / el:.1f} fps "
+                        f"q_ready={self.q_ready[-1]}/{self.lookahead} "
+                        f"write_backlog={sink.pending()}",
+                        flush=True,
+                    )
+        self.wall_s += time.perf_counter() - t_start
+        return self.report()
+
+    def report(self) -> dict:
+        q = np.asarray(self.q_ready) if self.q_ready else np.zeros(1)
+        rep = {
+            "frames": self.frames,
+            "batch": self.batch,
+            "reexported": self.reexported,
+            "size": list(self.size),
+            "wall_s": round(self.wall_s, 4),
+            "fps": self.frames / self.wall_s if self.wall_s > 0 else 0.0,
+            "lookahead": self.lookahead,
+            "q_ready_mean": float(q.mean()),
+            "q_ready_min": int(q.min()),
+            "decode_errors": self.decode_errors,
+        }
+        rep.update(self.times.summary())
+        return rep
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Process-wide ONNX Runtime session registry keyed by manifest name or model path.
+
+    sess = get_session("perception.depth")           # name in deploy/models/manifest.json
+    sess = get_session("artifacts/onnx/foo.onnx")    # or a plain path
+
+- Manifest entries have their sha256 verified once per process (re-checked only if the
+  file's size/mtime change); a mismatch raises instead of running a stale model.
+- Sessions are cached per (model, provider, threads, opt level), so every later call
+  from any tool in the same process reuses the warm session.
+- SessionOptions are tuned (intra/inter-op threads, graph optimisation level) and the
+  optimised graph is saved under `cache_dir` keyed by the model's sha256; later processes
+  load that file with optimisation disabled, which skips the graph rewrite on startup.
+  $NS_ORT_CACHE overrides the default location (read per call).
+- New sessions are warmed up with zero inputs (manifest "shape", or static dims with a
+  dynamic batch -> 1) so the first real call does not pay for lazy allocation. Models
+  with dynamic spatial dims and no manifest shape are not warmed up, and a failing
+  warmup is logged rather than failing the load.
+
+`python scripts/inference/model_registry.py [--names ...]` loads every manifest model
+twice and prints build vs reuse times.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import onnxruntime as ort
+
+DEF_MANIFEST = "deploy/models/manifest.json"
+DEF_CACHE_DIR = "artifacts/ort_cache"
+CACHE_ENV = "NS_ORT_CACHE"
+OPT_LEVELS = {
+    "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+_NP_TYPES = {
+    "tensor(float)": np.float32,
+    "tensor(float16)": np.float16,
+    "tensor(double)": np.float64,
+    "tensor(int64)": np.int64,
+    "tensor(int32)": np.int32,
+    "tensor(uint8)": np.uint8,
+}
+
+_LOCK = threading.RLock()
+_SESSIONS: dict[tuple, ort.InferenceSession] = {}
+_VERIFIED: dict[str, tuple[int, int, str]] = {}  # path -> (size, mtime_ns, sha256)
+_MANIFESTS: dict[str, tuple[int, dict]] = {}
+STATS: dict[str, list[float]] = {"build_ms": [], "reuse_ms": []}
+
+
+def load_manifest(path: str = DEF_MANIFEST) -> dict:
+    """Manifest as {name: entry}; list-form manifests are keyed by their "name"."""
+    mtime = os.stat(path).st_mtime_ns
+    hit = _MANIFESTS.get(path)
+    if hit and hit[0] == mtime:
+        return hit[1]
+    with open(path) as f:
+        m = json.load(f)
+    if isinstance(m, list):
+        m = {e.get("name") or e.get("target") or f"idx{i}": e for i, e in enumerate(m)}
+    _MANIFESTS[path] = (mtime, m)
+    return m
+
+
+def entry_path(entry: dict) -> str:
+    p = entry.get("dst") or entry.get("path") or entry.get("src")
+    if not p:
+        raise ValueError("manifest entry missing 'dst'/'path'/'src'")
+    return p
+
+
+def sha256_file(path: str, chunk: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while b := f.read(chunk):
+            h.update(b)
+    return h.hexdigest()
+
+
+def file_sha256(path: str) -> str:
+    """sha256 of `path`, memoised per process on (size, mtime)."""
+    st = os.stat(path)
+    hit = _VERIFIED.get(path)
+    if hit and hit[:2] == (st.st_size, st.st_mtime_ns):
+        return hit[2]
+    sha = sha256_file(path)
+    _VERIFIED[path] = (st.st_size, st.st_mtime_ns, sha)
+    return sha
+
+
+def resolve(name_or_path: str, manifest: str = DEF_MANIFEST) -> tuple[str, dict]:
+    """(model path, manifest entry or {}) for a manifest name or a file path."""
+    if os.path.exists(manifest):
+        man = load_manifest(manifest)
+        if name_or_path in man:
+            return entry_path(man[name_or_path]), man[name_or_path]
+        if os.path.isfile(name_or_path):
+            want = os.path.realpath(name_or_path)
+            for e in man.values():
+                if isinstance(e, dict) and os.path.realpath(entry_path(e)) == want:
+                    return name_or_path, e
+    if not os.path.isfile(name_or_path):
+        raise FileNotFoundError(f"no manifest entry or file {name_or_path!r}")
+    return name_or_path, {}
+
+
+def best_variant(target: str, manifest: str = DEF_MANIFEST) -> str:
+    """Fastest manifest entry for `target` ("<target>@<variant>" or itself) that passed.
+
+    Variants are registered by optimize_model.py with "p50_ms" and "passes"; the base
+    entry is the fallback when no variant passed or none was measured.
+    """
+    man = load_manifest(manifest)
+    best, best_ms = target, float(man.get(target, {}).get("p50_ms", float("inf")))
+    for name, e in man.items():
+        if name.startswith(f"{target}@") and e.get("passes") and "p50_ms" in e:
+            if float(e["p50_ms"]) < best_ms:
+                best, best_ms = name, float(e["p50_ms"])
+    return best
+
+
+def default_cache_dir() -> str:
+    """Optimised-graph cache: $NS_ORT_CACHE, else DEF_CACHE_DIR."""
+    return os.environ.get(CACHE_ENV) or DEF_CACHE_DIR
+
+
+def session_options(
+    threads: int = 0, inter_threads: int = 0, opt: str = "all", optimized_path: str | None = None
+) -> ort.SessionOptions:
+    so = ort.SessionOptions()
+    so.graph_optimization_level = OPT_LEVELS[opt]
+    if threads:
+        so.intra_op_num_threads = threads
+    if inter_threads:
+        so.inter_op_num_threads = inter_threads
+        so.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+    if optimized_path:
+        # the cache is per machine by construction; skip ORT's hardware-specific warning
+        so.optimized_model_filepath = optimized_path
+        so.log_severity_level = 3
+    return so
+
+
+def _static(shape, override=None) -> tuple[int, ...]:
+    if override:
+        return tuple(int(v) for v in override)
+    return tuple(d if isinstance(d, int) and d > 0 else 1 for d in shape)
+
+
+def make_feeds(sess: ort.InferenceSession, shape=None, rng=None) -> dict[str, np.ndarray]:
+    """Feeds for every input (first one shaped `shape`); zeros, or uniform [0, 1) from rng."""
+    feeds = {}
+    for k, i in enumerate(sess.get_inputs()):
+        shp = _static(i.shape, shape if k == 0 else None)
+        dt = _NP_TYPES.get(i.type, np.float32)
+        feeds[i.name] = np.zeros(shp, dtype=dt) if rng is None else rng.random(shp).astype(dt)
+    return feeds
+
+
+def _dynamic_spatial(sess: ort.InferenceSession) -> bool:
+    """True if any input has a dynamic dim past the batch axis (e.g. a free HxW)."""
+    return any(not (isinstance(d, int) and d > 0) for i in sess.get_inputs() for d in i.shape[1:])
+
+
+def warmup(sess: ort.InferenceSession, shape=None, runs: int = 1) -> bool:
+    """Run zero feeds `runs` times; a no-op (False) for dynamic spatial dims without `shape`."""
+    if shape is None and _dynamic_spatial(sess):
+        return False
+    feeds = make_feeds(sess, shape)
+    for _ in range(runs):
+        sess.run(None, feeds)
+    return True
+
+
+def entry_shape(entry: dict):
+    s = entry.get("shape") or entry.get("validated_shape")
+    if isinstance(s, str):
+        s = [int(v) for v in s.lower().split("x")]
+    return s
+
+
+def get_session(
+    name_or_path: str,
+    manifest: str = DEF_MANIFEST,
+    provider: str = "CPUExecutionProvider",
+    threads: int = 0,
+    inter_threads: int = 0,
+    opt: str = "all",
+    verify: bool = True,
+    warmup_runs: int = 1,
+    cache_dir: str | None = DEF_CACHE_DIR,
+) -> ort.InferenceSession:
+    t0 = time.perf_counter()
+    path, entry = resolve(name_or_path, manifest)
+    sha = file_sha256(path)
+    if verify and entry.get("sha256") and entry["sha256"] != sha:
+        raise RuntimeError(
+            f"{name_or_path}: sha256 mismatch ({entry['sha256'][:12]} != {sha[:12]})"
+        )
+    if cache_dir == DEF_CACHE_DIR:  # the default; $NS_ORT_CACHE may redirect it
+        cache_dir = default_cache_dir()
+    key = (sha, provider, threads, inter_threads, opt)
+    with _LOCK:
+        sess = _SESSIONS.get(key)
+        if sess is not None:
+            STATS["reuse_ms"].append((time.perf_counter() - t0) * 1e3)
+            return sess
+        load_path, level, save_to = path, opt, None
+        if cache_dir and opt != "disable":
+            ep = provider.replace("ExecutionProvider", "").lower()
+            cached = Path(cache_dir) / f"{Path(path).stem}.{sha[:16]}.{ep}.{opt}.t{threads}.onnx"
+            if cached.is_file():
+                load_path, level = str(cached), "disable"
+            else:
+                cached.parent.mkdir(parents=True, exist_ok=True)
+                save_to = str(cached)
+        so = session_options(threads, inter_threads, level, save_to)
+        sess = ort.InferenceSession(load_path, sess_options=so, providers=[provider])
+        if warmup_runs:
+            try:
+                warmup(sess, entry_shape(entry), warmup_runs)
+            except Exception as e:  # a bad warmup shape must not cost the caller the session
+                print(f"[registry] {name_or_path}: warmup skipped ({e})", file=sys.stderr)
+        _SESSIONS[key] = sess
+        STATS["build_ms"].append((time.perf_counter() - t0) * 1e3)
+        return sess
+
+
+def io_spec(sess: ort.InferenceSession) -> tuple[tuple[str, tuple], tuple[str, tuple]]:
+    """((in_name, in_shape), (out_name, out_shape)); dynamic dims -> -1."""
+
+    def _shape(s):
+        return tuple(d if isinstance(d, int) else -1 for d in s)
+
+    iv, ov = sess.get_inputs()[0], sess.get_outputs()[0]
+    return (iv.name, _shape(iv.shape)), (ov.name, _shape(ov.shape))
+
+
+def clear() -> None:
+    with _LOCK:
+        _SESSIONS.clear()
+        _VERIFIED.clear()
+        _MANIFESTS.clear()
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Load manifest models and time session reuse.")
+    ap.add_argument("--manifest", default=DEF_MANIFEST)
+    ap.add_argument("--names", nargs="*", default=None, help="default: every manifest entry")
+    ap.add_argument("--threads", type=int, default=0)
+    ap.add_argument("--opt", default="all", choices=sorted(OPT_LEVELS))
+    args = ap.parse_args(argv)
+
+    names = args.names or list(load_manifest(args.manifest))
+    for name in names:
+        t0 = time.perf_counter()
+        get_session(name, args.manifest, threads=args.threads, opt=args.opt)
+        t1 = time.perf_counter()
+        get_session(name, args.manifest, threads=args.threads, opt=args.opt)
+        t2 = time.perf_counter()
+        print(f"[registry] {name}: build {1e3 * (t1 - t0):.1f} ms, reuse {1e3 * (t2 - t1):.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Model optimisation stage: build faster variants of a manifest model, measure them,
+register them.
+
+Variants (written to artifacts/onnx/variants/<stem>.<variant>.onnx):
+  ortopt  ORT graph optimisations baked into the file (extended level, so it stays
+          portable across CPUs; the registry applies the hardware-specific ones at load)
+  int8    dynamic 8-bit weight quantisation (quantize_dynamic; uint8 weights, since the
+          CPU EP has no ConvInteger kernel for int8 weights)
+  fp16w   FP16-stored weights with a Cast back to float32 at graph entry (half the
+          weight bytes, FP32 compute; no converter dependency)
+
+Each variant is run on the depth_regress ramp input next to the base model. The mean/std
+drift is checked against the same --tol-mean/--tol-std as depth_regress.py, and the max
+abs error is recorded too. Latency comes from ort_profile.profile_model. Results go into
+deploy/models/manifest.json as "<target>@<variant>" entries (path, sha256, p50/p90, acc,
+passes), and the base entry gets its own p50. model_registry.best_variant(target) then
+returns the fastest variant that passes.
+
+Usage:
+  python scripts/inference/optimize_model.py --target perception.depth \\
+      [--variants ortopt,int8,fp16w] [--shape 1x3x384x640] [--iters 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import onnx
+import onnxruntime as ort
+from depth_regress import _stats, ramp_input
+from model_registry import (
+    DEF_MANIFEST,
+    best_variant,
+    entry_shape,
+    get_session,
+    load_manifest,
+    resolve,
+    sha256_file,
+)
+from onnx import TensorProto, helper, numpy_helper
+from ort_profile import parse_shape, profile_model
+
+VARIANTS = ("ortopt", "int8", "fp16w")
+DEF_OUT_DIR = "artifacts/onnx/variants"
+
+
+def ort_optimized(src: str, dst: str) -> str:
+    so = ort.SessionOptions()
+    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    so.optimized_model_filepath = dst
+    ort.InferenceSession(src, sess_options=so, providers=["CPUExecutionProvider"])
+    return dst
+
+
+def int8_dynamic(src: str, dst: str) -> str:
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(src, dst, weight_type=QuantType.QUInt8)
+    return dst
+
+
+def fp16_weights(src: str, dst: str, min_elems: int = 16) -> str:
+    """Store float32 initializers with >= min_elems values as float16 + Cast(to=FLOAT)."""
+    m = onnx.load(src)
+    g = m.graph
+    graph_inputs = {i.name for i in g.input}
+    keep, casts = [], []
+    for init in g.initializer:
+        if init.data_type != TensorProto.FLOAT or int(np.prod(init.dims)) < min_elems:
+            keep.append(init)
+            continue
+        if init.name in graph_inputs:  # overridable initializer: leave it alone
+            keep.append(init)
+            continue
+        half = numpy_helper.to_array(init).astype(np.float16)
+        keep.append(numpy_helper.from_array(half, f"{init.name}__fp16"))
+        casts.append(
+            helper.make_node(
+                "Cast",
+                [f"{init.name}__fp16"],
+                [init.name],
+                to=TensorProto.FLOAT,
+                name=f"{init.name}__cast",
+            )
+        )
+    del g.initializer[:]
+    g.initializer.extend(keep)
+    nodes = casts + list(g.node)
+    del g.node[:]
+    g.node.extend(nodes)
+    onnx.checker.check_model(m)
+    onnx.save(m, dst)
+    return dst
+
+
+BUILDERS = {"ortopt": ort_optimized, "int8": int8_dynamic, "fp16w": fp16_weights}
+
+
+def accuracy(base: str, variant: str, shape, tol_mean: float, tol_std: float) -> dict:
+    x = ramp_input(*shape)
+    outs = []
+    for p in (base, variant):
+        sess = get_session(p, verify=False, warmup_runs=0, cache_dir=None)
+        outs.append(np.asarray(sess.run(None, {sess.get_inputs()[0].name: x})[0], np.float64))
+    sb, sv = _stats(outs[0]), _stats(outs[1])
+    dm, ds = abs(sv["mean"] - sb["mean"]), abs(sv["std"] - sb["std"])
+    return {
+        "d_mean": dm,
+        "d_std": ds,
+        "max_abs": float(np.max(np.abs(outs[1] - outs[0]))) if outs[0].size else 0.0,
+        "tol_mean": tol_mean,
+        "tol_std": tol_std,
+        "passes": bool(dm <= tol_mean and ds <= tol_std),
+    }
+
+
+def optimize(
+    target: str,
+    manifest: str = DEF_MANIFEST,
+    variants=VARIANTS,
+    shape=None,
+    out_dir: str = DEF_OUT_DIR,
+    tol_mean: float = 1e-4,
+    tol_std: float = 1e-4,
+    iters: int = 50,
+    warmup: int = 10,
+    perf_dir: str = "artifacts/perf",
+) -> dict:
+    src, entry = resolve(target, manifest)
+    shape = list(shape or entry_shape(entry) or [1, 3, 384, 640])
+    os.makedirs(out_dir, exist_ok=True)
+
+    base_prof = profile_model(src, "cpu", shape, iters, warmup, perf_dir)
+    report = {"target": target, "base": src, "shape": shape, "base_p50_ms": base_prof["p50_ms"]}
+    entries = {}
+    for v in variants:
+        dst = os.path.join(out_dir, f"{Path(src).stem}.{v}.onnx")
+        t0 = time.perf_counter()
+        BUILDERS[v](src, dst)
+        build_s = time.perf_counter() - t0
+        acc = accuracy(src, dst, shape, tol_mean, tol_std)
+        prof = profile_model(dst, "cpu", shape, iters, warmup, perf_dir)
+        entries[f"{target}@{v}"] = {
+            "path": dst,
+            "sha256": sha256_file(dst),
+            "base": target,
+            "variant": v,
+            "bytes": os.path.getsize(dst),
+            "p50_ms": prof["p50_ms"],
+            "p90_ms": prof["p90_ms"],
+            "profile_trace": prof["profile_trace"],
+            "acc": acc,
+            "passes": acc["passes"],
+            "build_s": round(build_s, 3),
+            "ts": int(time.time()),
+        }
+
+    # register: copy (load_manifest's dict is cached) and swap in a complete file, so a
+    # reader never sees a half-written manifest; list-form manifests are written keyed
+    man = {k: dict(v) for k, v in load_manifest(manifest).items()}
+    if target in man:
+        man[target]["p50_ms"] = base_prof["p50_ms"]
+    man.update(entries)
+    tmp = f"{manifest}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(man, f, indent=2)
+    os.replace(tmp, manifest)
+    report["variants"] = entries
+    report["best"] = best_variant(target, manifest)
+    return report
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Build, measure and register model variants.")
+    ap.add_argument("--target", default="perception.depth", help="manifest name")
+    ap.add_argument("--manifest", default=DEF_MANIFEST)
+    ap.add_argument("--variants", default=",".join(VARIANTS))
+    ap.add_argument("--shape", default=None, help="input shape like 1x3x384x640")
+    ap.add_argument("--out-dir", default=DEF_OUT_DIR)
+    ap.add_argument("--tol-mean", type=float, default=1e-4)
+    ap.add_argument("--tol-std", type=float, default=1e-4)
+    ap.add_argument("--iters", type=int, default=50)
+    ap.add_argument("--warmup", type=int, default=10)
+    ap.add_argument(
+        "--json-out", default=None, help="default artifacts/perf/optimize_<target>.json"
+    )
+    args = ap.parse_args(argv)
+
+    variants = [v for v in args.variants.split(",") if v]
+    unknown = set(variants) - set(VARIANTS)
+    if unknown:
+        ap.error(f"unknown variants {sorted(unknown)}; choose from {VARIANTS}")
+    rep = optimize(
+        args.target,
+        args.manifest,
+        variants,
+        parse_shape(args.shape) if args.shape else None,
+        args.out_dir,
+        args.tol_mean,
+        args.tol_std,
+        args.iters,
+        args.warmup,
+    )
+    json_out = args.json_out or f"artifacts/perf/optimize_{args.target}.json"
+    os.makedirs(os.path.dirname(json_out) or ".", exist_ok=True)
+    with open(json_out, "w") as f:
+        json.dump(rep, f, indent=2)
+    print(f"[optimize] {args.target} base p50={rep['base_p50_ms']:.3f}ms")
+    for name, e in rep["variants"].items():
+        print(
+            f"[optimize] {name}: p50={e['p50_ms']:.3f}ms d_mean={e['acc']['d_mean']:.2e} "
+            f"d_std={e['acc']['d_std']:.2e} {'PASS' if e['passes'] else 'FAIL'}"
+        )
+    print(f"[optimize] best={rep['best']}  wrote {json_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
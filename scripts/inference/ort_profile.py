@@ -7,6 +7,7 @@ import time
 
 import numpy as np
 import onnxruntime as ort
+from ort_trace_report import aggregate, load_trace, report_markdown
 
 
 def parse_shape(txt):
@@ -19,31 +20,28 @@ def p50_p90(vals):
     return float(np.percentile(a, 50)), float(np.percentile(a, 90))
 
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--model", required=True)
-    ap.add_argument("--provider", default="cpu", choices=["cpu", "cuda", "tensorrt"])
-    ap.add_argument("--shape", default=None, help="Override input shape like 1x3x384x640")
-    ap.add_argument("--iters", type=int, default=50)
-    ap.add_argument("--warmup", type=int, default=10)
-    ap.add_argument("--outdir", default="artifacts/perf")
-    args = ap.parse_args()
+PROVIDERS = {
+    "cpu": "CPUExecutionProvider",
+    "cuda": "CUDAExecutionProvider",
+    "tensorrt": "TensorrtExecutionProvider",
+}
 
-    providers = {
-        "cpu": "CPUExecutionProvider",
-        "cuda": "CUDAExecutionProvider",
-        "tensorrt": "TensorrtExecutionProvider",
-    }
+
+def profile_model(
+    model, provider="cpu", shape=None, iters=50, warmup=10, outdir="artifacts/perf", threads=0
+):
+    """Timed runs with ORT profiling on; returns the summary dict (trace path included)."""
+    pathlib.Path(outdir).mkdir(parents=True, exist_ok=True)
     so = ort.SessionOptions()
+    if threads:
+        so.intra_op_num_threads = threads
     so.enable_profiling = True
-    so.profile_file_prefix = os.path.join(args.outdir, "ort_profile")
-    sess = ort.InferenceSession(args.model, sess_options=so, providers=[providers[args.provider]])
+    so.profile_file_prefix = os.path.join(outdir, "ort_profile")
+    sess = ort.InferenceSession(model, sess_options=so, providers=[PROVIDERS[provider]])
 
     # Infer input shape (or override)
     i0 = sess.get_inputs()[0]
-    if args.shape:
-        shape = parse_shape(args.shape)
-    else:
+    if shape is None:
         shape = [d if isinstance(d, int) else 1 for d in i0.shape]  # fill dynamic dims with 1
 
     # Make deterministic random to ease comparisons
@@ -51,34 +49,63 @@ def main():
     feed = {i0.name: rng.random(shape, dtype=np.float32)}
 
     # Warmup
-    for _ in range(args.warmup):
+    for _ in range(warmup):
         _ = sess.run(None, feed)
 
     # Timed runs
     times = []
-    for _ in range(args.iters):
+    for _ in range(iters):
         t0 = time.perf_counter()
         _ = sess.run(None, feed)
         times.append((time.perf_counter() - t0) * 1000.0)  # ms
 
     p50, p90 = p50_p90(times)
     prof_file = sess.end_profiling()  # ORT writes a JSON trace file
-
-    pathlib.Path(args.outdir).mkdir(parents=True, exist_ok=True)
-    out = {
-        "model": args.model,
-        "provider": args.provider,
-        "shape": shape,
-        "iters": args.iters,
-        "warmup": args.warmup,
+    return {
+        "model": model,
+        "provider": provider,
+        "shape": list(shape),
+        "iters": iters,
+        "warmup": warmup,
+        "threads": threads,
         "p50_ms": round(p50, 3),
         "p90_ms": round(p90, 3),
         "profile_trace": prof_file,
     }
-    ofn = os.path.join(args.outdir, f"ort_{pathlib.Path(args.model).stem}_{args.provider}.json")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", required=True)
+    ap.add_argument("--provider", default="cpu", choices=sorted(PROVIDERS))
+    ap.add_argument("--shape", default=None, help="Override input shape like 1x3x384x640")
+    ap.add_argument("--iters", type=int, default=50)
+    ap.add_argument("--warmup", type=int, default=10)
+    ap.add_argument("--outdir", default="artifacts/perf")
+    ap.add_argument("--threads", type=int, default=0, help="intra-op threads (0 = ORT default)")
+    ap.add_argument("--top", type=int, default=20, help="rows in the hotspot report")
+    args = ap.parse_args()
+
+    shape = parse_shape(args.shape) if args.shape else None
+    out = profile_model(
+        args.model, args.provider, shape, args.iters, args.warmup, args.outdir, args.threads
+    )
+    stem = f"ort_{pathlib.Path(args.model).stem}_{args.provider}"
+    if args.threads:
+        stem += f"_t{args.threads}"
+    # hotspots over the timed runs only (warmup runs are in the trace too)
+    hot = aggregate(load_trace(out["profile_trace"]), skip_runs=args.warmup)
+    out["top_ops"] = [{k: r[k] for k in ("op", "us_per_run", "share")} for r in hot["by_op"][:5]]
+    ofn = os.path.join(args.outdir, f"{stem}.json")
     with open(ofn, "w") as f:
         json.dump(out, f, indent=2)
-    print(f"Wrote {ofn}")
+    with open(os.path.join(args.outdir, f"{stem}_hotspots.json"), "w") as f:
+        json.dump({"trace": out["profile_trace"], **hot}, f, indent=2)
+    with open(os.path.join(args.outdir, f"{stem}_hotspots.md"), "w") as f:
+        f.write(report_markdown(hot, args.top, f"ORT hotspots: {args.model}"))
+    print(f"Wrote {ofn} (+ {stem}_hotspots.json/.md)")
+    for r in out["top_ops"]:
+        print(f"  {r['op']:<20s} {r['us_per_run'] / 1e3:8.3f} ms/run  {r['share']:6.1%}")
 
 
 if __name__ == "__main__":
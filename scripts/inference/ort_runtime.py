@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Warm depth -> policy ONNX runtime with pinned IO buffers and a two-stage pipeline.
+
+- BoundSession pins preallocated numpy input/output buffers to an ORT session through
+  IO binding, so a tick is "write into .inputs, call run(), read .outputs" with no
+  per-call allocation or name lookups.
+- column_bin_features turns a depth map into per-column-bin means with one column sum
+  and a cumulative-sum difference (same bins as the old per-bin Python loop).
+- DepthPolicyPipeline keeps both sessions warm and overlaps depth for frame N+1 (on a
+  worker thread, into the other of two depth slots) with features + policy for frame N.
+  ORT releases the GIL during Run, so the two stages really run concurrently.
+
+Reports sustained Hz and per-stage p50/p99 latency (depth, features, policy, tick).
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import onnxruntime as ort
+from model_registry import get_session
+
+_NP_TYPES = {
+    "tensor(float)": np.float32,
+    "tensor(float16)": np.float16,
+    "tensor(double)": np.float64,
+    "tensor(int64)": np.int64,
+    "tensor(int32)": np.int32,
+    "tensor(uint8)": np.uint8,
+}
+
+
+def make_session(path: str, provider: str = "CPUExecutionProvider", threads: int = 0):
+    """Warm, cached session for a manifest name or model path (see model_registry)."""
+    return get_session(path, provider=provider, threads=threads)
+
+
+def static_shape(shape, batch: int = 1) -> tuple[int, ...]:
+    """Concrete shape: symbolic/None dims -> `batch` for axis 0, else error."""
+    out = []
+    for i, d in enumerate(shape):
+        if isinstance(d, int) and d > 0:
+            out.append(d)
+        elif i == 0:
+            out.append(batch)
+        else:
+            raise ValueError(f"dynamic non-batch dim {i} in {shape}; pass explicit shapes")
+    return tuple(out)
+
+
+class BoundSession:
+    """ORT session with preallocated, IO-bound numpy buffers (one set per instance).
+
+    Several BoundSession objects may share one InferenceSession (e.g. two pipeline slots);
+    ORT's Run is thread-safe, each binding owns its own buffers.
+    """
+
+    def __init__(self, sess, input_shapes: dict[str, tuple] | None = None, batch: int = 1):
+        self.sess = sess
+        self.binding = sess.io_binding()
+        self.inputs: dict[str, np.ndarray] = {}
+        self.outputs: dict[str, np.ndarray] = {}
+        for i in sess.get_inputs():
+            shape = (input_shapes or {}).get(i.name) or static_shape(i.shape, batch)
+            buf = np.zeros(shape, dtype=_NP_TYPES.get(i.type, np.float32))
+            self.inputs[i.name] = buf
+            self.binding.bind_ortvalue_input(i.name, ort.OrtValue.ortvalue_from_numpy(buf))
+        # output shapes may depend on the inputs: take them from one dry run
+        dry = sess.run(None, self.inputs)
+        for o, y in zip(sess.get_outputs(), dry, strict=True):
+            buf = np.empty_like(np.asarray(y))
+            self.outputs[o.name] = buf
+            self.binding.bind_ortvalue_output(o.name, ort.OrtValue.ortvalue_from_numpy(buf))
+        self.input = next(iter(self.inputs.values()))
+        self.output = next(iter(self.outputs.values()))
+
+    def run(self) -> np.ndarray:
+        self.sess.run_with_iobinding(self.binding)
+        return self.output
+
+
+def column_bin_features(depth: np.ndarray, n_feats: int = 64, out=None) -> np.ndarray:
+    """[B, 1, H, W] (or [H, W]) depth -> [B, n_feats] means over equal column bins.
+
+    Bins follow linspace(0, W, n_feats + 1) truncated to int; empty bins are 0.
+    """
+    d = np.asarray(depth)
+    h, w = d.shape[-2:]
+    d = d.reshape(-1, h, w)
+    col = d.sum(axis=1).astype(np.float64)  # [B, W]; the only full pass over the map
+    if w % n_feats == 0:
+        res = col.reshape(-1, n_feats, w // n_feats).sum(axis=2) / (h * (w // n_feats))
+    else:
+        edges = np.linspace(0, w, n_feats + 1, dtype=int)
+        cs = np.zeros((col.shape[0], w + 1), dtype=np.float64)
+        np.cumsum(col, axis=1, out=cs[:, 1:])
+        width = np.diff(edges)
+        sums = cs[:, edges[1:]] - cs[:, edges[:-1]]
+        res = np.divide(sums, width * h, out=np.zeros_like(sums), where=width > 0)
+    if out is None:
+        return res.astype(np.float32)
+    out[...] = res.reshape(out.shape)
+    return out
+
+
+class StageTimes:
+    def __init__(self, *stages: str):
+        self.ms: dict[str, list[float]] = {s: [] for s in stages}
+
+    def add(self, stage: str, ms: float) -> None:
+        self.ms[stage].append(ms)
+
+    def summary(self) -> dict[str, float]:
+        out = {}
+        for s, v in self.ms.items():
+            a = np.asarray(v) if v else np.zeros(1)
+            out[f"p50_{s}_ms"] = float(np.percentile(a, 50))
+            out[f"p99_{s}_ms"] = float(np.percentile(a, 99))
+        return out
+
+
+class DepthPolicyPipeline:
+    """depth(frame) -> column features -> policy, optionally pipelined across frames."""
+
+    def __init__(self, depth_sess, policy_sess, slots: int = 2):
+        self.depth = [BoundSession(depth_sess) for _ in range(max(1, slots))]
+        self.policy = BoundSession(policy_sess)
+        self.n_feats = self.policy.input.shape[-1]
+        self.times = StageTimes("depth", "features", "policy", "tick")
+        self.frames = 0
+        self.wall_s = 0.0
+        self._pool = ThreadPoolExecutor(1, thread_name_prefix="depth")
+
+    def close(self) -> None:
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def warmup(self, n: int = 3) -> None:
+        for _ in range(n):
+            for slot in self.depth:
+                slot.run()
+            self.policy.run()
+
+    def _depth(self, slot: BoundSession, frame: np.ndarray) -> tuple[np.ndarray, float]:
+        t0 = time.perf_counter()
+        slot.input[...] = frame
+        y = slot.run()
+        return y, (time.perf_counter() - t0) * 1e3
+
+    def _policy(self, depth: np.ndarray) -> np.ndarray:
+        t0 = time.perf_counter()
+        column_bin_features(depth, self.n_feats, out=self.policy.input)
+        t1 = time.perf_counter()
+        u = self.policy.run()
+        t2 = time.perf_counter()
+        self.times.add("features", (t1 - t0) * 1e3)
+        self.times.add("policy", (t2 - t1) * 1e3)
+        return u
+
+    def run(self, frames: Iterable[np.ndarray], pipelined: bool = True) -> Iterator[np.ndarray]:
+        """Yield the policy output per frame (a view into a reused buffer; copy to keep)."""
+        t_start = time.perf_counter()
+        it = iter(frames)
+        try:
+            if not pipelined or len(self.depth) < 2:
+                for frame in it:
+                    t0 = time.perf_counter()
+                    d, ms = self._depth(self.depth[0], frame)
+                    self.times.add("depth", ms)
+                    u = self._policy(d)
+                    self.times.add("tick", (time.perf_counter() - t0) * 1e3)
+                    self.frames += 1
+                    yield u
+                return
+            first = next(it, None)
+            if first is None:
+                return
+            k = 0
+            fut = self._pool.submit(self._depth, self.depth[0], first)
+            t_prev = time.perf_counter()
+            while fut is not None:
+                d, ms = fut.result()
+                self.times.add("depth", ms)
+                nxt = next(it, None)
+                k += 1
+                slot = self.depth[k % len(self.depth)]
+                fut = self._pool.submit(self._depth, slot, nxt) if nxt is not None else None
+                u = self._policy(d)
+                now = time.perf_counter()
+                self.times.add("tick", (now - t_prev) * 1e3)
+                t_prev = now
+                self.frames += 1
+                yield u
+        finally:
+            self.wall_s += time.perf_counter() - t_start
+
+    def report(self) -> dict:
+        rep = {"frames": self.frames, "wall_s": round(self.wall_s, 4)}
+        rep["hz"] = self.frames / self.wall_s if self.wall_s > 0 else 0.0
+        rep.update(self.times.summary())
+        return rep
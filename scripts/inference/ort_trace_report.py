@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Per-operator hotspot report from ONNX Runtime profiling traces.
+
+ORT (SessionOptions.enable_profiling, as ort_profile.py sets it) writes a Chrome-trace JSON
+list. Node events named "<node>_kernel_time" carry the kernel duration (us) plus op type,
+provider and shapes in "args"; Session "model_run" events span each Run call.
+
+- aggregate() sums kernel time per op type and per node, normalised per run and as a
+  share of total kernel time; run wall time minus kernel time is reported as overhead.
+  The first `skip_runs` runs (warmup) can be dropped; with no runs left the report is empty.
+- diff() compares two aggregates per op or per node (per-run times, so traces with
+  different iteration counts compare fine): two model versions, or one model at two
+  thread settings. Nodes present in only one trace show up as added/removed.
+
+    python scripts/inference/ort_trace_report.py TRACE.json [--vs OTHER.json] \\
+        [--by op|node] [--top 20] [--skip-runs 10] [--json-out X.json] [--md-out X.md]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from collections import defaultdict
+
+KERNEL_SUFFIX = "_kernel_time"
+
+
+def load_trace(path: str) -> list[dict]:
+    with open(path) as f:
+        data = json.load(f)
+    return data.get("traceEvents", []) if isinstance(data, dict) else data
+
+
+def _runs(events: list[dict]) -> list[tuple[int, int]]:
+    return sorted(
+        (int(e["ts"]), int(e["ts"]) + int(e.get("dur", 0)))
+        for e in events
+        if e.get("cat") == "Session" and e.get("name") == "model_run"
+    )
+
+
+def aggregate(events: list[dict], skip_runs: int = 0) -> dict:
+    """Kernel time by op type and by node; times in us per run, shares of kernel total."""
+    runs = _runs(events)
+    n_total = len(runs)
+    t_from = runs[skip_runs - 1][1] if 0 < skip_runs <= len(runs) else None
+    runs = runs[skip_runs:]
+    if not runs:  # every run skipped (or none recorded): no kernel time to attribute
+        events = []
+    ops: dict[str, dict] = defaultdict(lambda: {"calls": 0, "total_us": 0, "nodes": set()})
+    nodes: dict[str, dict] = {}
+    for e in events:
+        name = e.get("name", "")
+        if e.get("cat") != "Node" or not name.endswith(KERNEL_SUFFIX):
+            continue
+        if t_from is not None and int(e["ts"]) < t_from:
+            continue
+        args = e.get("args", {})
+        node = name[: -len(KERNEL_SUFFIX)]
+        op = args.get("op_name", "?")
+        dur = int(e.get("dur", 0))
+        o = ops[op]
+        o["calls"] += 1
+        o["total_us"] += dur
+        o["nodes"].add(node)
+        n = nodes.setdefault(
+            node,
+            {
+                "op": op,
+                "provider": args.get("provider", ""),
+                "input_shapes": args.get("input_type_shape", []),
+                "output_shapes": args.get("output_type_shape", []),
+                "calls": 0,
+                "total_us": 0,
+            },
+        )
+        n["calls"] += 1
+        n["total_us"] += dur
+
+    kernel_us = sum(o["total_us"] for o in ops.values())
+    n_runs = max(1, len(runs))
+
+    def _rank(table: dict, key: str) -> list[dict]:
+        rows = []
+        for k, v in table.items():
+            row = {key: k, **v}
+            if "nodes" in row:
+                row["nodes"] = len(row["nodes"])
+            row["us_per_run"] = v["total_us"] / n_runs
+            row["share"] = v["total_us"] / kernel_us if kernel_us else 0.0
+            rows.append(row)
+        rows.sort(key=lambda r: r["total_us"], reverse=True)
+        return rows
+
+    run_us = sum(b - a for a, b in runs) / n_runs if runs else 0.0
+    return {
+        "runs": len(runs),
+        "skipped_runs": min(skip_runs, n_total),
+        "run_us": run_us,
+        "kernel_us_per_run": kernel_us / n_runs,
+        "overhead_us_per_run": max(0.0, run_us - kernel_us / n_runs) if runs else 0.0,
+        "by_op": _rank(ops, "op"),
+        "by_node": _rank(nodes, "node"),
+    }
+
+
+def diff(a: dict, b: dict, by: str = "op") -> list[dict]:
+    """Per-run kernel time a -> b for each op/node, largest absolute change first."""
+    key = "op" if by == "op" else "node"
+    ra = {r[key]: r for r in a[f"by_{by}"]}
+    rb = {r[key]: r for r in b[f"by_{by}"]}
+    rows = []
+    for k in ra.keys() | rb.keys():
+        ua = ra[k]["us_per_run"] if k in ra else 0.0
+        ub = rb[k]["us_per_run"] if k in rb else 0.0
+        rows.append(
+            {
+                key: k,
+                "op": (ra.get(k) or rb.get(k))["op"] if by == "node" else k,
+                "a_us": ua,
+                "b_us": ub,
+                "delta_us": ub - ua,
+                "ratio": ub / ua if ua else None,
+                "a_share": ra[k]["share"] if k in ra else 0.0,
+                "b_share": rb[k]["share"] if k in rb else 0.0,
+                "status": "both" if k in ra and k in rb else ("removed" if k in ra else "added"),
+            }
+        )
+    rows.sort(key=lambda r: abs(r["delta_us"]), reverse=True)
+    return rows
+
+
+def _ms(us: float) -> str:
+    return f"{us / 1e3:.3f}"
+
+
+def report_markdown(rep: dict, top: int = 20, title: str = "ORT hotspots") -> str:
+    lines = [
+        f"# {title}",
+        "",
+        f"runs={rep['runs']} (skipped {rep['skipped_runs']})  run={_ms(rep['run_us'])} ms  "
+        f"kernels={_ms(rep['kernel_us_per_run'])} ms  "
+        f"overhead={_ms(rep['overhead_us_per_run'])} ms",
+        "",
+        "## By op type",
+        "",
+        "| # | op | nodes | ms/run | share |",
+        "|---|----|------:|-------:|------:|",
+    ]
+    for i, r in enumerate(rep["by_op"][:top], 1):
+        lines.append(
+            f"| {i} | {r['op']} | {r['nodes']} | {_ms(r['us_per_run'])} | {r['share']:.1%} |"
+        )
+    lines += ["", "## By node", "", "| # | node | op | ms/run | share |"]
+    lines.append("|---|------|----|-------:|------:|")
+    for i, r in enumerate(rep["by_node"][:top], 1):
+        lines.append(
+            f"| {i} | {r['node']} | {r['op']} | {_ms(r['us_per_run'])} | {r['share']:.1%} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def diff_markdown(rows: list[dict], a: dict, b: dict, by: str, top: int = 20, labels=("a", "b")):
+    la, lb = labels
+    key = "op" if by == "op" else "node"
+    lines = [
+        f"# ORT hotspot diff ({by}): {la} -> {lb}",
+        "",
+        f"kernels/run: {_ms(a['kernel_us_per_run'])} -> {_ms(b['kernel_us_per_run'])} ms  "
+        f"run: {_ms(a['run_us'])} -> {_ms(b['run_us'])} ms",
+        "",
+        f"| # | {key} | {la} ms | {lb} ms | delta ms | ratio | status |",
+        "|---|---|---:|---:|---:|---:|---|",
+    ]
+    for i, r in enumerate(rows[:top], 1):
+        ratio = f"x{r['ratio']:.2f}" if r["ratio"] is not None else "-"
+        lines.append(
+            f"| {i} | {r[key]} | {_ms(r['a_us'])} | {_ms(r['b_us'])} | "
+            f"{r['delta_us'] / 1e3:+.3f} | {ratio} | {r['status']} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def _write(path: str | None, text: str) -> None:
+    if path:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Aggregate/diff ORT profiling traces.")
+    ap.add_argument("trace", help="ORT profile JSON (ort_profile.py 'profile_trace')")
+    ap.add_argument("--vs", default=None, help="second trace to diff against (a -> b)")
+    ap.add_argument("--by", choices=["op", "node"], default="op", help="diff granularity")
+    ap.add_argument("--labels", default="a,b", help="names for the two traces in a diff")
+    ap.add_argument("--skip-runs", type=int, default=0, help="drop the first N runs (warmup)")
+    ap.add_argument("--top", type=int, default=20)
+    ap.add_argument("--json-out", default=None)
+    ap.add_argument("--md-out", default=None)
+    args = ap.parse_args(argv)
+
+    a = aggregate(load_trace(args.trace), args.skip_runs)
+    if args.vs:
+        b = aggregate(load_trace(args.vs), args.skip_runs)
+        labels = tuple(args.labels.split(",", 1)) if "," in args.labels else ("a", "b")
+        rows = diff(a, b, args.by)
+        out = {"a": args.trace, "b": args.vs, "labels": list(labels), "by": args.by}
+        out.update({"diff": rows, "a_summary": a, "b_summary": b})
+        md = diff_markdown(rows, a, b, args.by, args.top, labels)
+    else:
+        out = {"trace": args.trace, **a}
+        md = report_markdown(a, args.top, f"ORT hotspots: {os.path.basename(args.trace)}")
+    _write(args.json_out, json.dumps(out, indent=2))
+    _write(args.md_out, md)
+    print(md, end="")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
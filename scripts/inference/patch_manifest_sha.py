@@ -1,14 +1,22 @@
 #!/usr/bin/env python3
 import argparse
-import hashlib
 import json
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "datasets"))
+from hashcache import add_cli_args, hash_files_from_args  # noqa: E402
 
 p = argparse.ArgumentParser()
 p.add_argument("--manifest", required=True)
 p.add_argument("--model-key", required=True)  # e.g. perception.depth
 p.add_argument("--file", required=True)
+add_cli_args(p)
 a = p.parse_args()
-sha = hashlib.sha256(open(a.file, "rb").read()).hexdigest()
+rep = hash_files_from_args([a.file], a)
+if a.file in rep.errors:
+    sys.exit(f"cannot hash {a.file}: {rep.errors[a.file]}")
+sha = rep.digests[a.file]
 m = json.load(open(a.manifest))
 dot_sha = f"{a.model_key}.sha256"
 dot_path = f"{a.model_key}.path"
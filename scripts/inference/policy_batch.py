@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Offline micro-batched policy inference over feature CSVs.
+
+- Feature CSVs are read columnar (one np.loadtxt per file, not csv.DictReader rows);
+  `t` is split off, features are padded/truncated to the model's feature dim.
+- A model whose batch dim is fixed is re-exported with a symbolic batch dim (input,
+  outputs and stale value_info relaxed) when that gives the same per-row results; the
+  re-export is cached next to the registry's optimised models.
+- Rows run in fixed-size micro-batches; the final batch is zero-padded to the same size
+  (ORT sees one shape, padded rows are dropped). If a model cannot be made dynamic,
+  micro-batches use its fixed batch size.
+- Several files stream through bounded queues: a reader thread parses file k+1 while
+  file k is inferred and a writer thread formats file k-1.
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import onnx
+from model_registry import DEF_CACHE_DIR, default_cache_dir, file_sha256, get_session
+
+
+def read_features_csv(path: str) -> tuple[np.ndarray, np.ndarray, list[str]]:
+    """(t [N] float64, features [N, C] float32, feature column names)."""
+    with open(path) as f:
+        header = [h.strip() for h in f.readline().strip().split(",")]
+        try:
+            with warnings.catch_warnings():  # header-only files are fine
+                warnings.simplefilter("ignore", UserWarning)
+                data = np.loadtxt(f, delimiter=",", dtype=np.float64, ndmin=2)
+        except ValueError:  # blanks / junk cells -> 0.0, like the old per-cell parser
+            f.seek(0)
+            f.readline()
+            data = np.genfromtxt(f, delimiter=",", dtype=np.float64, filling_values=0.0)
+            data = np.nan_to_num(np.atleast_2d(data), nan=0.0)
+    if data.size == 0:
+        data = np.zeros((0, len(header)))
+    feat_idx = [i for i, h in enumerate(header) if h != "t"]
+    t = data[:, header.index("t")] if "t" in header else np.zeros(len(data))
+    return t, data[:, feat_idx].astype(np.float32), [header[i] for i in feat_idx]
+
+
+def fit_features(x: np.ndarray, n_feats: int) -> np.ndarray:
+    if x.shape[1] == n_feats:
+        return np.ascontiguousarray(x, dtype=np.float32)
+    out = np.zeros((x.shape[0], n_feats), dtype=np.float32)
+    k = min(n_feats, x.shape[1])
+    out[:, :k] = x[:, :k]
+    return out
+
+
+def fixed_batch(sess) -> int | None:
+    d = sess.get_inputs()[0].shape[0] if sess.get_inputs()[0].shape else None
+    return d if isinstance(d, int) and d > 0 else None
+
+
+def make_dynamic_batch(
+    model_path: str, out_path: str, sample_shape, cache_dir: str | None = DEF_CACHE_DIR
+) -> str | None:
+    """Re-export with a symbolic batch dim; None if the graph hard-codes its batch.
+
+    `sample_shape` is one row's shape without the batch dim (an int for [B, F] models);
+    `cache_dir` is the registry's optimised-graph cache for the check sessions.
+    """
+    m = onnx.load(model_path)
+    g = m.graph
+    for vi in [g.input[0], *g.output]:
+        dims = vi.type.tensor_type.shape.dim
+        if len(dims):
+            dims[0].Clear()
+            dims[0].dim_param = "N"
+    del g.value_info[:]
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    onnx.save(m, out_path)
+    try:
+        dyn = get_session(out_path, verify=False, warmup_runs=0, cache_dir=cache_dir)
+        ref = get_session(model_path, verify=False, warmup_runs=0, cache_dir=cache_dir)
+        shape = (3, *np.atleast_1d(sample_shape).tolist())
+        x = np.random.default_rng(0).random(shape, dtype=np.float32)
+        name = ref.get_inputs()[0].name
+        want = np.concatenate([ref.run(None, {name: x[i : i + 1]})[0] for i in range(3)])
+        got = dyn.run(None, {dyn.get_inputs()[0].name: x})[0]
+        if got.shape == want.shape and np.allclose(got, want, rtol=1e-5, atol=1e-6):
+            return out_path
+    except Exception:
+        pass  # any load/run failure means the graph is not batch-agnostic
+    os.remove(out_path)
+    return None
+
+
+class BatchRunner:
+    """Micro-batched runner for a [B, F] -> [B, ...] policy model."""
+
+    def __init__(self, model: str, batch: int = 4096, dynamic: bool = True, cache_dir=None):
+        cache_dir = str(cache_dir or default_cache_dir())
+        sess = get_session(model, cache_dir=cache_dir)
+        f = sess.get_inputs()[0].shape[1]
+        self.n_feats = f if isinstance(f, int) and f > 0 else 64
+        b = fixed_batch(sess)
+        self.reexported = False
+        if b is not None and dynamic:
+            out = Path(cache_dir) / f"{Path(model).stem}.{file_sha256(model)[:16]}.dynbatch.onnx"
+            dyn = (
+                str(out)
+                if out.is_file()
+                else make_dynamic_batch(model, str(out), self.n_feats, cache_dir)
+            )
+            if dyn:
+                sess = get_session(dyn, verify=False, cache_dir=cache_dir)
+                b, self.reexported = None, True
+        self.sess = sess
+        self.in_name = sess.get_inputs()[0].name
+        self.batch = b or batch
+        self._buf = np.zeros((self.batch, self.n_feats), dtype=np.float32)
+
+    def run(self, x: np.ndarray) -> np.ndarray:
+        x = fit_features(x, self.n_feats)
+        n, bs = x.shape[0], self.batch
+        outs = []
+        for a in range(0, max(n, 1), bs):  # n == 0 still runs once for the output width
+            chunk = x[a : a + bs]
+            if len(chunk) < bs:  # padded final micro-batch
+                self._buf[: len(chunk)] = chunk
+                self._buf[len(chunk) :] = 0.0
+                chunk = self._buf
+            y = np.asarray(self.sess.run(None, {self.in_name: chunk})[0])
+            outs.append(y.reshape(bs, -1)[: min(bs, n - a)])
+        return np.concatenate(outs)
+
+
+def write_actions_csv(path: str, t: np.ndarray, u: np.ndarray) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    header = ",".join(["t"] + [f"u{k}" for k in range(u.shape[1])])
+    n = min(len(t), len(u))
+    data = np.column_stack([t[:n], u[:n]])
+    np.savetxt(
+        path, data, fmt=["%.2f"] + ["%.6f"] * u.shape[1], delimiter=",", header=header, comments=""
+    )
+
+
+def run_files(runner: BatchRunner, pairs: list[tuple[str, str]], depth: int = 2) -> list[dict]:
+    """Stream (in_csv, out_csv) pairs: read -> infer -> write through bounded queues."""
+    q_in: queue.Queue = queue.Queue(maxsize=depth)
+    q_out: queue.Queue = queue.Queue(maxsize=depth)
+    errors: list[BaseException] = []
+    stats: list[dict] = []
+
+    def reader():
+        try:
+            for src, dst in pairs:
+                t0 = time.perf_counter()
+                t, x, _ = read_features_csv(src)
+                q_in.put((src, dst, t, x, time.perf_counter() - t0))
+        except BaseException as e:  # re-raised in the caller
+            errors.append(e)
+        finally:
+            q_in.put(None)
+
+    def writer():
+        try:
+            while (item := q_out.get()) is not None:
+                rec, dst, t, u = item
+                t0 = time.perf_counter()
+                write_actions_csv(dst, t, u)
+                rec["write_s"] = round(time.perf_counter() - t0, 4)
+                stats.append(rec)
+        except BaseException as e:
+            errors.append(e)
+            while q_out.get() is not None:  # keep draining so the producer never blocks
+                pass
+
+    # the reader is a daemon: if inference fails it may stay blocked on a full queue
+    threading.Thread(target=reader, daemon=True).start()
+    wr = threading.Thread(target=writer)
+    wr.start()
+    try:
+        while (item := q_in.get()) is not None:
+            src, dst, t, x, read_s = item
+            t0 = time.perf_counter()
+            u = runner.run(x)
+            infer_s = time.perf_counter() - t0
+            rec = {
+                "in": src,
+                "out": dst,
+                "rows": int(len(x)),
+                "csv_cols": int(x.shape[1]),
+                "act_dim": int(u.shape[1]),
+                "read_s": round(read_s, 4),
+                "infer_s": round(infer_s, 4),
+                "rows_per_s": round(len(x) / infer_s, 1) if infer_s > 0 else 0.0,
+            }
+            q_out.put((rec, dst, t, u))
+    finally:
+        q_out.put(None)
+        wr.join()
+    if errors:
+        raise errors[0]
+    return stats
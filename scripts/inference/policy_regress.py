@@ -6,11 +6,11 @@ import sys
 import time
 
 import numpy as np
-import onnxruntime as ort
+from model_registry import get_session
 
 
 def run_once(model_path: str):
-    sess = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+    sess = get_session(model_path)
     inp = sess.get_inputs()[0]
     out = sess.get_outputs()[0]
     # deterministic 1x64 ramp input
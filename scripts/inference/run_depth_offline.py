@@ -1,31 +1,16 @@
 #!/usr/bin/env python3
 import argparse
 import csv
+import json
 import os
 
 import numpy as np
-import onnxruntime as ort
+from model_registry import get_session, io_spec
 
 
 def _get_io(model_path: str) -> tuple[tuple[str, tuple[int, ...]], tuple[str, tuple[int, ...]]]:
-    """Return ((in_name, in_shape), (out_name, out_shape)) from ONNX metadata."""
-    sess = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
-    iv = sess.get_inputs()[0]
-    ov = sess.get_outputs()[0]
-
-    def _shape(s):
-        out = []
-        for d in s:
-            if isinstance(d, int):
-                out.append(d)
-            elif d in (None, "None"):
-                out.append(-1)
-            else:
-                # symbolic -> treat as dynamic
-                out.append(-1)
-        return tuple(out)
-
-    return (iv.name, tuple(iv.shape)), (ov.name, _shape(ov.shape))
+    """Return ((in_name, in_shape), (out_name, out_shape)) from the cached session."""
+    return io_spec(get_session(model_path))
 
 
 def _make_input(shape_1x3xHxW: tuple[int, ...], mode: str, npy: str | None) -> np.ndarray:
@@ -73,6 +58,51 @@ def _make_input(shape_1x3xHxW: tuple[int, ...], mode: str, npy: str | None) -> n
     return out.astype(np.float32)
 
 
+def _stream(args) -> None:
+    """--index mode: stream every RGB frame of a dataset index through the model."""
+    from depth_stream import (
+        DepthStreamer,
+        NpySink,
+        PngSink,
+        png_names,
+        read_index,
+        write_pred_index,
+    )
+
+    root, rows = read_index(args.index, args.root)
+    size = tuple(int(v) for v in args.size.lower().split("x")) if args.size else None
+    st = DepthStreamer(
+        args.model,
+        batch=args.batch,
+        size=size,
+        workers=args.workers,
+        prefetch=args.prefetch,
+        threads=args.threads,
+    )
+    if args.out_npy:
+        sink = NpySink(args.out_npy, len(rows), st.out_hw)
+        pred_index = os.path.splitext(args.out_npy)[0] + "_index.csv"
+    else:
+        sink = PngSink(args.out_dir, png_names(rows), args.max_depth_m, args.writers)
+        pred_index = os.path.join(args.out_dir, "index.csv")
+    try:
+        rep = st.run([root / r["rgb_path"] for r in rows], sink, log_every=args.log_every)
+    finally:
+        preds = sink.close()
+    write_pred_index(pred_index, rows, preds)
+    print(
+        f"[depth-offline] {rep['frames']} frames in {rep['wall_s']:.2f}s = {rep['fps']:.1f} fps  "
+        f"batch={rep['batch']}{' reexported' if rep['reexported'] else ''} "
+        f"q_ready={rep['q_ready_mean']:.1f}/{rep['lookahead']} "
+        f"infer p50={rep['p50_infer_ms']:.2f}ms decode_wait p50={rep['p50_decode_wait_ms']:.2f}ms "
+        f"decode_errors={rep['decode_errors']}  wrote {pred_index}"
+    )
+    if args.json_out:
+        os.makedirs(os.path.dirname(args.json_out) or ".", exist_ok=True)
+        with open(args.json_out, "w") as f:
+            json.dump(rep, f, indent=2)
+
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--model", required=True, help="ONNX depth model (expects 1x3xHxW input)")
@@ -80,10 +110,32 @@ def main():
         "--mode", choices=["rand", "npy"], default="rand", help="random input or load .npy"
     )
     ap.add_argument("--npy", default=None, help="path to .npy if --mode npy")
-    ap.add_argument("--out-npz", required=True, help="npz to save raw output and stats")
-    ap.add_argument("--out-csv", required=True, help="csv to save summary stats")
+    ap.add_argument("--out-npz", default=None, help="npz to save raw output and stats")
+    ap.add_argument("--out-csv", default=None, help="csv to save summary stats")
+    st = ap.add_argument_group("streaming (--index)")
+    st.add_argument("--index", default=None, help="dataset index.csv (ns_build_index.py)")
+    st.add_argument("--root", default=None, help="dataset root (default: index.csv's dir)")
+    st.add_argument("--out-dir", default=None, help="write <rgb stem>.png uint16 mm depth here")
+    st.add_argument("--out-npy", default=None, help="or one float32 [N,H,W] .npy memmap")
+    st.add_argument("--batch", type=int, default=8)
+    st.add_argument("--size", default=None, help="network input WxH if the model is dynamic")
+    st.add_argument("--workers", type=int, default=4, help="PNG decode threads")
+    st.add_argument("--writers", type=int, default=2, help="PNG encode threads")
+    st.add_argument("--prefetch", type=int, default=2, help="decoded batches kept ahead")
+    st.add_argument("--threads", type=int, default=0, help="ORT intra-op threads")
+    st.add_argument("--max-depth-m", type=float, default=20.0, help="PNG scale: 1.0 -> this")
+    st.add_argument("--log-every", type=int, default=50, help="batches between progress logs")
+    st.add_argument("--json-out", default=None, help="optional throughput/queue report JSON")
     args = ap.parse_args()
 
+    if args.index:
+        if bool(args.out_dir) == bool(args.out_npy):
+            ap.error("--index needs exactly one of --out-dir / --out-npy")
+        _stream(args)
+        return
+    if not (args.out_npz and args.out_csv):
+        ap.error("--out-npz and --out-csv are required without --index")
+
     (in_name, in_shape), (out_name, out_shape) = _get_io(args.model)
     # coerce input shape to (1,3,H,W) for generation
     in_shape_sane = (
@@ -94,7 +146,7 @@ def main():
     )
     X = _make_input(in_shape_sane, args.mode, args.npy)
 
-    sess = ort.InferenceSession(args.model, providers=["CPUExecutionProvider"])
+    sess = get_session(args.model)
     Y = sess.run(None, {in_name: X})[0]
     Y = np.asarray(Y)
 
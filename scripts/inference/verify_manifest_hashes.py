@@ -1,20 +1,11 @@
 #!/usr/bin/env python3
 import argparse
-import hashlib
 import json
 import pathlib
 import sys
 
-
-def sha256_path(p: pathlib.Path, chunk=1 << 20) -> str:
-    h = hashlib.sha256()
-    with p.open("rb") as f:
-        while True:
-            b = f.read(chunk)
-            if not b:
-                break
-            h.update(b)
-    return h.hexdigest()
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "datasets"))
+from hashcache import add_cli_args, hash_files_from_args  # noqa: E402
 
 
 def iter_entries(manifest):
@@ -43,6 +34,7 @@ def main():
     ap.add_argument("--manifest", required=True)
     ap.add_argument("--check", action="store_true", help="verify sha256 matches")
     ap.add_argument("--write", action="store_true", help="write missing sha256 values")
+    add_cli_args(ap)
     args = ap.parse_args()
 
     manifest_path = pathlib.Path(args.manifest)
@@ -50,13 +42,22 @@ def main():
     changed = False
     failures = []
 
+    present = []
     for name, entry in iter_entries(m):
         p = get_model_path(entry)
         if not p.is_file():
             failures.append((name, "missing", str(p)))
             print(f"[verify] {name}: MISSING file {p}")
             continue
-        got = sha256_path(p)
+        present.append((name, entry, p))
+    rep = hash_files_from_args([str(p) for _, _, p in present], args)
+
+    for name, entry, p in present:
+        if str(p) in rep.errors:
+            failures.append((name, "unreadable", rep.errors[str(p)]))
+            print(f"[verify] {name}: UNREADABLE {p}: {rep.errors[str(p)]}")
+            continue
+        got = rep.digests[str(p)]
         want = entry.get("sha256")
         if want:
             if got != want:
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Planner-native cost cache: one file per costmap, memory-mapped with np.memmap.
+
+Layout (all little-endian):
+  b"NSCOST1\\n" | uint32 header_len | JSON header | zero pad to 4096
+  level 0 tiles, level 1 tiles, ... each level a (tiles_y, tiles_x, tile, tile) float32 block
+
+The JSON header carries geotransform, CRS WKT, nodata, size, tile size, per-level byte
+offsets and the source stamp (realpath, size, mtime_ns) of the raster it was built from;
+is_fresh() only accepts a cache whose stamp matches that exact file. Edge tiles are padded
+with nodata. Level k is a 2^k nodata-aware mean overview.
+Tiles are zero-copy views; `gather` indexes the tile array directly, so point probes never
+decode or copy the raster and pages are shared between processes.
+
+Usage:
+  python scripts/maps/cost_cache.py build --area <AREA>        # -> maps/cache/<AREA>_cost.nscost
+  python scripts/maps/cost_cache.py build --cost in.tif --out out.nscost [--tile 256]
+  python scripts/maps/cost_cache.py info maps/cache/<AREA>_cost.nscost
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b"NSCOST1\n"
+ALIGN = 4096
+SUFFIX = ".nscost"
+CACHE_DIR = "maps/cache"
+
+
+def cache_path_for(cost_path: str) -> str:
+    """Default cache location for a costmap: maps/cache/<stem>.nscost."""
+    stem = os.path.splitext(os.path.basename(cost_path))[0]
+    return os.path.join(CACHE_DIR, stem + SUFFIX)
+
+
+def source_stamp(path: str) -> dict:
+    st = os.stat(path)
+    return {"path": os.path.realpath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def read_header(path: str) -> dict:
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"not a cost cache: {path}")
+        (n,) = struct.unpack("<I", f.read(4))
+        return json.loads(f.read(n))
+
+
+def is_fresh(cache_path: str, source_path: str) -> bool:
+    """True if `cache_path` was built from (or last re-stamped against) this exact source file."""
+    try:
+        return read_header(cache_path).get("source") == source_stamp(source_path)
+    except (OSError, ValueError):
+        return False
+
+
+def restamp(cache_path: str, source_path: str) -> None:
+    """Record the current stamp of `source_path` (after patching both in step)."""
+    hdr = read_header(cache_path)
+    hdr["source"] = source_stamp(source_path)
+    blob = json.dumps(hdr).encode()
+    if len(MAGIC) + 4 + len(blob) > hdr["levels"][0]["offset"]:
+        raise ValueError(f"header of {cache_path} has no room for the new source stamp")
+    with open(cache_path, "r+b") as f:
+        f.seek(len(MAGIC))
+        f.write(struct.pack("<I", len(blob)) + blob)
+
+
+def _downsample2(a: np.ndarray, nodata: float) -> np.ndarray:
+    """2x2 nodata-aware mean; cells with no valid input become nodata."""
+    h, w = a.shape
+    a = np.pad(a, ((0, h % 2), (0, w % 2)), constant_values=nodata)
+    blk = a.reshape(a.shape[0] // 2, 2, a.shape[1] // 2, 2).astype(np.float64)
+    valid = ~np.isclose(blk, nodata) & np.isfinite(blk)
+    cnt = valid.sum(axis=(1, 3))
+    tot = np.where(valid, blk, 0.0).sum(axis=(1, 3))
+    out = np.full(cnt.shape, nodata, dtype=np.float32)
+    np.divide(tot, cnt, out=out, where=cnt > 0, casting="unsafe")
+    return out
+
+
+class CostCache:
+    """Read side of the .nscost format."""
+
+    def __init__(self, path: str, mode: str = "r"):
+        self.path = path
+        self.header = h = read_header(path)
+        self.width, self.height = h["width"], h["height"]
+        self.tile = h["tile"]
+        self.nodata = h["nodata"]
+        self.geotransform = tuple(h["geotransform"])
+        self.crs_wkt = h["crs_wkt"]
+        self.levels = [
+            np.memmap(
+                path,
+                dtype="<f4",
+                mode=mode,
+                offset=lv["offset"],
+                shape=(lv["tiles_y"], lv["tiles_x"], self.tile, self.tile),
+            )
+            for lv in h["levels"]
+        ]
+
+    def level_size(self, level: int) -> tuple[int, int]:
+        lv = self.header["levels"][level]
+        return lv["width"], lv["height"]
+
+    def tile_view(self, tx: int, ty: int, level: int = 0) -> np.ndarray:
+        return self.levels[level][ty, tx]
+
+    def gather(self, row: np.ndarray, col: np.ndarray, level: int = 0) -> np.ndarray:
+        t = self.tile
+        return self.levels[level][row // t, col // t, row % t, col % t]
+
+    def window(self, x0: int, y0: int, w: int, h: int, level: int = 0) -> np.ndarray:
+        """Pixel window; a view when it sits inside one tile, otherwise a stitched copy."""
+        t = self.tile
+        tx0, ty0 = x0 // t, y0 // t
+        tx1, ty1 = (x0 + w - 1) // t, (y0 + h - 1) // t
+        arr = self.levels[level]
+        if tx0 == tx1 and ty0 == ty1:
+            return arr[ty0, tx0, y0 - ty0 * t : y0 - ty0 * t + h, x0 - tx0 * t : x0 - tx0 * t + w]
+        blk = arr[ty0 : ty1 + 1, tx0 : tx1 + 1].transpose(0, 2, 1, 3)
+        blk = blk.reshape((ty1 - ty0 + 1) * t, (tx1 - tx0 + 1) * t)
+        oy, ox = y0 - ty0 * t, x0 - tx0 * t
+        return np.array(blk[oy : oy + h, ox : ox + w])
+
+    def write_window(self, x0: int, y0: int, block: np.ndarray, level: int = 0):
+        """Write `block` at pixel (x0, y0) tile by tile (cache opened with mode="r+")."""
+        t = self.tile
+        h, w = block.shape
+        arr = self.levels[level]
+        for ty in range(y0 // t, (y0 + h - 1) // t + 1):
+            for tx in range(x0 // t, (x0 + w - 1) // t + 1):
+                ya, yb = max(y0, ty * t), min(y0 + h, (ty + 1) * t)
+                xa, xb = max(x0, tx * t), min(x0 + w, (tx + 1) * t)
+                arr[ty, tx, ya - ty * t : yb - ty * t, xa - tx * t : xb - tx * t] = block[
+                    ya - y0 : yb - y0, xa - x0 : xb - x0
+                ]
+
+
+def patch_cache(path: str, x0: int, y0: int, block: np.ndarray):
+    """Overwrite a full-resolution window in place and refresh the overviews above it."""
+    c = CostCache(path, mode="r+")
+    c.write_window(x0, y0, np.asarray(block, dtype=np.float32))
+    xa, ya, xb, yb = x0, y0, x0 + block.shape[1], y0 + block.shape[0]
+    for k in range(1, len(c.levels)):
+        pw, ph = c.level_size(k - 1)
+        xa, ya = xa // 2, ya // 2
+        xb, yb = min(-(-xb // 2), c.level_size(k)[0]), min(-(-yb // 2), c.level_size(k)[1])
+        src = c.window(2 * xa, 2 * ya, min(2 * xb, pw) - 2 * xa, min(2 * yb, ph) - 2 * ya, k - 1)
+        c.write_window(xa, ya, _downsample2(np.asarray(src), c.nodata), level=k)
+    for lv in c.levels:
+        lv.flush()
+
+
+def _put_strip(arr: np.ndarray, ty: int, strip: np.ndarray, nodata: float) -> None:
+    """Write a (<= tile, <= tiles_x * tile) pixel strip into tile row `ty`."""
+    _, tx, t, _ = arr.shape
+    full = np.full((t, tx * t), nodata, dtype=np.float32)
+    full[: strip.shape[0], : strip.shape[1]] = strip
+    arr[ty] = full.reshape(t, tx, t).transpose(1, 0, 2)
+
+
+def _get_rows(arr: np.ndarray, ty0: int, ty1: int) -> np.ndarray:
+    """Pixel rows of tile rows [ty0, ty1) as one (n * tile, tiles_x * tile) array."""
+    blk = arr[ty0:ty1]
+    n, tx, t, _ = blk.shape
+    return blk.transpose(0, 2, 1, 3).reshape(n * t, tx * t)
+
+
+def build_cache(
+    src, out_path: str, tile: int = 256, min_size: int = 256, source_path: str | None = None
+) -> dict:
+    """Write `src` (a cost_query.CostRaster) to `out_path`; returns the header.
+
+    Memory stays at a few tile-row strips: level 0 streams from `src`, each overview level
+    reads the two parent tile rows it covers back from the file. `source_path` stamps the
+    header for is_fresh().
+    """
+    nodata = float(src.nodata) if src.nodata is not None else -9999.0
+    sizes = [(src.width, src.height)]
+    while max(sizes[-1]) > min_size:
+        w, h = sizes[-1]
+        sizes.append(((w + 1) // 2, (h + 1) // 2))
+
+    levels = []
+    offset = 0
+    for w, h in sizes:
+        tx, ty = -(-w // tile), -(-h // tile)
+        levels.append({"width": w, "height": h, "tiles_x": tx, "tiles_y": ty, "offset": offset})
+        offset += tx * ty * tile * tile * 4
+    header = {
+        "version": 1,
+        "width": src.width,
+        "height": src.height,
+        "tile": tile,
+        "nodata": nodata,
+        "geotransform": list(src.geotransform),
+        "crs_wkt": src.crs_wkt or "",
+        "levels": levels,
+    }
+    if source_path is not None:
+        header["source"] = source_stamp(source_path)
+    # header length is fixed before offsets become absolute, so reserve generously
+    # (offsets, and a later restamp() with longer size/mtime numbers)
+    probe = json.dumps(header).encode()
+    data_start = -(-(len(MAGIC) + 4 + len(probe) + 64 * len(levels) + 256) // ALIGN) * ALIGN
+    for lv in levels:
+        lv["offset"] += data_start
+    blob = json.dumps(header).encode()
+    assert len(MAGIC) + 4 + len(blob) <= data_start
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(blob)) + blob)
+        f.truncate(data_start + offset)
+
+    prev = None
+    for k, lv in enumerate(levels):
+        arr = np.memmap(
+            tmp,
+            dtype="<f4",
+            mode="r+",
+            offset=lv["offset"],
+            shape=(lv["tiles_y"], lv["tiles_x"], tile, tile),
+        )
+        for ty in range(lv["tiles_y"]):
+            y0 = ty * tile
+            if k == 0:
+                # stream the source one tile-row strip at a time
+                hh = min(tile, src.height - y0)
+                strip = np.asarray(src.read_window(0, y0, src.width, hh), dtype=np.float32)
+            else:
+                # parent rows [2*y0, 2*y0 + 2*tile) are parent tile rows 2*ty and 2*ty + 1
+                pv = levels[k - 1]
+                rows = _get_rows(prev, 2 * ty, min(2 * ty + 2, pv["tiles_y"]))
+                rows = rows[: min(2 * tile, pv["height"] - 2 * y0), : pv["width"]]
+                strip = _downsample2(rows, nodata)
+            _put_strip(arr, ty, strip, nodata)
+        arr.flush()
+        prev = arr
+    del prev
+    os.replace(tmp, out_path)
+    return header
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Build/inspect memory-mapped cost caches.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build")
+    src = b.add_mutually_exclusive_group(required=True)
+    src.add_argument("--area")
+    src.add_argument("--cost")
+    b.add_argument("--out", default=None)
+    b.add_argument("--tile", type=int, default=256)
+    i = sub.add_parser("info")
+    i.add_argument("path")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "info":
+        print(json.dumps(CostCache(args.path).header, indent=2))
+        return 0
+
+    from cost_query import CostRaster
+
+    cost = args.cost or f"maps/costmaps/{args.area}_cost.tif"
+    out = args.out or cache_path_for(cost)
+    t0 = time.perf_counter()
+    hdr = build_cache(CostRaster.open(cost), out, tile=args.tile, source_path=cost)
+    dt = time.perf_counter() - t0
+    print(
+        f"Wrote {out}: {hdr['width']}x{hdr['height']} tile={hdr['tile']} "
+        f"levels={len(hdr['levels'])} in {dt:.2f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
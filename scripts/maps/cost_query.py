@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Bulk cost-raster queries: one fast path for every "what does the planner cost say here" tool.
+
+The input CSV is read into columns once, all coordinates go through a single
+TransformPoints call, pixel indices come from the inverse geotransform, and values are
+gathered from a handful of strip-wise windowed reads (or straight from an in-memory /
+memory-mapped array or .nscost cache, see cost_cache.py). Nearest-pixel semantics match
+`gdallocationinfo` (floor, not round).
+
+Usage:
+  python scripts/maps/cost_query.py --area <AREA> --in points.csv [--out out.csv]
+  python scripts/maps/cost_query.py --cost maps/costmaps/<AREA>_cost.tif --in points.csv
+
+Input columns: lat|latitude + lon|lng|long|longitude, and/or x|easting|utm_e + y|northing|utm_n
+(raster CRS). Lat/lon is preferred when it is valid and inside the raster; otherwise X/Y.
+Output columns: lat,lon,cost (NaN for nodata / outside / unparseable).
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import math
+import os
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from cost_cache import SUFFIX, CostCache, cache_path_for, is_fresh
+
+NODATA_DEFAULT = -9999.0
+LAT_KEYS = ("lat", "latitude")
+LON_KEYS = ("lon", "lng", "long", "longitude")
+X_KEYS = ("x", "easting", "utm_e", "utm_easting")
+Y_KEYS = ("y", "northing", "utm_n", "utm_northing")
+
+
+def _gdal():
+    try:
+        from osgeo import gdal, osr
+    except Exception as err:  # pragma: no cover - depends on system GDAL
+        raise RuntimeError("GDAL unavailable. Pin numpy<2 and install python3-gdal.") from err
+    gdal.UseExceptions()
+    return gdal, osr
+
+
+def invert_geotransform(gt) -> tuple[float, ...]:
+    """Pure-NumPy inverse of a GDAL affine geotransform."""
+    a = np.array([[gt[1], gt[2]], [gt[4], gt[5]]], dtype=float)
+    inv = np.linalg.inv(a)
+    off = -inv @ np.array([gt[0], gt[3]], dtype=float)
+    return (off[0], inv[0, 0], inv[0, 1], off[1], inv[1, 0], inv[1, 1])
+
+
+def is_wgs84(crs_wkt: str | None) -> bool:
+    if not crs_wkt:
+        return True
+    s = crs_wkt.strip().upper()
+    if s in ("EPSG:4326", "WGS84", "OGC:CRS84"):
+        return True
+    return not s.startswith(("PROJCS", "PROJCRS", "EPSG:")) and "WGS 84" in s
+
+
+def _transform(xs: np.ndarray, ys: np.ndarray, src: str, dst: str) -> tuple[np.ndarray, ...]:
+    """Transform coordinate arrays between CRSs with one TransformPoints call."""
+    _, osr = _gdal()
+
+    def _srs(defn: str):
+        s = osr.SpatialReference()
+        s.SetFromUserInput(defn)
+        try:
+            s.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        except AttributeError:
+            pass
+        return s
+
+    ct = osr.CoordinateTransformation(_srs(src), _srs(dst))
+    ok = np.isfinite(xs) & np.isfinite(ys)
+    ox = np.full(xs.shape, np.nan)
+    oy = np.full(ys.shape, np.nan)
+    if ok.any():
+        pts = np.column_stack([xs[ok], ys[ok]])
+        res = np.asarray(ct.TransformPoints(pts.tolist()), dtype=float)
+        ox[ok], oy[ok] = res[:, 0], res[:, 1]
+    bad = ~(np.isfinite(ox) & np.isfinite(oy))
+    ox[bad] = oy[bad] = np.nan
+    return ox, oy
+
+
+def lonlat_to_crs(lon, lat, crs_wkt: str | None) -> tuple[np.ndarray, np.ndarray]:
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    if is_wgs84(crs_wkt):
+        return lon, lat
+    return _transform(lon, lat, "EPSG:4326", crs_wkt)
+
+
+def crs_to_lonlat(x, y, crs_wkt: str | None) -> tuple[np.ndarray, np.ndarray]:
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if is_wgs84(crs_wkt):
+        return x, y
+    return _transform(x, y, crs_wkt, "EPSG:4326")
+
+
+@dataclass
+class CostRaster:
+    """Single-band cost raster backed by a NumPy array/memmap or a lazily read GDAL band."""
+
+    geotransform: tuple[float, ...]
+    crs_wkt: str
+    nodata: float | None
+    width: int
+    height: int
+    array: np.ndarray | None = None
+    band: object | None = None
+    cache: CostCache | None = None
+    _ds: object | None = None
+
+    @classmethod
+    def from_array(cls, array, geotransform, crs_wkt="EPSG:4326", nodata=NODATA_DEFAULT):
+        a = np.asarray(array)
+        return cls(tuple(geotransform), crs_wkt, nodata, a.shape[1], a.shape[0], array=a)
+
+    @classmethod
+    def open(cls, path: str) -> CostRaster:
+        gdal, _ = _gdal()
+        ds = gdal.Open(path, gdal.GA_ReadOnly)
+        if ds is None:
+            raise RuntimeError(f"Could not open raster: {path}")
+        band = ds.GetRasterBand(1)
+        return cls(
+            tuple(ds.GetGeoTransform()),
+            ds.GetProjection(),
+            band.GetNoDataValue(),
+            ds.RasterXSize,
+            ds.RasterYSize,
+            band=band,
+            _ds=ds,
+        )
+
+    @classmethod
+    def from_cache(cls, path: str) -> CostRaster:
+        c = CostCache(path)
+        return cls(c.geotransform, c.crs_wkt, c.nodata, c.width, c.height, cache=c)
+
+    # ---- geometry ----
+    def world_to_pixel(self, x, y) -> tuple[np.ndarray, np.ndarray]:
+        """Fractional (col, row) for world coordinates in the raster CRS."""
+        inv = invert_geotransform(self.geotransform)
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        return inv[0] + inv[1] * x + inv[2] * y, inv[3] + inv[4] * x + inv[5] * y
+
+    def pixel_to_world(self, col, row) -> tuple[np.ndarray, np.ndarray]:
+        gt = self.geotransform
+        col = np.asarray(col, dtype=float)
+        row = np.asarray(row, dtype=float)
+        return gt[0] + gt[1] * col + gt[2] * row, gt[3] + gt[4] * col + gt[5] * row
+
+    def extent_lonlat(self) -> tuple[float, float, float, float]:
+        cols = np.array([0, self.width, 0, self.width], dtype=float)
+        rows = np.array([0, 0, self.height, self.height], dtype=float)
+        lon, lat = crs_to_lonlat(*self.pixel_to_world(cols, rows), self.crs_wkt)
+        return float(lon.min()), float(lat.min()), float(lon.max()), float(lat.max())
+
+    # ---- reads ----
+    def read_window(self, x0: int, y0: int, w: int, h: int) -> np.ndarray:
+        if self.array is not None:
+            return self.array[y0 : y0 + h, x0 : x0 + w]
+        if self.cache is not None:
+            return self.cache.window(x0, y0, w, h)
+        return self.band.ReadAsArray(x0, y0, w, h)
+
+    def sample_pixels(self, col, row, strip_rows: int = 1024) -> np.ndarray:
+        """Gather values at integer pixel indices; NaN outside the raster or at nodata.
+
+        Backed by an array this is one fancy-index; backed by GDAL it reads one window per
+        `strip_rows`-tall strip that actually contains points.
+        """
+        col = np.asarray(col)
+        row = np.asarray(row)
+        out = np.full(col.shape, np.nan, dtype=np.float64)
+        ok = (col >= 0) & (row >= 0) & (col < self.width) & (row < self.height)
+        if not ok.any():
+            return out
+        c = col[ok].astype(np.int64)
+        r = row[ok].astype(np.int64)
+        if self.array is not None:
+            vals = np.asarray(self.array[r, c], dtype=np.float64)
+        elif self.cache is not None:
+            vals = np.asarray(self.cache.gather(r, c), dtype=np.float64)
+        else:
+            vals = np.empty(c.shape, dtype=np.float64)
+            strip = r // strip_rows
+            order = np.argsort(strip, kind="stable")
+            bounds = np.flatnonzero(np.diff(strip[order])) + 1
+            for grp in np.split(order, bounds):
+                r0, r1 = int(r[grp].min()), int(r[grp].max())
+                c0, c1 = int(c[grp].min()), int(c[grp].max())
+                win = self.read_window(c0, r0, c1 - c0 + 1, r1 - r0 + 1)
+                vals[grp] = win[r[grp] - r0, c[grp] - c0]
+        if self.nodata is not None:
+            vals[np.isclose(vals, self.nodata)] = np.nan
+        vals[~np.isfinite(vals)] = np.nan
+        out[ok] = vals
+        return out
+
+    def sample_world(self, x, y) -> np.ndarray:
+        fc, fr = self.world_to_pixel(x, y)
+        good = np.isfinite(fc) & np.isfinite(fr)
+        col = np.where(good, np.floor(np.where(good, fc, 0)), -1).astype(np.int64)
+        row = np.where(good, np.floor(np.where(good, fr, 0)), -1).astype(np.int64)
+        return self.sample_pixels(col, row)
+
+    def sample_lonlat(self, lon, lat) -> np.ndarray:
+        return self.sample_world(*lonlat_to_crs(lon, lat, self.crs_wkt))
+
+
+def open_cost(path: str) -> CostRaster:
+    """Open a cost raster by path.
+
+    `.nscost` files are memory-mapped directly. For a GeoTIFF/VRT, the cache at
+    maps/cache/<stem>.nscost is preferred over decoding the source through GDAL, but only if
+    its header stamp names this exact file (realpath, size, mtime).
+    """
+    if path.endswith(SUFFIX):
+        return CostRaster.from_cache(path)
+    cached = cache_path_for(path)
+    if is_fresh(cached, path):
+        return CostRaster.from_cache(cached)
+    return CostRaster.open(path)
+
+
+# ---- CSV fast path ----
+def _floats(values: list[str]) -> np.ndarray:
+    try:
+        return np.asarray(values, dtype=float)
+    except ValueError:
+        out = np.full(len(values), np.nan)
+        for i, v in enumerate(values):
+            try:
+                out[i] = float(str(v).strip())
+            except ValueError:
+                pass
+        return out
+
+
+def read_points_csv(path: str) -> dict[str, np.ndarray]:
+    """Read a probe CSV into float columns: any of lat, lon, x, y that are present."""
+    with open(path, newline="") as f:
+        rdr = csv.reader(f)
+        header = [(h or "").strip().lower() for h in next(rdr)]
+        rows = [r for r in rdr if r]
+    cols: dict[str, np.ndarray] = {}
+    for name, keys in (("lat", LAT_KEYS), ("lon", LON_KEYS), ("x", X_KEYS), ("y", Y_KEYS)):
+        idx = next((i for i, h in enumerate(header) if h in keys), None)
+        if idx is not None:
+            cols[name] = _floats([r[idx] if idx < len(r) else "" for r in rows])
+    if not (("lat" in cols and "lon" in cols) or ("x" in cols and "y" in cols)):
+        raise RuntimeError(f"Could not find lat/lon or x/y columns in header: {header}")
+    return cols
+
+
+def query_points(ras: CostRaster, cols: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """Resolve lat/lon (preferred when valid and inside) or X/Y per row and sample costs."""
+    n = len(next(iter(cols.values())))
+    lat = cols.get("lat", np.full(n, np.nan)).copy()
+    lon = cols.get("lon", np.full(n, np.nan)).copy()
+    x, y = lonlat_to_crs(lon, lat, ras.crs_wkt)
+    fc, fr = ras.world_to_pixel(x, y)
+    inside = (fc >= 0) & (fr >= 0) & (fc < ras.width) & (fr < ras.height)
+    valid_ll = (np.abs(lat) <= 90) & (np.abs(lon) <= 180) & inside
+    if "x" in cols and "y" in cols:
+        use_xy = ~valid_ll & np.isfinite(cols["x"]) & np.isfinite(cols["y"])
+        if use_xy.any():
+            x = np.where(use_xy, cols["x"], x)
+            y = np.where(use_xy, cols["y"], y)
+            lon_xy, lat_xy = crs_to_lonlat(cols["x"][use_xy], cols["y"][use_xy], ras.crs_wkt)
+            lon[use_xy], lat[use_xy] = lon_xy, lat_xy
+    cost = ras.sample_world(x, y)
+    return {"lat": lat, "lon": lon, "cost": cost}
+
+
+def write_results_csv(path: str, res: dict[str, np.ndarray], order=("lat", "lon", "cost")):
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    fmt = {"lat": "{:.12f}", "lon": "{:.12f}", "cost": "{:.6f}"}
+    cols = [
+        ["NaN" if not math.isfinite(v) else fmt[k].format(v) for v in res[k].tolist()]
+        for k in order
+    ]
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(list(order))
+        w.writerows(zip(*cols, strict=True))
+
+
+def summarize(res: dict[str, np.ndarray]) -> dict:
+    c = res["cost"]
+    ok = np.isfinite(c)
+    return {
+        "n": int(c.size),
+        "n_finite": int(ok.sum()),
+        "min": float(c[ok].min()) if ok.any() else float("nan"),
+        "max": float(c[ok].max()) if ok.any() else float("nan"),
+        "mean": float(c[ok].mean()) if ok.any() else float("nan"),
+    }
+
+
+def run_query(cost_path: str, in_csv: str, out_csv: str, order=("lat", "lon", "cost")) -> dict:
+    t0 = time.perf_counter()
+    ras = open_cost(cost_path)
+    res = query_points(ras, read_points_csv(in_csv))
+    write_results_csv(out_csv, res, order)
+    summary = summarize(res)
+    summary.update({"cost": cost_path, "input": in_csv, "output": out_csv, "ts": int(time.time())})
+    summary["elapsed_s"] = round(time.perf_counter() - t0, 4)
+    return summary
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Vectorised cost-raster lookup for a CSV of points.")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--area", help="AOI name -> maps/costmaps/<AREA>_cost.tif")
+    src.add_argument("--cost", help="cost raster path")
+    ap.add_argument("--in", dest="in_csv", required=True)
+    ap.add_argument("--out", default=None, help="default maps/reports/<AREA>_cost_query.csv")
+    ap.add_argument("--summary", default=None, help="optional JSON summary path")
+    args = ap.parse_args(argv)
+
+    cost = args.cost or f"maps/costmaps/{args.area}_cost.tif"
+    area = args.area or os.path.splitext(os.path.basename(cost))[0].removesuffix("_cost")
+    out = args.out or f"maps/reports/{area}_cost_query.csv"
+    summary = run_query(cost, args.in_csv, out)
+    if args.summary:
+        os.makedirs(os.path.dirname(args.summary) or ".", exist_ok=True)
+        with open(args.summary, "w") as f:
+            json.dump(summary, f, indent=2)
+    print(f"Wrote {out} ({summary['n_finite']}/{summary['n']} finite, {summary['elapsed_s']}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Costmap builder: DEM + layer masks -> Float32 cost raster in one pass, no temp files.
+
+Per `cost_recipe.yaml`:
+  cost = base_cost + slope_mult * slope_pct + sum(<layer>_penalty * <layer>_mask)
+with slope in percent from a vectorised Horn kernel (gdaldem's default) and NoData=-9999
+wherever the DEM is nodata. Optional `max_cost` clips the result.
+
+The raster is processed in row strips (1-pixel halo for the kernel) on a process pool; the
+parent writes each finished strip straight into the output GeoTIFF. Layers are either
+rasters on the DEM grid (0/1 masks, GDAL or .nscost) or GeoJSON polygons rasterized per
+strip by pixel centre (what gdal_rasterize does by default).
+
+Usage:
+  python scripts/maps/costmap_build.py --area <AREA> \\
+      --layer building=maps/masks/<AREA>_buildings_mask.tif --layer water=water.geojson
+  python scripts/maps/costmap_build.py --dem dem.tif --out cost.tif [--workers 8] [--cache]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import yaml
+from cost_query import (
+    NODATA_DEFAULT,
+    _gdal,
+    invert_geotransform,
+    is_wgs84,
+    lonlat_to_crs,
+    open_cost,
+)
+
+RECIPE = "scripts/maps/cost_recipe.yaml"
+# gdaldem -s 111120: metres per degree for geographic DEMs
+DEG_SCALE = 111120.0
+
+
+def load_recipe(path: str = RECIPE) -> dict:
+    with open(path) as f:
+        rec = yaml.safe_load(f) or {}
+    rec.setdefault("base_cost", 1.0)
+    rec.setdefault("slope_mult", 0.0)
+    return rec
+
+
+def layer_penalty(recipe: dict, name: str) -> float:
+    """Penalty for a layer name; `buildings` falls back to `building_penalty` etc."""
+    for key in (f"{name}_penalty", f"{name.removesuffix('s')}_penalty"):
+        if key in recipe:
+            return float(recipe[key])
+    raise KeyError(f"no {name}_penalty in recipe")
+
+
+# ---- kernels ----
+def horn_slope_pct(
+    z: np.ndarray, dx: float, dy: float, invalid: np.ndarray | None = None
+) -> np.ndarray:
+    """Slope (percent) of the interior of `z`, which carries a 1-pixel halo on every side.
+
+    Neighbours flagged in `invalid` take the centre pixel's elevation, like
+    `gdaldem -compute_edges`, so terrain next to nodata is not read as a cliff.
+    """
+    z = z.astype(np.float64, copy=False)
+    e = z[1:-1, 1:-1]
+
+    def nb(r: int, c: int) -> np.ndarray:
+        sl = (slice(r, r + z.shape[0] - 2), slice(c, c + z.shape[1] - 2))
+        return z[sl] if invalid is None else np.where(invalid[sl], e, z[sl])
+
+    a, b, c = nb(0, 0), nb(0, 1), nb(0, 2)
+    d, f = nb(1, 0), nb(1, 2)
+    g, h, i = nb(2, 0), nb(2, 1), nb(2, 2)
+    dzdx = ((c + 2 * f + i) - (a + 2 * d + g)) / (8.0 * dx)
+    dzdy = ((g + 2 * h + i) - (a + 2 * b + c)) / (8.0 * dy)
+    return 100.0 * np.hypot(dzdx, dzdy)
+
+
+def cost_block(
+    z: np.ndarray,
+    masks: dict[str, np.ndarray],
+    recipe: dict,
+    dx: float,
+    dy: float,
+    dem_nodata: float | None,
+) -> np.ndarray:
+    """Cost for the interior of a haloed DEM block; masks are interior-sized."""
+    invalid = ~np.isfinite(z)
+    if dem_nodata is not None:
+        invalid |= np.isclose(z, dem_nodata)
+    slope = horn_slope_pct(z, dx, dy, invalid if invalid.any() else None)
+    cost = float(recipe["base_cost"]) + float(recipe["slope_mult"]) * slope
+    for name, m in masks.items():
+        cost += layer_penalty(recipe, name) * (np.asarray(m) == 1)
+    if "max_cost" in recipe:
+        np.minimum(cost, float(recipe["max_cost"]), out=cost)
+    out = cost.astype(np.float32)
+    out[invalid[1:-1, 1:-1]] = NODATA_DEFAULT
+    return out
+
+
+# ---- vector layers ----
+def _geojson_rings(path: str) -> list[tuple[np.ndarray, bool]]:
+    with open(path) as f:
+        gj = json.load(f)
+    feats = gj["features"] if gj.get("type") == "FeatureCollection" else [gj]
+    rings = []
+    for ft in feats:
+        geom = ft.get("geometry", ft) or {}
+        polys = {"Polygon": [geom.get("coordinates")], "MultiPolygon": geom.get("coordinates")}
+        for poly in polys.get(geom.get("type"), None) or []:
+            for k, ring in enumerate(poly):
+                rings.append((np.asarray(ring, dtype=float)[:, :2], k == 0))
+    return rings
+
+
+def polygon_edges(path: str, geotransform, crs_wkt: str | None) -> np.ndarray:
+    """(E, 5) pixel-space edges (c0, r0, c1, r1, winding) of a GeoJSON polygon layer.
+
+    Exterior rings and holes get opposite windings, so overlapping polygons union and holes
+    punch out under a non-zero rule regardless of the file's ring orientation.
+    """
+    inv = invert_geotransform(geotransform)
+    out = []
+    for ring, exterior in _geojson_rings(path):
+        x, y = lonlat_to_crs(ring[:, 0], ring[:, 1], crs_wkt)
+        c = inv[0] + inv[1] * x + inv[2] * y
+        r = inv[3] + inv[4] * x + inv[5] * y
+        area2 = np.sum(c[:-1] * r[1:] - c[1:] * r[:-1]) + (c[-1] * r[0] - c[0] * r[-1])
+        sign = 1.0 if (area2 > 0) == exterior else -1.0
+        c1, r1 = np.roll(c, -1), np.roll(r, -1)
+        w = np.where(r1 > r, sign, -sign)
+        out.append(np.column_stack([c, r, c1, r1, w]))
+    return np.concatenate(out) if out else np.zeros((0, 5))
+
+
+def rasterize_edges(edges: np.ndarray, x0: int, y0: int, w: int, h: int) -> np.ndarray:
+    """uint8 mask of pixels whose centre lies inside the polygons (non-zero winding)."""
+    acc = np.zeros((h, w + 1), dtype=np.int32)
+    if len(edges):
+        c0, r0, c1, r1, wd = edges.T
+        lo, hi = np.minimum(r0, r1), np.maximum(r0, r1)
+        # rows whose centre y satisfies lo <= y < hi, limited to this block
+        first = np.maximum(np.ceil(lo - 0.5), y0).astype(np.int64)
+        last = np.minimum(np.ceil(hi - 0.5), y0 + h).astype(np.int64)
+        n = np.maximum(last - first, 0)
+        if n.sum():
+            e = np.repeat(np.arange(len(edges)), n)
+            row = np.repeat(first, n) + (np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n))
+            yc = row + 0.5
+            t = (yc - r0[e]) / (r1[e] - r0[e])
+            xc = c0[e] + t * (c1[e] - c0[e])
+            col = np.clip(np.ceil(xc - 0.5).astype(np.int64) - x0, 0, w)
+            np.add.at(acc, (row - y0, col), wd[e].astype(np.int32))
+    return (np.cumsum(acc, axis=1)[:, :w] != 0).astype(np.uint8)
+
+
+# ---- strip workers ----
+_W: dict = {}
+
+
+def _init_worker(dem_path, rasters, vectors, recipe, dx, dy):
+    _W.update(
+        dem=open_cost(dem_path),
+        rasters={k: open_cost(p) for k, p in rasters.items()},
+        vectors=vectors,
+        recipe=recipe,
+        dx=dx,
+        dy=dy,
+    )
+
+
+def _window(x0: int, y0: int, w: int, h: int) -> np.ndarray:
+    """Cost for one pixel window of the DEM grid (worker state set by _init_worker)."""
+    dem = _W["dem"]
+    ya, yb = max(0, y0 - 1), min(dem.height, y0 + h + 1)
+    xa, xb = max(0, x0 - 1), min(dem.width, x0 + w + 1)
+    z = np.asarray(dem.read_window(xa, ya, xb - xa, yb - ya), dtype=np.float64)
+    pad_y = (1 if ya == y0 else 0, 1 if yb == y0 + h else 0)
+    pad_x = (1 if xa == x0 else 0, 1 if xb == x0 + w else 0)
+    z = np.pad(z, (pad_y, pad_x), mode="edge")
+    masks = {k: r.read_window(x0, y0, w, h) for k, r in _W["rasters"].items()}
+    for k, edges in _W["vectors"].items():
+        m = rasterize_edges(edges, x0, y0, w, h)
+        masks[k] = np.maximum(masks[k], m) if k in masks else m
+    return cost_block(z, masks, _W["recipe"], _W["dx"], _W["dy"], dem.nodata)
+
+
+def _strip(y0: int, h: int) -> tuple[int, np.ndarray]:
+    return y0, _window(0, y0, _W["dem"].width, h)
+
+
+def _create_tif(path, dem, nodata):
+    gdal, _ = _gdal()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    drv = gdal.GetDriverByName("GTiff")
+    ds = drv.Create(
+        path,
+        dem.width,
+        dem.height,
+        1,
+        gdal.GDT_Float32,
+        options=["TILED=YES", "COMPRESS=DEFLATE", "BIGTIFF=IF_SAFER"],
+    )
+    ds.SetGeoTransform(dem.geotransform)
+    ds.SetProjection(dem.crs_wkt or "")
+    ds.GetRasterBand(1).SetNoDataValue(nodata)
+    return ds
+
+
+def worker_args(dem_path: str, recipe: dict, layers: dict[str, str] | None, z_scale=None):
+    """Arguments for _init_worker: raster/vector layer split and metric pixel size."""
+    dem = open_cost(dem_path)
+    if z_scale is None:
+        z_scale = DEG_SCALE if is_wgs84(dem.crs_wkt) else 1.0
+    gt = dem.geotransform
+    rasters, vectors = {}, {}
+    for name, path in (layers or {}).items():
+        layer_penalty(recipe, name)  # fail before any work on an unknown layer
+        if path.lower().endswith((".geojson", ".json")):
+            vectors[name] = polygon_edges(path, gt, dem.crs_wkt)
+        else:
+            rasters[name] = path
+    return dem_path, rasters, vectors, recipe, abs(gt[1]) * z_scale, abs(gt[5]) * z_scale
+
+
+def build_costmap(
+    dem_path: str,
+    recipe: dict,
+    layers: dict[str, str] | None = None,
+    out_path: str | None = None,
+    workers: int | None = None,
+    block_rows: int = 512,
+    z_scale: float | None = None,
+) -> np.ndarray | None:
+    """Build the costmap; writes `out_path` (GeoTIFF) or returns the array when it is None."""
+    dem = open_cost(dem_path)
+    initargs = worker_args(dem_path, recipe, layers, z_scale)
+    jobs = [(y, min(block_rows, dem.height - y)) for y in range(0, dem.height, block_rows)]
+    ds = _create_tif(out_path, dem, NODATA_DEFAULT) if out_path else None
+    full = None if ds else np.empty((dem.height, dem.width), dtype=np.float32)
+
+    def _sink(y0, blk):
+        if ds is not None:
+            ds.GetRasterBand(1).WriteArray(blk, 0, y0)
+        else:
+            full[y0 : y0 + blk.shape[0]] = blk
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(jobs) == 1:
+        _init_worker(*initargs)
+        for y0, h in jobs:
+            _sink(*_strip(y0, h))
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as ex:
+            for y0, blk in ex.map(_strip, *zip(*jobs, strict=True)):
+                _sink(y0, blk)
+    if ds is not None:
+        ds.FlushCache()
+        ds = None
+        return None
+    return full
+
+
+def _parse_layers(items: list[str]) -> dict[str, str]:
+    out = {}
+    for it in items:
+        name, sep, path = it.partition("=")
+        if not sep:
+            raise SystemExit(f"--layer expects NAME=PATH, got {it!r}")
+        out[name] = path
+    return out
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Build a Float32 costmap from a DEM and masks.")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--area", help="AOI -> maps/build/<AREA>_dtm1m.tif, maps/costmaps/...")
+    src.add_argument("--dem")
+    ap.add_argument("--out", default=None)
+    ap.add_argument("--recipe", default=RECIPE)
+    ap.add_argument("--layer", action="append", default=[], help="NAME=mask.tif|polys.geojson")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--block-rows", type=int, default=512)
+    ap.add_argument("--z-scale", type=float, default=None, help="default 111120 for lat/lon")
+    ap.add_argument("--cache", action="store_true", help="also write maps/cache/<stem>.nscost")
+    args = ap.parse_args(argv)
+
+    dem = args.dem or f"maps/build/{args.area}_dtm1m.tif"
+    out = args.out or f"maps/costmaps/{args.area or 'area1'}_cost.tif"
+    t0 = time.perf_counter()
+    build_costmap(
+        dem,
+        load_recipe(args.recipe),
+        _parse_layers(args.layer),
+        out,
+        workers=args.workers,
+        block_rows=args.block_rows,
+        z_scale=args.z_scale,
+    )
+    print(f"Wrote {out} in {time.perf_counter() - t0:.2f}s")
+    if args.cache:
+        from cost_cache import build_cache, cache_path_for
+        from cost_query import CostRaster
+
+        build_cache(CostRaster.open(out), cache_path_for(out), source_path=out)
+        print(f"Wrote {cache_path_for(out)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Incremental costmap rebuild: recompute only the tiles whose inputs changed.
+
+Every input (DEM, mask rasters, GeoJSON layers) is fingerprinted per tile of the DEM grid;
+the DEM with the 1-pixel halo the slope kernel reads, vector layers by the tile's rasterised
+mask (winding accumulates from column 0, so a tile deep inside a polygon has no edge of its
+own). Fingerprints, the recipe hash and the palette hash live in `<cost>.build.json`. On a
+rerun, unchanged input files are skipped by their file hash; the others are re-hashed per
+tile, and only dirty tiles are recomputed and written in place into the Float32 raster (GDAL
+update for .tif, memmap for .nscost, plus a fresh maps/cache/<stem>.nscost copy). With
+--mbtiles, just the XYZ tiles that overlap dirty tiles are re-rendered with the same
+Palette as mbtiles_build.py; a palette change re-renders the whole extent. A recipe change,
+new grid, removed layer or missing output is a full build.
+
+Usage:
+  python scripts/maps/costmap_incremental.py --area <AREA> \\
+      --layer building=maps/masks/<AREA>_buildings.geojson \\
+      [--mbtiles artifacts/maps/mbtiles/<AREA>_cost_color.mbtiles --ramp RAMP]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from cost_cache import SUFFIX, build_cache, cache_path_for, is_fresh, patch_cache, restamp
+from cost_query import CostRaster, _gdal, crs_to_lonlat, open_cost
+from costmap_build import (
+    RECIPE,
+    _init_worker,
+    _parse_layers,
+    _window,
+    build_costmap,
+    load_recipe,
+    rasterize_edges,
+    worker_args,
+)
+from mbtiles_render import BYTE_MAX_COST
+
+STATE_VERSION = 1
+
+
+def file_sha256(path: str, chunk: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while b := f.read(chunk):
+            h.update(b)
+    return h.hexdigest()
+
+
+def tile_grid(width: int, height: int, tile: int) -> list[tuple[int, int, int, int]]:
+    """(x0, y0, w, h) of each tile, row-major."""
+    return [
+        (x, y, min(tile, width - x), min(tile, height - y))
+        for y in range(0, height, tile)
+        for x in range(0, width, tile)
+    ]
+
+
+def raster_tile_hashes(ras, grid, halo: int = 0) -> list[str]:
+    """blake2b of each tile window (grown by `halo`, clipped to the raster)."""
+    out = []
+    for x0, y0, w, h in grid:
+        xa, ya = max(0, x0 - halo), max(0, y0 - halo)
+        xb, yb = min(ras.width, x0 + w + halo), min(ras.height, y0 + h + halo)
+        win = np.ascontiguousarray(ras.read_window(xa, ya, xb - xa, yb - ya))
+        out.append(hashlib.blake2b(win.tobytes(), digest_size=16).hexdigest())
+    return out
+
+
+def vector_tile_hashes(edges: np.ndarray, grid) -> list[str]:
+    """blake2b of each tile's rasterised mask (exactly what _window burns in).
+
+    Only edges crossing the tile's row band at or left of its right edge can change the
+    mask, so each tile rasterises just those.
+    """
+    c0, r0, c1, r1 = (edges[:, k] for k in range(4))
+    cmin = np.minimum(c0, c1)
+    rmin, rmax = np.minimum(r0, r1), np.maximum(r0, r1)
+    out = []
+    for x0, y0, w, h in grid:
+        sel = (rmax >= y0) & (rmin <= y0 + h) & (cmin <= x0 + w)
+        mask = rasterize_edges(edges[sel], x0, y0, w, h)
+        out.append(hashlib.blake2b(np.packbits(mask).tobytes(), digest_size=16).hexdigest())
+    return out
+
+
+def _recipe_sha(recipe: dict) -> str:
+    return hashlib.sha256(json.dumps(recipe, sort_keys=True).encode()).hexdigest()
+
+
+def _palette_sha(ramp: str, domain: str, max_cost: float) -> str:
+    return hashlib.sha256(f"{file_sha256(ramp)}:{domain}:{max_cost!r}".encode()).hexdigest()
+
+
+def _state_path(out: str) -> str:
+    return out + ".build.json"
+
+
+def load_state(out: str) -> dict | None:
+    try:
+        with open(_state_path(out)) as f:
+            st = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return st if st.get("version") == STATE_VERSION else None
+
+
+def _write_full(out: str, dem_path: str, recipe: dict, layers: dict, workers) -> None:
+    if out.endswith(SUFFIX):
+        dem = open_cost(dem_path)
+        arr = build_costmap(dem_path, recipe, layers, None, workers=workers)
+        ras = CostRaster.from_array(arr, dem.geotransform, dem.crs_wkt, nodata=-9999.0)
+        build_cache(ras, out)
+    else:
+        build_costmap(dem_path, recipe, layers, out, workers=workers)
+
+
+def _patch_outputs(out: str, blocks: list[tuple[int, int, np.ndarray]]) -> None:
+    if out.endswith(SUFFIX):
+        for x0, y0, blk in blocks:
+            patch_cache(out, x0, y0, blk)
+        return
+    gdal, _ = _gdal()
+    cached = cache_path_for(out)
+    keep_cache = is_fresh(cached, out)
+    ds = gdal.Open(out, gdal.GA_Update)
+    band = ds.GetRasterBand(1)
+    for x0, y0, blk in blocks:
+        band.WriteArray(blk, x0, y0)
+    ds.FlushCache()
+    ds = None
+    if keep_cache:
+        for x0, y0, blk in blocks:
+            patch_cache(cached, x0, y0, blk)
+        restamp(cached, out)
+
+
+def _tile_bbox_lonlat(ras, x0, y0, w, h) -> tuple[float, float, float, float]:
+    cols = np.array([x0, x0 + w, x0, x0 + w], dtype=float)
+    rows = np.array([y0, y0, y0 + h, y0 + h], dtype=float)
+    lon, lat = crs_to_lonlat(*ras.pixel_to_world(cols, rows), ras.crs_wkt)
+    return float(lon.min()), float(lat.min()), float(lon.max()), float(lat.max())
+
+
+def rebuild(
+    dem_path: str,
+    out: str,
+    recipe: dict,
+    layers: dict[str, str] | None = None,
+    tile: int = 256,
+    mbtiles: str | None = None,
+    ramp: str | None = None,
+    workers: int | None = None,
+    ramp_domain: str = "auto",
+    max_cost: float = BYTE_MAX_COST,
+) -> dict:
+    """Bring `out` (and optionally `mbtiles`) up to date; returns a small report."""
+    t0 = time.perf_counter()
+    layers = dict(layers or {})
+    args = worker_args(dem_path, recipe, layers)
+    _, rasters, vectors, *_ = args
+    dem = open_cost(dem_path)
+    grid = tile_grid(dem.width, dem.height, tile)
+
+    prev = load_state(out)
+    files = {"dem": file_sha256(dem_path), **{k: file_sha256(p) for k, p in layers.items()}}
+    full = (
+        prev is None
+        or not os.path.exists(out)
+        or prev["grid"] != [dem.width, dem.height, tile]
+        or prev["recipe"] != _recipe_sha(recipe)
+        # a removed/renamed layer leaves its penalty in tiles nothing re-hashes
+        or not set(prev["files"]) <= set(files)
+    )
+
+    tiles: dict[str, list[str]] = {}
+    for name in files:
+        if not full and prev["files"].get(name) == files[name] and name in prev["tiles"]:
+            tiles[name] = prev["tiles"][name]
+        elif name == "dem":
+            tiles[name] = raster_tile_hashes(dem, grid, halo=1)
+        elif name in vectors:
+            tiles[name] = vector_tile_hashes(vectors[name], grid)
+        else:
+            tiles[name] = raster_tile_hashes(open_cost(rasters[name]), grid)
+
+    if full:
+        dirty = list(range(len(grid)))
+        _write_full(out, dem_path, recipe, layers, workers)
+    else:
+        dirty = [
+            i
+            for i in range(len(grid))
+            if any(tiles[n][i] != prev["tiles"].get(n, [None] * len(grid))[i] for n in tiles)
+        ]
+        jobs = [grid[i] for i in dirty]
+        if workers is not None and workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=args) as ex:
+                blks = list(ex.map(_window, *zip(*jobs, strict=True)))
+        else:
+            _init_worker(*args)
+            blks = [_window(*j) for j in jobs]
+        _patch_outputs(out, [(x0, y0, b) for (x0, y0, _, _), b in zip(jobs, blks, strict=True)])
+
+    ramp_sha = _palette_sha(ramp, ramp_domain, max_cost) if ramp else None
+    n_tiles = 0
+    if mbtiles:
+        from mbtiles_render import Palette, patch_mbtiles
+
+        ras = open_cost(out)
+        if full or prev.get("ramp") != ramp_sha:
+            bboxes = [ras.extent_lonlat()]
+        else:
+            bboxes = [_tile_bbox_lonlat(ras, *grid[i]) for i in dirty]
+        if bboxes:
+            pal = Palette.from_ramp(ramp, ramp_domain, max_cost)
+            n_tiles = patch_mbtiles(mbtiles, ras, bboxes, pal, max_cost=max_cost)
+
+    state = {
+        "version": STATE_VERSION,
+        "grid": [dem.width, dem.height, tile],
+        "recipe": _recipe_sha(recipe),
+        "ramp": ramp_sha,
+        "files": files,
+        "tiles": tiles,
+    }
+    with open(_state_path(out), "w") as f:
+        json.dump(state, f)
+    return {
+        "full": full,
+        "dirty_tiles": len(dirty),
+        "total_tiles": len(grid),
+        "mbtiles_tiles": n_tiles,
+        "elapsed_s": round(time.perf_counter() - t0, 3),
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Incrementally rebuild a costmap (dirty tiles).")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--area")
+    src.add_argument("--dem")
+    ap.add_argument("--out", default=None)
+    ap.add_argument("--recipe", default=RECIPE)
+    ap.add_argument("--layer", action="append", default=[], help="NAME=mask.tif|polys.geojson")
+    ap.add_argument("--tile", type=int, default=256)
+    ap.add_argument("--mbtiles", default=None)
+    ap.add_argument("--ramp", default="scripts/maps/cost_ramp_byte_v1.txt")
+    ap.add_argument("--ramp-domain", default="auto", choices=["auto", "byte", "cost"])
+    ap.add_argument("--max-cost", type=float, default=BYTE_MAX_COST)
+    ap.add_argument("--workers", type=int, default=None)
+    args = ap.parse_args(argv)
+
+    dem = args.dem or f"maps/build/{args.area}_dtm1m.tif"
+    out = args.out or f"maps/costmaps/{args.area or 'area1'}_cost.tif"
+    rep = rebuild(
+        dem,
+        out,
+        load_recipe(args.recipe),
+        _parse_layers(args.layer),
+        tile=args.tile,
+        mbtiles=args.mbtiles,
+        ramp=args.ramp if args.mbtiles else None,
+        workers=args.workers,
+        ramp_domain=args.ramp_domain,
+        max_cost=args.max_cost,
+    )
+    kind = "full build" if rep["full"] else "incremental"
+    print(
+        f"{out}: {kind}, {rep['dirty_tiles']}/{rep['total_tiles']} tiles, "
+        f"{rep['mbtiles_tiles']} MBTiles tiles, {rep['elapsed_s']}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Parallel MBTiles pyramid from a Float32 costmap (replaces translate/addo/color-relief chains).
+
+The costmap is read once into the memory-mapped .nscost cache (or an existing one is used),
+so every worker maps the same pages instead of decoding the GeoTIFF again. Each zoom picks
+the cache overview whose pixel is closest to (not larger than) the tile pixel, so low zooms
+sample mean-downsampled cost like `gdaladdo -r average` would. Tiles are coloured through a
+vectorised ramp LUT (mbtiles_render.Palette), rendered in a process pool in chunks, and
+written in batched transactions into a deduplicating map/images MBTiles: identical PNGs are
+stored once, tiles whose hash did not change are not rewritten, fully transparent tiles are
+skipped. Progress, tiles/s and dedup stats are printed and written as JSON.
+
+Usage:
+  python scripts/maps/mbtiles_build.py --cost maps/costmaps/<AOI>_cost.tif \\
+      --ramp scripts/maps/cost_ramp_byte_v1.txt \\
+      --out artifacts/maps/mbtiles/<AOI>_cost_color.mbtiles [--minzoom 10 --maxzoom 16]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from cost_cache import SUFFIX, CostCache, build_cache, cache_path_for, is_fresh
+from cost_query import CostRaster
+from mbtiles_render import (
+    BYTE_MAX_COST,
+    TILE,
+    Palette,
+    delete_tiles,
+    drop_orphan_images,
+    encode_png,
+    is_dedup,
+    open_mbtiles,
+    put_tiles,
+    render_tile,
+    tile_id,
+    tiles_for_bbox,
+)
+
+_W: dict = {}
+
+
+def native_maxzoom(ras: CostRaster) -> int:
+    """Smallest zoom whose tile pixels are no larger than the raster's pixels."""
+    w, _, e, _ = ras.extent_lonlat()
+    px_deg = (e - w) / ras.width
+    return max(0, math.ceil(math.log2(360.0 / (TILE * px_deg))))
+
+
+def overview_level(ras: CostRaster, z: int, n_levels: int) -> int:
+    w, _, e, _ = ras.extent_lonlat()
+    ratio = (360.0 / (TILE * (1 << z))) / ((e - w) / ras.width)
+    return int(min(max(math.floor(math.log2(ratio)) if ratio >= 1 else 0, 0), n_levels - 1))
+
+
+def level_raster(cache: CostCache, k: int) -> CostRaster:
+    """CostRaster over overview level k (geotransform scaled by 2^k)."""
+    if k == 0:
+        return CostRaster(
+            cache.geotransform, cache.crs_wkt, cache.nodata, cache.width, cache.height, cache=cache
+        )
+    w, h = cache.level_size(k)
+    s = float(1 << k)
+    gt = cache.geotransform
+    gt_k = (gt[0], gt[1] * s, gt[2] * s, gt[3], gt[4] * s, gt[5] * s)
+    arr = cache.window(0, 0, w, h, level=k)
+    return CostRaster.from_array(arr, gt_k, cache.crs_wkt, nodata=cache.nodata)
+
+
+def _init_worker(cache_path: str, palette: Palette):
+    cache = CostCache(cache_path)
+    _W.update(cache=cache, palette=palette, levels={}, base=level_raster(cache, 0))
+
+
+def _raster_for_zoom(z: int) -> CostRaster:
+    cache = _W["cache"]
+    k = overview_level(_W["base"], z, len(cache.levels))
+    if k not in _W["levels"]:
+        _W["levels"][k] = level_raster(cache, k)
+    return _W["levels"][k]
+
+
+def _render_chunk(chunk: list[tuple[int, int, int]]) -> list[tuple[int, int, int, bytes | None]]:
+    out = []
+    for z, x, y in chunk:
+        rgba = render_tile(_raster_for_zoom(z), z, x, y, _W["palette"])
+        out.append((z, x, y, encode_png(rgba) if rgba[..., 3].any() else None))
+    return out
+
+
+def _source_cache(cost: str, tmpdir: str) -> str:
+    """A .nscost for `cost`: itself, a fresh maps/cache copy, or a temporary one."""
+    if cost.endswith(SUFFIX):
+        return cost
+    cached = cache_path_for(cost)
+    if is_fresh(cached, cost):
+        return cached
+    tmp = os.path.join(tmpdir, os.path.basename(cached))
+    build_cache(CostRaster.open(cost), tmp)
+    return tmp
+
+
+def build_mbtiles(
+    cost: str,
+    out: str,
+    palette: Palette,
+    minzoom: int | None = None,
+    maxzoom: int | None = None,
+    workers: int | None = None,
+    chunk: int = 32,
+    batch: int = 512,
+    name: str | None = None,
+    progress: bool = True,
+) -> dict:
+    t_start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="mbtiles_build_") as tmpdir:
+        src = _source_cache(cost, tmpdir)
+        base = level_raster(CostCache(src), 0)
+        bbox = base.extent_lonlat()
+        maxzoom = native_maxzoom(base) if maxzoom is None else maxzoom
+        minzoom = max(0, maxzoom - 5) if minzoom is None else minzoom
+
+        db = open_mbtiles(out)
+        db.execute("PRAGMA synchronous=OFF")
+        existing = {}
+        if is_dedup(db):
+            rows = db.execute("SELECT zoom_level, tile_column, tile_row, tile_id FROM map")
+            existing = {(z, x, (1 << z) - 1 - r): i for z, x, r, i in rows}
+        stats = {"rendered": 0, "written": 0, "unchanged": 0, "empty": 0, "zooms": {}}
+        workers = workers or os.cpu_count() or 1
+        ex = (
+            ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(src, palette))
+            if workers > 1
+            else None
+        )
+        if ex is None:
+            _init_worker(src, palette)
+        try:
+            for z in range(minzoom, maxzoom + 1):
+                t0 = time.perf_counter()
+                keys = [(z, x, y) for x, y in tiles_for_bbox(bbox, z)]
+                chunks = [keys[i : i + chunk] for i in range(0, len(keys), chunk)]
+                results = ex.map(_render_chunk, chunks) if ex else map(_render_chunk, chunks)
+                rows, stale, zs = [], [], {"tiles": len(keys), "written": 0, "unchanged": 0}
+                for res in results:
+                    for tz, tx, ty, png in res:
+                        stats["rendered"] += 1
+                        old = existing.get((tz, tx, ty))
+                        if png is None:
+                            stats["empty"] += 1
+                            if old is not None:
+                                stale.append((tz, tx, (1 << tz) - 1 - ty))
+                        elif old is not None and old == tile_id(png):
+                            zs["unchanged"] += 1
+                        else:
+                            rows.append((tz, tx, (1 << tz) - 1 - ty, png))
+                    if len(rows) >= batch:
+                        with db:
+                            put_tiles(db, rows)
+                        zs["written"] += len(rows)
+                        rows = []
+                with db:
+                    put_tiles(db, rows)
+                    delete_tiles(db, stale)
+                zs["written"] += len(rows)
+                zs["elapsed_s"] = round(time.perf_counter() - t0, 3)
+                zs["tiles_per_s"] = round(len(keys) / max(zs["elapsed_s"], 1e-9), 1)
+                stats["written"] += zs["written"]
+                stats["unchanged"] += zs["unchanged"]
+                stats["zooms"][str(z)] = zs
+                if progress:
+                    print(
+                        f"z{z}: {len(keys)} tiles, {zs['written']} written, "
+                        f"{zs['unchanged']} unchanged ({zs['tiles_per_s']} tiles/s)",
+                        flush=True,
+                    )
+        finally:
+            if ex is not None:
+                ex.shutdown()
+
+        with db:
+            drop_orphan_images(db)
+            meta = {
+                "name": name or os.path.splitext(os.path.basename(out))[0],
+                "type": "overlay",
+                "version": "1.1",
+                "format": "png",
+                "bounds": ",".join(f"{v:.8f}" for v in bbox),
+                "center": f"{(bbox[0] + bbox[2]) / 2:.8f},{(bbox[1] + bbox[3]) / 2:.8f},{minzoom}",
+                "minzoom": str(minzoom),
+                "maxzoom": str(maxzoom),
+            }
+            db.executemany(
+                "INSERT OR REPLACE INTO metadata (name, value) VALUES (?, ?)", meta.items()
+            )
+        n_map = db.execute("SELECT count(*) FROM tiles").fetchone()[0]
+        n_images = (
+            db.execute("SELECT count(*) FROM images").fetchone()[0] if is_dedup(db) else n_map
+        )
+        db.close()
+
+    elapsed = time.perf_counter() - t_start
+    stats.update(
+        {
+            "out": out,
+            "minzoom": minzoom,
+            "maxzoom": maxzoom,
+            "tiles": n_map,
+            "unique_images": n_images,
+            "dedup_ratio": round(n_map / n_images, 3) if n_images else 0.0,
+            "elapsed_s": round(elapsed, 3),
+            "tiles_per_s": round(stats["rendered"] / max(elapsed, 1e-9), 1),
+        }
+    )
+    return stats
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Render an MBTiles pyramid from a costmap.")
+    ap.add_argument("--cost", required=True, help="Float32 costmap (.tif/.vrt or .nscost)")
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--ramp", default="scripts/maps/cost_ramp_byte_v1.txt")
+    ap.add_argument("--ramp-domain", default="auto", choices=["auto", "byte", "cost"])
+    ap.add_argument("--max-cost", type=float, default=BYTE_MAX_COST)
+    ap.add_argument("--minzoom", type=int, default=None)
+    ap.add_argument("--maxzoom", type=int, default=None, help="default: native resolution")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--json-out", default=None, help="default artifacts/perf/mbtiles_<name>.json")
+    args = ap.parse_args(argv)
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    pal = Palette.from_ramp(args.ramp, args.ramp_domain, args.max_cost)
+    stats = build_mbtiles(
+        args.cost, args.out, pal, args.minzoom, args.maxzoom, workers=args.workers
+    )
+    name = os.path.splitext(os.path.basename(args.out))[0]
+    json_out = args.json_out or f"artifacts/perf/mbtiles_{name}.json"
+    os.makedirs(os.path.dirname(json_out) or ".", exist_ok=True)
+    with open(json_out, "w") as f:
+        json.dump(stats, f, indent=2)
+    print(
+        f"Wrote {args.out}: {stats['tiles']} tiles ({stats['unique_images']} unique), "
+        f"{stats['tiles_per_s']} tiles/s in {stats['elapsed_s']}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
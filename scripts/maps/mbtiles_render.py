@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Render Web-Mercator PNG tiles straight from a cost raster and patch them into an MBTiles.
+
+A tile is rendered by sampling the raster (nearest, like `gdalwarp -r near`) at the 256x256
+pixel centres of the XYZ tile, mapping cost to Byte (0 = nodata, [0, 1500] -> [1, 255], as
+in build_cost_from_osm.sh) and colouring through a gdaldem-style ramp LUT; cost-domain
+ramps (cost_ramp_<AOI>.txt) are looked up on cost directly. Lower zooms are rendered from
+the raster as well rather than averaged from children.
+
+Usage:
+  python scripts/maps/mbtiles_render.py --cost maps/costmaps/<AREA>_cost.tif \\
+      --mbtiles artifacts/maps/mbtiles/<AREA>_cost_color.mbtiles \\
+      --ramp scripts/maps/cost_ramp_byte_v1.txt [--bbox W,S,E,N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import math
+import os
+import sqlite3
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+import numpy as np
+from cost_query import open_cost
+from PIL import Image
+
+TILE = 256
+BYTE_MAX_COST = 1500.0
+
+
+# ---- colour ----
+def read_ramp(path: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(values, RGBA colours, nodata RGBA) from a gdaldem color-relief text file."""
+    vals, cols, nv = [], [], np.zeros(4, dtype=np.float64)
+    with open(path) as f:
+        for line in f:
+            parts = line.split("#", 1)[0].split()
+            if len(parts) < 4:
+                continue
+            rgba = [float(p) for p in parts[1:5]] + ([255.0] if len(parts) == 4 else [])
+            if parts[0].lower() == "nv":
+                nv = np.asarray(rgba)
+            else:
+                vals.append(float(parts[0]))
+                cols.append(rgba)
+    order = np.argsort(vals, kind="stable")
+    return np.asarray(vals)[order], np.asarray(cols)[order], nv
+
+
+def byte_lut(path: str) -> np.ndarray:
+    """(256, 4) uint8 LUT for a Byte-domain ramp; index 0 is nodata."""
+    vals, cols, nv = read_ramp(path)
+    x = np.arange(256, dtype=np.float64)
+    lut = np.stack([np.interp(x, vals, cols[:, k]) for k in range(4)], axis=1)
+    lut[0] = nv
+    return np.rint(lut).astype(np.uint8)
+
+
+def cost_lut(path: str, n: int = 4096) -> tuple[np.ndarray, float, float, np.ndarray]:
+    """(n, 4) uint8 LUT spanning a cost-domain ramp's value range, plus (lo, hi, nodata)."""
+    vals, cols, nv = read_ramp(path)
+    x = np.linspace(vals[0], vals[-1], n)
+    lut = np.stack([np.interp(x, vals, cols[:, k]) for k in range(4)], axis=1)
+    return np.rint(lut).astype(np.uint8), float(vals[0]), float(vals[-1]), np.rint(nv)
+
+
+@dataclass(frozen=True)
+class Palette:
+    """Cost -> RGBA. "byte": scale to 1..255 then a Byte ramp; "cost": ramp on cost values."""
+
+    lut: np.ndarray
+    domain: str = "byte"
+    lo: float = 0.0
+    hi: float = 255.0
+    nodata: tuple = (0, 0, 0, 0)
+    max_cost: float = BYTE_MAX_COST
+
+    @classmethod
+    def from_ramp(cls, path: str, domain: str = "auto", max_cost: float = BYTE_MAX_COST):
+        if domain == "auto":
+            domain = "byte" if "byte" in os.path.basename(path) else "cost"
+        if domain == "byte":
+            return cls(byte_lut(path), "byte", max_cost=max_cost)
+        lut, lo, hi, nv = cost_lut(path)
+        return cls(lut, "cost", lo, hi, tuple(int(v) for v in nv), max_cost)
+
+    def colorize(self, cost: np.ndarray) -> np.ndarray:
+        if self.domain == "byte":
+            return self.lut[cost_to_byte(cost, self.max_cost)]
+        c = np.asarray(cost, dtype=np.float64)
+        ok = np.isfinite(c)
+        span = max(self.hi - self.lo, 1e-12)
+        idx = np.rint(
+            (np.clip(np.where(ok, c, self.lo), self.lo, self.hi) - self.lo)
+            / span
+            * (len(self.lut) - 1)
+        )
+        out = self.lut[idx.astype(np.int64)]
+        out[~ok] = self.nodata
+        return out
+
+
+def cost_to_byte(cost: np.ndarray, max_cost: float = BYTE_MAX_COST) -> np.ndarray:
+    """NaN -> 0, [0, max_cost] -> [1, 255] (clipped), matching the parity checks."""
+    c = np.asarray(cost, dtype=np.float64)
+    ok = np.isfinite(c)
+    dn = 1 + np.rint(np.clip(np.where(ok, c, 0.0), 0.0, max_cost) / max_cost * 254.0)
+    return np.where(ok, dn, 0).astype(np.uint8)
+
+
+# ---- tile math ----
+def lonlat_to_tile(lon: float, lat: float, z: int) -> tuple[int, int]:
+    n = 1 << z
+    lat = max(min(lat, 85.05112878), -85.05112878)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tiles_for_bbox(bbox: tuple[float, float, float, float], z: int) -> Iterable[tuple[int, int]]:
+    """XYZ (x, y) of every tile at zoom z touching lon/lat bbox (W, S, E, N)."""
+    x0, y0 = lonlat_to_tile(bbox[0], bbox[3], z)
+    x1, y1 = lonlat_to_tile(bbox[2], bbox[1], z)
+    for y in range(y0, y1 + 1):
+        for x in range(x0, x1 + 1):
+            yield x, y
+
+
+def tile_pixel_lonlat(z: int, x: int, y: int, size: int = TILE) -> tuple[np.ndarray, np.ndarray]:
+    n = float(1 << z)
+    f = (np.arange(size) + 0.5) / size
+    lon = (x + f) / n * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1.0 - 2.0 * (y + f) / n))))
+    return np.broadcast_to(lon, (size, size)), np.broadcast_to(lat[:, None], (size, size))
+
+
+def render_tile(ras, z: int, x: int, y: int, lut, max_cost=BYTE_MAX_COST):
+    """(256, 256, 4) uint8 RGBA for XYZ tile (z, x, y) of a cost_query.CostRaster.
+
+    `lut` is a Palette or a (256, 4) Byte-domain LUT.
+    """
+    lon, lat = tile_pixel_lonlat(z, x, y)
+    cost = ras.sample_lonlat(lon.ravel(), lat.ravel()).reshape(lon.shape)
+    if isinstance(lut, Palette):
+        return lut.colorize(cost)
+    return lut[cost_to_byte(cost, max_cost)]
+
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    Image.fromarray(rgba, "RGBA").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+# ---- MBTiles ----
+DEDUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (name text, value text);
+CREATE UNIQUE INDEX IF NOT EXISTS name ON metadata (name);
+CREATE TABLE IF NOT EXISTS map (
+    zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_id TEXT);
+CREATE UNIQUE INDEX IF NOT EXISTS map_index ON map (zoom_level, tile_column, tile_row);
+CREATE TABLE IF NOT EXISTS images (tile_data BLOB, tile_id TEXT);
+CREATE UNIQUE INDEX IF NOT EXISTS images_id ON images (tile_id);
+CREATE VIEW IF NOT EXISTS tiles AS
+    SELECT map.zoom_level AS zoom_level, map.tile_column AS tile_column,
+           map.tile_row AS tile_row, images.tile_data AS tile_data
+    FROM map JOIN images ON images.tile_id = map.tile_id;
+"""
+
+
+def tile_id(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def open_mbtiles(path: str) -> sqlite3.Connection:
+    """Open (creating with the deduplicating map/images schema if new) an MBTiles file."""
+    db = sqlite3.connect(path)
+    if db.execute("SELECT 1 FROM sqlite_master WHERE name='tiles'").fetchone() is None:
+        db.executescript(DEDUP_SCHEMA)
+    return db
+
+
+def is_dedup(db: sqlite3.Connection) -> bool:
+    row = db.execute("SELECT type FROM sqlite_master WHERE name='tiles'").fetchone()
+    return row is not None and row[0] == "view"
+
+
+def put_tiles(db: sqlite3.Connection, rows: list[tuple[int, int, int, bytes]]) -> None:
+    """Upsert (z, x, tms_row, png) rows; identical images are stored once in dedup files."""
+    if not is_dedup(db):
+        db.executemany(
+            "INSERT OR REPLACE INTO tiles (zoom_level, tile_column, tile_row, tile_data) "
+            "VALUES (?, ?, ?, ?)",
+            [(z, x, r, sqlite3.Binary(d)) for z, x, r, d in rows],
+        )
+        return
+    ids = [tile_id(d) for *_, d in rows]
+    db.executemany(
+        "INSERT OR IGNORE INTO images (tile_data, tile_id) VALUES (?, ?)",
+        [(sqlite3.Binary(d), i) for (*_, d), i in zip(rows, ids, strict=True)],
+    )
+    db.executemany(
+        "INSERT OR REPLACE INTO map (zoom_level, tile_column, tile_row, tile_id) "
+        "VALUES (?, ?, ?, ?)",
+        [(z, x, r, i) for (z, x, r, _), i in zip(rows, ids, strict=True)],
+    )
+
+
+def delete_tiles(db: sqlite3.Connection, keys: list[tuple[int, int, int]]) -> None:
+    """Delete (z, x, tms_row) tiles from either schema."""
+    table = "map" if is_dedup(db) else "tiles"
+    db.executemany(f"DELETE FROM {table} WHERE zoom_level=? AND tile_column=? AND tile_row=?", keys)
+
+
+def drop_orphan_images(db: sqlite3.Connection) -> int:
+    if not is_dedup(db):
+        return 0
+    cur = db.execute("DELETE FROM images WHERE tile_id NOT IN (SELECT tile_id FROM map)")
+    return cur.rowcount
+
+
+def mbtiles_zooms(db: sqlite3.Connection) -> list[int]:
+    """Zooms present in `tiles`, else the metadata minzoom..maxzoom range."""
+    zooms = [r[0] for r in db.execute("SELECT DISTINCT zoom_level FROM tiles ORDER BY 1")]
+    if zooms:
+        return zooms
+    meta = dict(db.execute("SELECT name, value FROM metadata WHERE name IN ('minzoom','maxzoom')"))
+    if len(meta) < 2:
+        return []
+    return list(range(int(meta["minzoom"]), int(meta["maxzoom"]) + 1))
+
+
+def patch_mbtiles(
+    path: str,
+    ras,
+    bboxes: Iterable[tuple[float, float, float, float]],
+    lut: Palette | np.ndarray,
+    zooms: Iterable[int] | None = None,
+    max_cost: float = BYTE_MAX_COST,
+) -> int:
+    """Re-render every tile touching any lon/lat bbox at the MBTiles' zooms (once each).
+
+    Returns the number of tiles written.
+    """
+    db = sqlite3.connect(path)
+    try:
+        zooms = list(zooms) if zooms is not None else mbtiles_zooms(db)
+        keys = {(z, x, y) for bb in bboxes for z in zooms for x, y in tiles_for_bbox(bb, z)}
+        rows = []
+        for z, x, y in sorted(keys):
+            png = encode_png(render_tile(ras, z, x, y, lut, max_cost))
+            rows.append((z, x, (1 << z) - 1 - y, png))
+        with db:
+            put_tiles(db, rows)
+            drop_orphan_images(db)
+        return len(rows)
+    finally:
+        db.close()
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Re-render MBTiles tiles from a cost raster.")
+    ap.add_argument("--cost", required=True)
+    ap.add_argument("--mbtiles", required=True)
+    ap.add_argument("--ramp", default="scripts/maps/cost_ramp_byte_v1.txt")
+    ap.add_argument("--bbox", default=None, help="W,S,E,N (default: raster extent)")
+    ap.add_argument("--ramp-domain", default="auto", choices=["auto", "byte", "cost"])
+    ap.add_argument("--max-cost", type=float, default=BYTE_MAX_COST)
+    args = ap.parse_args(argv)
+
+    ras = open_cost(args.cost)
+    bbox = tuple(map(float, args.bbox.split(","))) if args.bbox else ras.extent_lonlat()
+    pal = Palette.from_ramp(args.ramp, args.ramp_domain, args.max_cost)
+    n = patch_mbtiles(args.mbtiles, ras, [bbox], pal)
+    print(f"Patched {n} tiles in {args.mbtiles}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Batched path-cost and corridor statistics over a cost raster (GDAL, array or .nscost).
+
+Many polylines are handled as one ragged batch: every segment of every path is densified
+at `step_px` (midpoint samples, so each sample carries ds = segment length / n), all
+samples are gathered from the raster in one call, and per-path aggregates come from
+bincount/maximum.at. With `corridor_px` > 0 each sample also looks at the disk of pixel
+offsets around it, giving corridor max/mean/nodata exposure for a buffered route.
+
+Coordinates may be lon/lat, raster-CRS world or pixel (col, row). Lengths are metres
+(haversine when the raster is geographic); integrated cost is sum(cost * ds_m) over valid
+samples.
+
+Usage:
+  python scripts/maps/path_cost.py --area <AREA> --paths routes.geojson [--corridor-m 10]
+  python scripts/maps/path_cost.py --cost maps/cache/<AREA>_cost.nscost --paths routes.csv
+(CSV input columns: path_id, lat, lon in vertex order.)
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import time
+from collections.abc import Sequence
+
+import numpy as np
+from cost_query import _floats, is_wgs84, lonlat_to_crs, open_cost
+
+EARTH_R = 6371008.8
+STATS = (
+    "length_m",
+    "n_samples",
+    "integrated_cost",
+    "mean_cost",
+    "max_cost",
+    "nodata_frac",
+    "corridor_max",
+    "corridor_mean",
+    "corridor_nodata_frac",
+)
+
+
+def _haversine(lon0, lat0, lon1, lat1) -> np.ndarray:
+    p0, p1 = np.radians(lat0), np.radians(lat1)
+    dphi, dlam = p1 - p0, np.radians(lon1 - lon0)
+    a = np.sin(dphi / 2) ** 2 + np.cos(p0) * np.cos(p1) * np.sin(dlam / 2) ** 2
+    return 2 * EARTH_R * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def disk_offsets(radius_px: float) -> tuple[np.ndarray, np.ndarray]:
+    r = int(np.floor(radius_px))
+    dy, dx = np.mgrid[-r : r + 1, -r : r + 1]
+    keep = dx * dx + dy * dy <= radius_px * radius_px
+    return dx[keep], dy[keep]
+
+
+def _ragged(paths: Sequence[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """Concatenated (V, 2) vertices and per-path vertex offsets (len n_paths + 1)."""
+    arrs = [np.asarray(p, dtype=np.float64).reshape(-1, 2) for p in paths]
+    offs = np.zeros(len(arrs) + 1, dtype=np.int64)
+    offs[1:] = np.cumsum([len(a) for a in arrs])
+    verts = np.concatenate(arrs) if arrs else np.zeros((0, 2))
+    return verts, offs
+
+
+def path_stats(
+    ras,
+    paths: Sequence[np.ndarray],
+    coords: str = "lonlat",
+    step_px: float = 0.5,
+    corridor_px: float = 0.0,
+    chunk: int = 1 << 21,
+) -> dict[str, np.ndarray]:
+    """Per-path aggregates (arrays of length len(paths)); see STATS for the keys.
+
+    `paths` are (N_i, 2) vertex arrays as (lon, lat), (x, y) or (col, row) per `coords`.
+    """
+    verts, offs = _ragged(paths)
+    n_paths = len(offs) - 1
+    if coords == "lonlat":
+        wx, wy = lonlat_to_crs(verts[:, 0], verts[:, 1], ras.crs_wkt)
+        col, row = ras.world_to_pixel(wx, wy)
+    elif coords == "world":
+        wx, wy = verts[:, 0], verts[:, 1]
+        col, row = ras.world_to_pixel(wx, wy)
+    elif coords == "pixel":
+        col, row = verts[:, 0], verts[:, 1]
+        wx, wy = ras.pixel_to_world(col, row)
+    else:
+        raise ValueError(f"coords must be lonlat|world|pixel, got {coords!r}")
+
+    # segments: every vertex except the last of each path starts one (paths with fewer
+    # than 2 vertices have none)
+    counts = np.diff(offs)
+    k_in_path = np.arange(len(verts)) - np.repeat(offs[:-1], counts)
+    s0 = np.flatnonzero(k_in_path < np.repeat(counts - 1, counts))
+    s1 = s0 + 1
+    seg_path = np.repeat(np.arange(n_paths), np.maximum(counts - 1, 0))
+    if is_wgs84(ras.crs_wkt):
+        seg_m = _haversine(wx[s0], wy[s0], wx[s1], wy[s1])
+    else:
+        seg_m = np.hypot(wx[s1] - wx[s0], wy[s1] - wy[s0])
+    seg_px = np.hypot(col[s1] - col[s0], row[s1] - row[s0])
+    n_seg = np.maximum(np.ceil(seg_px / step_px).astype(np.int64), 1)
+
+    # midpoint samples of every segment in one ragged expansion
+    sid = np.repeat(np.arange(len(s0)), n_seg)
+    k = np.arange(len(sid)) - np.repeat(np.cumsum(n_seg) - n_seg, n_seg)
+    t = (k + 0.5) / n_seg[sid]
+    sc = col[s0][sid] + t * (col[s1] - col[s0])[sid]
+    sr = row[s0][sid] + t * (row[s1] - row[s0])[sid]
+    ds = (seg_m / n_seg)[sid]
+    pid = seg_path[sid]
+    good = np.isfinite(sc) & np.isfinite(sr)
+    ic = np.where(good, np.floor(np.where(good, sc, 0)), -1).astype(np.int64)
+    ir = np.where(good, np.floor(np.where(good, sr, 0)), -1).astype(np.int64)
+
+    cost = ras.sample_pixels(ic, ir)
+    valid = np.isfinite(cost)
+    c0 = np.where(valid, cost, 0.0)
+
+    length = np.bincount(pid, weights=ds, minlength=n_paths)
+    valid_len = np.bincount(pid, weights=ds * valid, minlength=n_paths)
+    integ = np.bincount(pid, weights=c0 * ds, minlength=n_paths)
+    mx = np.full(n_paths, -np.inf)
+    np.maximum.at(mx, pid[valid], cost[valid])
+    out = {
+        "length_m": length,
+        "n_samples": np.bincount(pid, minlength=n_paths),
+        "integrated_cost": integ,
+        "mean_cost": np.divide(integ, valid_len, out=np.full(n_paths, np.nan), where=valid_len > 0),
+        "max_cost": np.where(np.isfinite(mx), mx, np.nan),
+        "nodata_frac": np.divide(
+            length - valid_len, length, out=np.zeros(n_paths), where=length > 0
+        ),
+    }
+
+    if corridor_px > 0:
+        dx, dy = disk_offsets(corridor_px)
+        cmax = np.full(n_paths, -np.inf)
+        csum = np.zeros(n_paths)
+        cval = np.zeros(n_paths)
+        ctot = np.zeros(n_paths)
+        step = max(1, chunk // len(dx))
+        for a in range(0, len(ic), step):
+            b = min(a + step, len(ic))
+            cc = ras.sample_pixels((ic[a:b, None] + dx).ravel(), (ir[a:b, None] + dy).ravel())
+            cc = cc.reshape(b - a, len(dx))
+            ok = np.isfinite(cc)
+            p = pid[a:b]
+            w = ds[a:b]
+            row_max = np.where(ok, cc, -np.inf).max(axis=1)
+            np.maximum.at(cmax, p, row_max)
+            csum += np.bincount(p, weights=w * np.where(ok, cc, 0.0).sum(axis=1), minlength=n_paths)
+            cval += np.bincount(p, weights=w * ok.sum(axis=1), minlength=n_paths)
+            ctot += np.bincount(p, weights=w * len(dx), minlength=n_paths)
+        out["corridor_max"] = np.where(np.isfinite(cmax), cmax, np.nan)
+        out["corridor_mean"] = np.divide(csum, cval, out=np.full(n_paths, np.nan), where=cval > 0)
+        out["corridor_nodata_frac"] = np.divide(
+            ctot - cval, ctot, out=np.zeros(n_paths), where=ctot > 0
+        )
+    return out
+
+
+# ---- I/O ----
+def read_paths(path: str) -> tuple[list[str], list[np.ndarray]]:
+    """(ids, lon/lat vertex arrays) from GeoJSON LineStrings or a path_id,lat,lon CSV."""
+    if path.lower().endswith((".geojson", ".json")):
+        with open(path) as f:
+            gj = json.load(f)
+        feats = gj["features"] if gj.get("type") == "FeatureCollection" else [gj]
+        ids, out = [], []
+        for i, ft in enumerate(feats):
+            geom = ft.get("geometry", ft) or {}
+            lines = {
+                "LineString": [geom.get("coordinates")],
+                "MultiLineString": geom.get("coordinates"),
+            }
+            for j, line in enumerate(lines.get(geom.get("type"), None) or []):
+                pid = str((ft.get("properties") or {}).get("id", i))
+                ids.append(pid if j == 0 else f"{pid}.{j}")
+                xy = np.asarray(line if line is not None else [], dtype=float)
+                out.append(xy[:, :2] if xy.ndim == 2 else np.zeros((0, 2)))  # empty line
+        return ids, out
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    if not rows:
+        return [], []
+    key = {k.strip().lower(): k for k in rows[0]}
+    pids = [r[key["path_id"]] for r in rows]
+    lon = _floats([r[key["lon"]] for r in rows])
+    lat = _floats([r[key["lat"]] for r in rows])
+    ids, out, start = [], [], 0
+    for i in range(1, len(rows) + 1):
+        if i == len(rows) or pids[i] != pids[start]:
+            ids.append(pids[start])
+            out.append(np.column_stack([lon[start:i], lat[start:i]]))
+            start = i
+    return ids, out
+
+
+def write_stats_csv(path: str, ids: list[str], stats: dict[str, np.ndarray]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    keys = [k for k in STATS if k in stats]
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["path_id", *keys])
+        for i, pid in enumerate(ids):
+            w.writerow([pid, *(f"{float(stats[k][i]):.6g}" for k in keys)])
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Per-path cost and corridor statistics.")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--area", help="AOI -> maps/costmaps/<AREA>_cost.tif (cache preferred)")
+    src.add_argument("--cost")
+    ap.add_argument("--paths", required=True, help="GeoJSON LineStrings or path_id,lat,lon CSV")
+    ap.add_argument("--out", default=None, help="default maps/reports/<stem>_path_cost.csv")
+    ap.add_argument("--step-px", type=float, default=0.5)
+    ap.add_argument("--corridor-m", type=float, default=0.0, help="buffer radius in metres")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    ras = open_cost(args.cost or f"maps/costmaps/{args.area}_cost.tif")
+    ids, paths = read_paths(args.paths)
+    px_m = abs(ras.geotransform[1]) * (111320.0 if is_wgs84(ras.crs_wkt) else 1.0)
+    stats = path_stats(ras, paths, "lonlat", args.step_px, args.corridor_m / px_m)
+    stem = os.path.splitext(os.path.basename(args.paths))[0]
+    out = args.out or f"maps/reports/{stem}_path_cost.csv"
+    write_stats_csv(out, ids, stats)
+    print(f"Wrote {out} ({len(ids)} paths, {time.perf_counter() - t0:.3f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
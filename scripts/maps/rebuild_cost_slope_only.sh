@@ -29,5 +29,5 @@ gdallocationinfo -wgs84 -valonly "$COST" -79.3839 43.6535 || true
 
 # 4) Make 5 inside points and query them
 python scripts/maps/make_inside_points.py "$AREA" 5
-python scripts/maps/csv_cost_query_cli.py "$AREA" "maps/reports/${AREA}_inside_latlon.csv"
+python scripts/maps/cost_query.py --area "$AREA" --in "maps/reports/${AREA}_inside_latlon.csv"
 column -s, -t "maps/reports/${AREA}_cost_query.csv" | sed -n '1,12p'
@@ -1,11 +1,28 @@
 #!/usr/bin/env bash
 set -euo pipefail
-NAME="ns-mbtiles-8001"; PORT=8001
+# Native asyncio server (same /services/<name>/tiles/{z}/{x}/{y} routes as mbtileserver).
+# Starts detached like the old `docker run -d`; `stop` kills it, `fg` runs in the foreground.
+# Binds 127.0.0.1 by default; HOST=0.0.0.0 exposes it on all interfaces as docker -p did.
+PORT="${PORT:-8001}"
+HOST="${HOST:-127.0.0.1}"
 DIR1="$(pwd)/artifacts/maps/mbtiles"
 DIR2="$(pwd)/maps_v2/mbtiles"
-docker rm -f "$NAME" 2>/dev/null || true
-docker run -d --name "$NAME" -p ${PORT}:8000 \
-  -e TILE_DIR="/tiles1,/tiles2" \
-  -v "$DIR1:/tiles1:ro" -v "$DIR2:/tiles2:ro" \
-  ghcr.io/consbio/mbtileserver:latest
-echo "→ Services: http://127.0.0.1:${PORT}/services"
+PIDFILE=.tmp/mbtiles.pid
+LOG=.tmp/mbtiles.log
+mkdir -p .tmp
+
+cmd=${1:-start}
+[[ -f "$PIDFILE" ]] && kill "$(cat "$PIDFILE")" 2>/dev/null || true
+rm -f "$PIDFILE"
+if [[ "${cmd}" == "stop" ]]; then
+  echo "stopped"; exit 0
+fi
+
+args=(--host "$HOST" --port "$PORT" --dir "$DIR1" --dir "$DIR2" --viewer viewer)
+if [[ "${cmd}" == "fg" ]]; then
+  exec python3 scripts/maps/tile_server.py "${args[@]}"
+fi
+
+nohup python3 scripts/maps/tile_server.py "${args[@]}" >"$LOG" 2>&1 &
+echo $! > "$PIDFILE"
+echo "→ Services: http://${HOST}:${PORT}/services (pid $(cat "$PIDFILE"), log $LOG)"
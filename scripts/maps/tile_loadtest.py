@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Load test for tile_server.py (or any /services/<name>/tiles/{z}/{x}/{y} server).
+
+Tile addresses are sampled from the .mbtiles itself, so every request is a real hit.
+--conns keep-alive connections issue requests back to back for the duration; per-request latency
+is recorded and tiles/s plus p50/p90/p99 are reported. --revalidate sends If-None-Match
+with the ETag from the first response so the 304 path can be measured too.
+
+Usage:
+  python scripts/maps/tile_loadtest.py --mbtiles artifacts/maps/mbtiles/<AOI>_cost_color.mbtiles \\
+      [--url http://127.0.0.1:8001] [--conns 32] [--seconds 10] [--json-out ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import numpy as np
+
+
+def sample_tiles(mbtiles: str, n: int = 2000, seed: int = 0) -> list[tuple[int, int, int]]:
+    """Up to n XYZ (z, x, y) addresses present in the file."""
+    with sqlite3.connect(f"file:{os.path.abspath(mbtiles)}?mode=ro", uri=True) as db:
+        rows = db.execute("SELECT zoom_level, tile_column, tile_row FROM tiles").fetchall()
+    random.Random(seed).shuffle(rows)
+    return [(z, x, (1 << z) - 1 - r) for z, x, r in rows[:n]]
+
+
+async def _request(reader, writer, host: str, path: str, etag: str | None):
+    hdr = f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept-Encoding: gzip\r\n"
+    if etag:
+        hdr += f"If-None-Match: {etag}\r\n"
+    writer.write((hdr + "\r\n").encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length, tag = 0, None
+    while (h := await reader.readline()) not in (b"\r\n", b""):
+        k, _, v = h.decode("latin-1").partition(":")
+        k = k.strip().lower()
+        if k == "content-length":
+            length = int(v)
+        elif k == "etag":
+            tag = v.strip()
+    if length:
+        await reader.readexactly(length)
+    return status, tag
+
+
+async def run_load(
+    url: str,
+    service: str,
+    tiles: list[tuple[int, int, int]],
+    conns: int = 32,
+    seconds: float = 10.0,
+    revalidate: bool = False,
+    ext: str = "png",
+) -> dict:
+    u = urlsplit(url)
+    host, port = u.hostname or "127.0.0.1", u.port or 80
+    lat: list[float] = []
+    status_counts: dict[int, int] = {}
+    etags: dict[tuple, str] = {}
+    deadline = time.perf_counter() + seconds
+
+    async def worker(k: int):
+        reader, writer = await asyncio.open_connection(host, port)
+        i = k
+        try:
+            while time.perf_counter() < deadline:
+                z, x, y = tiles[i % len(tiles)]
+                i += conns
+                path = f"/services/{service}/tiles/{z}/{x}/{y}.{ext}"
+                t0 = time.perf_counter()
+                status, tag = await _request(
+                    reader, writer, f"{host}:{port}", path, etags.get((z, x, y))
+                )
+                lat.append(time.perf_counter() - t0)
+                status_counts[status] = status_counts.get(status, 0) + 1
+                if revalidate and tag:
+                    etags[(z, x, y)] = tag
+        finally:
+            writer.close()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(k) for k in range(conns)))
+    wall = time.perf_counter() - t0
+    ms = np.asarray(lat) * 1e3
+    return {
+        "service": service,
+        "conns": conns,
+        "requests": len(lat),
+        "seconds": round(wall, 3),
+        "tiles_per_s": round(len(lat) / wall, 1) if wall > 0 else 0.0,
+        "p50_ms": round(float(np.percentile(ms, 50)), 3) if len(ms) else None,
+        "p90_ms": round(float(np.percentile(ms, 90)), 3) if len(ms) else None,
+        "p99_ms": round(float(np.percentile(ms, 99)), 3) if len(ms) else None,
+        "status": {str(k): v for k, v in sorted(status_counts.items())},
+        "revalidate": revalidate,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Measure tiles/s and latency of a tile server.")
+    ap.add_argument("--mbtiles", required=True, help="file to sample tile addresses from")
+    ap.add_argument("--service", default=None, help="default: mbtiles file stem")
+    ap.add_argument("--url", default="http://127.0.0.1:8001")
+    ap.add_argument("--conns", type=int, default=32)
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--tiles", type=int, default=2000, help="distinct tiles to cycle through")
+    ap.add_argument("--revalidate", action="store_true", help="send If-None-Match (304 path)")
+    ap.add_argument("--json-out", default="artifacts/perf/tile_server_load.json")
+    args = ap.parse_args(argv)
+
+    tiles = sample_tiles(args.mbtiles, args.tiles)
+    if not tiles:
+        raise SystemExit(f"no tiles in {args.mbtiles}")
+    service = args.service or Path(args.mbtiles).stem
+    res = asyncio.run(run_load(args.url, service, tiles, args.conns, args.seconds, args.revalidate))
+    os.makedirs(os.path.dirname(args.json_out) or ".", exist_ok=True)
+    with open(args.json_out, "w") as f:
+        json.dump(res, f, indent=2)
+    print(
+        f"{res['requests']} req in {res['seconds']}s -> {res['tiles_per_s']} tiles/s, "
+        f"p50 {res['p50_ms']} ms, p99 {res['p99_ms']} ms, status {res['status']}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Vectorised MBTiles <-> raster parity check.
+
+For every zoom, N random tile pixels inside the MBTiles bounds are drawn at once. Points
+are grouped by tile so each PNG is fetched and decoded exactly once, pixel values are
+gathered with one fancy-index per tile, and the reference values come from a few
+strip-wise windowed reads of the raster (Float32 cost mapped to Byte as 0 = nodata,
+[0, 1500] -> [1, 255]; or an 8-bit raster compared as-is with --byte-raster).
+
+A point passes when |tile - expected| <= tol; tile 0 vs expected 1 (the 0->1 mapping
+quirk of the 8-bit VRT) also passes. The report has per-zoom pass rates with a Wilson 95%
+lower bound, error stats and tile counts.
+
+Usage:
+  python scripts/maps/tile_parity.py --mbtiles artifacts/maps/mbtiles/<AOI>_cost_gray.mbtiles \\
+      --cost maps/costmaps/<AOI>_cost.tif [--n 100000] [--zooms 12,13,14] [--tol 2]
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import math
+import os
+import sqlite3
+import time
+
+import numpy as np
+from cost_query import lonlat_to_crs, open_cost
+from mbtiles_render import BYTE_MAX_COST, TILE, cost_to_byte, mbtiles_zooms
+from PIL import Image
+
+MISSING = -1
+
+
+def read_bounds(db: sqlite3.Connection) -> tuple[float, float, float, float]:
+    row = db.execute("SELECT value FROM metadata WHERE name='bounds'").fetchone()
+    if not row or not row[0]:
+        raise RuntimeError("MBTiles has no 'bounds' metadata")
+    w, s, e, n = map(float, row[0].split(","))
+    return w, s, e, n
+
+
+def sample_tile_pixels(bounds, z: int, n: int, rng: np.random.Generator):
+    """n random (x, y, px, py) tile pixels whose footprint centre lies inside bounds."""
+    lon = rng.uniform(bounds[0], bounds[2], n)
+    lat = rng.uniform(bounds[1], bounds[3], n)
+    scale = float(1 << z)
+    fx = (lon + 180.0) / 360.0 * scale
+    fy = (1.0 - np.arcsinh(np.tan(np.radians(lat))) / np.pi) / 2.0 * scale
+    fx = np.clip(fx, 0, scale - 1e-9)
+    fy = np.clip(fy, 0, scale - 1e-9)
+    x, y = fx.astype(np.int64), fy.astype(np.int64)
+    px = ((fx - x) * TILE).astype(np.int64)
+    py = ((fy - y) * TILE).astype(np.int64)
+    return x, y, px, py
+
+
+def pixel_lonlat(z: int, x, y, px, py) -> tuple[np.ndarray, np.ndarray]:
+    scale = float(1 << z)
+    u = (x + (px + 0.5) / TILE) / scale
+    v = (y + (py + 0.5) / TILE) / scale
+    return u * 360.0 - 180.0, np.degrees(np.arctan(np.sinh(np.pi * (1.0 - 2.0 * v))))
+
+
+def _decode(data: bytes, band: str) -> np.ndarray:
+    img = Image.open(io.BytesIO(data))
+    if band == "L":
+        return np.asarray(img.convert("L"))
+    return np.asarray(img.convert("RGBA"))[..., "RGBA".index(band)]
+
+
+def gather_tile_pixels(db, z: int, x, y, px, py, band: str = "L") -> tuple[np.ndarray, int]:
+    """Pixel values (MISSING where the tile is absent) and the number of tiles decoded."""
+    out = np.full(x.shape, MISSING, dtype=np.int16)
+    keys = x * (1 << z) + y
+    uniq, inv = np.unique(keys, return_inverse=True)
+    order = np.argsort(inv, kind="stable")
+    bounds = np.flatnonzero(np.diff(inv[order])) + 1
+    decoded = 0
+    cur = db.cursor()
+    for k, grp in zip(uniq, np.split(order, bounds), strict=True):
+        tx, ty = divmod(int(k), 1 << z)
+        row = cur.execute(
+            "SELECT tile_data FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+            (z, tx, (1 << z) - 1 - ty),
+        ).fetchone()
+        if row is None:
+            continue
+        arr = _decode(row[0], band)
+        decoded += 1
+        out[grp] = arr[np.minimum(py[grp], arr.shape[0] - 1), np.minimum(px[grp], arr.shape[1] - 1)]
+    return out, decoded
+
+
+def reference_bytes(ras, lon, lat, byte_raster: bool = False, max_cost=BYTE_MAX_COST):
+    """Expected tile bytes at lon/lat, gathered in one pass of strip-wise windowed reads."""
+    fc, fr = ras.world_to_pixel(*lonlat_to_crs(lon, lat, ras.crs_wkt))
+    good = np.isfinite(fc) & np.isfinite(fr)
+    col = np.where(good, np.floor(np.where(good, fc, 0)), -1).astype(np.int64)
+    row = np.where(good, np.floor(np.where(good, fr, 0)), -1).astype(np.int64)
+    vals = ras.sample_pixels(col, row)
+    if byte_raster:
+        return np.where(np.isfinite(vals), vals, 0).astype(np.int16)
+    return cost_to_byte(vals, max_cost).astype(np.int16)
+
+
+def wilson_lower(k: int, n: int, zscore: float = 1.96) -> float:
+    if n == 0:
+        return 0.0
+    p = k / n
+    d = 1 + zscore * zscore / n
+    c = p + zscore * zscore / (2 * n)
+    r = zscore * math.sqrt(p * (1 - p) / n + zscore * zscore / (4 * n * n))
+    return (c - r) / d
+
+
+def check_parity(
+    mbtiles: str,
+    ras,
+    zooms=None,
+    n: int = 10000,
+    tol: int = 2,
+    byte_raster: bool = False,
+    band: str = "L",
+    seed: int = 0,
+    keep_samples: int = 0,
+) -> dict:
+    """Per-zoom parity report; `keep_samples` rows per zoom are kept for CSV output."""
+    rng = np.random.default_rng(seed)
+    db = sqlite3.connect(f"file:{os.path.abspath(mbtiles)}?mode=ro", uri=True)
+    try:
+        bounds = read_bounds(db)
+        zooms = list(zooms) if zooms else mbtiles_zooms(db)
+        per_zoom, samples = {}, []
+        for z in zooms:
+            t0 = time.perf_counter()
+            x, y, px, py = sample_tile_pixels(bounds, z, n, rng)
+            got, decoded = gather_tile_pixels(db, z, x, y, px, py, band)
+            lon, lat = pixel_lonlat(z, x, y, px, py)
+            exp = reference_bytes(ras, lon, lat, byte_raster)
+            present = got != MISSING
+            err = np.abs(got.astype(np.int32) - exp)
+            ok = present & ((err <= tol) | ((got == 0) & (exp == 1)))
+            checked = int(present.sum())
+            n_ok = int(ok.sum())
+            per_zoom[str(z)] = {
+                "samples": int(n),
+                "tiles_decoded": decoded,
+                "missing": int(n - checked),
+                "checked": checked,
+                "ok": n_ok,
+                "bad": checked - n_ok,
+                "pass_rate": n_ok / checked if checked else 0.0,
+                "pass_rate_lo95": wilson_lower(n_ok, checked),
+                "nodata_mismatch": int((present & ((got == 0) != (exp == 0)) & (exp != 1)).sum()),
+                "mae": float(err[present].mean()) if checked else 0.0,
+                "max_err": int(err[present].max()) if checked else 0,
+                "elapsed_s": round(time.perf_counter() - t0, 4),
+            }
+            for i in range(min(keep_samples, n)):
+                samples.append(
+                    {
+                        "zoom": z,
+                        "lon": float(lon[i]),
+                        "lat": float(lat[i]),
+                        "tile": int(got[i]) if present[i] else None,
+                        "expected": int(exp[i]),
+                        "ok": bool(ok[i]),
+                    }
+                )
+    finally:
+        db.close()
+    bad = sum(v["bad"] for v in per_zoom.values())
+    return {
+        "mbtiles": mbtiles,
+        "bounds": list(bounds),
+        "tol": tol,
+        "zooms": per_zoom,
+        "checked": sum(v["checked"] for v in per_zoom.values()),
+        "bad": bad,
+        "pass": bad == 0 and any(v["checked"] for v in per_zoom.values()),
+        "samples": samples,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Vectorised MBTiles vs raster parity check.")
+    ap.add_argument("--mbtiles", required=True)
+    ref = ap.add_mutually_exclusive_group(required=True)
+    ref.add_argument("--cost", help="Float32 cost raster (mapped to Byte)")
+    ref.add_argument("--byte-raster", help="8-bit reference raster/VRT (compared as-is)")
+    ap.add_argument("--zooms", default=None, help="comma list (default: all in the file)")
+    ap.add_argument("--n", type=int, default=10000, help="samples per zoom")
+    ap.add_argument("--tol", type=int, default=2)
+    ap.add_argument("--band", default="L", choices=["L", "R", "G", "B", "A"])
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json-out", default="artifacts/perf/tile_parity.json")
+    ap.add_argument("--strict", action="store_true", help="exit 1 when any sample fails")
+    args = ap.parse_args(argv)
+
+    ras = open_cost(args.cost or args.byte_raster)
+    zooms = [int(z) for z in args.zooms.split(",")] if args.zooms else None
+    t0 = time.perf_counter()
+    rep = check_parity(
+        args.mbtiles,
+        ras,
+        zooms,
+        args.n,
+        args.tol,
+        byte_raster=bool(args.byte_raster),
+        band=args.band,
+        seed=args.seed,
+    )
+    rep["elapsed_s"] = round(time.perf_counter() - t0, 3)
+    rep["ts"] = int(time.time())
+    os.makedirs(os.path.dirname(args.json_out) or ".", exist_ok=True)
+    with open(args.json_out, "w") as f:
+        json.dump(rep, f, indent=2)
+    for z, v in rep["zooms"].items():
+        print(
+            f"z{z}: {v['ok']}/{v['checked']} ok (lo95 {v['pass_rate_lo95']:.4f}), "
+            f"missing {v['missing']}, tiles {v['tiles_decoded']}, mae {v['mae']:.3f}"
+        )
+    print(f"Wrote {args.json_out} ({rep['checked']} points in {rep['elapsed_s']}s)")
+    return 1 if args.strict and not rep["pass"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
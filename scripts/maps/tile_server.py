@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Asyncio MBTiles tile server (drop-in for the mbtileserver container in serve_mbtiles.sh).
+
+Routes (same scheme the viewer/*.html overlays already use):
+  GET /services                              -> JSON list of services
+  GET /services/<name>                       -> TileJSON for one .mbtiles
+  GET /services/<name>/tiles/<z>/<x>/<y>.<ext>
+  GET /viewer/<file>, GET /                  -> static files from viewer/
+
+Each .mbtiles gets a small pool of read-only SQLite connections; lookups run in the default
+executor so the event loop never blocks on disk. Hot tiles sit in a byte-bounded LRU with a
+precomputed strong ETag, so repeat requests are a dict hit and If-None-Match gets a 304.
+Gzipped tiles (vector .pbf) are passed through with Content-Encoding: gzip; JSON and
+static text are gzipped when the client accepts it.
+
+Usage:
+  python scripts/maps/tile_server.py [--port 8001] [--dir artifacts/maps/mbtiles ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import queue
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+DEFAULT_DIRS = ("artifacts/maps/mbtiles", "maps_v2/mbtiles", "maps/mbtiles")
+VIEWER_DIR = "viewer"
+TILE_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+    "pbf": "application/x-protobuf",
+}
+GZIP_TYPES = ("text/", "application/json", "application/javascript")
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Not Allowed"}
+
+
+def etag_for(data: bytes) -> str:
+    return '"' + hashlib.blake2b(data, digest_size=12).hexdigest() + '"'
+
+
+class TileLRU:
+    """Byte-bounded LRU of (data, etag) keyed by (service, z, x, y)."""
+
+    def __init__(self, max_bytes: int = 64 << 20):
+        self.max_bytes = int(max_bytes)
+        self.nbytes = 0
+        self.hits = self.misses = 0
+        self._d: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        item = self._d.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self._d.move_to_end(key)
+        self.hits += 1
+        return item
+
+    def put(self, key, data: bytes, etag: str):
+        if len(data) > self.max_bytes:
+            return
+        old = self._d.pop(key, None)
+        if old is not None:
+            self.nbytes -= len(old[0])
+        self._d[key] = (data, etag)
+        self.nbytes += len(data)
+        while self.nbytes > self.max_bytes:
+            _, (d, _) = self._d.popitem(last=False)
+            self.nbytes -= len(d)
+
+
+class MBTilesSource:
+    """One .mbtiles file behind a pool of read-only connections."""
+
+    def __init__(self, path: str, pool_size: int = 4):
+        self.path = path
+        self.name = Path(path).stem
+        uri = "file:" + os.path.abspath(path) + "?mode=ro"
+        self._pool: queue.SimpleQueue = queue.SimpleQueue()
+        for _ in range(max(1, pool_size)):
+            self._pool.put(sqlite3.connect(uri, uri=True, check_same_thread=False))
+        try:
+            self.metadata = dict(self._query("SELECT name, value FROM metadata", ()) or [])
+        except sqlite3.DatabaseError:
+            self.close()
+            raise
+        self.format = self.metadata.get("format", "png")
+
+    def _query(self, sql: str, params: tuple):
+        con = self._pool.get()
+        try:
+            return con.execute(sql, params).fetchall()
+        finally:
+            self._pool.put(con)
+
+    def tile(self, z: int, x: int, y: int) -> bytes | None:
+        rows = self._query(
+            "SELECT tile_data FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+            (z, x, (1 << z) - 1 - y),
+        )
+        return bytes(rows[0][0]) if rows else None
+
+    def tilejson(self, base_url: str) -> dict:
+        m = self.metadata
+        tj = {
+            "tilejson": "2.2.0",
+            "name": m.get("name", self.name),
+            "format": self.format,
+            "tiles": [f"{base_url}/services/{self.name}/tiles/{{z}}/{{x}}/{{y}}.{self.format}"],
+        }
+        for key in ("minzoom", "maxzoom"):
+            if key in m:
+                tj[key] = int(m[key])
+        for key in ("bounds", "center"):
+            if key in m:
+                tj[key] = [float(v) for v in m[key].split(",")]
+        return tj
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get().close()
+
+
+def discover(paths) -> dict[str, MBTilesSource]:
+    """Services from .mbtiles files and/or directories of them (first name wins)."""
+    out: dict[str, MBTilesSource] = {}
+    for p in paths:
+        p = Path(p)
+        files = sorted(p.glob("*.mbtiles")) if p.is_dir() else [p] if p.is_file() else []
+        for f in files:
+            if f.stem in out:
+                continue
+            try:
+                out[f.stem] = MBTilesSource(str(f))
+            except sqlite3.DatabaseError as e:  # no metadata/tiles table, not sqlite, ...
+                print(f"skipping {f}: {e}", file=sys.stderr)
+    return out
+
+
+class TileServer:
+    def __init__(
+        self,
+        sources: dict[str, MBTilesSource],
+        viewer_dir: str | None = VIEWER_DIR,
+        cache_bytes: int = 64 << 20,
+        max_age: int = 3600,
+    ):
+        self.sources = sources
+        self.viewer_dir = Path(viewer_dir).resolve() if viewer_dir else None
+        self.cache = TileLRU(cache_bytes)
+        self.static: dict[str, tuple[bytes, str, str]] = {}
+        self.max_age = int(max_age)
+        self.requests = 0
+        self.server: asyncio.base_events.Server | None = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8001):
+        self.server = await asyncio.start_server(self._client, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for s in self.sources.values():
+            s.close()
+
+    # ---- HTTP plumbing ----
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                headers = {}
+                while (h := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                parts = line.decode("latin-1").split()
+                if len(parts) != 3:
+                    await self._send(writer, 400, b"bad request", "text/plain", {})
+                    break
+                method, target, version = parts
+                status, body, ctype, extra = await self._route(method, target, headers)
+                keep = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                await self._send(writer, status, body, ctype, extra, head=method == "HEAD")
+                if not keep:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _send(self, writer, status, body, ctype, extra, head=False):
+        self.requests += 1
+        hdr = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            f"Content-Length: {len(body)}",
+            "Access-Control-Allow-Origin: *",
+        ]
+        if ctype:
+            hdr.append(f"Content-Type: {ctype}")
+        hdr += [f"{k}: {v}" for k, v in extra.items()]
+        writer.write(("\r\n".join(hdr) + "\r\n\r\n").encode("latin-1"))
+        if not head and status != 304:
+            writer.write(body)
+        await writer.drain()
+
+    def _conditional(self, data: bytes, etag: str, ctype: str, headers: dict, extra: dict):
+        if extra.get("Content-Encoding") == "gzip":
+            etag = etag[:-1] + '-gz"'  # the gzip body is a different representation
+        extra = {"ETag": etag, "Cache-Control": f"public, max-age={self.max_age}", **extra}
+        if etag in headers.get("if-none-match", ""):
+            return 304, b"", None, extra
+        return 200, data, ctype, extra
+
+    async def _route(self, method: str, target: str, headers: dict):
+        if method not in ("GET", "HEAD"):
+            return 405, b"", "text/plain", {"Allow": "GET, HEAD"}
+        path = unquote(urlsplit(target).path)
+        parts = [p for p in path.split("/") if p]
+        gz = "gzip" in headers.get("accept-encoding", "")
+        if parts[:1] == ["services"]:
+            host = headers.get("host", "127.0.0.1")
+            if len(parts) == 1:
+                body = [{"name": n, "url": f"http://{host}/services/{n}"} for n in self.sources]
+                return self._json(body, gz)
+            src = self.sources.get(parts[1])
+            if src is None:
+                return 404, b"unknown service", "text/plain", {}
+            if len(parts) == 2:
+                return self._json(src.tilejson(f"http://{host}"), gz)
+            if len(parts) == 6 and parts[2] == "tiles":
+                return await self._tile(src, parts[3:], headers, gz)
+            return 404, b"", "text/plain", {}
+        return self._static(parts, headers, gz)
+
+    async def _tile(self, src: MBTilesSource, zxy: list[str], headers: dict, gz: bool):
+        y_str, _, ext = zxy[2].partition(".")
+        try:
+            z, x, y = int(zxy[0]), int(zxy[1]), int(y_str)
+        except ValueError:
+            return 400, b"bad tile address", "text/plain", {}
+        key = (src.name, z, x, y)
+        item = self.cache.get(key)
+        if item is None:
+            data = await asyncio.get_running_loop().run_in_executor(None, src.tile, z, x, y)
+            if data is None:
+                return 404, b"", "text/plain", {}
+            item = (data, etag_for(data))
+            self.cache.put(key, *item)
+        data, etag = item
+        extra = {}
+        if data[:2] == b"\x1f\x8b":
+            extra["Vary"] = "Accept-Encoding"
+            if gz:
+                extra["Content-Encoding"] = "gzip"
+            else:
+                data = gzip.decompress(data)
+        ctype = TILE_TYPES.get(ext or src.format, "application/octet-stream")
+        return self._conditional(data, etag, ctype, headers, extra)
+
+    def _json(self, obj, gz: bool):
+        body = json.dumps(obj).encode()
+        extra = {"Vary": "Accept-Encoding"}
+        if gz and len(body) > 512:
+            extra["Content-Encoding"] = "gzip"
+            return 200, gzip.compress(body), "application/json", extra
+        return 200, body, "application/json", extra
+
+    def _static(self, parts: list[str], headers: dict, gz: bool):
+        if self.viewer_dir is None:
+            return 404, b"", "text/plain", {}
+        rel = parts[1:] if parts[:1] == ["viewer"] else parts
+        f = (self.viewer_dir.joinpath(*rel) if rel else self.viewer_dir).resolve()
+        if not (f == self.viewer_dir or self.viewer_dir in f.parents):
+            return 404, b"", "text/plain", {}
+        if f.is_dir():
+            names = sorted(p.name for p in f.glob("*.html"))
+            links = "".join(f'<li><a href="/viewer/{n}">{n}</a></li>' for n in names)
+            body = f"<!doctype html><ul>{links}</ul>".encode()
+            return 200, body, "text/html; charset=utf-8", {}
+        if not f.is_file():
+            return 404, b"", "text/plain", {}
+        key = str(f)
+        mtime = f.stat().st_mtime_ns
+        hit = self.static.get(key)
+        if hit is None or hit[2] != mtime:
+            data = f.read_bytes()
+            hit = (data, etag_for(data), mtime)
+            self.static[key] = hit
+        data, etag, _ = hit
+        ctype = mimetypes.guess_type(f.name)[0] or "application/octet-stream"
+        extra = {}
+        if ctype.startswith(GZIP_TYPES) and len(data) > 512:
+            extra["Vary"] = "Accept-Encoding"  # shared caches must key on the encoding
+            if gz:
+                data, extra["Content-Encoding"] = gzip.compress(data), "gzip"
+        return self._conditional(data, etag, ctype, headers, extra)
+
+
+async def _serve(args):
+    sources = discover(args.mbtiles or args.dir or DEFAULT_DIRS)
+    srv = TileServer(sources, args.viewer, cache_bytes=args.cache_mb << 20)
+    port = await srv.start(args.host, args.port)
+    print(f"→ Services: http://{args.host}:{port}/services ({len(sources)} mbtiles)")
+    print(f"→ Viewer:   http://{args.host}:{port}/viewer/")
+    t0 = time.monotonic()
+    try:
+        await srv.server.serve_forever()
+    finally:
+        c = srv.cache
+        print(
+            f"served {srv.requests} requests in {time.monotonic() - t0:.0f}s; "
+            f"tile cache {c.hits} hits / {c.misses} misses"
+        )
+        await srv.close()
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Serve .mbtiles and viewer/ over HTTP.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8001)
+    ap.add_argument("--dir", action="append", help="directory of .mbtiles (repeatable)")
+    ap.add_argument("--mbtiles", action="append", help="single .mbtiles file (repeatable)")
+    ap.add_argument("--viewer", default=VIEWER_DIR)
+    ap.add_argument("--cache-mb", type=int, default=64)
+    args = ap.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
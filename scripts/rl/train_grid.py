@@ -1,23 +1,142 @@
 #!/usr/bin/env python3
+"""Tabular Q-learning on VecGridWorld with an optional hazard shield.
+
+Writes artifacts/rl/summary.json with KPIs from a greedy rollout of the learned
+policy on the scalar GridWorld (so the numbers come from real training).
+"""
+
 from __future__ import annotations
-import argparse, json
+
+import argparse
+import json
+import sys
+import time
 from pathlib import Path
 
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "training"))
+from src.rl.gridworld import GridWorld, GWCfg, VecGridWorld, shortest_path_len  # noqa: E402
+
+OUT = Path("artifacts/rl/summary.json")
+
+
+def default_cfg() -> GWCfg:
+    # wall at x=5 with a gap along the bottom; hazards sit in the upper half of the gap
+    return GWCfg(
+        w=12,
+        h=8,
+        start=(0, 0),
+        goal=(11, 7),
+        obstacles={(5, y) for y in range(6)},
+        hazards={(4, 6), (5, 6), (6, 6)},
+    )
+
+
+def shield_mask(env: VecGridWorld, shield: bool) -> np.ndarray:
+    """(S, A) allowed actions: never enter a hazard unless every action does."""
+    allowed = ~env.unsafe if shield else np.ones_like(env.unsafe)
+    allowed[~allowed.any(axis=1)] = True
+    return allowed
+
+
+def _masked_argmax(q: np.ndarray, allowed: np.ndarray) -> np.ndarray:
+    return np.where(allowed, q, -np.inf).argmax(axis=-1)
+
+
+def train(
+    env: VecGridWorld,
+    episodes: int,
+    alpha: float = 0.5,
+    gamma: float = 0.97,
+    eps_start: float = 1.0,
+    eps_end: float = 0.05,
+    shield: bool = True,
+    seed: int = 0,
+) -> tuple[np.ndarray, dict]:
+    rng = np.random.default_rng(seed)
+    S, A = env.n_states, env.n_actions
+    Q = np.zeros((S, A), dtype=np.float64)
+    allowed = shield_mask(env, shield)
+
+    s = env.reset()
+    finished = steps = 0
+    window: list[bool] = []
+    t0 = time.perf_counter()
+    while finished < episodes:
+        eps = max(eps_end, eps_start - (eps_start - eps_end) * finished / max(1, episodes // 2))
+        greedy = _masked_argmax(Q[s], allowed[s])
+        rand = _masked_argmax(rng.random((env.n_envs, A)), allowed[s])
+        a = np.where(rng.random(env.n_envs) < eps, rand, greedy)
+
+        ns, r, done, info = env.step(a)
+        target = r + gamma * (~done) * np.where(allowed[ns], Q[ns], -np.inf).max(axis=1)
+        idx = s * A + a
+        td = np.bincount(idx, weights=target - Q.flat[idx], minlength=S * A)
+        cnt = np.bincount(idx, minlength=S * A)
+        hit = cnt > 0
+        Q.flat[hit] += alpha * td[hit] / cnt[hit]
+
+        end = done | info["truncated"]
+        finished += int(end.sum())
+        window.extend(done[end].tolist())
+        steps += env.n_envs
+        s = env.s.copy()
+    dt = time.perf_counter() - t0
+    recent = window[len(window) // 2 :] or [False]
+    stats = {
+        "train_episodes": finished,
+        "train_success_rate": float(np.mean(recent)),
+        "env_steps": steps,
+        "steps_per_s": steps / dt if dt > 0 else 0.0,
+    }
+    return Q, stats
+
+
+def evaluate(cfg: GWCfg, Q: np.ndarray, max_steps: int) -> dict:
+    env = GridWorld(cfg)
+    pos = env.reset()
+    unsafe = 0
+    for k in range(1, max_steps + 1):
+        pos, _, done, info = env.step(int(Q[pos[1] * cfg.w + pos[0]].argmax()))
+        unsafe += int(info["unsafe"])
+        if done:
+            return {"eval_steps": k, "eval_success": True, "eval_unsafe_steps": unsafe}
+    return {"eval_steps": max_steps, "eval_success": False, "eval_unsafe_steps": unsafe}
+
+
 def main() -> None:
-    ap = argparse.ArgumentParser()
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
     ap.add_argument("--episodes", type=int, default=250)
+    ap.add_argument("--envs", type=int, default=64, help="parallel gridworlds")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--no-shield", action="store_true", help="disable the hazard action shield")
+    ap.add_argument("--out", default=str(OUT))
     args = ap.parse_args()
-    out = Path("artifacts/rl/summary.json")
-    out.parent.mkdir(parents=True, exist_ok=True)
+
+    cfg = default_cfg()
+    env = VecGridWorld(cfg, n_envs=args.envs)
+    Q, stats = train(env, args.episodes, shield=not args.no_shield, seed=args.seed)
+    # the shield stays on when acting greedily
+    Q = np.where(shield_mask(env, not args.no_shield), Q, -np.inf)
+    ev = evaluate(cfg, Q, env.max_steps)
     summary = {
         "episodes": int(args.episodes),
-        "train_success_rate": 0.90,
-        "eval_steps": 48,
-        "optimal_steps": 45,
-        "eval_unsafe_steps": 1,
+        **stats,
+        **ev,
+        "optimal_steps": shortest_path_len(cfg.w, cfg.h, cfg.start, cfg.goal, cfg.obstacles),
+        "shield": not args.no_shield,
     }
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
     out.write_text(json.dumps(summary, indent=2))
+    print(
+        f"[train_grid] success={summary['train_success_rate']:.2f} "
+        f"eval_steps={ev['eval_steps']} optimal={summary['optimal_steps']} "
+        f"unsafe={ev['eval_unsafe_steps']} ({stats['steps_per_s']:.0f} steps/s)"
+    )
     print(f"Wrote {out}")
 
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,342 @@
+# rl/envs/px4_pool.py
+"""
+Pooled altitude-hold env: K PX4 SITL instances stepped concurrently in one asyncio loop.
+
+Each instance is reached through an `AltLink` (MAVSDK by default, or any object with the
+same async methods, e.g. a fake link in tests). Telemetry is cached by background stream
+tasks, so a pool step is: send K setpoints -> sleep once for step_dt -> read K cached
+states. Instances that raise or time out are torn down, optionally relaunched, reconnected
+and reported with info["crashed"] = True; finished episodes auto-reset (SB3 VecEnv style,
+final observation in info["terminal_observation"]).
+"""
+
+import asyncio
+import math
+import os
+import signal
+import subprocess
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class InstanceSpec:
+    px4_port: int
+    grpc_port: int
+    # optional SITL launch command, formatted with i/px4_port/grpc_port (e.g. from ppo_run.sh)
+    launch_cmd: str | None = None
+
+
+class MavsdkAltLink:
+    """One PX4 instance over MAVSDK with cached telemetry and a zero-velocity keepalive."""
+
+    def __init__(
+        self,
+        spec: InstanceSpec,
+        connect_timeout_s: float = 30.0,
+        stale_s: float = 2.0,
+        keepalive_hz: float = 5.0,
+    ):
+        self.spec = spec
+        self.connect_timeout_s = float(connect_timeout_s)
+        self.stale_s = float(stale_s)
+        self.keepalive_hz = float(keepalive_hz)
+        self._drone = None
+        self._server: subprocess.Popen | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._alt = math.nan
+        self._vz = math.nan
+        self._t_telem = 0.0
+        self._last_vz = 0.0
+        self._t_cmd = 0.0
+
+    async def connect(self):
+        from mavsdk import System
+
+        from .px4_alt_env import _ensure_executable, _find_mavsdk_server, _tcp_listen_on
+
+        addr = f"udp://:{self.spec.px4_port}"
+        if not _tcp_listen_on(self.spec.grpc_port) and os.getenv("MAVSDK_NO_SPAWN", "0") != "1":
+            server_bin = _find_mavsdk_server()
+            if server_bin is None:
+                raise RuntimeError("mavsdk_server not found (PATH/venv/site-packages).")
+            _ensure_executable(server_bin)
+            self._server = subprocess.Popen(
+                [server_bin, "-p", str(self.spec.grpc_port), addr],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                preexec_fn=os.setsid,
+            )
+            await asyncio.sleep(0.6)
+
+        self._drone = System(mavsdk_server_address="127.0.0.1", port=self.spec.grpc_port)
+        await self._drone.connect(system_address=addr)
+
+        async def _connected():
+            async for state in self._drone.core.connection_state():
+                if state.is_connected:
+                    return
+
+        await asyncio.wait_for(_connected(), self.connect_timeout_s)
+        self._tasks = [
+            asyncio.create_task(self._cache_position()),
+            asyncio.create_task(self._cache_velocity()),
+            asyncio.create_task(self._keepalive()),
+        ]
+        await self.reset()
+
+    async def _cache_position(self):
+        async for pos in self._drone.telemetry.position():
+            self._alt = float(pos.relative_altitude_m)
+            self._t_telem = time.monotonic()
+
+    async def _cache_velocity(self):
+        async for vel in self._drone.telemetry.velocity_ned():
+            self._vz = float(-vel.down_m_s)
+
+    async def _keepalive(self):
+        # re-send the last setpoint while the learner is busy so offboard doesn't time out
+        period = 1.0 / max(1.0, self.keepalive_hz)
+        while True:
+            await asyncio.sleep(period)
+            if time.monotonic() - self._t_cmd > period:
+                try:
+                    await self.set_vz(self._last_vz)
+                except Exception:
+                    pass
+
+    async def reset(self):
+        from mavsdk.offboard import OffboardError, VelocityNedYaw
+
+        try:
+            await self._drone.action.arm()
+        except Exception:
+            pass
+        await self._drone.offboard.set_velocity_ned(VelocityNedYaw(0.0, 0.0, 0.0, 0.0))
+        try:
+            await self._drone.offboard.start()
+        except OffboardError:
+            await asyncio.sleep(0.2)
+            await self._drone.offboard.start()
+
+    async def set_vz(self, vz_mps: float):
+        from mavsdk.offboard import VelocityNedYaw
+
+        self._last_vz, self._t_cmd = vz_mps, time.monotonic()
+        await self._drone.offboard.set_velocity_ned(VelocityNedYaw(0.0, 0.0, -vz_mps, 0.0))
+
+    async def state(self) -> tuple[float, float]:
+        if time.monotonic() - self._t_telem > self.stale_s:
+            raise TimeoutError(f"telemetry stale on port {self.spec.px4_port}")
+        return self._alt, self._vz
+
+    async def close(self):
+        for t in self._tasks:
+            t.cancel()
+        self._tasks = []
+        if self._drone is not None:
+            for coro in (self._drone.offboard.stop, self._drone.action.disarm):
+                try:
+                    await asyncio.wait_for(coro(), 2.0)
+                except Exception:
+                    pass
+        if self._server is not None:
+            try:
+                os.killpg(os.getpgid(self._server.pid), signal.SIGTERM)
+            except Exception:
+                pass
+            self._server = None
+
+
+class Px4AltPool:
+    """
+    Batched altitude hold over K instances; same obs/reward/termination as Px4AltHoldEnv.
+      reset(seeds=None) -> obs (K, 3)
+      step(actions (K, 1)) -> obs, reward (K,), terminated (K,), truncated (K,), infos
+      call(i, name, *args) -> result of instance i's link method (awaited in the pool loop)
+    """
+
+    render_mode = None  # like Px4AltHoldEnv, nothing to render
+
+    def __init__(
+        self,
+        specs: Sequence[InstanceSpec],
+        target_alt_m: float = 2.0,
+        max_steps: int = 400,
+        step_dt: float = 0.10,
+        max_vz_mps: float = 1.0,
+        io_timeout_s: float = 1.0,
+        link_factory: Callable[[InstanceSpec], object] = MavsdkAltLink,
+    ):
+        self.specs = list(specs)
+        self.num_envs = len(self.specs)
+        self.target_alt_m = float(target_alt_m)
+        self.max_steps = int(max_steps)
+        self.step_dt = float(step_dt)
+        self.max_vz = float(max_vz_mps)
+        self.io_timeout_s = float(io_timeout_s)
+        self.link_factory = link_factory
+
+        self._loop = asyncio.new_event_loop()
+        self._links: list = [None] * self.num_envs
+        self._procs: list[subprocess.Popen | None] = [None] * self.num_envs
+        self._steps = np.zeros(self.num_envs, dtype=np.int64)
+        self._obs = np.zeros((self.num_envs, 3), dtype=np.float32)
+        self.restarts = np.zeros(self.num_envs, dtype=np.int64)
+        self.seeds: list[int | None] = [None] * self.num_envs
+
+    # ---------- public ----------
+    def reset(self, seeds: Sequence[int | None] | None = None) -> np.ndarray:
+        """Reset every instance; per-instance `seeds` are recorded and, as in
+        Px4AltHoldEnv.seed, applied to NumPy's global RNG (in instance order)."""
+        for i, seed in enumerate(seeds or ()):
+            if seed is not None:
+                self.seeds[i] = int(seed)
+                np.random.seed(self.seeds[i])
+        self._run(self._reset_all())
+        return self._obs.copy()
+
+    def call(self, i: int, method_name: str, *args, **kwargs):
+        link = self._links[i]
+        if link is None:
+            raise ConnectionError(f"instance {i} is down")
+        out = getattr(link, method_name)(*args, **kwargs)
+        return self._run(self._io(out)) if asyncio.iscoroutine(out) else out
+
+    def step(self, actions: np.ndarray):
+        vz = np.clip(np.asarray(actions, dtype=np.float64).reshape(-1), -self.max_vz, self.max_vz)
+        return self._run(self._step_all(vz))
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        self._run(self._close_all())
+        self._loop.close()
+
+    # ---------- internals ----------
+    def _run(self, coro):
+        return self._loop.run_until_complete(coro)
+
+    async def _io(self, coro):
+        return await asyncio.wait_for(coro, self.io_timeout_s)
+
+    async def _send(self, i: int, vz: float):
+        if self._links[i] is None:
+            raise ConnectionError(f"instance {i} is down")
+        await self._io(self._links[i].set_vz(vz))
+
+    async def _read(self, i: int) -> tuple[float, float]:
+        if self._links[i] is None:
+            raise ConnectionError(f"instance {i} is down")
+        return await self._io(self._links[i].state())
+
+    def _obs_row(self, i: int, alt: float, vz: float) -> float:
+        err = self.target_alt_m - alt
+        self._obs[i] = (alt, vz, err)
+        return err
+
+    async def _start(self, i: int):
+        spec = self.specs[i]
+        if spec.launch_cmd and self._procs[i] is None:
+            cmd = spec.launch_cmd.format(i=i, px4_port=spec.px4_port, grpc_port=spec.grpc_port)
+            self._procs[i] = subprocess.Popen(
+                cmd,
+                shell=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                preexec_fn=os.setsid,
+            )
+        link = self.link_factory(spec)
+        await link.connect()
+        self._links[i] = link
+        alt, vz = await self._io(link.state())
+        self._obs_row(i, alt, vz)
+        self._steps[i] = 0
+
+    async def _teardown(self, i: int, kill_sitl: bool = True):
+        link, self._links[i] = self._links[i], None
+        if link is not None:
+            try:
+                await link.close()
+            except Exception:
+                pass
+        proc = self._procs[i]
+        if kill_sitl and proc is not None:
+            try:
+                os.killpg(os.getpgid(proc.pid), signal.SIGTERM)
+            except Exception:
+                pass
+            self._procs[i] = None
+
+    async def _recover(self, i: int):
+        # relaunch SITL only if its process died; otherwise just reconnect the link
+        proc = self._procs[i]
+        await self._teardown(i, kill_sitl=proc is not None and proc.poll() is not None)
+        self.restarts[i] += 1
+        await self._start(i)
+
+    async def _reset_one(self, i: int):
+        link = self._links[i]
+        if link is None:
+            await self._start(i)
+            return
+        await self._io(link.reset())
+        alt, vz = await self._io(link.state())
+        self._obs_row(i, alt, vz)
+        self._steps[i] = 0
+
+    async def _close_all(self):
+        await asyncio.gather(*(self._teardown(i) for i in range(self.num_envs)))
+
+    async def _recover_all(self, idx: list[int]):
+        # a failed recovery leaves the link down; the next step reports it crashed again
+        res = await asyncio.gather(*(self._recover(i) for i in idx), return_exceptions=True)
+        for i, r in zip(idx, res, strict=True):
+            if isinstance(r, BaseException):
+                self._links[i] = None
+                self._obs[i] = 0.0
+
+    async def _reset_all(self):
+        res = await asyncio.gather(
+            *(self._reset_one(i) for i in range(self.num_envs)), return_exceptions=True
+        )
+        await self._recover_all([i for i, r in enumerate(res) if isinstance(r, BaseException)])
+
+    async def _step_all(self, vz: np.ndarray):
+        n = self.num_envs
+        t0 = time.monotonic()
+        sent = await asyncio.gather(
+            *(self._send(i, float(vz[i])) for i in range(n)), return_exceptions=True
+        )
+        await asyncio.sleep(max(0.0, self.step_dt - (time.monotonic() - t0)))
+        states = await asyncio.gather(*(self._read(i) for i in range(n)), return_exceptions=True)
+
+        rew = np.zeros(n, dtype=np.float32)
+        terminated = np.zeros(n, dtype=bool)
+        truncated = np.zeros(n, dtype=bool)
+        infos: list[dict] = [{} for _ in range(n)]
+        crashed = []
+        for i in range(n):
+            if isinstance(sent[i], BaseException) or isinstance(states[i], BaseException):
+                crashed.append(i)
+                terminated[i] = True
+                infos[i]["crashed"] = True
+                infos[i]["terminal_observation"] = self._obs[i].copy()
+                continue
+            alt, v = states[i]
+            err = self._obs_row(i, alt, v)
+            rew[i] = -abs(err) - 0.01 * abs(v)
+            self._steps[i] += 1
+            terminated[i] = abs(err) > 10.0 or math.isnan(alt) or math.isnan(v)
+            truncated[i] = self._steps[i] >= self.max_steps
+            if terminated[i] or truncated[i]:
+                infos[i]["terminal_observation"] = self._obs[i].copy()
+
+        done = [i for i in range(n) if (terminated[i] or truncated[i]) and i not in crashed]
+        res = await asyncio.gather(*(self._reset_one(i) for i in done), return_exceptions=True)
+        crashed += [i for i, r in zip(done, res, strict=True) if isinstance(r, BaseException)]
+        await self._recover_all(crashed)
+        return self._obs.copy(), rew, terminated, truncated, infos
@@ -8,6 +8,7 @@ CKPT_EVERY=200000
 LOGDIR="runs/ppo_hover_vec4"
 CKPTDIR="checkpoints/ppo_hover_vec4"
 SEED=42
+POOL_ARGS=()
 PX4_REPO="${PX4_REPO:-$HOME/dev/px4-autopilot-harmonic}"
 WORLD_SDF="$PX4_REPO/Tools/simulation/gz/worlds/default.sdf"
 
@@ -21,6 +22,7 @@ while [[ $# -gt 0 ]]; do
     --logdir) LOGDIR="$2"; shift 2;;
     --checkpoint-dir) CKPTDIR="$2"; shift 2;;
     --seed) SEED="$2"; shift 2;;
+    --pool) POOL_ARGS=(--pool); shift;;
     *) echo "Unknown arg: $1" >&2; exit 2;;
   esac
 done
@@ -63,4 +65,5 @@ python -m rl.train_ppo \
   --ckpt-every "$CKPT_EVERY" \
   --logdir "$LOGDIR" \
   --checkpoint-dir "$CKPTDIR" \
-  --seed "$SEED"
+  --seed "$SEED" \
+  "${POOL_ARGS[@]}"
@@ -2,13 +2,16 @@
 import argparse
 import os
 
+import numpy as np
 import torch
+from gymnasium import spaces
 from rl.envs.px4_alt_env import Px4AltHoldEnv
+from rl.envs.px4_pool import InstanceSpec, Px4AltPool
 from stable_baselines3 import PPO
 from stable_baselines3.common.callbacks import CallbackList, CheckpointCallback
 from stable_baselines3.common.monitor import Monitor
 from stable_baselines3.common.utils import set_random_seed
-from stable_baselines3.common.vec_env import DummyVecEnv
+from stable_baselines3.common.vec_env import DummyVecEnv, VecEnv, VecMonitor
 
 
 def parse_list(n: int, csv: str, base: int, step: int) -> list[int]:
@@ -40,6 +43,50 @@ def make_env_fn(px4_port: int, grpc_port: int, seed: int):
     return _thunk
 
 
+class PoolVecEnv(VecEnv):
+    """SB3 VecEnv over Px4AltPool: all instances step concurrently in one asyncio loop."""
+
+    def __init__(self, pool: Px4AltPool):
+        high = np.array([100.0, 20.0, 100.0], dtype=np.float32)
+        act = spaces.Box(-pool.max_vz, pool.max_vz, shape=(1,), dtype=np.float32)
+        self.pool = pool  # VecEnv.__init__ already queries get_attr("render_mode")
+        self._actions = None
+        super().__init__(pool.num_envs, spaces.Box(-high, high, dtype=np.float32), act)
+
+    def reset(self):
+        obs = self.pool.reset(seeds=self._seeds)
+        self._reset_seeds()
+        return obs
+
+    def step_async(self, actions):
+        self._actions = actions
+
+    def step_wait(self):
+        obs, rew, terminated, truncated, infos = self.pool.step(self._actions)
+        for i, info in enumerate(infos):
+            info["TimeLimit.truncated"] = bool(truncated[i] and not terminated[i])
+        return obs, rew, terminated | truncated, infos
+
+    def close(self):
+        self.pool.close()
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self.pool, attr_name)] * len(self._get_indices(indices))
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self.pool, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        """Call `method_name` on each selected instance's link (Px4AltPool.call)."""
+        return [
+            self.pool.call(i, method_name, *method_args, **method_kwargs)
+            for i in self._get_indices(indices)
+        ]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False] * len(self._get_indices(indices))
+
+
 def main():
     p = argparse.ArgumentParser()
     p.add_argument("--steps", type=int, default=12_000_000)
@@ -57,6 +104,18 @@ def main():
     p.add_argument("--grpc-base", type=int, default=50060)
     p.add_argument("--grpc-step", type=int, default=1)
 
+    p.add_argument(
+        "--pool",
+        action="store_true",
+        help="step all instances concurrently via Px4AltPool (crash recovery included)",
+    )
+    p.add_argument(
+        "--launch-cmd",
+        type=str,
+        default="",
+        help="per-instance SITL command for --pool, formatted with {i},{px4_port},{grpc_port}",
+    )
+
     p.add_argument("--device", type=str, default="cuda", choices=["cuda", "cpu", "auto"])
     p.add_argument("--seed", type=int, default=42)
 
@@ -79,10 +138,18 @@ def main():
 
     set_random_seed(args.seed)
 
-    env_fns = [
-        make_env_fn(px4_ports[i], grpc_ports[i], args.seed + i) for i in range(args.num_envs)
-    ]
-    vec_env = DummyVecEnv(env_fns)
+    if args.pool:
+        specs = [
+            InstanceSpec(px4_ports[i], grpc_ports[i], args.launch_cmd or None)
+            for i in range(args.num_envs)
+        ]
+        pool = Px4AltPool(specs, target_alt_m=2.0, max_steps=400, step_dt=0.10, max_vz_mps=1.0)
+        vec_env = VecMonitor(PoolVecEnv(pool))
+    else:
+        env_fns = [
+            make_env_fn(px4_ports[i], grpc_ports[i], args.seed + i) for i in range(args.num_envs)
+        ]
+        vec_env = DummyVecEnv(env_fns)
 
     policy_kwargs = dict(net_arch=[256, 256])
     model = PPO(
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+ROS-free core of ns_depth_onnx_node.py: latest-frame mailbox + worker-thread ONNX depth.
+
+- LatestFrame holds at most one pending frame; a newer frame replaces (drops) an
+  unprocessed older one, so the worker always runs on the freshest image.
+- DepthPipeline owns preallocated buffers: the [1, 3, H, W] network input, the IO-bound
+  output, and the uint16 millimetre / colour preview images. RGB/BGR/mono 8-bit input is
+  resized (cv2 INTER_AREA if available, else nearest) and normalised channel by channel
+  straight into the input buffer - no cvtColor/astype/transpose temporaries.
+- image_to_array() views a sensor_msgs/Image-like message's data buffer as HxWxC uint8
+  without cv_bridge (honours row padding via `step`).
+- Each result goes to `publish(DepthResult)` on the worker thread, with processing
+  latency (receive -> publish) and the drop rate over the last `window` frames. The
+  buffers are reused: `publish` must serialise/copy before returning.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+try:
+    import cv2
+except ImportError:  # the core stays usable (nearest resize, no colour preview) without cv2
+    cv2 = None
+
+CHANNELS = {"rgb8": 3, "bgr8": 3, "rgba8": 4, "bgra8": 4, "mono8": 1, "8uc1": 1, "8uc3": 3}
+# network input channel c comes from source channel ORDER[encoding][c]
+ORDER = {"rgb8": (0, 1, 2), "rgba8": (0, 1, 2), "8uc3": (0, 1, 2), "bgr8": (2, 1, 0)}
+ORDER.update({"bgra8": (2, 1, 0), "mono8": (0, 0, 0), "8uc1": (0, 0, 0)})
+
+
+def image_to_array(msg) -> np.ndarray:
+    """HxWxC uint8 view of an Image message's data (no copy)."""
+    enc = msg.encoding.lower()
+    if enc not in CHANNELS:
+        raise ValueError(f"unsupported encoding {msg.encoding!r}; want one of {sorted(CHANNELS)}")
+    ch = CHANNELS[enc]
+    rows = np.frombuffer(msg.data, dtype=np.uint8).reshape(msg.height, msg.step)
+    return rows[:, : msg.width * ch].reshape(msg.height, msg.width, ch)
+
+
+@dataclass
+class Frame:
+    img: np.ndarray
+    encoding: str
+    header: Any = None
+    t_recv: float = 0.0
+
+
+@dataclass
+class DepthResult:
+    header: Any
+    depth_mm: np.ndarray  # uint16 HxW, reused buffer
+    color: np.ndarray | None  # bgr8 HxWx3 preview, reused buffer (None without cv2)
+    latency_ms: float
+    infer_ms: float
+    drop_rate: float
+    seq: int
+
+
+class LatestFrame:
+    """Single-slot mailbox: put() never blocks and overwrites; take() waits for a frame."""
+
+    def __init__(self):
+        self._cv = threading.Condition()
+        self._item: Frame | None = None
+        self._closed = False
+
+    def put(self, item: Frame) -> bool:
+        """Store `item`; True if it replaced a frame nobody had taken yet (a drop)."""
+        with self._cv:
+            dropped = self._item is not None
+            self._item = item
+            self._cv.notify()
+            return dropped
+
+    def take(self, timeout: float | None = None) -> Frame | None:
+        with self._cv:
+            if self._item is None and not self._closed:
+                self._cv.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+    def close(self) -> None:
+        with self._cv:
+            self._closed = True
+            self._cv.notify_all()
+
+
+class DepthPipeline:
+    def __init__(
+        self,
+        sess,
+        size: tuple[int, int] = (320, 240),
+        max_depth_m: float = 20.0,
+        publish: Callable[[DepthResult], None] | None = None,
+        color: bool = True,
+        window: int = 100,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.sess = sess
+        self.size = tuple(size)  # (W, H)
+        w, h = self.size
+        self.max_mm = float(max_depth_m) * 1000.0
+        self.publish = publish or (lambda r: None)
+        self.clock = clock
+        self.in_name = sess.get_inputs()[0].name
+        self.x = np.zeros((1, 3, h, w), dtype=np.float32)
+        y = sess.run(None, {self.in_name: self.x})[0]  # dry run: output shape + warm kernels
+        self.y = np.empty_like(y)
+        self.binding = sess.io_binding()
+        self.binding.bind_cpu_input(self.in_name, self.x)
+        self.binding.bind_output(
+            sess.get_outputs()[0].name, "cpu", 0, np.float32, list(self.y.shape), self.y.ctypes.data
+        )
+        oh, ow = self.y.shape[-2:]
+        self._p01 = np.empty((oh, ow), dtype=np.float32)
+        self.depth_mm = np.empty((oh, ow), dtype=np.uint16)
+        self.color = np.empty((oh, ow, 3), np.uint8) if color and cv2 is not None else None
+        self._color8 = np.empty((oh, ow), np.uint8) if self.color is not None else None
+        self._rs = np.empty((h, w, 4), dtype=np.uint8)
+        self._idx: dict[tuple[int, int], tuple[np.ndarray, np.ndarray]] = {}
+
+        self.slot = LatestFrame()
+        self.received = self.dropped = self.processed = 0
+        self._recent: deque[bool] = deque(maxlen=max(1, window))
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # ---- producer side (subscription callback) ----
+    def submit(self, img: np.ndarray, encoding: str, header=None) -> bool:
+        """Hand a frame to the worker; True if an older unprocessed frame was dropped."""
+        dropped = self.slot.put(Frame(img, encoding.lower(), header, self.clock()))
+        with self._lock:
+            self.received += 1
+            self.dropped += dropped
+            if dropped and self._recent:
+                self._recent[-1] = True  # the replaced frame is the one that got dropped
+            self._recent.append(False)
+        return dropped
+
+    def drop_rate(self) -> float:
+        with self._lock:
+            return sum(self._recent) / len(self._recent) if self._recent else 0.0
+
+    # ---- processing ----
+    def _resize(self, img: np.ndarray) -> np.ndarray:
+        w, h = self.size
+        ch = img.shape[2]
+        if img.shape[:2] == (h, w):
+            return img
+        out = self._rs[:, :, :ch]
+        if cv2 is not None:
+            r = cv2.resize(img, (w, h), interpolation=cv2.INTER_AREA)
+            out[...] = r.reshape(h, w, ch)
+            return out
+        key = img.shape[:2]
+        if key not in self._idx:
+            self._idx[key] = (
+                (np.arange(h) * key[0] // h)[:, None],
+                (np.arange(w) * key[1] // w)[None, :],
+            )
+        ri, ci = self._idx[key]
+        out[...] = img[ri, ci]
+        return out
+
+    def _prepare(self, img: np.ndarray, encoding: str) -> None:
+        src = self._resize(img)
+        inv255 = np.float32(1.0 / 255.0)
+        for c, s in enumerate(ORDER.get(encoding, (0, 1, 2))):
+            np.multiply(src[:, :, s], inv255, out=self.x[0, c], casting="unsafe")
+
+    def process(self, frame: Frame) -> DepthResult:
+        self._prepare(frame.img, frame.encoding)
+        t0 = self.clock()
+        self.sess.run_with_iobinding(self.binding)
+        t1 = self.clock()
+        np.clip(self.y.reshape(self._p01.shape), 0.0, 1.0, out=self._p01)
+        np.multiply(self._p01, self.max_mm, out=self.depth_mm, casting="unsafe")
+        if self.color is not None:
+            np.multiply(self._p01, 255.0, out=self._color8, casting="unsafe")
+            cv2.applyColorMap(self._color8, cv2.COLORMAP_TURBO, dst=self.color)
+        self.processed += 1
+        return DepthResult(
+            frame.header,
+            self.depth_mm,
+            self.color,
+            (self.clock() - frame.t_recv) * 1e3,
+            (t1 - t0) * 1e3,
+            self.drop_rate(),
+            self.processed,
+        )
+
+    # ---- worker thread ----
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            frame = self.slot.take(timeout=0.1)
+            if frame is not None:
+                self.publish(self.process(frame))
+
+    def start(self) -> DepthPipeline:
+        self._thread = threading.Thread(target=self._loop, name="depth-worker", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        self.slot.close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "received": self.received,
+                "dropped": self.dropped,
+                "processed": self.processed,
+                "drop_rate": sum(self._recent) / len(self._recent) if self._recent else 0.0,
+            }
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+ROS-free core of ns_live_depth_mae.py: timestamp-matched depth error metrics.
+
+- StampRing keeps the last N (stamp, depth_mm) frames of one stream in a preallocated
+  [N, H, W] uint16 buffer.
+- match_nearest() pairs each prediction stamp with the nearest ground-truth stamp
+  (searchsorted on the sorted GT stamps) and keeps pairs within max_skew.
+- depth_metrics() scores K pairs at once: per pair MAE / RMSE (metres) and
+  delta < 1.25 accuracy over pixels where both maps are in (0, max_mm].
+- RollingMetrics aggregates pair metrics over a sliding time window, weighted by valid
+  pixels.
+- LiveDepthMAE wires these together for the node: push_pred/push_gt from callbacks,
+  update() on a timer evaluates every newly matchable prediction exactly once.
+
+Offline: evaluate_streams(pred_t, pred_mm, gt_t, gt_mm) scores whole recordings.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+
+import numpy as np
+
+
+def to_mm(arr: np.ndarray, encoding: str, max_mm: int) -> np.ndarray:
+    """Depth image -> uint16 millimetres (32F encodings are metres)."""
+    if "32f" in (encoding or "").lower():
+        return np.clip(np.nan_to_num(arr) * 1000.0, 0, max_mm).astype(np.uint16)
+    return arr if arr.dtype == np.uint16 else arr.astype(np.uint16)
+
+
+def resize_nearest(img: np.ndarray, shape: tuple[int, int]) -> np.ndarray:
+    h, w = shape
+    if img.shape[-2:] == (h, w):
+        return img
+    ri = np.arange(h) * img.shape[-2] // h
+    ci = np.arange(w) * img.shape[-1] // w
+    return img[..., ri[:, None], ci[None, :]]
+
+
+class StampRing:
+    """Fixed-capacity ring of (stamp, HxW uint16) frames; re-allocates if the size changes."""
+
+    def __init__(self, capacity: int = 30):
+        self.capacity = int(capacity)
+        self.t = np.full(self.capacity, np.nan)
+        self.buf: np.ndarray | None = None
+        self.head = 0
+
+    def push(self, t: float, img: np.ndarray) -> None:
+        if self.buf is None or self.buf.shape[1:] != img.shape:
+            self.buf = np.zeros((self.capacity, *img.shape), dtype=np.uint16)
+            self.t[:] = np.nan
+        self.buf[self.head] = img
+        self.t[self.head] = t
+        self.head = (self.head + 1) % self.capacity
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(~np.isnan(self.t)))
+
+    def valid(self) -> np.ndarray:
+        """Slots holding a frame, oldest stamp first."""
+        idx = np.flatnonzero(~np.isnan(self.t))
+        return idx[np.argsort(self.t[idx], kind="stable")]
+
+
+def match_nearest(
+    t_pred: np.ndarray, t_gt: np.ndarray, max_skew: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(pred idx, gt idx, |dt|) of nearest-stamp pairs within max_skew; t_gt sorted."""
+    t_pred, t_gt = np.asarray(t_pred, np.float64), np.asarray(t_gt, np.float64)
+    if len(t_pred) == 0 or len(t_gt) == 0:
+        e = np.zeros(0, dtype=np.intp)
+        return e, e, np.zeros(0)
+    j = np.clip(np.searchsorted(t_gt, t_pred), 1, len(t_gt) - 1) if len(t_gt) > 1 else None
+    if j is None:
+        jj = np.zeros(len(t_pred), dtype=np.intp)
+    else:
+        left_closer = np.abs(t_pred - t_gt[j - 1]) <= np.abs(t_gt[j] - t_pred)
+        jj = np.where(left_closer, j - 1, j)
+    dt = np.abs(t_gt[jj] - t_pred)
+    ok = dt <= max_skew
+    return np.flatnonzero(ok), jj[ok], dt[ok]
+
+
+def depth_metrics(pred_mm: np.ndarray, gt_mm: np.ndarray, max_mm: int) -> dict[str, np.ndarray]:
+    """Per-pair metrics for [K, H, W] (or [H, W]) uint16 mm maps; NaN where no valid pixel."""
+    p = np.asarray(pred_mm).reshape(-1, *np.shape(pred_mm)[-2:]).astype(np.float32)
+    g = np.asarray(gt_mm).reshape(-1, *np.shape(gt_mm)[-2:]).astype(np.float32)
+    valid = (p > 0) & (g > 0) & (p <= max_mm) & (g <= max_mm)
+    n = valid.sum(axis=(1, 2))
+    err = np.where(valid, p - g, 0.0)
+    ratio = np.maximum(p, 1.0) / np.maximum(g, 1.0)
+    ok = valid & (np.maximum(ratio, 1.0 / ratio) < 1.25)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "mae_m": np.abs(err).sum(axis=(1, 2)) / n / 1000.0,
+            "rmse_m": np.sqrt((err * err).sum(axis=(1, 2)) / n) / 1000.0,
+            "delta1": ok.sum(axis=(1, 2)) / n,
+            "n_valid": n,
+        }
+
+
+class RollingMetrics:
+    """Pixel-weighted aggregates of pair metrics over the last `window_s` seconds."""
+
+    def __init__(self, window_s: float = 5.0):
+        self.window_s = float(window_s)
+        self._rows: deque[tuple[float, float, float, float, int, float]] = deque()
+
+    def add(self, t, m: dict[str, np.ndarray], skew) -> None:
+        for row in zip(
+            np.atleast_1d(t),
+            m["mae_m"],
+            m["rmse_m"],
+            m["delta1"],
+            m["n_valid"],
+            np.atleast_1d(skew),
+            strict=True,
+        ):
+            if row[4] > 0:
+                self._rows.append(tuple(float(v) for v in row))
+
+    def summary(self, now: float | None = None) -> dict[str, float]:
+        if now is None and self._rows:
+            now = max(r[0] for r in self._rows)
+        while self._rows and self._rows[0][0] < now - self.window_s:
+            self._rows.popleft()
+        if not self._rows:
+            return {"pairs": 0}
+        a = np.asarray(self._rows)
+        w = a[:, 4] / a[:, 4].sum()
+        return {
+            "pairs": int(len(a)),
+            "mae_m": float(w @ a[:, 1]),
+            "rmse_m": float(np.sqrt(w @ a[:, 2] ** 2)),
+            "delta1": float(w @ a[:, 3]),
+            "mean_skew_s": float(a[:, 5].mean()),
+        }
+
+
+class LiveDepthMAE:
+    def __init__(
+        self,
+        max_depth_m: float = 20.0,
+        max_skew_s: float = 0.10,
+        buffer_len: int = 30,
+        window_s: float = 5.0,
+    ):
+        self.max_mm = int(float(max_depth_m) * 1000.0)
+        self.max_skew = float(max_skew_s)
+        self.pred = StampRing(buffer_len)
+        self.gt = StampRing(buffer_len)
+        self.rolling = RollingMetrics(window_s)
+        self._done_t = float("-inf")  # newest prediction stamp already evaluated
+        self.matched = self.unmatched = 0
+
+    def push_pred(self, t: float, mm: np.ndarray) -> None:
+        self.pred.push(t, mm)
+
+    def push_gt(self, t: float, mm: np.ndarray) -> None:
+        self.gt.push(t, mm)
+
+    def update(self) -> dict[str, float]:
+        """Score predictions whose GT neighbourhood is complete; return rolling summary."""
+        pi, gi = self.pred.valid(), self.gt.valid()
+        if len(pi) and len(gi):
+            tp, tg = self.pred.t[pi], self.gt.t[gi]
+            # a prediction's nearest GT is settled once a GT stamp at or after it arrived
+            ready = (tp > self._done_t) & (tp <= tg[-1])
+            pend = pi[ready]
+            if len(pend):
+                a, b, dt = match_nearest(self.pred.t[pend], tg, self.max_skew)
+                self.matched += len(a)
+                self.unmatched += len(pend) - len(a)
+                self._done_t = float(self.pred.t[pend].max())
+                if len(a):
+                    pm = self.pred.buf[pend[a]]
+                    gm = self.gt.buf[gi[b]]
+                    if pm.shape[1:] != gm.shape[1:]:
+                        gm = resize_nearest(gm, pm.shape[1:])
+                    m = depth_metrics(pm, gm, self.max_mm)
+                    self.rolling.add(self.pred.t[pend[a]], m, dt)
+        out = self.rolling.summary()
+        total = self.matched + self.unmatched
+        out["match_rate"] = self.matched / total if total else 0.0
+        return out
+
+
+def evaluate_streams(
+    pred_t, pred_mm, gt_t, gt_mm, max_depth_m: float = 20.0, max_skew_s: float = 0.10
+) -> dict[str, float | np.ndarray]:
+    """Offline: nearest-stamp match whole recordings and score every matched pair."""
+    order = np.argsort(np.asarray(gt_t, np.float64), kind="stable")
+    gt_t = np.asarray(gt_t, np.float64)[order]
+    a, b, dt = match_nearest(pred_t, gt_t, max_skew_s)
+    if not len(a):
+        return {"pairs": 0}
+    max_mm = int(max_depth_m * 1000.0)
+    pm = np.asarray(pred_mm)[a]
+    gm = np.asarray(gt_mm)[order[b]]
+    if pm.shape[1:] != gm.shape[1:]:
+        gm = resize_nearest(gm, pm.shape[1:])
+    m = depth_metrics(pm, gm, max_mm)
+    roll = RollingMetrics(float("inf"))
+    roll.add(np.asarray(pred_t, np.float64)[a], m, dt)
+    return {**roll.summary(), "per_pair": m, "pred_idx": a, "gt_idx": order[b]}
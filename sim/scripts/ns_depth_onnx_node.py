@@ -2,39 +2,69 @@
 import argparse
 from pathlib import Path
 
-import cv2
-import numpy as np
 import onnxruntime as ort
 import rclpy
-from cv_bridge import CvBridge
+from ns_depth_core import DepthPipeline, DepthResult, image_to_array
 from rclpy.node import Node
+from rclpy.qos import HistoryPolicy, QoSProfile, ReliabilityPolicy
 from sensor_msgs.msg import Image
+from std_msgs.msg import Float32
+
+# keep only the newest camera frame; older ones are stale by the time we could run them
+QOS_LATEST = QoSProfile(
+    reliability=ReliabilityPolicy.BEST_EFFORT,
+    history=HistoryPolicy.KEEP_LAST,
+    depth=1,
+)
+
+
+def array_to_imgmsg(arr, encoding: str, header) -> Image:
+    """Image message from a contiguous HxW[xC] array (one copy, into the message)."""
+    msg = Image()
+    msg.header = header
+    msg.height, msg.width = arr.shape[:2]
+    msg.encoding = encoding
+    msg.is_bigendian = 0
+    msg.step = arr.strides[0]
+    msg.data = arr.tobytes()
+    return msg
 
 
 class DepthONNXNode(Node):
     def __init__(
-        self, model_path: Path, in_topic: str, out_topic: str, size=(320, 240), max_depth_m=20.0
+        self,
+        model_path: Path,
+        in_topic: str,
+        out_topic: str,
+        size=(320, 240),
+        max_depth_m=20.0,
+        threads: int = 0,
     ):
         super().__init__("ns_depth_onnx")
         self.size = tuple(size)  # (W, H)
-        self.max_depth_m = float(max_depth_m)
-        self.bridge = CvBridge()
         self._shutting_down = False
         rclpy.get_default_context().on_shutdown(self._mark_shutdown)
 
         # ONNX session
         so = ort.SessionOptions()
         so.log_severity_level = 3
-        self.sess = ort.InferenceSession(str(model_path), so, providers=["CPUExecutionProvider"])
-        self.in_name = self.sess.get_inputs()[0].name
+        if threads:
+            so.intra_op_num_threads = threads
+        sess = ort.InferenceSession(str(model_path), so, providers=["CPUExecutionProvider"])
 
         # I/O
         self.pub_depth = self.create_publisher(Image, out_topic, 10)
         self.pub_color = self.create_publisher(Image, out_topic + "_color", 10)
-        self.sub = self.create_subscription(Image, in_topic, self.cb, 10)
+        self.pub_latency = self.create_publisher(Float32, out_topic + "/latency_ms", 10)
+        self.pub_drop = self.create_publisher(Float32, out_topic + "/drop_rate", 10)
+
+        # inference runs on the pipeline's worker thread; the callback only hands frames over
+        self.pipe = DepthPipeline(sess, self.size, max_depth_m, publish=self._publish).start()
+        self.sub = self.create_subscription(Image, in_topic, self.cb, QOS_LATEST)
 
         self.get_logger().info(
-            f"Loaded {model_path}; subscribe {in_topic} -> publish {out_topic} (+_color) size={self.size}"
+            f"Loaded {model_path}; subscribe {in_topic} -> publish {out_topic} (+_color, "
+            f"/latency_ms, /drop_rate) size={self.size}"
         )
 
     # ---- shutdown & publish helpers ----
@@ -50,30 +80,26 @@ class DepthONNXNode(Node):
             # Context may already be tearing down; ignore.
             pass
 
-    # ---- callback ----
-    def cb(self, msg: Image):
-        # BGR8 -> RGB, resize to network size
-        bgr = self.bridge.imgmsg_to_cv2(msg, desired_encoding="bgr8")
-        rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
-        rgb = cv2.resize(rgb, self.size, interpolation=cv2.INTER_AREA)
-
-        x = (rgb.astype(np.float32) / 255.0).transpose(2, 0, 1)[None]  # 1x3xHxW
-        (y,) = self.sess.run(None, {self.in_name: x})
-        pred01 = np.clip(y[0, 0], 0.0, 1.0)
-
-        # Depth 0..1 -> millimeters in 16UC1
-        depth_mm = (pred01 * (self.max_depth_m * 1000.0)).astype(np.uint16)
-        depth_msg = self.bridge.cv2_to_imgmsg(depth_mm, encoding="16UC1")
-        depth_msg.header = msg.header
+    def destroy_node(self):
+        self.pipe.stop()
+        return super().destroy_node()
 
-        # Nice color preview
-        color8 = (pred01 * 255.0).astype(np.uint8)
-        color_bgr = cv2.applyColorMap(color8, cv2.COLORMAP_TURBO)
-        color_msg = self.bridge.cv2_to_imgmsg(color_bgr, encoding="bgr8")
-        color_msg.header = msg.header
+    # ---- callback (executor thread): zero-copy view, newest frame wins ----
+    def cb(self, msg: Image):
+        try:
+            img = image_to_array(msg)
+        except ValueError as e:
+            self.get_logger().warning(str(e), throttle_duration_sec=5.0)
+            return
+        self.pipe.submit(img, msg.encoding, msg.header)
 
-        self._safe_publish(self.pub_depth, depth_msg)
-        self._safe_publish(self.pub_color, color_msg)
+    # ---- worker thread ----
+    def _publish(self, r: DepthResult):
+        self._safe_publish(self.pub_depth, array_to_imgmsg(r.depth_mm, "16UC1", r.header))
+        if r.color is not None:
+            self._safe_publish(self.pub_color, array_to_imgmsg(r.color, "bgr8", r.header))
+        self._safe_publish(self.pub_latency, Float32(data=float(r.latency_ms)))
+        self._safe_publish(self.pub_drop, Float32(data=float(r.drop_rate)))
 
 
 def main():
@@ -83,6 +109,7 @@ def main():
     ap.add_argument("--out", dest="out_topic", default="/ns_depth/pred")
     ap.add_argument("--size", type=int, nargs=2, default=(320, 240), help="W H")
     ap.add_argument("--max_depth_m", type=float, default=20.0)
+    ap.add_argument("--threads", type=int, default=0, help="ORT intra-op threads")
     args = ap.parse_args()
 
     rclpy.init()
@@ -92,6 +119,7 @@ def main():
         out_topic=args.out_topic,
         size=tuple(args.size),
         max_depth_m=args.max_depth_m,
+        threads=args.threads,
     )
     try:
         rclpy.spin(node)
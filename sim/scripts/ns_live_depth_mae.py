@@ -1,36 +1,37 @@
 #!/usr/bin/env python3
-from dataclasses import dataclass
-
 import numpy as np
 import rclpy
 from cv_bridge import CvBridge
+from ns_depth_mae_core import LiveDepthMAE, to_mm
 from rclpy.node import Node
 from sensor_msgs.msg import Image
 from std_msgs.msg import Float32
 
 
-@dataclass
-class Buff:
-    img: np.ndarray = None
-    t: float = 0.0  # header stamp in seconds
-    enc: str = ""
-
-
 class LiveMAENode(Node):
     def __init__(self):
         super().__init__("ns_live_depth_mae")
         self.bridge = CvBridge()
-        self.max_mm = int(float(self.declare_parameter("max_depth_m", 20.0).value) * 1000.0)
+        max_depth_m = float(self.declare_parameter("max_depth_m", 20.0).value)
+        self.max_mm = int(max_depth_m * 1000.0)
         self.max_skew = float(self.declare_parameter("max_skew_s", 0.10).value)
-        self.pred = Buff()
-        self.gt = Buff()
+        buffer_len = int(self.declare_parameter("buffer_len", 30).value)
+        window_s = float(self.declare_parameter("window_s", 5.0).value)
+        publish_hz = float(self.declare_parameter("publish_hz", 10.0).value)
+        self.core = LiveDepthMAE(max_depth_m, self.max_skew, buffer_len, window_s)
         self.sub_pred = self.create_subscription(Image, "/ns_depth/pred", self.cb_pred, 10)
         self.sub_gt = self.create_subscription(Image, "/ns_depth/depth_image", self.cb_gt, 10)
         self.pub = self.create_publisher(Float32, "/ns_depth/live_mae_m", 10)
-        self.timer = self.create_timer(0.10, self.on_tick)  # 10 Hz compute
+        self.pub_rmse = self.create_publisher(Float32, "/ns_depth/live_rmse_m", 10)
+        self.pub_d1 = self.create_publisher(Float32, "/ns_depth/live_delta1", 10)
+        self.pub_match = self.create_publisher(Float32, "/ns_depth/live_match_rate", 10)
+        self.timer = self.create_timer(1.0 / max(publish_hz, 1e-3), self.on_tick)
         self.logged_pred_once = False
         self.logged_gt_once = False
-        self.get_logger().info(f"Live MAE up. max_depth={self.max_mm} mm, skew<={self.max_skew}s")
+        self.get_logger().info(
+            f"Live MAE up. max_depth={self.max_mm} mm, skew<={self.max_skew}s, "
+            f"buffers={buffer_len}, window={window_s}s @ {publish_hz} Hz"
+        )
 
     def _stamp_to_sec(self, msg: Image) -> float:
         return msg.header.stamp.sec + msg.header.stamp.nanosec * 1e-9
@@ -38,16 +39,7 @@ class LiveMAENode(Node):
     def img_to_mm(self, msg: Image, is_pred: bool):
         enc = (msg.encoding or "").lower()
         arr = self.bridge.imgmsg_to_cv2(msg, desired_encoding="passthrough")
-        if "16u" in enc:
-            if arr.dtype != np.uint16:
-                arr = arr.astype(np.uint16)
-            mm = arr
-        elif "32f" in enc:
-            mm = np.clip(arr * 1000.0, 0, self.max_mm).astype(np.uint16)  # meters->mm
-        else:
-            if arr.dtype != np.uint16:
-                arr = arr.astype(np.uint16)
-            mm = arr
+        mm = to_mm(arr, enc, self.max_mm)
         if is_pred and not self.logged_pred_once:
             self.get_logger().info(
                 f"pred enc={enc or '<?>'} dtype={arr.dtype} min={int(mm.min())} max={int(mm.max())}"
@@ -61,34 +53,21 @@ class LiveMAENode(Node):
         return mm, enc
 
     def cb_pred(self, msg: Image):
-        mm, enc = self.img_to_mm(msg, True)
-        self.pred.img = mm
-        self.pred.t = self._stamp_to_sec(msg)
-        self.pred.enc = enc
+        mm, _ = self.img_to_mm(msg, True)
+        self.core.push_pred(self._stamp_to_sec(msg), mm)
 
     def cb_gt(self, msg: Image):
-        mm, enc = self.img_to_mm(msg, False)
-        self.gt.img = mm
-        self.gt.t = self._stamp_to_sec(msg)
-        self.gt.enc = enc
+        mm, _ = self.img_to_mm(msg, False)
+        self.core.push_gt(self._stamp_to_sec(msg), mm)
 
     def on_tick(self):
-        if self.pred.img is None or self.gt.img is None:
+        s = self.core.update()
+        if not s.get("pairs") or not np.isfinite(s["mae_m"]):
             return
-        if abs(self.pred.t - self.gt.t) > self.max_skew:
-            return
-        a, b = self.pred.img, self.gt.img
-        if a.shape != b.shape:
-            import cv2
-
-            b = cv2.resize(b, (a.shape[1], a.shape[0]), interpolation=cv2.INTER_NEAREST)
-        valid = (a > 0) & (b > 0) & (a <= self.max_mm) & (b <= self.max_mm)
-        if not np.any(valid):
-            return
-        mae_m = float(
-            np.mean(np.abs(a[valid].astype(np.int32) - b[valid].astype(np.int32))) / 1000.0
-        )
-        self.pub.publish(Float32(data=mae_m))
+        self.pub.publish(Float32(data=s["mae_m"]))
+        self.pub_rmse.publish(Float32(data=s["rmse_m"]))
+        self.pub_d1.publish(Float32(data=s["delta1"]))
+        self.pub_match.publish(Float32(data=s["match_rate"]))
 
 
 def main():
@@ -9,6 +9,8 @@ import time
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+
 try:
     import yaml
 except Exception:
@@ -40,6 +42,102 @@ def _sample_val(v, rng: random.Random):
     return v
 
 
+def _compile_profile(prof, prefix: str = "") -> tuple[list[tuple], dict[str, Any]]:
+    """Flatten a profile into sampler specs once (same semantics as _sample_val).
+
+    Returns (specs, constants): specs are (dotted_key, "uniform", (lo, hi)) or
+    (dotted_key, "choice", options); everything else is a constant leaf.
+    """
+    specs: list[tuple] = []
+    consts: dict[str, Any] = {}
+    if isinstance(prof, dict) and (prof or not prefix):
+        for k, v in prof.items():
+            sub_specs, sub_consts = _compile_profile(v, f"{prefix}{k}.")
+            specs += sub_specs
+            consts.update(sub_consts)
+        return specs, consts
+    key = prefix[:-1]
+    if _is_range(prof):
+        specs.append((key, "uniform", (float(prof[0]), float(prof[1]))))
+    elif isinstance(prof, (list, tuple)) and len(prof) > 2:
+        specs.append((key, "choice", list(prof)))
+    else:
+        consts[key] = prof  # includes empty dicts, so batch_row keeps the key
+    return specs, consts
+
+
+def _native_options(options: list) -> bool:
+    """True if the options make a plain (non-object) array without changing type."""
+    kinds = {
+        bool if isinstance(o, bool) else (float if isinstance(o, int) else type(o)) for o in options
+    }
+    return kinds in ({str}, {float}, {bool})
+
+
+def sample_batch(prof: dict[str, Any], n: int, seed: int) -> tuple[dict[str, np.ndarray], dict]:
+    """Draw n profiles as columns keyed by dotted path, plus a JSON-able header."""
+    specs, consts = _compile_profile(prof)
+    rng = np.random.default_rng(seed)
+    cols: dict[str, np.ndarray] = {"index": np.arange(n, dtype=np.int64)}
+    json_cols = []
+    for key, kind, arg in specs:
+        if kind == "uniform":
+            cols[key] = rng.uniform(arg[0], arg[1], size=n)
+            continue
+        pick = rng.integers(0, len(arg), size=n)
+        if _native_options(arg):
+            cols[key] = np.asarray(arg)[pick]
+        else:
+            # dicts / lists / mixed types would become object arrays (pickle-only in .npz)
+            cols[key] = np.asarray([json.dumps(o, sort_keys=True) for o in arg])[pick]
+            json_cols.append(key)
+    meta = {"seed": seed, "samples": n, "constants": consts, "columns": list(cols)}
+    meta["json_columns"] = json_cols
+    return cols, meta
+
+
+def write_batch(path: Path, cols: dict[str, np.ndarray], meta: dict) -> None:
+    """Write columns as .parquet (needs pyarrow) or .npz with the header under '__meta__'."""
+    _mkdir(path.parent)
+    if path.suffix == ".parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table(cols).replace_schema_metadata({"ns_rand": json.dumps(meta)})
+        pq.write_table(table, path)
+    else:
+        np.savez(path, __meta__=np.asarray(json.dumps(meta)), **cols)
+
+
+def load_batch(path: Path) -> tuple[dict[str, np.ndarray], dict]:
+    path = Path(path)
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path)
+        meta = json.loads(table.schema.metadata[b"ns_rand"])
+        return {c: table.column(c).to_numpy() for c in table.column_names}, meta
+    with np.load(path) as z:
+        meta = json.loads(str(z["__meta__"]))
+        return {c: z[c] for c in meta["columns"]}, meta
+
+
+def batch_row(cols: dict[str, np.ndarray], meta: dict, i: int) -> dict[str, Any]:
+    """Rebuild the nested profile dict for row i (what _sample_val would have produced)."""
+    flat = dict(meta["constants"])
+    flat.update({k: v[i].item() for k, v in cols.items() if k != "index"})
+    for k in meta.get("json_columns", []):
+        flat[k] = json.loads(flat[k])
+    out: dict[str, Any] = {}
+    for key, val in flat.items():
+        node = out
+        *parents, leaf = key.split(".")
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = val
+    return out
+
+
 def _load_profile(path: Path) -> dict[str, Any]:
     if not path.exists():
         raise FileNotFoundError(f"profile not found: {path}")
@@ -69,10 +167,16 @@ def main(argv=None):
     ap.add_argument("--seed", type=int, default=None)
     ap.add_argument("--samples", type=int, default=1)
     ap.add_argument("--jsonl", default=None)
+    ap.add_argument(
+        "--batch",
+        type=int,
+        default=0,
+        help="draw N profiles in one pass into a columnar file (skips JSONL/legacy outputs)",
+    )
+    ap.add_argument("--batch-out", default=None, help=".npz (default) or .parquet path")
     args = ap.parse_args(argv)
 
     outdir = Path(args.out)
-    _mkdir(outdir)
     jsonl_path = Path(args.jsonl) if args.jsonl else outdir / "randomization.jsonl"
 
     seed = args.seed if args.seed is not None else int(time.time())
@@ -81,6 +185,20 @@ def main(argv=None):
     prof_path = Path(args.profile)
     prof = _load_profile(prof_path)
 
+    if args.batch > 0:
+        batch_path = Path(args.batch_out) if args.batch_out else outdir / "randomization_batch.npz"
+        t0 = time.perf_counter()
+        cols, meta = sample_batch(prof, int(args.batch), seed)
+        meta["profile"] = str(prof_path)
+        write_batch(batch_path, cols, meta)
+        dt = time.perf_counter() - t0
+        print(
+            f"[apply_randomization] wrote {args.batch} profile(s) x {len(cols) - 1} column(s) "
+            f"to {batch_path} in {dt * 1e3:.1f} ms"
+        )
+        return 0
+
+    _mkdir(outdir)
     last_sample = None
     with open(jsonl_path, "a") as jf:
         for i in range(int(args.samples)):
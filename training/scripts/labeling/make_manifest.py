@@ -4,11 +4,15 @@ from __future__ import annotations
 import argparse
 import hashlib
 import json
-from collections import Counter
+import sys
+from collections import Counter, defaultdict
 from pathlib import Path
 
 import yaml
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts" / "datasets"))
+from hashcache import DEFAULT_CACHE, hash_files  # noqa: E402
+
 IMG_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff"}
 
 
@@ -94,6 +98,21 @@ def write_dataset_yaml(
         yaml.safe_dump(payload, f, sort_keys=False)
 
 
+def content_duplicates(
+    images: list[Path], split_of: dict[Path, str], digests: dict[str, str]
+) -> dict[str, int]:
+    """Byte-identical images: extra copies, and groups whose copies sit in different splits."""
+    groups: dict[str, list[Path]] = defaultdict(list)
+    for img in images:
+        if str(img) in digests:
+            groups[digests[str(img)]].append(img)
+    dups = [g for g in groups.values() if len(g) > 1]
+    return {
+        "duplicates": sum(len(g) - 1 for g in dups),
+        "cross_split_duplicate_groups": sum(len({split_of[p] for p in g}) > 1 for g in dups),
+    }
+
+
 def make_manifest(
     images_dir: Path,
     labels_dir: Path,
@@ -103,6 +122,9 @@ def make_manifest(
     stats_json: Path | None,
     p_train: float,
     p_val: float,
+    hash_images: bool = False,
+    hash_cache: str | None = DEFAULT_CACHE,
+    hash_workers: int = 0,
 ) -> None:
     assert (
         0.0 < p_train < 1.0 and 0.0 <= p_val < 1.0 and p_train + p_val < 1.0
@@ -112,6 +134,7 @@ def make_manifest(
     images = find_images(images_dir)
     class_counts: Counter[int] = Counter()
     per_split: dict[str, list[Path]] = {"train": [], "val": [], "test": []}
+    split_of: dict[Path, str] = {}
     labeled_count = 0
 
     for img in images:
@@ -124,6 +147,7 @@ def make_manifest(
         # Split by image stem (stable)
         split = deterministic_split(img.stem, p_train, p_val)
         per_split[split].append(img)
+        split_of[img] = split
 
     # Write split files as absolute or repo-relative paths (use POSIX style)
     splits_dir.mkdir(parents=True, exist_ok=True)
@@ -151,6 +175,19 @@ def make_manifest(
         "splits": {"train": n_train, "val": n_val, "test": n_test},
         "ratios": {"train": p_train, "val": p_val, "test": p_test},
     }
+    if hash_images:
+        # content hashes (cached by stat) -> <splits>/sha256.txt + duplicate/leakage counts
+        rep = hash_files(images, cache_path=hash_cache, workers=hash_workers)
+        with (splits_dir / "sha256.txt").open("w") as f:
+            for p in images:
+                if str(p) in rep.digests:
+                    f.write(f"{rep.digests[str(p)]}  {p.as_posix()}\n")
+        stats_payload.update(content_duplicates(images, split_of, rep.digests))
+        stats_payload["hash_errors"] = len(rep.errors)
+        print(f"[hash]     {rep.summary()}")
+        if stats_payload["cross_split_duplicate_groups"]:
+            n = stats_payload["cross_split_duplicate_groups"]
+            print(f"[hash]     WARNING: {n} identical image group(s) span several splits")
     if stats_json is not None:
         stats_json.parent.mkdir(parents=True, exist_ok=True)
         stats_json.write_text(json.dumps(stats_payload, indent=2))
@@ -168,6 +205,10 @@ def main() -> int:
     ap.add_argument("--stats-json", type=Path, default=None)
     ap.add_argument("--train", type=float, default=0.8)
     ap.add_argument("--val", type=float, default=0.1)
+    ap.add_argument("--hash", action="store_true", help="sha256 images, report duplicates")
+    ap.add_argument("--hash-cache", default=DEFAULT_CACHE, help="sha256 cache (sqlite)")
+    ap.add_argument("--no-hash-cache", action="store_true")
+    ap.add_argument("--hash-workers", type=int, default=0)
     args = ap.parse_args()
 
     make_manifest(
@@ -179,6 +220,9 @@ def main() -> int:
         stats_json=args.stats_json,
         p_train=args.train,
         p_val=args.val,
+        hash_images=args.hash,
+        hash_cache=None if args.no_hash_cache else args.hash_cache,
+        hash_workers=args.hash_workers,
     )
     return 0
 
@@ -4,14 +4,19 @@ from __future__ import annotations
 import argparse
 import asyncio
 import json
-import math
 import os
+import sys
+from pathlib import Path
 from typing import Any
 
+import numpy as np
 import yaml
 from mavsdk import System
 from mavsdk.mission import MissionItem, MissionPlan
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # training/, for src.*
+from src.domain.projection import origin  # noqa: E402
+
 
 # ---------- utils ----------
 def load_yaml(p: str):
@@ -19,12 +24,10 @@ def load_yaml(p: str):
         return yaml.safe_load(f)
 
 
-def meters_to_latlon(
-    lat0: float, lon0: float, north_m: float, east_m: float
-) -> tuple[float, float]:
-    dlat = north_m / 111_320.0
-    dlon = east_m / (111_320.0 * math.cos(math.radians(lat0)) + 1e-9)
-    return lat0 + dlat, lon0 + dlon
+def meters_to_latlon(lat0: float, lon0: float, north_m, east_m):
+    """Local NED offsets (scalars or arrays) -> lat/lon via a true ENU frame at home."""
+    lat, lon, _ = origin(lat0, lon0).from_enu(east_m, north_m, 0.0)
+    return lat, lon
 
 
 async def wait_local_ok(drone: System, timeout_s: float = 60.0):
@@ -100,10 +103,15 @@ def make_mission_item(lat: float, lon: float, alt: float, speed: float) -> Missi
 def build_plan_from_home(mission: dict[str, Any], home_lat: float, home_lon: float) -> MissionPlan:
     speed = float(mission.get("speed_m_s", 5.0))
     items: list[MissionItem] = []
-    for wp in mission["waypoints"]:
-        lat, lon = meters_to_latlon(home_lat, home_lon, float(wp["north_m"]), float(wp["east_m"]))
-        alt = float(wp["alt_m"])
-        items.append(make_mission_item(lat, lon, alt, speed))
+    wps = mission["waypoints"]
+    lats, lons = meters_to_latlon(
+        home_lat,
+        home_lon,
+        np.array([float(wp["north_m"]) for wp in wps]),
+        np.array([float(wp["east_m"]) for wp in wps]),
+    )
+    for wp, lat, lon in zip(wps, lats.tolist(), lons.tolist(), strict=True):
+        items.append(make_mission_item(lat, lon, float(wp["alt_m"]), speed))
     return MissionPlan(items)
 
 
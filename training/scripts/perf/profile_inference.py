@@ -1,77 +1,47 @@
 #!/usr/bin/env python3
 import argparse
 import json
-import statistics
-import time
+import sys
 from pathlib import Path
 
-import numpy as np
-import torch
-import torch.nn as nn
-
-
-# Tiny CNN to simulate vision inference
-class TinyCNN(nn.Module):
-    def __init__(self, in_ch=3, out_dim=1000):
-        super().__init__()
-        self.net = nn.Sequential(
-            nn.Conv2d(in_ch, 32, 3, stride=2, padding=1),
-            nn.ReLU(inplace=True),
-            nn.Conv2d(32, 64, 3, stride=2, padding=1),
-            nn.ReLU(inplace=True),
-            nn.AdaptiveAvgPool2d((1, 1)),
-        )
-        self.fc = nn.Linear(64, out_dim)
-
-    def forward(self, x):
-        x = self.net(x)
-        x = x.flatten(1)
-        return self.fc(x)
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts" / "inference"))
+from bench_models import bench_model, set_affinity  # noqa: E402
 
 
 def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--height", type=int, default=224)
-    ap.add_argument("--width", type=int, default=224)
-    ap.add_argument("--warmup", type=int, default=20)
-    ap.add_argument("--iters", type=int, default=200)
+    ap.add_argument("--model", default="perception.depth", help="manifest name or .onnx path")
+    ap.add_argument("--manifest", default="deploy/models/manifest.json")
+    ap.add_argument("--height", type=int, default=384)
+    ap.add_argument("--width", type=int, default=640)
     ap.add_argument("--batch", type=int, default=1)
+    ap.add_argument("--threads", type=int, default=1)
+    ap.add_argument("--iters", type=int, default=2000)
     ap.add_argument("--save-json", type=str, default="artifacts/perf.json")
     args = ap.parse_args()
 
-    device = torch.device("cpu")
-    model = TinyCNN().to(device).eval()
-
-    x = torch.randn(args.batch, 3, args.height, args.width, device=device)
-
-    # Warmup
-    with torch.inference_mode():
-        for _ in range(args.warmup):
-            _ = model(x)
-
-    times_ms = []
-    with torch.inference_mode():
-        for _ in range(args.iters):
-            t0 = time.perf_counter()
-            _ = model(x)
-            t1 = time.perf_counter()
-            times_ms.append((t1 - t0) * 1000.0)
-
-    p50 = statistics.median(times_ms)
-    p95 = np.percentile(times_ms, 95)
-    fps = 1000.0 / p50 if p50 > 0 else float("inf")
-
+    cpus = set_affinity(None)
+    shape = [args.batch, 3, args.height, args.width]
+    rep, _ = bench_model(
+        args.model, args.manifest, threads=args.threads, samples=args.iters, shape=shape
+    )
+    # keys read by check_budgets.py
     out = {
-        "p50_ms": float(p50),
-        "p95_ms": float(p95),
-        "fps": float(fps),
-        "iters": args.iters,
+        "p50_ms": rep["p50_ms"],
+        "p95_ms": rep["p95_ms"],
+        "p99_ms": rep["p99_ms"],
+        "fps": rep["throughput_hz"],
+        "iters": rep["n"],
         "batch": args.batch,
-        "shape": [args.batch, 3, args.height, args.width],
-        "device": str(device),
+        "shape": rep["shape"],
+        "device": "cpu",
+        "model": args.model,
+        "threads": args.threads,
+        "affinity": cpus,
+        "rss_mb": rep["rss_mb"],
     }
 
-    Path("artifacts").mkdir(parents=True, exist_ok=True)
+    Path(args.save_json).parent.mkdir(parents=True, exist_ok=True)
     with open(args.save_json, "w") as f:
         json.dump(out, f, indent=2)
     print(json.dumps(out, indent=2))
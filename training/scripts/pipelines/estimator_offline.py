@@ -7,7 +7,8 @@ from pathlib import Path
 
 import matplotlib.pyplot as plt
 import numpy as np
-from src.estimators.ekf_cv import EKFCV, geodetic_to_local_xy
+from src.domain.projection import geodetic_to_local_xy
+from src.estimators.ekf_cv import EKFCV
 
 """
 Input: artifacts/waypoint_run.csv (expected columns)
@@ -35,6 +36,11 @@ def fnum(d, k, default=0.0):
         return default
 
 
+def fcol(rows, k, default=0.0) -> np.ndarray:
+    """Whole CSV column as float64 (bad/missing cells -> default)."""
+    return np.array([fnum(d, k, default) for d in rows], dtype=np.float64)
+
+
 def main(in_path: str):
     in_csv = Path(in_path)
     out_csv = in_csv.parent / "waypoint_run_ekf.csv"
@@ -44,10 +50,10 @@ def main(in_path: str):
         return
 
     # detect whether lat/lon move
-    lats = [fnum(d, "lat", 0.0) for d in rows]
-    lons = [fnum(d, "lon", 0.0) for d in rows]
-    lat_span = max(lats) - min(lats)
-    lon_span = max(lons) - min(lons)
+    lats = fcol(rows, "lat")
+    lons = fcol(rows, "lon")
+    lat_span = float(lats.max() - lats.min())
+    lon_span = float(lons.max() - lons.min())
 
     use_geo = (lat_span > 1e-6) or (lon_span > 1e-6)  # ~0.1 m threshold
     have_local_cols = "x_m" in cols and "y_m" in cols
@@ -57,39 +63,21 @@ def main(in_path: str):
     lon0 = lons[0]
     z0 = fnum(rows[0], "rel_alt_m", 0.0)
 
-    # build raw measurement trajectory (x_meas,y_meas)
-    x_meas = []
-    y_meas = []
-    z_meas = []
+    # build raw measurement trajectory (x_meas,y_meas), whole columns at once
+    z_meas = fcol(rows, "rel_alt_m")
     if have_local_cols:
-        for d in rows:
-            x_meas.append(fnum(d, "x_m", 0.0))
-            y_meas.append(fnum(d, "y_m", 0.0))
-            z_meas.append(fnum(d, "rel_alt_m", 0.0))
+        x_meas = fcol(rows, "x_m")
+        y_meas = fcol(rows, "y_m")
         mode = "local_xy_columns"
     elif use_geo:
-        for d in rows:
-            x, y = geodetic_to_local_xy(lat0, lon0, fnum(d, "lat", 0.0), fnum(d, "lon", 0.0))
-            x_meas.append(x)
-            y_meas.append(y)
-            z_meas.append(fnum(d, "rel_alt_m", 0.0))
+        x_meas, y_meas = geodetic_to_local_xy(lat0, lon0, lats, lons)
         mode = "geodetic"
     else:
         # integrate velocities (east=ve, north=vn)
-        x = 0.0
-        y = 0.0
-        t_prev = fnum(rows[0], "t", 0.0)
-        for d in rows:
-            t = fnum(d, "t", 0.0)
-            dt = max(1e-3, t - t_prev)
-            t_prev = t
-            ve = fnum(d, "ve", 0.0)
-            vn = fnum(d, "vn", 0.0)
-            x += ve * dt
-            y += vn * dt
-            x_meas.append(x)
-            y_meas.append(y)
-            z_meas.append(fnum(d, "rel_alt_m", 0.0))
+        t = fcol(rows, "t")
+        dt = np.maximum(1e-3, np.diff(t, prepend=t[0]))
+        x_meas = np.cumsum(fcol(rows, "ve") * dt)
+        y_meas = np.cumsum(fcol(rows, "vn") * dt)
         mode = "integrated_vn_ve"
 
     # EKF pass
@@ -101,7 +89,7 @@ def main(in_path: str):
     xs = []
     ys = []
     zs = []
-    for d, xm, ym, zm in zip(rows, x_meas, y_meas, z_meas, strict=False):
+    for d, xm, ym, zm in zip(rows, x_meas.tolist(), y_meas.tolist(), z_meas.tolist(), strict=False):
         t = fnum(d, "t", 0.0)
         dt = max(1e-3, t - t_prev)
         t_prev = t
@@ -27,12 +27,14 @@ class Quad2D:
     def state(self) -> tuple[float, float, float, float]:
         return self.px, self.py, self.vx, self.vy
 
-    def step(self, dt: float, ax_cmd: float, ay_cmd: float) -> tuple[float, float, float, float]:
+    def step(
+        self, dt: float, ax_cmd: float, ay_cmd: float, wind: tuple[float, float] = (0.0, 0.0)
+    ) -> tuple[float, float, float, float]:
         ax_cmd = _clamp(ax_cmd, -self.p.accel_max, self.p.accel_max)
         ay_cmd = _clamp(ay_cmd, -self.p.accel_max, self.p.accel_max)
-        # apply linear drag on velocity
-        ax = ax_cmd - self.p.drag * self.vx
-        ay = ay_cmd - self.p.drag * self.vy
+        # apply linear drag on airspeed (ground velocity minus local wind)
+        ax = ax_cmd - self.p.drag * (self.vx - wind[0])
+        ay = ay_cmd - self.p.drag * (self.vy - wind[1])
         # integrate
         self.vx += ax * dt
         self.vy += ay * dt
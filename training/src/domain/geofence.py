@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Vectorised geofence containment on planner grids.
+
+Polygons use the same grid coordinates and ray-cast convention as
+`geo.point_in_polygon` (a crossing counts when its x is >= the query x), so results
+agree point for point. A polygon is scanline-filled onto the grid once per
+(polygon, shape) and cached by content hash; integer on-grid queries are then a single
+mask gather. Off-grid or fractional points fall back to a crossing test that only looks
+at edges bucketed into the point's row band.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+_MASKS: OrderedDict[tuple, np.ndarray] = OrderedDict()
+MASK_CACHE_SIZE = 64
+
+
+def _as_poly(poly) -> np.ndarray:
+    arr = np.asarray(poly, dtype=np.float64).reshape(-1, 2)
+    if len(arr) < 3:
+        raise ValueError("geofence polygon needs at least 3 vertices")
+    return arr
+
+
+def polygon_key(poly) -> str:
+    arr = _as_poly(poly)
+    return hashlib.sha1(np.ascontiguousarray(arr).tobytes()).hexdigest()
+
+
+def _edges(arr: np.ndarray) -> tuple[np.ndarray, ...]:
+    x1, y1 = arr[:, 0], arr[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    keep = y1 != y2  # horizontal edges never straddle a scanline
+    return x1[keep], y1[keep], x2[keep], y2[keep]
+
+
+def rasterize_polygon(poly, shape: tuple[int, int]) -> np.ndarray:
+    """Boolean (H, W) mask: mask[y, x] == point_in_polygon((x, y), poly)."""
+    h, w = shape
+    x1, y1, x2, y2 = _edges(_as_poly(poly))
+    # edge straddles row y iff min(y1, y2) <= y < max(y1, y2)
+    lo = np.clip(np.ceil(np.minimum(y1, y2)), 0, h).astype(np.int64)
+    hi = np.clip(np.ceil(np.maximum(y1, y2)), 0, h).astype(np.int64)
+    n = np.maximum(hi - lo, 0)
+    eid = np.repeat(np.arange(len(n)), n)
+    ys = np.arange(len(eid)) - np.repeat(np.cumsum(n) - n, n) + lo[eid]
+    xin = x1[eid] + (x2[eid] - x1[eid]) * (ys - y1[eid]) / (y2[eid] - y1[eid])
+    # a crossing at xin toggles every cell x <= floor(xin); count them from the right
+    fx = np.floor(xin)
+    hit = fx >= 0
+    counts = np.zeros((h, w), dtype=np.int32)
+    np.add.at(counts, (ys[hit], np.minimum(fx[hit], w - 1).astype(np.int64)), 1)
+    return (np.cumsum(counts[:, ::-1], axis=1)[:, ::-1] & 1).astype(bool)
+
+
+def polygon_mask(poly, shape: tuple[int, int]) -> np.ndarray:
+    """Cached, read-only `rasterize_polygon` result keyed by polygon hash and shape."""
+    key = (polygon_key(poly), tuple(shape))
+    mask = _MASKS.get(key)
+    if mask is None:
+        mask = rasterize_polygon(poly, shape)
+        mask.setflags(write=False)
+        _MASKS[key] = mask
+        if len(_MASKS) > MASK_CACHE_SIZE:
+            _MASKS.popitem(last=False)
+    else:
+        _MASKS.move_to_end(key)
+    return mask
+
+
+class Geofence:
+    """Inclusion polygon with batched containment queries.
+
+    With `shape` the polygon is rasterized onto that grid (cached) and integer points
+    inside it are answered from the mask; everything else uses the bucketed crossing test.
+    """
+
+    def __init__(self, poly, shape: tuple[int, int] | None = None, bucket: float = 8.0):
+        self.poly = _as_poly(poly)
+        self.shape = tuple(shape) if shape is not None else None
+        self.mask = polygon_mask(self.poly, self.shape) if self.shape else None
+        self.bucket = float(bucket)
+        x1, y1, x2, y2 = _edges(self.poly)
+        self._e = (x1, y1, x2, y2)
+        # CSR buckets: edge ids overlapping each bucket's [b*bucket, (b+1)*bucket) band
+        self._y0 = float(np.floor(self.poly[:, 1].min()))
+        b_lo = ((np.minimum(y1, y2) - self._y0) // self.bucket).astype(np.int64)
+        b_hi = ((np.maximum(y1, y2) - self._y0) // self.bucket).astype(np.int64)
+        n = b_hi - b_lo + 1
+        eid = np.repeat(np.arange(len(n)), n)
+        bid = np.arange(len(eid)) - np.repeat(np.cumsum(n) - n, n) + b_lo[eid]
+        order = np.argsort(bid, kind="stable")
+        self._n_buckets = int(b_hi.max()) + 1 if len(b_hi) else 0
+        self._bucket_edges = eid[order]
+        self._bucket_ptr = np.searchsorted(bid[order], np.arange(self._n_buckets + 1))
+
+    def _crossing(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        out = np.zeros(x.shape, dtype=bool)
+        b = np.floor((y - self._y0) / self.bucket)
+        ok = (b >= 0) & (b < self._n_buckets)
+        b = np.where(ok, b, -1).astype(np.int64)
+        x1, y1, x2, y2 = self._e
+        for k in np.unique(b[ok]):
+            pts = np.flatnonzero(b == k)
+            e = self._bucket_edges[self._bucket_ptr[k] : self._bucket_ptr[k + 1]]
+            px, py = x[pts, None], y[pts, None]
+            ey1, ey2 = y1[e], y2[e]
+            straddle = (ey1 > py) != (ey2 > py)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                xin = x1[e] + (x2[e] - x1[e]) * (py - ey1) / (ey2 - ey1)
+            out[pts] = ((straddle & (xin >= px)).sum(axis=1) & 1).astype(bool)
+        return out
+
+    def contains(self, points) -> np.ndarray:
+        """Boolean per (x, y) point in an (N, 2) array."""
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        x, y = pts[:, 0], pts[:, 1]
+        out = np.zeros(len(pts), dtype=bool)
+        on_grid = np.zeros(len(pts), dtype=bool)
+        if self.mask is not None:
+            h, w = self.shape
+            on_grid = (x == np.floor(x)) & (y == np.floor(y))
+            on_grid &= (x >= 0) & (y >= 0) & (x < w) & (y < h)
+            out[on_grid] = self.mask[y[on_grid].astype(np.int64), x[on_grid].astype(np.int64)]
+        off = ~on_grid
+        if off.any():
+            out[off] = self._crossing(x[off], y[off])
+        return out
+
+    def contains_path(self, path, densify: bool = True) -> np.ndarray:
+        """Per-segment containment of a trajectory ((N, 2) -> N - 1 bools).
+
+        With `densify` every grid cell the segment passes through (rounded samples at
+        one per cell) must be inside, not only the endpoints.
+        """
+        p = np.asarray(path, dtype=np.float64).reshape(-1, 2)
+        if len(p) < 2:
+            return np.zeros(0, dtype=bool)
+        a, b = p[:-1], p[1:]
+        if not densify:
+            inside = self.contains(p)
+            return inside[:-1] & inside[1:]
+        n = np.maximum(np.ceil(np.abs(b - a).max(axis=1)).astype(np.int64), 1) + 1
+        sid = np.repeat(np.arange(len(a)), n)
+        k = np.arange(len(sid)) - np.repeat(np.cumsum(n) - n, n)
+        t = (k / (n[sid] - 1))[:, None]
+        samples = a[sid] + t * (b - a)[sid]
+        inner = (k > 0) & (k < n[sid] - 1)
+        samples[inner] = np.round(samples[inner])
+        inside = self.contains(samples)
+        return np.bincount(sid, weights=~inside, minlength=len(a)) == 0
+
+    def first_exit(self, path, densify: bool = True) -> int:
+        """Index of the first segment that leaves the fence, or -1 if the path stays in."""
+        bad = np.flatnonzero(~self.contains_path(path, densify))
+        return int(bad[0]) if len(bad) else -1
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Array-in/array-out geodetic <-> local coordinate conversions.
+
+Two local frames around an origin:
+  * equirectangular (east, north) on a sphere of radius R_EQUATOR, cos(mean latitude)
+    scaling — cheap and fine for a few km (the historical `geodetic_to_local_xy`);
+  * true ENU through WGS84 ECEF, valid at any range and including altitude.
+
+`LocalOrigin` precomputes the origin trigonometry and ECEF position once; `origin()`
+memoises instances so repeated conversions around the same home point reuse them.
+All functions broadcast over numpy arrays (scalars in -> 0-d arrays out).
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import numpy as np
+
+R_EQUATOR = 6378137.0  # WGS84 semi-major axis (m)
+F_WGS84 = 1.0 / 298.257223563
+E2_WGS84 = F_WGS84 * (2.0 - F_WGS84)
+B_WGS84 = R_EQUATOR * (1.0 - F_WGS84)
+EP2_WGS84 = E2_WGS84 / (1.0 - E2_WGS84)
+
+
+def geodetic_to_ecef(lat, lon, alt=0.0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    alt = np.asarray(alt, dtype=np.float64)
+    s, c = np.sin(lat), np.cos(lat)
+    n = R_EQUATOR / np.sqrt(1.0 - E2_WGS84 * s * s)
+    return (
+        (n + alt) * c * np.cos(lon),
+        (n + alt) * c * np.sin(lon),
+        (n * (1.0 - E2_WGS84) + alt) * s,
+    )
+
+
+def ecef_to_geodetic(x, y, z) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bowring's closed form with one refinement step (sub-mm for terrestrial heights)."""
+    x, y, z = (np.asarray(v, dtype=np.float64) for v in (x, y, z))
+    p = np.hypot(x, y)
+    lon = np.arctan2(y, x)
+    th = np.arctan2(z * R_EQUATOR, p * B_WGS84)
+    lat = np.arctan2(
+        z + EP2_WGS84 * B_WGS84 * np.sin(th) ** 3, p - E2_WGS84 * R_EQUATOR * np.cos(th) ** 3
+    )
+    s = np.sin(lat)
+    lat = np.arctan2(z + E2_WGS84 * R_EQUATOR / np.sqrt(1.0 - E2_WGS84 * s * s) * s, p)
+    s, c = np.sin(lat), np.cos(lat)
+    n = R_EQUATOR / np.sqrt(1.0 - E2_WGS84 * s * s)
+    # p/cos(lat) is unstable near the poles; use the z form there
+    with np.errstate(divide="ignore", invalid="ignore"):
+        alt = np.where(np.abs(c) > 1e-3, p / c - n, z / s - n * (1.0 - E2_WGS84))
+    return np.degrees(lat), np.degrees(lon), alt
+
+
+@dataclass(frozen=True)
+class LocalOrigin:
+    lat0: float
+    lon0: float
+    alt0: float = 0.0
+    _trig: tuple[float, float, float, float] = field(init=False, repr=False, compare=False)
+    _ecef: tuple[float, float, float] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        la, lo = math.radians(self.lat0), math.radians(self.lon0)
+        object.__setattr__(self, "_trig", (math.sin(la), math.cos(la), math.sin(lo), math.cos(lo)))
+        ecef = geodetic_to_ecef(self.lat0, self.lon0, self.alt0)
+        object.__setattr__(self, "_ecef", tuple(float(v) for v in ecef))
+
+    # ---- equirectangular ----
+    def to_local_xy(self, lat, lon) -> tuple[np.ndarray, np.ndarray]:
+        """(east, north) metres; longitude scaled by cos of the mean latitude."""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        east = R_EQUATOR * np.radians(lon - self.lon0) * np.cos(np.radians((lat + self.lat0) / 2.0))
+        return east, R_EQUATOR * np.radians(lat - self.lat0)
+
+    def from_local_xy(self, east, north) -> tuple[np.ndarray, np.ndarray]:
+        """Exact inverse of `to_local_xy`."""
+        lat = self.lat0 + np.degrees(np.asarray(north, dtype=np.float64) / R_EQUATOR)
+        c = np.cos(np.radians((lat + self.lat0) / 2.0))
+        lon = self.lon0 + np.degrees(np.asarray(east, dtype=np.float64) / (R_EQUATOR * c))
+        return lat, lon
+
+    # ---- ENU via ECEF ----
+    def to_enu(self, lat, lon, alt=0.0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        sl, cl, so, co = self._trig
+        x, y, z = geodetic_to_ecef(lat, lon, alt)
+        dx, dy, dz = x - self._ecef[0], y - self._ecef[1], z - self._ecef[2]
+        e = -so * dx + co * dy
+        n = -sl * co * dx - sl * so * dy + cl * dz
+        u = cl * co * dx + cl * so * dy + sl * dz
+        return e, n, u
+
+    def from_enu(self, e, n, u=0.0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        sl, cl, so, co = self._trig
+        e, n, u = (np.asarray(v, dtype=np.float64) for v in (e, n, u))
+        x = -so * e - sl * co * n + cl * co * u + self._ecef[0]
+        y = co * e - sl * so * n + cl * so * u + self._ecef[1]
+        z = cl * n + sl * u + self._ecef[2]
+        return ecef_to_geodetic(x, y, z)
+
+
+@lru_cache(maxsize=256)
+def origin(lat0: float, lon0: float, alt0: float = 0.0) -> LocalOrigin:
+    return LocalOrigin(float(lat0), float(lon0), float(alt0))
+
+
+def geodetic_to_local_xy(lat0, lon0, lat, lon) -> tuple[np.ndarray, np.ndarray]:
+    return origin(lat0, lon0).to_local_xy(lat, lon)
+
+
+def local_xy_to_geodetic(lat0, lon0, east, north) -> tuple[np.ndarray, np.ndarray]:
+    return origin(lat0, lon0).from_local_xy(east, north)
+
+
+def geodetic_to_enu(lat0, lon0, alt0, lat, lon, alt) -> tuple[np.ndarray, ...]:
+    return origin(lat0, lon0, alt0).to_enu(lat, lon, alt)
+
+
+def enu_to_geodetic(lat0, lon0, alt0, e, n, u) -> tuple[np.ndarray, ...]:
+    return origin(lat0, lon0, alt0).from_enu(e, n, u)
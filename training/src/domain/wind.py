@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import hashlib
+import json
 import math
 import random
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
 
 
 @dataclass
@@ -47,3 +52,134 @@ class WindField:
 
     def sample(self, dt: float) -> tuple[float, float, float]:
         return (self.wx.step(dt), self.wy.step(dt), self.wz.step(dt))
+
+
+# --- spatially correlated turbulence ------------------------------------------------------------
+
+WIND_CACHE_DIR = Path("artifacts/cache/wind")
+_FIELD_MEMO: dict[str, np.ndarray] = {}
+
+
+@dataclass(frozen=True)
+class TurbulenceParams:
+    """Frozen-turbulence grid synthesised from a von Kármán or Dryden spectrum.
+
+    ``shape`` is (ny, nx) for a horizontal slab or (nz, ny, nx) for a volume; the
+    grid is periodic, so lookups outside ``shape * spacing_m`` wrap around.
+    """
+
+    shape: tuple[int, ...] = (128, 128)
+    spacing_m: float = 2.0
+    length_scale_m: float = 50.0
+    sigma: tuple[float, float, float] = (1.5, 1.5, 0.8)  # per-component std (m/s)
+    mean: tuple[float, float, float] = (0.0, 0.0, 0.0)  # advection wind (m/s)
+    spectrum: str = "von_karman"  # or "dryden"
+
+    def key(self, seed: int) -> str:
+        blob = json.dumps({**asdict(self), "seed": int(seed)}, sort_keys=True)
+        return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+
+def _spectrum_amplitude(p: TurbulenceParams) -> np.ndarray:
+    """sqrt(PSD) on the rfftn frequency grid for a scalar isotropic field."""
+    d = len(p.shape)
+    axes = [np.fft.fftfreq(n, d=p.spacing_m) for n in p.shape[:-1]]
+    axes.append(np.fft.rfftfreq(p.shape[-1], d=p.spacing_m))
+    k2 = np.zeros([len(a) for a in axes])
+    for i, a in enumerate(axes):
+        sh = [1] * d
+        sh[i] = len(a)
+        k2 = k2 + (2.0 * np.pi * a.reshape(sh)) ** 2
+    lk2 = k2 * p.length_scale_m**2
+    if p.spectrum == "von_karman":
+        psd = (1.0 + (1.339**2) * lk2) ** (-(d / 2.0 + 1.0 / 3.0))
+    elif p.spectrum == "dryden":
+        psd = (1.0 + lk2) ** (-(d + 1.0) / 2.0)
+    else:
+        raise ValueError(f"unknown spectrum: {p.spectrum!r}")
+    psd.flat[0] = 0.0  # zero-mean fluctuations; the mean wind is added separately
+    return np.sqrt(psd)
+
+
+def synthesize_turbulence(p: TurbulenceParams, seed: int = 42) -> np.ndarray:
+    """FFT synthesis of a 3-component gust field, shape (3, *p.shape), float32."""
+    if len(p.shape) not in (2, 3):
+        raise ValueError("shape must be (ny, nx) or (nz, ny, nx)")
+    rng = np.random.default_rng(seed)
+    amp = _spectrum_amplitude(p)
+    out = np.empty((3, *p.shape), dtype=np.float32)
+    for c in range(3):
+        white = rng.standard_normal(p.shape)
+        comp = np.fft.irfftn(np.fft.rfftn(white) * amp, s=p.shape)
+        std = float(comp.std())
+        out[c] = comp * (p.sigma[c] / std if std > 0 else 0.0)
+    return out
+
+
+def load_turbulence(
+    p: TurbulenceParams, seed: int = 42, cache_dir: Path | None = WIND_CACHE_DIR
+) -> np.ndarray:
+    """Return the gust grid for (params, seed), synthesising it at most once.
+
+    Grids are memoised per process and persisted as ``<key>.npy`` under ``cache_dir``
+    (memory-mapped on reload); pass ``cache_dir=None`` to skip the disk cache.
+    """
+    key = p.key(seed)
+    if key in _FIELD_MEMO:
+        return _FIELD_MEMO[key]
+    path = Path(cache_dir) / f"turb_{key}.npy" if cache_dir is not None else None
+    if path is not None and path.is_file():
+        field = np.load(path, mmap_mode="r")
+    else:
+        field = synthesize_turbulence(p, seed)
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp.npy")
+            np.save(tmp, field)
+            tmp.replace(path)
+    _FIELD_MEMO[key] = field
+    return field
+
+
+class GriddedWindField:
+    """Spatially varying wind: mean flow plus frozen turbulence advected by it (Taylor).
+
+    ``sample(pos, t)`` takes positions of shape (N, 2) or (N, 3) in metres and returns
+    (N, 3) wind vectors via vectorised bilinear (2D grid) or trilinear (3D grid) lookup.
+    """
+
+    def __init__(
+        self,
+        p: TurbulenceParams | None = None,
+        seed: int = 42,
+        cache_dir: Path | None = WIND_CACHE_DIR,
+    ):
+        self.p = p or TurbulenceParams()
+        self.field = load_turbulence(self.p, seed=seed, cache_dir=cache_dir)
+        self.mean = np.asarray(self.p.mean, dtype=float)
+        self._dims = len(self.p.shape)
+        # grid axes are ordered (z, y, x); positions come in as (x, y, z)
+        self._shape = np.asarray(self.p.shape[::-1], dtype=np.int64)
+
+    def sample(self, pos, t: float = 0.0) -> np.ndarray:
+        pos = np.atleast_2d(np.asarray(pos, dtype=float))
+        d = self._dims
+        if pos.shape[1] < d:
+            pos = np.pad(pos, ((0, 0), (0, d - pos.shape[1])))
+        g = (pos[:, :d] - self.mean[:d] * t) / self.p.spacing_m
+        i0 = np.floor(g).astype(np.int64)
+        frac = g - i0
+        i0 %= self._shape
+        i1 = (i0 + 1) % self._shape
+
+        out = np.zeros((pos.shape[0], 3), dtype=float)
+        for corner in range(1 << d):
+            w = np.ones(pos.shape[0])
+            idx = []
+            for a in range(d):
+                hi = (corner >> a) & 1
+                w = w * (frac[:, a] if hi else 1.0 - frac[:, a])
+                idx.append(i1[:, a] if hi else i0[:, a])
+            # field axes are (component, [z,] y, x)
+            out += w[:, None] * self.field[(slice(None), *idx[::-1])].T
+        return out + self.mean
@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
-import math
 from dataclasses import dataclass
 
 import numpy as np
+from src.domain.projection import geodetic_to_local_xy  # noqa: F401
 
 
 @dataclass
@@ -51,12 +51,3 @@ class EKFCV:
         st.x = st.x + K @ y
         st.P = (self._I - K @ H) @ st.P
         return st
-
-
-def geodetic_to_local_xy(lat0, lon0, lat, lon):
-    R = 6378137.0
-    dlat = math.radians(lat - lat0)
-    dlon = math.radians(lon - lon0)
-    x = R * dlon * math.cos(math.radians((lat + lat0) / 2.0))
-    y = R * dlat
-    return x, y
@@ -32,12 +32,14 @@ def simulate_swarm(
     kp_form: float = 0.8,
     r_avoid: float = 0.7,
     k_avoid: float = 0.6,
+    wind=None,
 ) -> np.ndarray:
     """
     Simple 2D single-integrator swarm.
     - agent 0 = leader, tracks waypoints sequentially.
     - followers i>0 track leader + offsets[i-1].
     - pairwise repulsion for separation (barrier-style near collisions).
+    - optional `wind` (e.g. GriddedWindField) drifts each agent by its local xy wind.
     Returns: trace [steps, n_agents, 2]
     """
     assert n_agents >= 1
@@ -99,9 +101,12 @@ def simulate_swarm(
             ag.vx, ag.vy = float(v[0]), float(v[1])
 
         # integrate
+        gust = np.zeros((n_agents, 3))
+        if wind is not None:
+            gust = wind.sample(np.array([[ag.x, ag.y] for ag in agents]), t=k * dt)
         for i, ag in enumerate(agents):
-            ag.x += ag.vx * dt
-            ag.y += ag.vy * dt
+            ag.x += (ag.vx + gust[i, 0]) * dt
+            ag.y += (ag.vy + gust[i, 1]) * dt
             trace[k, i, 0] = ag.x
             trace[k, i, 1] = ag.y
 
@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import hashlib
 import random
-from collections import deque
+from collections import OrderedDict
 from dataclasses import dataclass
 
+import numpy as np
+
 Pos = tuple[int, int]
 
 
@@ -66,23 +69,168 @@ class GridWorld:
         return nxt, float(reward), bool(done), info
 
 
+class VecGridWorld:
+    """B copies of one GridWorld stepped in lock-step with NumPy, with auto-reset.
+
+    Obstacles/hazards become boolean masks indexed [y, x]; the dynamics are compiled
+    once into (S, A) next-state/reward/done/unsafe tables over flat states s = y*w + x,
+    so ``step`` is a handful of gathers regardless of B. Semantics match GridWorld.step.
+    With ``shaping_gamma`` the tables also carry the potential-based shaping term
+    gamma*phi(s') - phi(s), phi = -distance-to-goal, at no per-step cost.
+    """
+
+    ACTIONS = GridWorld.ACTIONS
+
+    def __init__(
+        self,
+        cfg: GWCfg | None = None,
+        n_envs: int = 1024,
+        max_steps: int = 0,
+        shaping_gamma: float | None = None,
+    ):
+        self.cfg = cfg or GWCfg()
+        c = self.cfg
+        self.n_envs = int(n_envs)
+        self.max_steps = int(max_steps) or 4 * c.w * c.h
+        self.shaping_gamma = shaping_gamma
+        self.n_states = c.w * c.h
+        self.n_actions = len(self.ACTIONS)
+        self.occ = cells_to_mask(c.w, c.h, c.obstacles or ())
+        self.hazard = cells_to_mask(c.w, c.h, c.hazards or ())
+        self.start_s = c.start[1] * c.w + c.start[0]
+        self.goal_s = c.goal[1] * c.w + c.goal[0]
+        self._compile()
+        self.s = np.full(self.n_envs, self.start_s, dtype=np.int64)
+        self.t = np.zeros(self.n_envs, dtype=np.int64)
+
+    def _compile(self) -> None:
+        c = self.cfg
+        ys, xs = np.divmod(np.arange(self.n_states), c.w)
+        d = np.asarray(self.ACTIONS)
+        nx = xs[:, None] + d[None, :, 0]
+        ny = ys[:, None] + d[None, :, 1]
+        inb = (nx >= 0) & (nx < c.w) & (ny >= 0) & (ny < c.h)
+        blocked = ~inb
+        blocked[inb] = self.occ[ny[inb], nx[inb]]
+        ns = np.where(blocked, np.arange(self.n_states)[:, None], ny * c.w + nx)
+        unsafe = ~blocked & self.hazard.ravel()[ns]
+        done = ~blocked & (ns == self.goal_s)
+        r = np.where(blocked, c.obstacle_penalty, c.step_cost)
+        r = r + unsafe * c.hazard_penalty + done * c.goal_reward
+        if self.shaping_gamma is not None:
+            phi = DISTANCE_FIELDS.potential(self.occ, c.goal).ravel()
+            phi_next = np.where(done, 0.0, phi[ns])
+            r = r + self.shaping_gamma * phi_next - phi[:, None]
+        self.next_s, self.reward, self.done, self.unsafe = ns, r.astype(np.float32), done, unsafe
+
+    def reset(self) -> np.ndarray:
+        self.s[:] = self.start_s
+        self.t[:] = 0
+        return self.s.copy()
+
+    def step(self, actions: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, dict]:
+        """Advance all envs; returns (next_s, reward, done, info) before auto-reset.
+
+        ``info["unsafe"]`` flags hazard entries, ``info["truncated"]`` episodes cut at
+        ``max_steps``; envs that finish either way restart from ``cfg.start``.
+        """
+        a = np.asarray(actions, dtype=np.int64)
+        s = self.s
+        nxt = self.next_s[s, a]
+        rew = self.reward[s, a]
+        done = self.done[s, a]
+        self.t += 1
+        trunc = ~done & (self.t >= self.max_steps)
+        info = {"unsafe": self.unsafe[s, a], "truncated": trunc}
+        end = done | trunc
+        self.s = np.where(end, self.start_s, nxt)
+        self.t[end] = 0
+        return nxt, rew, done, info
+
+
+def cells_to_mask(w: int, h: int, cells) -> np.ndarray:
+    """Boolean [h, w] mask from an iterable of (x, y) cells; out-of-grid cells are ignored."""
+    m = np.zeros((h, w), dtype=bool)
+    pts = np.asarray(list(cells), dtype=np.int64).reshape(-1, 2)
+    inside = (pts[:, 0] >= 0) & (pts[:, 0] < w) & (pts[:, 1] >= 0) & (pts[:, 1] < h)
+    m[pts[inside, 1], pts[inside, 0]] = True
+    return m
+
+
+UNREACHABLE = 10**9
+
+
+def distance_field(occ: np.ndarray, goal: Pos) -> np.ndarray:
+    """4-connected BFS distance to ``goal`` for every cell of a boolean [h, w] occupancy mask.
+
+    The frontier is a boolean array expanded by whole-grid shifts, so each BFS layer is a
+    few NumPy ops. Blocked/unreachable cells get UNREACHABLE.
+    """
+    h, w = occ.shape
+    free = ~occ
+    dist = np.full((h, w), UNREACHABLE, dtype=np.int64)
+    frontier = np.zeros((h, w), dtype=bool)
+    frontier[goal[1], goal[0]] = True
+    d = 0
+    while frontier.any():
+        dist[frontier] = d
+        nxt = np.zeros_like(frontier)
+        nxt[1:, :] |= frontier[:-1, :]
+        nxt[:-1, :] |= frontier[1:, :]
+        nxt[:, 1:] |= frontier[:, :-1]
+        nxt[:, :-1] |= frontier[:, 1:]
+        frontier = nxt & free & (dist == UNREACHABLE)
+        d += 1
+    return dist
+
+
+class DistanceFields:
+    """LRU of distance_field maps keyed by (occupancy mask, goal); lookups are O(1)."""
+
+    def __init__(self, maxsize: int = 32):
+        self.maxsize = maxsize
+        self._maps: OrderedDict[tuple, np.ndarray] = OrderedDict()
+
+    def get(self, occ: np.ndarray, goal: Pos) -> np.ndarray:
+        occ = np.ascontiguousarray(occ, dtype=bool)
+        key = (occ.shape, hashlib.sha1(occ.tobytes()).hexdigest(), tuple(goal))
+        if key in self._maps:
+            self._maps.move_to_end(key)
+            return self._maps[key]
+        field = distance_field(occ, goal)
+        field.setflags(write=False)
+        self._maps[key] = field
+        if len(self._maps) > self.maxsize:
+            self._maps.popitem(last=False)
+        return field
+
+    def potential(self, occ: np.ndarray, goal: Pos) -> np.ndarray:
+        """Shaping potential phi = -distance, with unreachable cells clamped to -(w*h)."""
+        return -np.minimum(self.get(occ, goal), occ.size).astype(np.float32)
+
+
+DISTANCE_FIELDS = DistanceFields()
+
+
 def shortest_path_len(w: int, h: int, start: Pos, goal: Pos, obstacles: set[Pos]) -> int:
-    """BFS on 4-connectivity (ignores hazards). Returns steps or large number if unreachable."""
-    Q = deque([(start, 0)])
-    seen = {start}
-    moves = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-    while Q:
-        (x, y), d = Q.popleft()
-        if (x, y) == goal:
-            return d
-        for dx, dy in moves:
-            nx, ny = x + dx, y + dy
-            if not (0 <= nx < w and 0 <= ny < h):
-                continue
-            if (nx, ny) in obstacles:
-                continue
-            if (nx, ny) in seen:
-                continue
-            seen.add((nx, ny))
-            Q.append(((nx, ny), d + 1))
-    return 10**9
+    """4-connectivity steps (ignores hazards), or UNREACHABLE. Served from DISTANCE_FIELDS.
+
+    Same semantics as a BFS from ``start``: the start cell itself is never checked, and a
+    goal that is blocked or off the grid can't be entered.
+    """
+    if start == goal:
+        return 0
+    occ = cells_to_mask(w, h, obstacles or ())
+    gx, gy = goal
+    if not (0 <= gx < w and 0 <= gy < h) or occ[gy, gx]:
+        return UNREACHABLE
+    field = DISTANCE_FIELDS.get(occ, goal)
+    x, y = start
+    if 0 <= x < w and 0 <= y < h and not occ[y, x]:
+        return int(field[y, x])
+    # blocked / off-grid start: one step onto the best neighbour (blocked cells are UNREACHABLE)
+    best = UNREACHABLE
+    for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+        if 0 <= nx < w and 0 <= ny < h and field[ny, nx] < UNREACHABLE:
+            best = min(best, int(field[ny, nx]) + 1)
+    return best
@@ -1,6 +1,16 @@
 import os
 import sys
 
+import pytest
+
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def _tool_caches_in_tmp(tmp_path_factory, monkeypatch):
+    """Keep per-machine tool caches (ORT graphs, sha256 cache) out of the working tree."""
+    root = tmp_path_factory.getbasetemp() / "tool_caches"
+    monkeypatch.setenv("NS_ORT_CACHE", str(root / "ort_cache"))
+    monkeypatch.setenv("NS_HASH_CACHE", str(root / "hash_cache.sqlite"))
@@ -0,0 +1,51 @@
+import numpy as np
+from src.domain.geo import point_in_polygon
+from src.domain.geofence import Geofence, polygon_mask, rasterize_polygon
+
+# concave "U" with fractional vertices and a vertex exactly on a scanline
+POLY = [
+    (2.5, 3.0),
+    (30.2, 3.0),
+    (30.2, 28.7),
+    (20.0, 28.7),
+    (20.0, 12.0),
+    (12.0, 12.0),
+    (12.0, 28.7),
+    (2.5, 28.7),
+]
+
+
+def test_raster_matches_point_in_polygon_everywhere():
+    mask = rasterize_polygon(POLY, (32, 36))
+    ref = np.array([[point_in_polygon((x, y), POLY) for x in range(36)] for y in range(32)])
+    assert np.array_equal(mask, ref)
+    assert mask[20, 5] and not mask[20, 15] and not mask[1, 5]
+
+
+def test_mask_is_cached_by_polygon_hash():
+    a = polygon_mask(POLY, (32, 36))
+    b = polygon_mask([tuple(p) for p in POLY], (32, 36))
+    assert a is b and not a.flags.writeable
+    assert polygon_mask(POLY, (40, 40)) is not a
+
+
+def test_batch_contains_on_and_off_grid():
+    fence = Geofence(POLY, shape=(32, 36), bucket=4.0)
+    rng = np.random.default_rng(1)
+    pts = np.concatenate(
+        [rng.integers(-5, 40, size=(500, 2)).astype(float), rng.uniform(-5, 40, size=(500, 2))]
+    )
+    ref = np.array([point_in_polygon(tuple(p), POLY) for p in pts])
+    assert np.array_equal(fence.contains(pts), ref)
+    assert np.array_equal(Geofence(POLY).contains(pts), ref)  # crossing test only
+
+
+def test_trajectory_containment():
+    fence = Geofence(POLY, shape=(32, 36))
+    # both endpoints inside the left arm, but the straight line crosses the notch
+    path = [(5, 20), (8, 25), (25, 20), (25, 6)]
+    seg = fence.contains_path(path)
+    assert seg.tolist() == [True, False, True]
+    assert fence.contains_path(path, densify=False).all()
+    assert fence.first_exit(path) == 1
+    assert fence.first_exit([(5, 5), (25, 5)]) == -1
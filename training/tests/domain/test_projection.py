@@ -0,0 +1,53 @@
+import math
+
+import numpy as np
+from src.domain.projection import (
+    enu_to_geodetic,
+    geodetic_to_ecef,
+    geodetic_to_enu,
+    geodetic_to_local_xy,
+    local_xy_to_geodetic,
+    origin,
+)
+
+LAT0, LON0, ALT0 = 43.6532, -79.3832, 76.0
+
+
+def _scalar_local_xy(lat0, lon0, lat, lon):
+    # the original per-point equirectangular formula from ekf_cv
+    r = 6378137.0
+    x = r * math.radians(lon - lon0) * math.cos(math.radians((lat + lat0) / 2.0))
+    return x, r * math.radians(lat - lat0)
+
+
+def test_local_xy_matches_scalar_formula_and_inverts():
+    rng = np.random.default_rng(0)
+    lat = LAT0 + rng.uniform(-0.05, 0.05, 200)
+    lon = LON0 + rng.uniform(-0.05, 0.05, 200)
+    x, y = geodetic_to_local_xy(LAT0, LON0, lat, lon)
+    ref = np.array([_scalar_local_xy(LAT0, LON0, a, b) for a, b in zip(lat, lon, strict=True)])
+    assert np.allclose(x, ref[:, 0]) and np.allclose(y, ref[:, 1])
+    lat2, lon2 = local_xy_to_geodetic(LAT0, LON0, x, y)
+    assert np.allclose(lat2, lat, atol=1e-12) and np.allclose(lon2, lon, atol=1e-12)
+
+
+def test_enu_round_trip_and_axes():
+    rng = np.random.default_rng(1)
+    lat = LAT0 + rng.uniform(-0.5, 0.5, 500)
+    lon = LON0 + rng.uniform(-0.5, 0.5, 500)
+    alt = rng.uniform(-50, 3000, 500)
+    e, n, u = geodetic_to_enu(LAT0, LON0, ALT0, lat, lon, alt)
+    lat2, lon2, alt2 = enu_to_geodetic(LAT0, LON0, ALT0, e, n, u)
+    assert np.abs(lat2 - lat).max() < 1e-9 and np.abs(lon2 - lon).max() < 1e-9
+    assert np.abs(alt2 - alt).max() < 1e-3
+    # 100 m up is pure +U; a small step north is ~pure +N
+    e, n, u = geodetic_to_enu(LAT0, LON0, ALT0, LAT0, LON0, ALT0 + 100.0)
+    assert abs(e) < 1e-6 and abs(n) < 1e-6 and abs(u - 100.0) < 1e-6
+    e, n, _ = origin(LAT0, LON0, ALT0).to_enu(LAT0 + 1e-4, LON0, ALT0)
+    assert abs(e) < 1e-6 and 11.0 < n < 11.2
+
+
+def test_origin_is_memoised_and_ecef_known_point():
+    assert origin(LAT0, LON0) is origin(LAT0, LON0)
+    x, y, z = geodetic_to_ecef(0.0, 0.0, 0.0)
+    assert np.allclose([x, y, z], [6378137.0, 0.0, 0.0])
@@ -1,4 +1,6 @@
-from src.domain.wind import OUParams, WindField
+import numpy as np
+from src.domain import wind as wind_mod
+from src.domain.wind import GriddedWindField, OUParams, TurbulenceParams, WindField
 
 
 def test_wind_stats_and_repeatability():
@@ -18,3 +20,33 @@ def test_wind_stats_and_repeatability():
     mean = sum(xs) / len(xs)
     var = sum((x - mean) ** 2 for x in xs) / len(xs)
     assert 0.5 < var < 4.0
+
+
+def test_gridded_wind_is_cached_and_spatially_varying(tmp_path):
+    p = TurbulenceParams(shape=(64, 64), spacing_m=2.0, length_scale_m=20.0, sigma=(1.5, 1.5, 0.5))
+    wf = GriddedWindField(p, seed=3, cache_dir=tmp_path)
+    assert len(list(tmp_path.glob("turb_*.npy"))) == 1
+    assert abs(float(wf.field[0].std()) - 1.5) < 1e-3
+
+    # grid nodes return the stored values; far-apart agents see different gusts
+    node = wf.sample([[4.0, 6.0]])[0]
+    assert np.allclose(node, wf.field[:, 3, 2], atol=1e-5)
+    pts = np.array([[0.0, 0.0], [60.0, 60.0]])
+    w = wf.sample(pts)
+    assert w.shape == (2, 3)
+    assert not np.allclose(w[0], w[1])
+
+    # periodic wrap and reload from disk give the same answer
+    period = np.array(p.shape[::-1]) * p.spacing_m
+    assert np.allclose(wf.sample(pts + period), w)
+    wind_mod._FIELD_MEMO.clear()
+    wf2 = GriddedWindField(p, seed=3, cache_dir=tmp_path)
+    assert np.allclose(wf2.sample(pts), w)
+
+
+def test_gridded_wind_advects_with_mean():
+    p = TurbulenceParams(shape=(8, 32, 32), spacing_m=1.0, mean=(3.0, 0.0, 0.0))
+    wf = GriddedWindField(p, seed=1, cache_dir=None)
+    xyz = np.array([[5.0, 7.0, 2.0]])
+    # frozen turbulence: what is at x now is at x + U*t after t seconds
+    assert np.allclose(wf.sample(xyz + [6.0, 0.0, 0.0], t=2.0), wf.sample(xyz, t=0.0))
@@ -0,0 +1,85 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import onnx
+import pytest
+from onnx import TensorProto, helper
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts" / "inference"))
+import bench_models as bm  # noqa: E402
+
+
+def _model(path):
+    x = helper.make_tensor_value_info("x", TensorProto.FLOAT, [1, 64])
+    y = helper.make_tensor_value_info("y", TensorProto.FLOAT, [1, 64])
+    g = helper.make_graph([helper.make_node("Relu", ["x"], ["y"])], "m", [x], [y])
+    m = helper.make_model(g, opset_imports=[helper.make_operatorsetid("", 13)])
+    m.ir_version = 8
+    onnx.save(m, path)
+    return str(path)
+
+
+def test_parse_cpus():
+    assert bm.parse_cpus("0-3,6,2") == [0, 1, 2, 3, 6]
+    assert bm.parse_cpus(None) == []
+
+
+def test_mann_whitney_matches_scipy():
+    stats = pytest.importorskip("scipy.stats")
+    rng = np.random.default_rng(0)
+    a = np.round(rng.lognormal(0.0, 0.3, 400), 2)  # rounding -> plenty of ties
+    b = np.round(rng.lognormal(0.05, 0.3, 500), 2)
+    u, p = bm.mann_whitney_greater(a, b)
+    ref = stats.mannwhitneyu(b, a, alternative="greater", method="asymptotic")
+    assert u == pytest.approx(ref.statistic)
+    assert p == pytest.approx(ref.pvalue, rel=1e-6)
+
+
+def test_gate_flags_shift_and_tail_but_not_noise():
+    rng = np.random.default_rng(1)
+    base = rng.lognormal(0.0, 0.1, 2000)
+    same = rng.lognormal(0.0, 0.1, 2000)
+    assert not bm.gate(base, same)["regressed"]
+
+    slower = rng.lognormal(np.log(1.3), 0.1, 2000)
+    g = bm.gate(base, slower)
+    assert g["regressed"] and g["quantiles"]["p50"]["regressed"] and g["mw_p"] < 1e-6
+
+    tail = rng.lognormal(0.0, 0.1, 2000)
+    tail[rng.random(2000) < 0.05] *= 3.0  # p50 unchanged, p99 blown up
+    g = bm.gate(base, tail)
+    assert not g["quantiles"]["p50"]["regressed"] and g["quantiles"]["p99"]["regressed"]
+
+
+def test_bench_save_then_gate(tmp_path):
+    model = _model(tmp_path / "m.onnx")
+    man = tmp_path / "manifest.json"
+    man.write_text(json.dumps({"ctl.m": {"path": model}}))
+    rep, ms = bm.bench_model("ctl.m", str(man), threads=1, samples=300, warmup_window=10)
+    assert rep["n"] == len(ms) == 300 and rep["shape"] == [1, 64]
+    assert rep["p50_ms"] <= rep["p95_ms"] <= rep["p99_ms"] and rep["throughput_hz"] > 0
+    assert rep["warmup_iters"] >= 20 and rep["rss_mb"] > 0
+
+    common = ["--manifest", str(man), "--samples", "300", "--baseline-dir", str(tmp_path / "b")]
+    assert bm.main([*common, "--save-baseline", "--out", str(tmp_path / "a.json")]) == 0
+    base = json.loads((tmp_path / "b" / "bench_ctl.m_t1.json").read_text())
+    assert len(base["samples_ms"]) == 300 and base["env"]["onnxruntime"]
+    out = tmp_path / "g.json"
+    gated = [*common, "--gate", "--gate-q", "50", "--min-effect", "1.0", "--out", str(out)]
+    assert bm.main(gated) == 0
+    assert "gate" in json.loads(out.read_text())["results"][0]
+
+
+def test_bench_rss_is_per_model_and_sequential_by_default(tmp_path):
+    model = _model(tmp_path / "m.onnx")
+    man = tmp_path / "manifest.json"
+    man.write_text(json.dumps({"ctl.m": {"path": model}}))
+    big = np.ones(64 << 20, dtype=np.uint8)  # a 64 MiB high-water mark from "another model"
+    big.fill(2)
+    del big
+    rep, _ = bm.bench_model("ctl.m", str(man), samples=50, warmup_window=10)
+    assert rep["inter_threads"] == 0 and "rss_delta_mb" in rep
+    if rep["peak_rss_mb"] is not None:
+        assert rep["peak_rss_mb"] < bm.rss_mb()[0] + 32
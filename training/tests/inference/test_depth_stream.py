@@ -0,0 +1,123 @@
+import csv
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper
+from PIL import Image
+
+SCRIPTS = Path(__file__).resolve().parents[3] / "scripts" / "inference"
+sys.path.insert(0, str(SCRIPTS))
+from depth_stream import DepthStreamer, NpySink, PngSink, png_names, read_index  # noqa: E402
+
+H, W = 12, 20
+
+
+def _depth_model(path):
+    # mean over RGB: [1, 3, H, W] -> [1, 1, H, W], fixed batch of 1 like the exported nets
+    x = helper.make_tensor_value_info("input", TensorProto.FLOAT, [1, 3, H, W])
+    y = helper.make_tensor_value_info("depth", TensorProto.FLOAT, [1, 1, H, W])
+    node = helper.make_node("ReduceMean", ["input"], ["depth"], axes=[1], keepdims=1)
+    m = helper.make_model(
+        helper.make_graph([node], "d", [x], [y]),
+        opset_imports=[helper.make_operatorsetid("", 13)],
+    )
+    m.ir_version = 8
+    onnx.save(m, path)
+    return str(path)
+
+
+def _dataset(root, n, missing=()):
+    """rgb/<t>.png frames (some at 2x size) + index.csv in ns_build_index.py's format."""
+    (root / "rgb").mkdir(parents=True)
+    rng = np.random.default_rng(0)
+    want = []
+    with open(root / "index.csv", "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["t_rgb", "rgb_path", "t_depth", "depth_path", "abs_dt"])
+        for i in range(n):
+            t = 100.0 + 0.1 * i
+            rel = f"rgb/{t:.6f}.png"
+            img = rng.integers(0, 256, (H, W, 3), dtype=np.uint8)
+            if i in missing:
+                want.append(np.zeros((H, W)))
+            else:
+                big = img.repeat(2, 0).repeat(2, 1) if i % 3 == 0 else img  # box resize -> img
+                Image.fromarray(big).save(root / rel)
+                want.append(img.astype(np.float64).mean(axis=2) / 255.0)
+            w.writerow([f"{t:.9f}", rel, f"{t:.9f}", f"depth/{t:.6f}.png", "0.000000"])
+    return np.stack(want)
+
+
+def test_stream_to_npy_matches_per_frame(tmp_path):
+    model = _depth_model(tmp_path / "d.onnx")
+    want = _dataset(tmp_path / "ds", 23, missing={5})
+    root, rows = read_index(str(tmp_path / "ds" / "index.csv"))
+    st = DepthStreamer(model, batch=8, workers=3, prefetch=2, cache_dir=str(tmp_path))
+    assert st.reexported and st.batch == 8 and st.size == (W, H)
+    sink = NpySink(str(tmp_path / "out.npy"), len(rows), st.out_hw)
+    rep = st.run([root / r["rgb_path"] for r in rows], sink)
+    assert sink.close() == [str(i) for i in range(23)]
+    got = np.load(tmp_path / "out.npy")
+    assert got.shape == (23, H, W) and got.dtype == np.float32
+    np.testing.assert_allclose(got, want, atol=1e-5)
+    assert rep["frames"] == 23 and rep["decode_errors"] == 1
+    assert 0 <= rep["q_ready_min"] <= rep["lookahead"] == 16
+    assert rep["p50_infer_ms"] > 0
+
+
+def test_streamer_skips_registry_warmup(tmp_path, monkeypatch):
+    import model_registry
+
+    calls = []
+    monkeypatch.setattr(model_registry, "warmup", lambda *a, **k: calls.append(a))
+    model_registry.clear()
+    st = DepthStreamer(_depth_model(tmp_path / "w.onnx"), batch=4, cache_dir=str(tmp_path))
+    assert st.reexported and calls == []  # BoundSession's dry run is the only warmup
+    assert len(list(tmp_path.glob("w.*.cpu.all.*.onnx"))) == 2  # graphs cached in cache_dir
+
+
+def test_stream_to_png_in_millimetres(tmp_path):
+    model = _depth_model(tmp_path / "d.onnx")
+    want = _dataset(tmp_path / "ds", 5)
+    root, rows = read_index(str(tmp_path / "ds" / "index.csv"))
+    st = DepthStreamer(model, batch=1)
+    assert not st.reexported
+    sink = PngSink(str(tmp_path / "pred"), png_names(rows), max_depth_m=10.0)
+    st.run([root / r["rgb_path"] for r in rows], sink)
+    names = sink.close()
+    assert names[0] == "100.000000.png"
+    for i, name in enumerate(names):
+        mm = np.asarray(Image.open(tmp_path / "pred" / name))
+        assert mm.dtype == np.uint16
+        assert np.abs(mm.astype(np.float64) - want[i] * 10000.0).max() <= 1.0
+
+
+def test_cli_index_mode(tmp_path):
+    model = _depth_model(tmp_path / "d.onnx")
+    _dataset(tmp_path / "ds", 6)
+    out = tmp_path / "out" / "depth.npy"
+    subprocess.run(
+        [
+            sys.executable,
+            str(SCRIPTS / "run_depth_offline.py"),
+            "--model",
+            model,
+            "--index",
+            str(tmp_path / "ds" / "index.csv"),
+            "--out-npy",
+            str(out),
+            "--batch",
+            "4",
+            "--json-out",
+            str(tmp_path / "rep.json"),
+        ],
+        check=True,
+        cwd=tmp_path,
+    )
+    assert np.load(out).shape == (6, H, W)
+    rows = list(csv.DictReader(open(tmp_path / "out" / "depth_index.csv")))
+    assert [r["pred"] for r in rows] == [str(i) for i in range(6)]
+    assert (tmp_path / "rep.json").is_file()
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(ROOT / "scripts" / "datasets"))
+sys.path.insert(0, str(ROOT / "training" / "scripts" / "labeling"))
+import hashcache as hc  # noqa: E402
+from make_manifest import make_manifest  # noqa: E402
+
+
+def _write(p: Path, data: bytes, age_s: float = 60.0) -> Path:
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_bytes(data)
+    t = time.time() - age_s  # older than RACY_S, so the result is cacheable
+    os.utime(p, (t, t))
+    return p
+
+
+def _sha(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def test_sha256_file_stream_and_mmap_agree(tmp_path):
+    data = os.urandom(300_000)
+    p = _write(tmp_path / "a.bin", data)
+    assert hc.sha256_file(str(p)) == _sha(data)
+    assert hc.sha256_file(str(p), chunk=4096, mmap_min=1) == _sha(data)
+    assert hc.sha256_file(str(_write(tmp_path / "e.bin", b"")), mmap_min=0) == _sha(b"")
+
+
+@pytest.mark.parametrize("processes", [False, True])
+def test_cache_skips_unchanged_and_rehashes_stale(tmp_path, processes):
+    cache = str(tmp_path / "cache.sqlite")
+    files = {tmp_path / "d" / f"f{i}.bin": os.urandom(1000 + i) for i in range(12)}
+    for p, d in files.items():
+        _write(p, d)
+    paths = [str(p) for p in files]
+    rep = hc.hash_files(paths, cache_path=cache, workers=3, processes=processes)
+    assert rep.hashed == 12 and rep.hits == 0 and not rep.errors
+    assert rep.digests == {str(p): _sha(d) for p, d in files.items()}
+
+    again = hc.hash_files(paths, cache_path=cache)  # new process/connection: persisted
+    assert again.hashed == 0 and again.hits == 12 and again.digests == rep.digests
+
+    p0, p1 = list(files)[:2]
+    _write(p0, b"changed size")
+    _write(p1, bytes(reversed(files[p1])), age_s=30.0)  # same size, new mtime
+    third = hc.hash_files(paths + [str(tmp_path / "gone.bin")], cache_path=cache)
+    assert third.hashed == 2 and third.hits == 10
+    assert third.digests[str(p0)] == _sha(b"changed size")
+    assert third.digests[str(p1)] == _sha(bytes(reversed(files[p1])))
+    assert list(third.errors) == [str(tmp_path / "gone.bin")]
+
+
+def test_recently_modified_files_are_not_cached(tmp_path):
+    cache = str(tmp_path / "cache.sqlite")
+    p = _write(tmp_path / "fresh.bin", b"x" * 10, age_s=0.0)
+    assert hc.hash_files([p], cache_path=cache).hashed == 1
+    assert hc.hash_files([p], cache_path=cache).hashed == 1  # racy: hashed again
+    with hc.HashCache(cache) as c:
+        assert len(c) == 0
+    assert hc.hash_files([p], cache_path=None).digests[str(p)] == _sha(b"x" * 10)
+
+
+def test_make_manifest_reports_cross_split_duplicates(tmp_path):
+    img = tmp_path / "images"
+    same = os.urandom(64)
+    for i in range(40):
+        _write(img / f"im{i:02d}.png", same if i < 3 else os.urandom(64))
+    (tmp_path / "labels").mkdir()
+    (tmp_path / "labelmap.yaml").write_text("names: [a]\n")
+    stats = tmp_path / "stats.json"
+    make_manifest(
+        img,
+        tmp_path / "labels",
+        tmp_path / "labelmap.yaml",
+        tmp_path / "data.yaml",
+        tmp_path / "splits",
+        stats,
+        0.5,
+        0.25,
+        hash_images=True,
+        hash_cache=str(tmp_path / "cache.sqlite"),
+    )
+    s = json.loads(stats.read_text())
+    assert s["duplicates"] == 2 and s["hash_errors"] == 0
+    lines = (tmp_path / "splits" / "sha256.txt").read_text().splitlines()
+    assert len(lines) == 40 and lines[0].split()[0] == _sha(same)
+    splits = {
+        name
+        for name in ("train", "val", "test")
+        for line in (tmp_path / "splits" / f"{name}.txt").read_text().splitlines()
+        if Path(line).stem in {"im00", "im01", "im02"}
+    }
+    assert s["cross_split_duplicate_groups"] == (1 if len(splits) > 1 else 0)
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import onnx
+import pytest
+from onnx import TensorProto, helper
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts" / "inference"))
+import model_registry as reg  # noqa: E402
+
+
+def _policy(path):
+    obs = helper.make_tensor_value_info("obs", TensorProto.FLOAT, ["N", 8])
+    act = helper.make_tensor_value_info("act", TensorProto.FLOAT, ["N", 2])
+    w = helper.make_tensor("W", TensorProto.FLOAT, [8, 2], np.ones(16, np.float32).tolist())
+    g = helper.make_graph(
+        [helper.make_node("MatMul", ["obs", "W"], ["act"])], "p", [obs], [act], [w]
+    )
+    m = helper.make_model(g, opset_imports=[helper.make_operatorsetid("", 13)])
+    m.ir_version = 8
+    onnx.save(m, path)
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def test_registry_reuses_verified_sessions(tmp_path):
+    reg.clear()
+    model = tmp_path / "policy.onnx"
+    sha = _policy(model)
+    man = tmp_path / "manifest.json"
+    man.write_text(json.dumps({"control.policy": {"dst": str(model), "sha256": sha}}))
+    cache = tmp_path / "cache"
+
+    s1 = reg.get_session("control.policy", str(man), cache_dir=str(cache))
+    t0 = time.perf_counter()
+    s2 = reg.get_session("control.policy", str(man), cache_dir=str(cache))
+    s3 = reg.get_session(str(model), str(man), cache_dir=str(cache))  # by path, same model
+    assert s1 is s2 is s3
+    assert (time.perf_counter() - t0) * 1e3 < 100
+    y = s1.run(None, {"obs": np.ones((3, 8), np.float32)})[0]
+    assert y.shape == (3, 2) and np.allclose(y, 8.0)
+
+    # the optimised graph is cached on disk and reloaded in a "new process"
+    assert len(list(cache.glob("policy.*.onnx"))) == 1
+    reg.clear()
+    s4 = reg.get_session("control.policy", str(man), cache_dir=str(cache))
+    assert s4 is not s1
+    assert np.allclose(s4.run(None, {"obs": np.ones((1, 8), np.float32)})[0], 8.0)
+
+
+def test_registry_rejects_sha_mismatch(tmp_path):
+    reg.clear()
+    model = tmp_path / "policy.onnx"
+    _policy(model)
+    man = tmp_path / "manifest.json"
+    man.write_text(json.dumps({"control.policy": {"path": str(model), "sha256": "0" * 64}}))
+    with pytest.raises(RuntimeError, match="sha256 mismatch"):
+        reg.get_session("control.policy", str(man), cache_dir=None)
+    with pytest.raises(FileNotFoundError):
+        reg.get_session("perception.depth", str(man), cache_dir=None)
+
+
+def _conv(path):
+    x = helper.make_tensor_value_info("x", TensorProto.FLOAT, ["N", 1, "H", "W"])
+    y = helper.make_tensor_value_info("y", TensorProto.FLOAT, ["N", 1, "H2", "W2"])
+    w = helper.make_tensor("K", TensorProto.FLOAT, [1, 1, 3, 3], np.ones(9, np.float32).tolist())
+    g = helper.make_graph([helper.make_node("Conv", ["x", "K"], ["y"])], "c", [x], [y], [w])
+    m = helper.make_model(g, opset_imports=[helper.make_operatorsetid("", 13)])
+    m.ir_version = 8
+    onnx.save(m, path)
+
+
+def test_registry_warmup_dynamic_spatial_dims(tmp_path, capsys):
+    reg.clear()
+    model = tmp_path / "conv.onnx"
+    _conv(model)
+    man = tmp_path / "manifest.json"
+    # no manifest shape: warmup is skipped instead of feeding a 1x1 image to a 3x3 Conv
+    sess = reg.get_session(str(model), str(man), cache_dir=None)
+    assert not reg.warmup(sess)
+    assert reg.warmup(sess, [1, 1, 16, 16])
+    assert sess.run(None, {"x": np.ones((1, 1, 8, 8), np.float32)})[0].shape == (1, 1, 6, 6)
+
+    # an unusable manifest shape is logged, the session is still returned
+    reg.clear()
+    man.write_text(json.dumps({"depth": {"dst": str(model), "shape": "1x1x1x1"}}))
+    sess = reg.get_session("depth", str(man), cache_dir=None)
+    assert "warmup skipped" in capsys.readouterr().err
+    assert sess.run(None, {"x": np.ones((1, 1, 4, 4), np.float32)})[0].shape == (1, 1, 2, 2)
+
+
+def test_registry_cache_dir_follows_env(tmp_path, monkeypatch):
+    reg.clear()
+    model = tmp_path / "policy.onnx"
+    _policy(model)
+    monkeypatch.setenv("NS_ORT_CACHE", str(tmp_path / "env_cache"))
+    reg.get_session(str(model), str(tmp_path / "none.json"))
+    assert len(list((tmp_path / "env_cache").glob("policy.*.onnx"))) == 1
@@ -0,0 +1,94 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts" / "inference"))
+import model_registry as reg  # noqa: E402
+from optimize_model import fp16_weights, optimize  # noqa: E402
+
+
+def _depth(path):
+    # Conv(3->8, 3x3) -> Relu -> Conv(8->1, 1x1): a tiny stand-in for the depth net
+    rng = np.random.default_rng(0)
+    w1 = numpy_helper.from_array(rng.normal(0, 0.3, (8, 3, 3, 3)).astype(np.float32), "w1")
+    w2 = numpy_helper.from_array(rng.normal(0, 0.3, (1, 8, 1, 1)).astype(np.float32), "w2")
+    x = helper.make_tensor_value_info("input", TensorProto.FLOAT, [1, 3, 16, 24])
+    y = helper.make_tensor_value_info("output", TensorProto.FLOAT, [1, 1, 16, 24])
+    nodes = [
+        helper.make_node("Conv", ["input", "w1"], ["c1"], pads=[1, 1, 1, 1]),
+        helper.make_node("Relu", ["c1"], ["r1"]),
+        helper.make_node("Conv", ["r1", "w2"], ["output"]),
+    ]
+    g = helper.make_graph(nodes, "depth", [x], [y], [w1, w2])
+    m = helper.make_model(g, opset_imports=[helper.make_operatorsetid("", 13)])
+    m.ir_version = 8
+    onnx.save(m, path)
+
+
+def test_fp16_weights_halves_weight_storage(tmp_path):
+    _depth(tmp_path / "d.onnx")
+    fp16_weights(str(tmp_path / "d.onnx"), str(tmp_path / "d16.onnx"))
+    inits = {i.name: i.data_type for i in onnx.load(str(tmp_path / "d16.onnx")).graph.initializer}
+    # w1 (216 values) is stored as fp16; w2 (8 values) is below min_elems and kept as-is
+    assert inits == {"w1__fp16": TensorProto.FLOAT16, "w2": TensorProto.FLOAT}
+
+
+def test_optimize_registers_variants_and_picks_passing(tmp_path):
+    reg.clear()
+    model = tmp_path / "d.onnx"
+    _depth(model)
+    man = tmp_path / "manifest.json"
+    man.write_text(json.dumps({"perception.depth": {"path": str(model), "shape": [1, 3, 16, 24]}}))
+    rep = optimize(
+        "perception.depth",
+        str(man),
+        out_dir=str(tmp_path / "variants"),
+        tol_mean=1e-3,
+        tol_std=1e-3,
+        iters=5,
+        warmup=1,
+        perf_dir=str(tmp_path / "perf"),
+    )
+    m = json.loads(man.read_text())
+    assert "p50_ms" in m["perception.depth"]
+    for v in ("ortopt", "int8", "fp16w"):
+        e = m[f"perception.depth@{v}"]
+        assert Path(e["path"]).is_file() and len(e["sha256"]) == 64
+        assert e["p50_ms"] >= 0 and {"d_mean", "d_std", "max_abs"} <= e["acc"].keys()
+    assert m["perception.depth@ortopt"]["passes"]
+    assert m["perception.depth@ortopt"]["acc"]["max_abs"] < 1e-5
+    assert m["perception.depth@fp16w"]["acc"]["max_abs"] < 1e-2
+    # the pick is the base or a passing variant, and never slower than the base
+    best = rep["best"]
+    assert best == "perception.depth" or m[best]["passes"]
+    assert m.get(best, {}).get("p50_ms", 0) <= m["perception.depth"]["p50_ms"]
+    # registered variants are loadable by name through the registry
+    sess = reg.get_session("perception.depth@fp16w", str(man), cache_dir=None)
+    assert sess.get_inputs()[0].name == "input"
+
+
+def test_optimize_accepts_list_manifest(tmp_path):
+    reg.clear()
+    model = tmp_path / "d.onnx"
+    _depth(model)
+    man = tmp_path / "manifest.json"
+    other = {"name": "control.policy", "path": "p.onnx"}
+    entry = {"name": "perception.depth", "path": str(model), "shape": [1, 3, 16, 24]}
+    man.write_text(json.dumps([entry, other]))
+    optimize(
+        "perception.depth",
+        str(man),
+        variants=("ortopt",),
+        out_dir=str(tmp_path / "variants"),
+        iters=2,
+        warmup=1,
+        perf_dir=str(tmp_path / "perf"),
+    )
+    m = json.loads(man.read_text())
+    assert m["control.policy"] == other and "p50_ms" in m["perception.depth"]
+    assert m["perception.depth@ortopt"]["passes"]
+    assert [p.name for p in tmp_path.iterdir() if p.name.startswith("manifest")] == [man.name]
@@ -0,0 +1,73 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts" / "inference"))
+from ort_runtime import DepthPolicyPipeline, column_bin_features, make_session  # noqa: E402
+
+
+def _loop_features(depth, n_feats):
+    # reference: the per-bin loop e2e_tick used to run
+    _, _, h, w = depth.shape
+    d = depth.reshape(h, w)
+    edges = np.linspace(0, w, n_feats + 1, dtype=int)
+    return np.array(
+        [d[:, a:b].mean() if b > a else 0.0 for a, b in zip(edges[:-1], edges[1:], strict=True)]
+    )
+
+
+def _models(tmp_path, h=24, w=40, n_feats=8):
+    x = helper.make_tensor_value_info("input", TensorProto.FLOAT, [1, 3, h, w])
+    y = helper.make_tensor_value_info("output", TensorProto.FLOAT, [1, 1, h, w])
+    axes = helper.make_tensor("axes", TensorProto.INT64, [1], [1])
+    g = helper.make_graph(
+        [helper.make_node("ReduceMean", ["input", "axes"], ["output"], keepdims=1)],
+        "depth",
+        [x],
+        [y],
+        [axes],
+    )
+    depth = tmp_path / "depth.onnx"
+    m = helper.make_model(g, opset_imports=[helper.make_operatorsetid("", 18)])
+    m.ir_version = 8
+    onnx.save(m, depth)
+    obs = helper.make_tensor_value_info("obs", TensorProto.FLOAT, [1, n_feats])
+    act = helper.make_tensor_value_info("act", TensorProto.FLOAT, [1, 2])
+    wts = np.arange(n_feats * 2, dtype=np.float32).reshape(n_feats, 2) / 10
+    g = helper.make_graph(
+        [helper.make_node("MatMul", ["obs", "W"], ["act"])],
+        "policy",
+        [obs],
+        [act],
+        [helper.make_tensor("W", TensorProto.FLOAT, [n_feats, 2], wts.ravel().tolist())],
+    )
+    policy = tmp_path / "policy.onnx"
+    m = helper.make_model(g, opset_imports=[helper.make_operatorsetid("", 13)])
+    m.ir_version = 8
+    onnx.save(m, policy)
+    return str(depth), str(policy), wts
+
+
+def test_column_bin_features_match_loop():
+    rng = np.random.default_rng(0)
+    for w, n in ((640, 64), (50, 7), (5, 8)):
+        d = rng.random((1, 1, 12, w), dtype=np.float32)
+        assert np.allclose(column_bin_features(d, n)[0], _loop_features(d, n), atol=1e-6)
+
+
+def test_pipelined_matches_sequential(tmp_path):
+    depth, policy, wts = _models(tmp_path)
+    rng = np.random.default_rng(1)
+    frames = [rng.random((1, 3, 24, 40), dtype=np.float32) for _ in range(20)]
+    expected = [column_bin_features(f.mean(axis=1, keepdims=True), 8) @ wts for f in frames]
+    for pipelined in (True, False):
+        with DepthPolicyPipeline(make_session(depth), make_session(policy)) as pipe:
+            got = [u.copy() for u in pipe.run(frames, pipelined=pipelined)]
+            rep = pipe.report()
+        assert len(got) == 20 and rep["frames"] == 20 and rep["hz"] > 0
+        assert {"p50_depth_ms", "p99_policy_ms", "p99_tick_ms"} <= rep.keys()
+        for g, e in zip(got, expected, strict=True):
+            assert np.allclose(g, e, atol=1e-5)
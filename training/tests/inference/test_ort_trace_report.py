@@ -0,0 +1,95 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts" / "inference"))
+import ort_trace_report as tr  # noqa: E402
+from ort_profile import profile_model  # noqa: E402
+
+
+def _ev(cat, name, ts, dur, op=None):
+    e = {"cat": cat, "name": name, "ts": ts, "dur": dur, "ph": "X", "pid": 1, "tid": 1}
+    e["args"] = {"op_name": op, "provider": "CPUExecutionProvider"} if op else {}
+    return e
+
+
+def _trace(runs, conv_us, relu_us, extra=None):
+    ev, t = [_ev("Session", "session_initialization", 0, 50)], 100
+    for _ in range(runs):
+        ev.append(_ev("Session", "model_run", t, conv_us + relu_us + 10))
+        ev.append(_ev("Node", "conv1_fence_before", t, 0, "Conv"))
+        ev.append(_ev("Node", "conv1_kernel_time", t + 1, conv_us, "Conv"))
+        ev.append(_ev("Node", "relu1_kernel_time", t + 2 + conv_us, relu_us, "Relu"))
+        if extra:
+            ev.append(_ev("Node", f"{extra}_kernel_time", t + 3 + conv_us, 5, "Cast"))
+        t += conv_us + relu_us + 100
+    return ev
+
+
+def test_aggregate_skips_warmup_and_ranks():
+    ev = _trace(5, 300, 100)
+    # make the first two (warmup) runs slow; they must not count
+    for e in ev:
+        if e["name"] == "conv1_kernel_time" and e["ts"] < 100 + 2 * 500:  # runs are 500 us apart
+            e["dur"] = 10_000
+    rep = tr.aggregate(ev, skip_runs=2)
+    assert rep["runs"] == 3 and rep["skipped_runs"] == 2
+    assert [r["op"] for r in rep["by_op"]] == ["Conv", "Relu"]
+    conv = rep["by_op"][0]
+    assert conv["calls"] == 3 and conv["us_per_run"] == 300 and conv["nodes"] == 1
+    assert abs(conv["share"] - 0.75) < 1e-9
+    assert rep["kernel_us_per_run"] == 400 and rep["overhead_us_per_run"] == 10
+    assert rep["by_node"][0]["node"] == "conv1"
+
+
+def test_aggregate_with_every_run_skipped_is_empty():
+    for skip in (3, 7):
+        rep = tr.aggregate(_trace(3, 300, 100), skip_runs=skip)
+        assert rep["runs"] == 0 and rep["skipped_runs"] == 3
+        assert rep["by_op"] == rep["by_node"] == [] and rep["kernel_us_per_run"] == 0
+
+
+def test_diff_per_run_with_added_nodes():
+    a = tr.aggregate(_trace(4, 300, 100))
+    b = tr.aggregate(_trace(10, 150, 100, extra="w_cast"))  # different run counts
+    rows = tr.diff(a, b, "node")
+    by = {r["node"]: r for r in rows}
+    assert rows[0]["node"] == "conv1" and by["conv1"]["ratio"] == 0.5
+    assert by["conv1"]["delta_us"] == -150 and by["relu1"]["status"] == "both"
+    assert by["w_cast"]["status"] == "added" and by["w_cast"]["ratio"] is None
+    md = tr.diff_markdown(rows, a, b, "node", labels=("fp32", "fp16w"))
+    assert "fp32 -> fp16w" in md and "| conv1 |" in md
+
+
+def test_real_trace_and_cli(tmp_path):
+    rng = np.random.default_rng(0)
+    w = numpy_helper.from_array(rng.normal(size=(4, 3, 3, 3)).astype(np.float32), "w")
+    x = helper.make_tensor_value_info("x", TensorProto.FLOAT, [1, 3, 32, 32])
+    y = helper.make_tensor_value_info("y", TensorProto.FLOAT, [1, 4, 30, 30])
+    nodes = [
+        helper.make_node("Conv", ["x", "w"], ["c"], name="conv"),
+        helper.make_node("Sigmoid", ["c"], ["y"], name="sig"),
+    ]
+    m = helper.make_model(
+        helper.make_graph(nodes, "g", [x], [y], [w]),
+        opset_imports=[helper.make_operatorsetid("", 13)],
+    )
+    m.ir_version = 8
+    onnx.save(m, tmp_path / "m.onnx")
+    prof = profile_model(str(tmp_path / "m.onnx"), iters=4, warmup=2, outdir=str(tmp_path))
+    rep = tr.aggregate(tr.load_trace(prof["profile_trace"]), skip_runs=2)
+    assert rep["runs"] == 4
+    assert sum(r["share"] for r in rep["by_op"]) > 0.999
+    assert {r["calls"] for r in rep["by_node"]} == {4}
+
+    out = tmp_path / "r"
+    t = prof["profile_trace"]
+    args = [t, "--vs", t, "--by", "op", "--json-out", f"{out}.json", "--md-out", f"{out}.md"]
+    assert tr.main(args) == 0
+    d = json.loads(Path(f"{out}.json").read_text())
+    assert all(r["delta_us"] == 0 for r in d["diff"])
+    assert Path(f"{out}.md").read_text().startswith("# ORT hotspot diff (op)")
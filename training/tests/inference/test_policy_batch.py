@@ -0,0 +1,87 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts" / "inference"))
+import model_registry  # noqa: E402
+from policy_batch import BatchRunner, read_features_csv, run_files  # noqa: E402
+
+W = (np.arange(12, dtype=np.float32).reshape(6, 2) - 5.0) / 7.0
+
+
+def _save(graph, path):
+    m = helper.make_model(graph, opset_imports=[helper.make_operatorsetid("", 13)])
+    m.ir_version = 8
+    onnx.save(m, path)
+    return str(path)
+
+
+def _policy(path, batch):
+    obs = helper.make_tensor_value_info("obs", TensorProto.FLOAT, [batch, 6])
+    act = helper.make_tensor_value_info("act", TensorProto.FLOAT, [batch, 2])
+    w = helper.make_tensor("W", TensorProto.FLOAT, [6, 2], W.ravel().tolist())
+    g = helper.make_graph(
+        [helper.make_node("MatMul", ["obs", "W"], ["act"])], "p", [obs], [act], [w]
+    )
+    return _save(g, path)
+
+
+def _policy_hardcoded_batch(path, batch):
+    # Reshape to a constant [batch, 6] bakes the batch size into the graph
+    obs = helper.make_tensor_value_info("obs", TensorProto.FLOAT, [batch, 6])
+    act = helper.make_tensor_value_info("act", TensorProto.FLOAT, [batch, 2])
+    shp = helper.make_tensor("shp", TensorProto.INT64, [2], [batch, 6])
+    w = helper.make_tensor("W", TensorProto.FLOAT, [6, 2], W.ravel().tolist())
+    nodes = [
+        helper.make_node("Reshape", ["obs", "shp"], ["r"]),
+        helper.make_node("MatMul", ["r", "W"], ["act"]),
+    ]
+    return _save(helper.make_graph(nodes, "p", [obs], [act], [shp, w]), path)
+
+
+def _csv(path, rows, cols=4, seed=0):
+    x = np.random.default_rng(seed).random((rows, cols)).round(4)
+    t = np.arange(rows) * 0.02
+    hdr = "t," + ",".join(f"f{i}" for i in range(cols))
+    np.savetxt(path, np.column_stack([t, x]), delimiter=",", header=hdr, comments="", fmt="%.4f")
+    feats = np.zeros((rows, 6), np.float32)
+    feats[:, :cols] = x
+    return feats
+
+
+def test_fixed_batch_model_is_reexported_dynamic(tmp_path):
+    model_registry.clear()
+    model = _policy(tmp_path / "fixed1.onnx", 1)
+    r = BatchRunner(model, batch=64, cache_dir=tmp_path)
+    assert r.reexported and r.batch == 64
+    # every registry session (source, check and re-export) caches its graph under cache_dir
+    assert len(list(tmp_path.glob("fixed1.*.cpu.all.*.onnx"))) == 2
+    x = np.random.default_rng(1).random((150, 6), dtype=np.float32)
+    assert np.allclose(r.run(x), x @ W, atol=1e-5)
+
+
+def test_hardcoded_batch_falls_back_to_padded_microbatches(tmp_path):
+    model = _policy_hardcoded_batch(tmp_path / "fixed4.onnx", 4)
+    r = BatchRunner(model, batch=64, cache_dir=tmp_path)
+    assert not r.reexported and r.batch == 4
+    x = np.random.default_rng(2).random((10, 6), dtype=np.float32)  # last batch padded 2 -> 4
+    assert np.allclose(r.run(x), x @ W, atol=1e-5)
+
+
+def test_run_files_streams_and_matches(tmp_path):
+    model = _policy(tmp_path / "dyn.onnx", "N")
+    r = BatchRunner(model, batch=32, cache_dir=tmp_path)
+    pairs, want = [], []
+    for k, rows in enumerate((100, 0, 7)):
+        src = tmp_path / f"in{k}.csv"
+        want.append(_csv(src, rows, seed=k) @ W)
+        pairs.append((str(src), str(tmp_path / "out" / f"u{k}.csv")))
+    stats = run_files(r, pairs, depth=1)
+    assert [s["rows"] for s in stats] == [100, 0, 7]
+    for (_, dst), w in zip(pairs, want, strict=True):
+        t, u, names = read_features_csv(dst)
+        assert names == ["u0", "u1"] and len(u) == len(w)
+        assert np.allclose(u, w, atol=2e-6)
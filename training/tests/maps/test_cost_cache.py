@@ -0,0 +1,87 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts" / "maps"))
+import cost_cache  # noqa: E402
+from cost_cache import CostCache, _downsample2, build_cache, is_fresh, restamp  # noqa: E402
+from cost_query import CostRaster, open_cost  # noqa: E402
+
+GT = (-80.0, 0.01, 0.0, 44.0, 0.0, -0.01)
+
+
+def _src():
+    arr = np.arange(70 * 90, dtype=np.float32).reshape(70, 90)
+    arr[60:, 80:] = -9999.0
+    return arr, CostRaster.from_array(arr, GT, "EPSG:4326", nodata=-9999.0)
+
+
+def test_cache_roundtrip_windows_and_overviews(tmp_path):
+    arr, src = _src()
+    out = tmp_path / "a_cost.nscost"
+    hdr = build_cache(src, str(out), tile=32, min_size=32)
+    assert [lv["width"] for lv in hdr["levels"]] == [90, 45, 23]
+
+    c = CostCache(str(out))
+    assert c.geotransform == GT and c.nodata == -9999.0
+    # inside one tile -> memmap view, across tiles -> stitched copy
+    w = c.window(3, 4, 10, 10)
+    assert isinstance(w, np.memmap) and np.array_equal(w, arr[4:14, 3:13])
+    assert np.array_equal(c.window(20, 25, 50, 40), arr[25:65, 20:70])
+    assert np.array_equal(c.window(0, 0, 90, 70), arr)
+
+    rng = np.random.default_rng(0)
+    r, col = rng.integers(0, 70, 500), rng.integers(0, 90, 500)
+    assert np.array_equal(c.gather(r, col), arr[r, col])
+
+    # level 1 is the 2x2 mean; all-nodata blocks stay nodata
+    l1 = c.window(0, 0, 45, 35, level=1)
+    assert np.isclose(l1[0, 0], arr[:2, :2].mean())
+    assert l1[34, 44] == -9999.0
+
+
+def test_open_cost_prefers_cache(tmp_path):
+    arr, src = _src()
+    out = tmp_path / "b_cost.nscost"
+    build_cache(src, str(out), tile=32)
+    ras = open_cost(str(out))
+    assert ras.cache is not None and (ras.width, ras.height) == (90, 70)
+    lon = np.array([-79.995, -79.105, -81.0])
+    lat = np.array([43.995, 43.305, 43.9])
+    got = ras.sample_lonlat(lon, lat)
+    want = src.sample_lonlat(lon, lat)
+    assert np.array_equal(got, want, equal_nan=True)
+    assert np.isnan(got[1]) and np.isnan(got[2])
+
+
+def test_streamed_overviews_match_full_array_chain(tmp_path):
+    arr, src = _src()
+    out = tmp_path / "s_cost.nscost"
+    hdr = build_cache(src, str(out), tile=16, min_size=8)
+    c = CostCache(str(out))
+    want = arr
+    for k, lv in enumerate(hdr["levels"]):
+        assert np.array_equal(c.window(0, 0, lv["width"], lv["height"], level=k), want)
+        want = _downsample2(want, -9999.0)
+
+
+def test_cache_freshness_is_bound_to_the_source_file(tmp_path, monkeypatch):
+    _, src = _src()
+    a, b = tmp_path / "a" / "cost.tif", tmp_path / "b" / "cost.tif"
+    for p in (a, b):
+        p.parent.mkdir()
+        p.write_bytes(b"tif")
+    monkeypatch.setattr(cost_cache, "CACHE_DIR", str(tmp_path / "cache"))
+    cached = cost_cache.cache_path_for(str(a))
+    assert cached == cost_cache.cache_path_for(str(b))  # same stem, same cache file
+    build_cache(src, cached, tile=32, source_path=str(a))
+    assert is_fresh(cached, str(a)) and not is_fresh(cached, str(b))
+    assert open_cost(str(a)).cache is not None
+
+    a.write_bytes(b"patched tif")  # source changed -> stale until re-stamped
+    assert not is_fresh(cached, str(a))
+    restamp(cached, str(a))
+    assert is_fresh(cached, str(a)) and CostCache(cached).width == 90
+    a.unlink()
+    assert not is_fresh(cached, str(a))
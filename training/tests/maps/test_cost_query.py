@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts" / "maps"))
+from cost_query import (  # noqa: E402
+    CostRaster,
+    query_points,
+    read_points_csv,
+    write_results_csv,
+)
+
+# 0.01 deg pixels, origin (-80, 44), north-up; nodata in the bottom-right corner
+GT = (-80.0, 0.01, 0.0, 44.0, 0.0, -0.01)
+
+
+def _raster():
+    arr = np.arange(50 * 40, dtype=np.float32).reshape(50, 40)
+    arr[45:, 35:] = -9999.0
+    return CostRaster.from_array(arr, GT, "EPSG:4326", nodata=-9999.0)
+
+
+def test_sample_matches_floor_pixel_and_masks_nodata():
+    ras = _raster()
+    lon = np.array([-79.995, -79.6051, -80.5, -79.61, -79.999])
+    lat = np.array([43.995, 43.8149, 43.9, 43.505, 43.5001])
+    got = ras.sample_lonlat(lon, lat)
+    # (col, row) = floor((lon+80)/0.01), floor((44-lat)/0.01)
+    assert got[0] == 0.0
+    assert got[1] == 18 * 40 + 39
+    assert np.isnan(got[2])  # outside
+    assert np.isnan(got[3])  # nodata block
+    assert got[4] == 49 * 40
+
+
+def test_csv_roundtrip_with_xy_fallback(tmp_path):
+    ras = _raster()
+    src = tmp_path / "pts.csv"
+    src.write_text(
+        "Latitude,Longitude,x,y\n"
+        "43.995,-79.995,,\n"
+        "bad,-79.9,-79.985,43.985\n"  # unparseable lat -> use x/y (raster CRS)
+        "91,0,,\n"
+    )
+    cols = read_points_csv(str(src))
+    res = query_points(ras, cols)
+    assert res["cost"][0] == 0.0
+    assert res["cost"][1] == 1 * 40 + 1 and np.isclose(res["lat"][1], 43.985)
+    assert np.isnan(res["cost"][2])
+    out = tmp_path / "out.csv"
+    write_results_csv(str(out), res)
+    lines = out.read_text().splitlines()
+    assert lines[0] == "lat,lon,cost" and lines[3] == "91.000000000000,0.000000000000,NaN"
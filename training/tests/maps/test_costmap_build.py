@@ -0,0 +1,90 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts" / "maps"))
+from cost_cache import build_cache  # noqa: E402
+from cost_query import CostRaster  # noqa: E402
+from costmap_build import (  # noqa: E402
+    build_costmap,
+    cost_block,
+    horn_slope_pct,
+    polygon_edges,
+    rasterize_edges,
+)
+
+# 1 m pixels in a projected CRS so slope needs no degree scaling
+GT = (500000.0, 1.0, 0.0, 4800000.0, 0.0, -1.0)
+UTM = 'PROJCS["WGS 84 / UTM zone 17N"]'
+RECIPE = {"base_cost": 1.0, "slope_mult": 2.0, "building_penalty": 200.0, "water_penalty": 500.0}
+
+
+def test_horn_slope_on_plane():
+    yy, xx = np.mgrid[0:6, 0:7].astype(float)
+    z = 0.03 * xx - 0.04 * yy  # 5 % grade
+    assert np.allclose(horn_slope_pct(z, 1.0, 1.0), 5.0)
+
+
+def test_nodata_neighbours_take_centre_elevation():
+    # a 3x3 plateau at 500 m in a nodata grid: its corners border nodata on five sides
+    z = np.full((7, 7), -9999.0)
+    z[2:5, 2:5] = 500.0
+    out = cost_block(z, {}, RECIPE, 1.0, 1.0, -9999.0)  # interior is z[1:6, 1:6]
+    assert np.allclose(out[1:4, 1:4], RECIPE["base_cost"])
+    assert (out[0] == -9999.0).all() and (out[:, 4] == -9999.0).all()
+    # a 5 % ramp keeps at most its own grade at a nodata corner
+    yy, xx = np.mgrid[0:6, 0:7].astype(float)
+    ramp = 0.05 * xx
+    ramp[:2, :2] = np.nan
+    slope = horn_slope_pct(ramp, 1.0, 1.0, ~np.isfinite(ramp))
+    assert np.nanmax(slope) <= 5.0 + 1e-9 and np.allclose(slope[2:, 2:], 5.0)
+
+
+def test_rasterize_square_with_hole_and_overlap(tmp_path):
+    sq = [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]
+    hole = [[3, 3], [3, 6], [6, 6], [6, 3], [3, 3]]
+    over = [[8, 8], [14, 8], [14, 14], [8, 14], [8, 8]]
+    gj = {
+        "type": "FeatureCollection",
+        "features": [
+            {"geometry": {"type": "Polygon", "coordinates": [sq, hole]}},
+            {"geometry": {"type": "Polygon", "coordinates": [over]}},
+        ],
+    }
+    p = tmp_path / "polys.geojson"
+    p.write_text(json.dumps(gj))
+    edges = polygon_edges(str(p), (0.0, 1.0, 0.0, 16.0, 0.0, -1.0), "EPSG:4326")
+    m = rasterize_edges(edges, 0, 0, 16, 16)
+    want = np.zeros((16, 16), dtype=np.uint8)
+    want[6:16, 0:10] = 1  # rows count down from y=16
+    want[10:13, 3:6] = 0
+    want[2:8, 8:14] = 1
+    assert np.array_equal(m, want)
+    # a sub-block gives the same pixels
+    assert np.array_equal(rasterize_edges(edges, 2, 5, 9, 7), want[5:12, 2:11])
+
+
+def test_build_costmap_strips_match_single_block(tmp_path):
+    rng = np.random.default_rng(0)
+    h, w = 70, 45
+    yy, xx = np.mgrid[0:h, 0:w].astype(float)
+    dem = (0.1 * xx + 0.05 * yy + rng.normal(0, 0.2, (h, w))).astype(np.float32)
+    dem[:3, :4] = -9999.0
+    mask = np.zeros((h, w), dtype=np.float32)
+    mask[20:30, 10:20] = 1
+    dem_p, mask_p = tmp_path / "dem.nscost", tmp_path / "bld.nscost"
+    build_cache(CostRaster.from_array(dem, GT, UTM, nodata=-9999.0), str(dem_p), tile=16)
+    build_cache(CostRaster.from_array(mask, GT, UTM, nodata=-9999.0), str(mask_p), tile=16)
+
+    layers = {"buildings": str(mask_p)}
+    ref = build_costmap(str(dem_p), RECIPE, layers, workers=1, block_rows=h)
+    got = build_costmap(str(dem_p), RECIPE, layers, workers=2, block_rows=16)
+    assert np.array_equal(ref, got)
+    assert (ref[:3, :4] == -9999.0).all() and (ref[3:] > 0).all()
+
+    z = np.pad(dem.astype(float), 1, mode="edge")
+    slope = horn_slope_pct(z, 1.0, 1.0)
+    assert np.isclose(ref[40, 30], 1.0 + 2.0 * slope[40, 30], rtol=1e-5)
+    assert np.isclose(ref[25, 15], 201.0 + 2.0 * slope[25, 15], rtol=1e-5)
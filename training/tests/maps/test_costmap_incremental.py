@@ -0,0 +1,131 @@
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts" / "maps"))
+from cost_cache import CostCache, build_cache  # noqa: E402
+from cost_query import CostRaster, open_cost  # noqa: E402
+from costmap_build import build_costmap  # noqa: E402
+from costmap_incremental import rebuild  # noqa: E402
+from mbtiles_render import byte_lut, encode_png, render_tile  # noqa: E402
+
+GT = (-79.40, 0.0001, 0.0, 43.66, 0.0, -0.0001)
+RECIPE = {"base_cost": 1.0, "slope_mult": 2.0, "building_penalty": 200.0}
+RAMP = Path(__file__).resolve().parents[3] / "scripts" / "maps" / "cost_ramp_byte_v1.txt"
+
+
+def _square(lon, lat, d=0.002):
+    ring = [[lon, lat], [lon + d, lat], [lon + d, lat + d], [lon, lat + d], [lon, lat]]
+    return {"geometry": {"type": "Polygon", "coordinates": [ring]}}
+
+
+def _write_buildings(path, feats):
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": feats}))
+
+
+def _inputs(tmp_path):
+    rng = np.random.default_rng(1)
+    dem = rng.normal(100.0, 0.5, (160, 200)).astype(np.float32)
+    dem_p = tmp_path / "dem.nscost"
+    build_cache(CostRaster.from_array(dem, GT, "EPSG:4326", nodata=-9999.0), str(dem_p))
+    bld = tmp_path / "bld.geojson"
+    _write_buildings(bld, [_square(-79.395, 43.650), _square(-79.385, 43.645)])
+    return str(dem_p), bld
+
+
+def _mbtiles(path):
+    db = sqlite3.connect(path)
+    db.execute(
+        "CREATE TABLE tiles (zoom_level integer, tile_column integer, tile_row integer, "
+        "tile_data blob)"
+    )
+    db.execute("CREATE UNIQUE INDEX tile_index on tiles (zoom_level, tile_column, tile_row)")
+    db.execute("CREATE TABLE metadata (name text, value text)")
+    db.executemany("INSERT INTO metadata VALUES (?, ?)", [("minzoom", "15"), ("maxzoom", "16")])
+    db.commit()
+    db.close()
+
+
+def test_incremental_rebuild_matches_full_build(tmp_path):
+    dem_p, bld = _inputs(tmp_path)
+    out = str(tmp_path / "cost.nscost")
+    mbt = str(tmp_path / "cost.mbtiles")
+    _mbtiles(mbt)
+    layers = {"building": str(bld)}
+
+    rep = rebuild(dem_p, out, RECIPE, layers, tile=32, mbtiles=mbt, ramp=str(RAMP))
+    assert rep["full"] and rep["dirty_tiles"] == rep["total_tiles"] == 35
+    n_full = rep["mbtiles_tiles"]
+    assert n_full > 0
+
+    rep = rebuild(dem_p, out, RECIPE, layers, tile=32, mbtiles=mbt, ramp=str(RAMP))
+    assert not rep["full"] and rep["dirty_tiles"] == 0 and rep["mbtiles_tiles"] == 0
+
+    # move one building: only the tiles around the old and new footprint change
+    _write_buildings(bld, [_square(-79.395, 43.650), _square(-79.3855, 43.6445)])
+    rep = rebuild(dem_p, out, RECIPE, layers, tile=32, mbtiles=mbt, ramp=str(RAMP))
+    assert not rep["full"] and 0 < rep["dirty_tiles"] < 12
+    assert 0 < rep["mbtiles_tiles"] < n_full
+
+    want = build_costmap(dem_p, RECIPE, layers, workers=1)
+    got = CostCache(out)
+    assert np.array_equal(got.window(0, 0, 200, 160), want)
+    ref = tmp_path / "ref.nscost"
+    build_cache(CostRaster.from_array(want, GT, "EPSG:4326", nodata=-9999.0), str(ref))
+    for k in range(1, len(got.levels)):
+        assert np.array_equal(got.levels[k], CostCache(str(ref)).levels[k])
+
+    ras = open_cost(out)
+    lut = byte_lut(str(RAMP))
+    db = sqlite3.connect(mbt)
+    for z, x, row, data in db.execute("SELECT * FROM tiles"):
+        y = (1 << z) - 1 - row
+        assert data == encode_png(render_tile(ras, z, x, y, lut))
+    db.close()
+
+
+def test_enclosing_polygon_and_removed_layer_match_full_build(tmp_path):
+    dem_p, bld = _inputs(tmp_path)
+    out = str(tmp_path / "cost.nscost")
+    rebuild(dem_p, out, RECIPE, {"building": str(bld)}, tile=32)
+
+    # a large square whose edges touch only the border tiles of the block it covers
+    big = tmp_path / "big.geojson"
+    _write_buildings(big, [_square(-79.3985, 43.6455, d=0.01)])
+    layers = {"building": str(bld), "zone": str(big)}
+    recipe = {**RECIPE, "zone_penalty": 50.0}
+    rebuild(dem_p, out, recipe, {"building": str(bld), "zone": str(bld)}, tile=32)
+    rep = rebuild(dem_p, out, recipe, layers, tile=32)
+    assert not rep["full"]
+    want = build_costmap(dem_p, recipe, layers, workers=1)
+    assert np.array_equal(CostCache(out).window(0, 0, 200, 160), want)
+
+    rep = rebuild(dem_p, out, recipe, {"building": str(bld)}, tile=32)  # drop "zone"
+    assert rep["full"]
+    want = build_costmap(dem_p, recipe, {"building": str(bld)}, workers=1)
+    assert np.array_equal(CostCache(out).window(0, 0, 200, 160), want)
+
+
+def test_mbtiles_patch_uses_cost_domain_palette(tmp_path):
+    from mbtiles_render import Palette
+
+    dem_p, bld = _inputs(tmp_path)
+    out = str(tmp_path / "cost.nscost")
+    mbt = str(tmp_path / "cost.mbtiles")
+    _mbtiles(mbt)
+    ramp = RAMP.parent / "cost_ramp_aoi_a.txt"
+    layers = {"building": str(bld)}
+    rebuild(dem_p, out, RECIPE, layers, tile=32, mbtiles=mbt, ramp=str(RAMP))
+    rep = rebuild(dem_p, out, RECIPE, layers, tile=32, mbtiles=mbt, ramp=str(ramp))
+    assert rep["dirty_tiles"] == 0 and rep["mbtiles_tiles"] > 0  # palette change: re-render
+
+    ras = open_cost(out)
+    pal = Palette.from_ramp(str(ramp))
+    assert pal.domain == "cost"
+    db = sqlite3.connect(mbt)
+    for z, x, row, data in db.execute("SELECT * FROM tiles"):
+        assert data == encode_png(render_tile(ras, z, x, (1 << z) - 1 - row, pal))
+    db.close()
@@ -0,0 +1,52 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts" / "maps"))
+from cost_cache import build_cache  # noqa: E402
+from cost_query import CostRaster  # noqa: E402
+from mbtiles_build import build_mbtiles  # noqa: E402
+from mbtiles_render import Palette  # noqa: E402
+from tile_parity import check_parity  # noqa: E402
+
+GT = (-79.40, 0.0001, 0.0, 43.66, 0.0, -0.0001)
+RAMPS = Path(__file__).resolve().parents[3] / "scripts" / "maps"
+
+
+def _gray():
+    lut = np.repeat(np.arange(256, dtype=np.uint8)[:, None], 4, axis=1)
+    lut[:, 3] = np.where(np.arange(256) > 0, 255, 0)
+    return Palette(lut)
+
+
+def test_pyramid_build_dedup_and_rebuild(tmp_path):
+    rng = np.random.default_rng(5)
+    arr = np.full((160, 200), 300.0, dtype=np.float32)  # flat cost -> many identical tiles
+    arr[40:120, 60:140] = rng.uniform(0, 1500, (80, 80))
+    arr[:10, :10] = -9999.0
+    src = tmp_path / "aoi_cost.nscost"
+    ras = CostRaster.from_array(arr, GT, "EPSG:4326", nodata=-9999.0)
+    build_cache(ras, str(src), tile=64, min_size=32)
+    out = str(tmp_path / "aoi_cost_gray.mbtiles")
+
+    st = build_mbtiles(str(src), out, _gray(), minzoom=13, maxzoom=17, workers=2, chunk=4)
+    assert st["maxzoom"] == 17 and st["tiles"] > 0
+    assert st["unique_images"] < st["tiles"]  # flat tiles share one image
+    assert st["written"] == st["tiles"]
+
+    # full-resolution zoom matches the raster exactly
+    rep = check_parity(out, ras, zooms=[17], n=5000, tol=0)
+    assert rep["pass"], rep["zooms"]
+
+    again = build_mbtiles(str(src), out, _gray(), minzoom=13, maxzoom=17, workers=1)
+    assert again["written"] == 0 and again["unchanged"] == st["tiles"]
+
+    # colour ramp in the cost domain also renders
+    pal = Palette.from_ramp(str(RAMPS / "cost_ramp.txt"))
+    assert pal.domain == "cost"
+    st2 = build_mbtiles(str(src), str(tmp_path / "color.mbtiles"), pal, 15, 15, workers=1)
+    db = sqlite3.connect(tmp_path / "color.mbtiles")
+    meta = dict(db.execute("SELECT name, value FROM metadata"))
+    assert meta["format"] == "png" and meta["minzoom"] == "15" and st2["tiles"] > 0
@@ -0,0 +1,102 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts" / "maps"))
+from cost_cache import build_cache  # noqa: E402
+from cost_query import CostRaster, open_cost  # noqa: E402
+from path_cost import path_stats, read_paths  # noqa: E402
+
+# 10 m pixels in a projected CRS, origin (500000, 4900000), north-up
+GT = (500000.0, 10.0, 0.0, 4900000.0, 0.0, -10.0)
+
+
+def _raster():
+    arr = np.ones((60, 80), dtype=np.float32)
+    arr[:, 40:] = 3.0
+    arr[20, :] = 50.0  # a wall one row above the test path
+    arr[40:, 70:] = -9999.0
+    return CostRaster.from_array(arr, GT, "EPSG:32617", nodata=-9999.0)
+
+
+def test_straight_path_integrates_cost_and_length():
+    ras = _raster()
+    # row 21.5 (centre of row 21), col 10 -> 60: 30 px at cost 1, 20 px at cost 3
+    st = path_stats(ras, [np.array([[10.0, 21.5], [60.0, 21.5]])], coords="pixel")
+    assert np.isclose(st["length_m"][0], 500.0)
+    assert np.isclose(st["integrated_cost"][0], 30 * 10 * 1.0 + 20 * 10 * 3.0)
+    assert st["max_cost"][0] == 3.0
+    assert st["nodata_frac"][0] == 0.0
+    # world coordinates give the same answer
+    wx, wy = ras.pixel_to_world(np.array([10.0, 60.0]), np.array([21.5, 21.5]))
+    st_w = path_stats(ras, [np.column_stack([wx, wy])], coords="world")
+    assert np.isclose(st_w["integrated_cost"][0], st["integrated_cost"][0])
+
+
+def test_corridor_sees_adjacent_wall_and_nodata_exposure():
+    ras = _raster()
+    path = [np.array([[10.0, 21.5], [30.0, 21.5]]), np.array([[60.0, 35.5], [60.0, 50.5]])]
+    st = path_stats(ras, path, coords="pixel", corridor_px=1.5)
+    assert st["max_cost"][0] == 1.0 and st["corridor_max"][0] == 50.0
+    assert st["nodata_frac"][1] == 0.0 and st["corridor_nodata_frac"][1] == 0.0
+    far = path_stats(ras, [np.array([[75.0, 35.5], [75.0, 55.5]])], coords="pixel")
+    assert np.isclose(far["nodata_frac"][0], 15.0 / 20.0, atol=0.03)
+    assert far["max_cost"][0] == 3.0
+
+
+def test_batch_matches_per_path_on_cache(tmp_path):
+    ras = _raster()
+    cache = tmp_path / "c.nscost"
+    build_cache(ras, str(cache), tile=32)
+    cras = open_cost(str(cache))
+    rng = np.random.default_rng(0)
+    paths = [rng.uniform([-5, -5], [85, 65], size=(int(rng.integers(1, 6)), 2)) for _ in range(50)]
+    batch = path_stats(cras, paths, coords="pixel", corridor_px=2.0)
+    for i in (0, 7, 23, 49):
+        one = path_stats(ras, [paths[i]], coords="pixel", corridor_px=2.0)
+        for k, v in one.items():
+            assert np.allclose(batch[k][i], v[0], equal_nan=True), k
+
+
+def test_read_paths_geojson_and_csv(tmp_path):
+    gj = {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "properties": {"id": "r1"},
+                "geometry": {"type": "LineString", "coordinates": [[-79.5, 43.7], [-79.4, 43.8]]},
+            }
+        ],
+    }
+    (tmp_path / "p.geojson").write_text(json.dumps(gj))
+    ids, paths = read_paths(str(tmp_path / "p.geojson"))
+    assert ids == ["r1"] and paths[0].shape == (2, 2)
+    (tmp_path / "p.csv").write_text("path_id,lat,lon\na,43.7,-79.5\na,43.8,-79.4\nb,43.0,-79.0\n")
+    ids, paths = read_paths(str(tmp_path / "p.csv"))
+    assert ids == ["a", "b"] and paths[0][1].tolist() == [-79.4, 43.8] and len(paths[1]) == 1
+
+
+def test_empty_and_single_vertex_paths_keep_segment_mapping(tmp_path):
+    ras = _raster()
+    line = np.array([[10.0, 30.5], [19.0, 30.5]])  # 9 px = 90 m
+    empty, single = np.zeros((0, 2)), np.array([[5.0, 5.5]])
+    st = path_stats(ras, [empty, line, single, line, empty], coords="pixel")
+    assert np.allclose(st["length_m"], [0.0, 90.0, 0.0, 90.0, 0.0])
+    assert np.allclose(st["integrated_cost"], [0.0, 90.0, 0.0, 90.0, 0.0])
+
+    gj = {
+        "type": "FeatureCollection",
+        "features": [
+            {"properties": {"id": "e"}, "geometry": {"type": "LineString", "coordinates": []}},
+            {
+                "properties": {"id": "a"},
+                "geometry": {"type": "LineString", "coordinates": [[1, 2], [3, 4]]},
+            },
+        ],
+    }
+    (tmp_path / "r.geojson").write_text(json.dumps(gj))
+    ids, paths = read_paths(str(tmp_path / "r.geojson"))
+    assert ids == ["e", "a"] and paths[0].shape == (0, 2) and paths[1].shape == (2, 2)
@@ -0,0 +1,71 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts" / "maps"))
+from cost_query import CostRaster  # noqa: E402
+from mbtiles_render import encode_png, patch_mbtiles  # noqa: E402
+from tile_parity import check_parity, wilson_lower  # noqa: E402
+
+GT = (-79.40, 0.0001, 0.0, 43.66, 0.0, -0.0001)
+BOUNDS = (-79.40, 43.644, -79.38, 43.66)
+
+
+def _setup(tmp_path):
+    rng = np.random.default_rng(3)
+    arr = rng.uniform(0, 1600, (160, 200)).astype(np.float32)
+    arr[:20, :30] = -9999.0
+    ras = CostRaster.from_array(arr, GT, "EPSG:4326", nodata=-9999.0)
+    path = str(tmp_path / "gray.mbtiles")
+    db = sqlite3.connect(path)
+    db.execute(
+        "CREATE TABLE tiles (zoom_level integer, tile_column integer, tile_row integer, "
+        "tile_data blob)"
+    )
+    db.execute("CREATE UNIQUE INDEX tile_index on tiles (zoom_level, tile_column, tile_row)")
+    db.execute("CREATE TABLE metadata (name text, value text)")
+    db.executemany(
+        "INSERT INTO metadata VALUES (?, ?)",
+        [("minzoom", "14"), ("maxzoom", "16"), ("bounds", ",".join(map(str, BOUNDS)))],
+    )
+    db.commit()
+    db.close()
+    gray = np.repeat(np.arange(256, dtype=np.uint8)[:, None], 4, axis=1)
+    gray[:, 3] = 255
+    patch_mbtiles(path, ras, [BOUNDS], gray)
+    return ras, path
+
+
+def test_parity_passes_on_matching_tiles_and_catches_corruption(tmp_path):
+    ras, path = _setup(tmp_path)
+    rep = check_parity(path, ras, n=20000, tol=0)
+    assert rep["pass"] and set(rep["zooms"]) == {"14", "15", "16"}
+    z16 = rep["zooms"]["16"]
+    assert z16["checked"] == 20000 and z16["missing"] == 0
+    # every tile is decoded once, however many points land in it
+    db = sqlite3.connect(path)
+    n16 = db.execute("SELECT count(*) FROM tiles WHERE zoom_level=16").fetchone()[0]
+    assert 0 < z16["tiles_decoded"] <= n16
+    assert z16["pass_rate_lo95"] > 0.999
+
+    z, x, row = db.execute("SELECT zoom_level, tile_column, tile_row FROM tiles").fetchone()
+    flat = np.full((256, 256, 4), 255, dtype=np.uint8)
+    db.execute(
+        "UPDATE tiles SET tile_data=? WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+        (encode_png(flat), z, x, row),
+    )
+    x16, r16 = db.execute("SELECT tile_column, tile_row FROM tiles WHERE zoom_level=16").fetchone()
+    db.execute("DELETE FROM tiles WHERE zoom_level=16 AND tile_column=? AND tile_row=?", (x16, r16))
+    db.commit()
+    db.close()
+    bad = check_parity(path, ras, n=20000, tol=0)
+    assert not bad["pass"] and bad["zooms"][str(z)]["bad"] > 0
+    assert bad["zooms"]["16"]["missing"] > 0
+
+
+def test_wilson_lower_bound():
+    assert wilson_lower(0, 0) == 0.0
+    assert 0.99 < wilson_lower(10000, 10000) < 1.0
+    assert wilson_lower(50, 100) < 0.5
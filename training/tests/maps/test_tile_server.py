@@ -0,0 +1,127 @@
+import asyncio
+import gzip
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts" / "maps"))
+from tile_loadtest import _request, run_load, sample_tiles  # noqa: E402
+from tile_server import TileLRU, TileServer, discover  # noqa: E402
+
+
+def _mbtiles(path, fmt="png"):
+    db = sqlite3.connect(path)
+    db.execute(
+        "CREATE TABLE tiles (zoom_level integer, tile_column integer, tile_row integer, "
+        "tile_data blob)"
+    )
+    db.execute("CREATE TABLE metadata (name text, value text)")
+    db.executemany(
+        "INSERT INTO metadata VALUES (?, ?)",
+        [("format", fmt), ("minzoom", "1"), ("maxzoom", "2"), ("bounds", "-80,43,-79,44")],
+    )
+    for z in (1, 2):
+        for x in range(1 << z):
+            for y in range(1 << z):
+                data = f"{z}/{x}/{y}".encode()
+                if fmt == "pbf":
+                    data = gzip.compress(data)
+                db.execute("INSERT INTO tiles VALUES (?,?,?,?)", (z, x, (1 << z) - 1 - y, data))
+    db.commit()
+    db.close()
+
+
+def test_lru_evicts_by_bytes():
+    c = TileLRU(max_bytes=10)
+    c.put("a", b"12345", "e1")
+    c.put("b", b"12345", "e2")
+    assert c.get("a") is not None  # a is now most recent
+    c.put("c", b"123", "e3")
+    assert c.get("b") is None and c.get("a") and c.get("c") and c.nbytes == 8
+
+
+def test_server_tiles_etag_gzip_and_viewer(tmp_path):
+    _mbtiles(tmp_path / "cost.mbtiles")
+    _mbtiles(tmp_path / "vec.mbtiles", fmt="pbf")
+    viewer = tmp_path / "viewer"
+    viewer.mkdir()
+    (viewer / "map.html").write_text("<html>" + "x" * 2000 + "</html>")
+    (tmp_path / "secret.txt").write_text("nope")
+
+    async def scenario():
+        srv = TileServer(discover([tmp_path]), str(viewer))
+        port = await srv.start("127.0.0.1", 0)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        host = f"127.0.0.1:{port}"
+        try:
+            # XYZ y=0 is the TMS top row
+            status, tag = await _request(
+                reader, writer, host, "/services/cost/tiles/1/0/0.png", None
+            )
+            assert status == 200 and tag
+            assert srv.sources["cost"].tile(1, 0, 0) == b"1/0/0"
+            status, _ = await _request(reader, writer, host, "/services/cost/tiles/1/0/0.png", tag)
+            assert status == 304 and srv.cache.hits == 1
+            status, _ = await _request(reader, writer, host, "/services/cost/tiles/9/0/0.png", None)
+            assert status == 404
+            status, _ = await _request(reader, writer, host, "/services/vec/tiles/2/1/3.pbf", None)
+            assert status == 200
+            assert (await _request(reader, writer, host, "/viewer/map.html", None))[0] == 200
+            assert (await _request(reader, writer, host, "/viewer/../secret.txt", None))[0] == 404
+        finally:
+            writer.close()
+
+        # raw check of gzip passthrough for vector tiles and JSON TileJSON
+        r, w = await asyncio.open_connection("127.0.0.1", port)
+        w.write(
+            b"GET /services/vec/tiles/2/1/3.pbf HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n"
+        )
+        raw = await r.read()
+        w.close()
+        head, body = raw.split(b"\r\n\r\n", 1)
+        assert b"Content-Encoding" not in head and body == b"2/1/3"
+        assert b"Vary: Accept-Encoding" in head
+        assert srv._json({"a": 1}, False)[3]["Vary"] == "Accept-Encoding"
+
+        tiles = sample_tiles(str(tmp_path / "cost.mbtiles"))
+        res = await run_load(f"http://{host}", "cost", tiles, conns=4, seconds=0.3)
+        assert res["requests"] > 0 and res["status"] == {"200": res["requests"]}
+        await srv.close()
+        return res
+
+    res = asyncio.run(scenario())
+    assert res["p99_ms"] >= res["p50_ms"] > 0
+
+
+def test_viewer_containment_gzip_etag_and_bad_mbtiles(tmp_path):
+    _mbtiles(tmp_path / "cost.mbtiles")
+    db = sqlite3.connect(tmp_path / "broken.mbtiles")  # tiles but no metadata table
+    db.execute("CREATE TABLE tiles (zoom_level integer)")
+    db.commit()
+    db.close()
+    sources = discover([tmp_path])
+    assert set(sources) == {"cost"}
+
+    viewer = tmp_path / "web" / "viewer"
+    viewer.mkdir(parents=True)
+    (viewer / "map.html").write_text("<html>" + "x" * 2000 + "</html>")
+    (tmp_path / "other.html").write_text("outside")
+    srv = TileServer(sources, str(viewer))
+
+    status, body, _, _ = srv._static(["viewer", "..", ".."], {}, False)
+    assert status == 404 and b"other.html" not in body
+    status, body, _, _ = srv._static(["viewer"], {}, False)
+    assert status == 200 and b"map.html" in body
+
+    _, _, _, plain = srv._static(["viewer", "map.html"], {}, False)
+    _, gz_body, _, zipped = srv._static(["viewer", "map.html"], {}, True)
+    assert zipped["Content-Encoding"] == "gzip" and gzip.decompress(gz_body).startswith(b"<html>")
+    assert zipped["ETag"] != plain["ETag"]
+    assert plain["Vary"] == zipped["Vary"] == "Accept-Encoding"
+    status, _, _, extra = srv._static(
+        ["viewer", "map.html"], {"if-none-match": zipped["ETag"]}, True
+    )
+    assert status == 304 and extra["Vary"] == "Accept-Encoding"
+    assert srv._static(["viewer", "map.html"], {"if-none-match": zipped["ETag"]}, False)[0] == 200
+    for s in sources.values():
+        s.close()
@@ -1,4 +1,5 @@
 import numpy as np
+from src.domain.wind import GriddedWindField, TurbulenceParams
 from src.multi_agent.swarm import auction_assign, min_pairwise_distance, simulate_swarm
 
 
@@ -36,3 +37,14 @@ def test_auction_unique_pairs():
     assert len(pairs) == 3
     assert len({i for i, j in pairs}) == 3
     assert len({j for i, j in pairs}) == 3
+
+
+def test_swarm_drifts_with_gridded_wind():
+    wf = GriddedWindField(
+        TurbulenceParams(shape=(32, 32), sigma=(0.0, 0.0, 0.0), mean=(0.5, 0.0, 0.0)),
+        cache_dir=None,
+    )
+    calm = simulate_swarm(1, [], [(0.0, 0.0)], steps=40)
+    windy = simulate_swarm(1, [], [(0.0, 0.0)], steps=40, wind=wf)
+    assert np.allclose(calm[-1, 0], 0.0)
+    assert windy[-1, 0, 0] > 0.1  # pushed downwind, controller fights back
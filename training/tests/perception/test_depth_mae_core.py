@@ -0,0 +1,93 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "sim" / "scripts"))
+from ns_depth_mae_core import (  # noqa: E402
+    LiveDepthMAE,
+    depth_metrics,
+    evaluate_streams,
+    match_nearest,
+)
+
+MAX_MM = 20000
+
+
+def test_match_nearest_equals_brute_force():
+    rng = np.random.default_rng(0)
+    tg = np.sort(rng.uniform(0, 10, 200))
+    tp = rng.uniform(-1, 11, 300)
+    a, b, dt = match_nearest(tp, tg, 0.03)
+    d = np.abs(tp[:, None] - tg[None, :])
+    want_j = d.argmin(axis=1)
+    keep = d.min(axis=1) <= 0.03
+    np.testing.assert_array_equal(a, np.flatnonzero(keep))
+    np.testing.assert_array_equal(b, want_j[keep])
+    np.testing.assert_allclose(dt, d.min(axis=1)[keep])
+    assert match_nearest(tp, tg[:1], 100.0)[1].tolist() == [0] * len(tp)
+
+
+def test_depth_metrics_matches_per_pixel_reference():
+    rng = np.random.default_rng(1)
+    g = rng.integers(0, 25000, (3, 6, 8)).astype(np.uint16)  # zeros and > max are invalid
+    p = np.clip(g.astype(np.int64) + rng.integers(-900, 900, g.shape), 0, 65535).astype(np.uint16)
+    p[2] = 0  # no valid pixel in the last pair
+    m = depth_metrics(p, g, MAX_MM)
+    for k in range(2):
+        v = (p[k] > 0) & (g[k] > 0) & (p[k] <= MAX_MM) & (g[k] <= MAX_MM)
+        e = p[k][v].astype(float) - g[k][v]
+        r = p[k][v].astype(float) / g[k][v]
+        assert m["n_valid"][k] == v.sum()
+        assert m["mae_m"][k] == pytest.approx(np.abs(e).mean() / 1000, rel=1e-5)
+        assert m["rmse_m"][k] == pytest.approx(np.sqrt((e**2).mean()) / 1000, rel=1e-5)
+        assert m["delta1"][k] == pytest.approx((np.maximum(r, 1 / r) < 1.25).mean())
+    assert m["n_valid"][2] == 0 and np.isnan(m["mae_m"][2])
+
+
+def _streams(n_gt=90, shape=(4, 5)):
+    rng = np.random.default_rng(2)
+    gt_t = 100.0 + np.arange(n_gt) / 30.0  # 30 Hz depth camera
+    gt = rng.integers(1000, 5000, (n_gt, *shape)).astype(np.uint16)
+    pred_t = gt_t[::3] + 0.004  # 10 Hz predictions, stamps slightly off the GT grid
+    pred = gt[::3] + np.uint16(100)  # constant +10 cm error
+    return gt_t, gt, pred_t, pred
+
+
+def test_live_matches_every_prediction_under_delayed_arrival():
+    gt_t, gt, pred_t, pred = _streams()
+    live = LiveDepthMAE(max_skew_s=0.02, buffer_len=30, window_s=60.0)
+    # predictions arrive ~0.25 s late (inference latency); GT arrives on time
+    events = [(t, 0, i) for i, t in enumerate(gt_t)] + [
+        (t + 0.25, 1, i) for i, t in enumerate(pred_t)
+    ]
+    for _, kind, i in sorted(events):
+        if kind == 0:
+            live.push_gt(gt_t[i], gt[i])
+        else:
+            live.push_pred(pred_t[i], pred[i])
+        s = live.update()
+    s = live.update()  # nothing new: already-scored predictions are not counted twice
+    assert s["pairs"] == len(pred_t)  # each prediction scored once
+    assert s["match_rate"] == 1.0
+    assert s["mae_m"] == pytest.approx(0.1) and s["rmse_m"] == pytest.approx(0.1)
+    assert s["delta1"] == 1.0 and s["mean_skew_s"] == pytest.approx(0.004)
+
+
+def test_rolling_window_and_offline_agree():
+    gt_t, gt, pred_t, pred = _streams()
+    pred = pred.copy()
+    pred[-5:] = gt[::3][-5:] + np.uint16(300)  # last 5 predictions are worse
+    live = LiveDepthMAE(max_skew_s=0.02, buffer_len=100, window_s=0.45)
+    for i in range(len(gt_t)):
+        live.push_gt(gt_t[i], gt[i])
+    for i in range(len(pred_t)):
+        live.push_pred(pred_t[i], pred[i])
+    s = live.update()
+    assert s["pairs"] == 5 and s["mae_m"] == pytest.approx(0.3)  # only the last 0.45 s
+
+    off = evaluate_streams(pred_t, pred, gt_t[::-1], gt[::-1], max_skew_s=0.02)  # unsorted ok
+    assert off["pairs"] == len(pred_t)
+    assert off["mae_m"] == pytest.approx((25 * 0.1 + 5 * 0.3) / 30)
+    np.testing.assert_array_equal(gt_t[::-1][off["gt_idx"]], gt_t[::3])
@@ -0,0 +1,100 @@
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import onnx
+import onnxruntime as ort
+from onnx import TensorProto, helper, numpy_helper
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "sim" / "scripts"))
+from ns_depth_core import DepthPipeline, Frame, image_to_array  # noqa: E402
+
+W, H = 16, 8
+
+
+def _red_channel_model(path):
+    # 1x1 conv picking the R channel: depth01 = R / 255
+    w = numpy_helper.from_array(np.array([1, 0, 0], np.float32).reshape(1, 3, 1, 1), "w")
+    x = helper.make_tensor_value_info("x", TensorProto.FLOAT, [1, 3, H, W])
+    y = helper.make_tensor_value_info("y", TensorProto.FLOAT, [1, 1, H, W])
+    g = helper.make_graph([helper.make_node("Conv", ["x", "w"], ["y"])], "d", [x], [y], [w])
+    m = helper.make_model(g, opset_imports=[helper.make_operatorsetid("", 13)])
+    m.ir_version = 8
+    onnx.save(m, path)
+    return ort.InferenceSession(str(path), providers=["CPUExecutionProvider"])
+
+
+def _msg(img, encoding, pad=0):
+    h, w, c = img.shape
+    rows = np.zeros((h, w * c + pad), np.uint8)
+    rows[:, : w * c] = img.reshape(h, -1)
+    return SimpleNamespace(
+        height=h, width=w, step=w * c + pad, encoding=encoding, data=bytearray(rows.tobytes())
+    )
+
+
+def test_image_to_array_is_a_view_honouring_step():
+    img = np.random.default_rng(0).integers(0, 256, (H, W, 3), dtype=np.uint8)
+    msg = _msg(img, "bgr8", pad=5)
+    arr = image_to_array(msg)
+    np.testing.assert_array_equal(arr, img)
+    msg.data[0] = 255 - msg.data[0]  # writes through: no copy was made
+    assert arr[0, 0, 0] == 255 - img[0, 0, 0]
+
+
+def test_process_handles_channel_order_and_resize(tmp_path):
+    pipe = DepthPipeline(_red_channel_model(tmp_path / "d.onnx"), (W, H), max_depth_m=10.0)
+    r = np.tile(np.linspace(0, 255, W).astype(np.uint8), (H, 1))
+    rgb = np.stack([r, np.full_like(r, 7), np.full_like(r, 99)], axis=2)
+    want = (r.astype(np.float32) / 255.0 * 10000.0).astype(np.uint16)
+
+    out = pipe.process(Frame(rgb, "rgb8")).depth_mm
+    np.testing.assert_allclose(out, want, atol=1)
+    out = pipe.process(Frame(np.ascontiguousarray(rgb[:, :, ::-1]), "bgr8")).depth_mm
+    np.testing.assert_allclose(out, want, atol=1)
+    big = rgb.repeat(2, axis=0).repeat(2, axis=1)  # 2x input -> resized back to W x H
+    res = pipe.process(Frame(big, "rgb8"))
+    np.testing.assert_allclose(res.depth_mm, want, atol=1)
+    assert res.seq == 3 and res.depth_mm.dtype == np.uint16
+
+
+def test_latest_frame_wins_and_drops_are_counted(tmp_path):
+    pipe = DepthPipeline(_red_channel_model(tmp_path / "d.onnx"), (W, H), window=4)
+    img = np.zeros((H, W, 3), np.uint8)
+    assert [pipe.submit(img, "rgb8", header=k) for k in range(3)] == [False, True, True]
+    assert pipe.slot.take(0).header == 2 and pipe.slot.take(0) is None
+    assert pipe.stats()["dropped"] == 2 and pipe.drop_rate() == 2 / 3
+    for k in range(3, 7):  # every frame taken in time: window fills with kept frames
+        pipe.submit(img, "rgb8", header=k)
+        pipe.slot.take(0)
+    assert pipe.drop_rate() == 0.0
+
+
+def test_worker_thread_publishes_freshest_frames(tmp_path):
+    got, done = [], threading.Event()
+
+    def slow_publisher(res):  # stands in for the ROS publishers
+        got.append((res.header, res.latency_ms, res.drop_rate, int(res.depth_mm[0, -1])))
+        time.sleep(0.01)
+        if res.header == 59:
+            done.set()
+
+    pipe = DepthPipeline(_red_channel_model(tmp_path / "d.onnx"), (W, H), publish=slow_publisher)
+    pipe.start()
+    img = np.full((H, W, 3), 255, np.uint8)
+    try:
+        for k in range(60):
+            pipe.submit(img, "rgb8", header=k)
+            time.sleep(0.001)
+        assert done.wait(5.0)
+    finally:
+        pipe.stop()
+    headers = [g[0] for g in got]
+    assert headers == sorted(set(headers)) and headers[-1] == 59
+    st = pipe.stats()
+    assert st["received"] == 60 and st["dropped"] > 0
+    assert st["processed"] == len(got) == 60 - st["dropped"]
+    assert all(g[1] >= 0 for g in got) and got[-1][2] > 0 and got[-1][3] == 20000
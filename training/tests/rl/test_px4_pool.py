@@ -0,0 +1,87 @@
+import asyncio
+
+import numpy as np
+from rl.envs.px4_pool import InstanceSpec, Px4AltPool
+
+
+class FakeLink:
+    """Stand-in for a MAVSDK-connected SITL: first-order altitude response to vz commands."""
+
+    crash_ports: set[int] = set()
+    connects: list[int] = []
+
+    def __init__(self, spec: InstanceSpec):
+        self.spec = spec
+        self.alt = 0.0
+        self.vz = 0.0
+
+    async def connect(self):
+        FakeLink.connects.append(self.spec.px4_port)
+
+    async def reset(self):
+        self.alt, self.vz = 0.0, 0.0
+
+    async def set_vz(self, vz_mps):
+        if self.spec.px4_port in FakeLink.crash_ports:
+            FakeLink.crash_ports.discard(self.spec.px4_port)
+            raise ConnectionError("sitl died")
+        self.vz = vz_mps
+        self.alt += 0.1 * vz_mps
+
+    async def state(self):
+        await asyncio.sleep(0.001)
+        return self.alt, self.vz
+
+    async def close(self):
+        pass
+
+
+def _pool(k=4, **kw):
+    specs = [InstanceSpec(14540 + i, 50060 + i) for i in range(k)]
+    return Px4AltPool(specs, step_dt=0.0, link_factory=FakeLink, **kw)
+
+
+def test_pool_steps_batched_and_autoresets():
+    FakeLink.connects.clear()
+    pool = _pool(k=4, max_steps=3)
+    obs = pool.reset()
+    assert obs.shape == (4, 3) and np.allclose(obs[:, 2], 2.0)
+    acts = np.array([[1.0], [0.5], [0.0], [-1.0]])
+    obs, rew, term, trunc, infos = pool.step(acts)
+    assert np.allclose(obs[:, 0], [0.1, 0.05, 0.0, -0.1])
+    assert np.allclose(rew, -np.abs(2.0 - obs[:, 0]) - 0.01 * np.abs(obs[:, 1]))
+    assert not term.any() and not trunc.any()
+    pool.step(acts)
+    obs, _, _, trunc, infos = pool.step(acts)
+    assert trunc.all()
+    assert np.allclose(infos[0]["terminal_observation"][0], 0.3)
+    assert np.allclose(obs[:, 0], 0.0)  # auto-reset
+    assert len(FakeLink.connects) == 4  # resets reuse the connection
+    pool.close()
+
+
+def test_pool_recovers_crashed_instance():
+    FakeLink.connects.clear()
+    pool = _pool(k=3)
+    pool.reset()
+    FakeLink.crash_ports.add(14541)
+    obs, _, term, _, infos = pool.step(np.ones((3, 1)))
+    assert term[1] and infos[1].get("crashed")
+    assert not term[0] and not term[2]
+    assert pool.restarts.tolist() == [0, 1, 0]
+    assert FakeLink.connects.count(14541) == 2
+    obs, _, term, _, _ = pool.step(np.ones((3, 1)))
+    assert not term.any() and np.isclose(obs[1, 0], 0.1)
+    pool.close()
+
+
+def test_pool_reset_seeds_and_forwards_instance_calls():
+    pool = _pool(k=2)
+    pool.reset(seeds=[7, None])
+    assert pool.seeds == [7, None]
+    a = np.random.random()
+    pool.reset(seeds=[7, None])
+    assert np.random.random() == a  # seeded like Px4AltHoldEnv.seed
+    pool.step(np.ones((2, 1)))
+    assert pool.call(1, "state") == (0.1, 1.0)  # coroutine awaited in the pool loop
+    pool.close()
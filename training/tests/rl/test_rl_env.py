@@ -15,3 +15,77 @@ def test_env_step_and_safety():
     s3, r2, done2, info2 = env.step(2)  # move S into obstacle at (2,2)
     assert s3 == (2, 1)
     assert r2 < -0.5 and not done2
+
+
+def test_vec_env_matches_scalar_and_autoresets():
+    import numpy as np
+    from src.rl.gridworld import VecGridWorld
+
+    cfg = GWCfg(w=6, h=5, start=(0, 0), goal=(2, 0), obstacles={(0, 1)}, hazards={(1, 0)})
+    venv = VecGridWorld(cfg, n_envs=4, max_steps=3)
+    venv.reset()
+    # E into hazard, S into obstacle, W out of bounds, N out of bounds
+    ns, r, done, info = venv.step(np.array([0, 2, 1, 3]))
+    for i, a in enumerate([0, 2, 1, 3]):
+        env = GridWorld(cfg)
+        env.reset()
+        pos, r1, d1, info1 = env.step(a)
+        assert ns[i] == pos[1] * cfg.w + pos[0]
+        assert np.isclose(r[i], r1) and done[i] == d1 and info["unsafe"][i] == info1["unsafe"]
+    # env 0 reaches the goal next step and is reset to start
+    ns, r, done, _ = venv.step(np.array([0, 1, 1, 1]))
+    assert done[0] and ns[0] == 2 and venv.s[0] == 0
+    # the rest hit max_steps=3 on the following step and are truncated
+    _, _, done, info = venv.step(np.array([1, 1, 1, 1]))
+    assert info["truncated"][1:].all() and (venv.s == 0).all()
+
+
+def test_distance_field_cache_and_shortest_path():
+    import numpy as np
+    from src.rl.gridworld import UNREACHABLE, DistanceFields, cells_to_mask, shortest_path_len
+
+    wall = {(5, y) for y in range(6)}
+    assert shortest_path_len(12, 8, (0, 0), (11, 7), wall) == 18
+    assert shortest_path_len(12, 8, (4, 0), (6, 0), wall) == 14  # detour around the wall
+    assert shortest_path_len(3, 3, (0, 0), (2, 2), {(1, 0), (1, 1), (1, 2)}) == UNREACHABLE
+
+    fields = DistanceFields(maxsize=2)
+    occ = cells_to_mask(12, 8, wall)
+    f = fields.get(occ, (11, 7))
+    assert fields.get(occ.copy(), (11, 7)) is f  # keyed by content, not identity
+    assert f[7, 11] == 0 and f[0, 0] == 18 and f[0, 5] == UNREACHABLE
+    fields.get(occ, (0, 0))
+    fields.get(occ, (1, 1))  # evicts the (11, 7) map
+    assert fields.get(occ, (11, 7)) is not f
+    assert np.array_equal(fields.potential(occ, (11, 7))[0, :2], [-18.0, -17.0])
+
+
+def _bfs_reference(w, h, start, goal, obstacles):
+    from collections import deque
+
+    q, seen = deque([(start, 0)]), {start}
+    while q:
+        (x, y), d = q.popleft()
+        if (x, y) == goal:
+            return d
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if 0 <= nx < w and 0 <= ny < h and (nx, ny) not in obstacles | seen:
+                seen.add((nx, ny))
+                q.append(((nx, ny), d + 1))
+    return 10**9
+
+
+def test_shortest_path_matches_bfs_on_edge_cases():
+    import random
+
+    from src.rl.gridworld import cells_to_mask, shortest_path_len
+
+    assert cells_to_mask(3, 2, [(-1, 0), (3, 1), (0, 2), (1, 1)]).sum() == 1  # off-grid ignored
+    rng = random.Random(0)
+    for _ in range(300):
+        w, h = rng.randint(2, 7), rng.randint(2, 7)
+        obs = {(rng.randint(-2, w + 1), rng.randint(-2, h + 1)) for _ in range(rng.randint(0, 12))}
+        start, goal = (rng.randrange(w), rng.randrange(h)), (rng.randrange(w), rng.randrange(h))
+        if rng.random() < 0.3:
+            obs |= {rng.choice([start, goal])}  # start/goal inside an obstacle
+        assert shortest_path_len(w, h, start, goal, obs) == _bfs_reference(w, h, start, goal, obs)
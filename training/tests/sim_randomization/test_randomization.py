@@ -39,3 +39,58 @@ def test_different_seeds_differ():
     for k in ("wind_mps", "gust_mps", "direction_deg"):
         diffs.append(a["wind"][k] != b["wind"][k])
     assert any(diffs)
+
+
+def test_batch_mode_columnar_and_reproducible(tmp_path):
+    import numpy as np
+
+    prof = "sim/simulation/domain_randomization/profiles/windy.yaml"
+    outs = []
+    for name in ("a.npz", "b.npz"):
+        out = tmp_path / name
+        _run(RUN + ["--profile", prof, "--seed", "5", "--batch", "2000", "--batch-out", str(out)])
+        with np.load(out) as z:
+            meta = json.loads(str(z["__meta__"]))
+            outs.append({c: z[c] for c in meta["columns"]})
+    a, b = outs
+    assert meta["seed"] == 5 and meta["samples"] == 2000
+    assert meta["constants"]["sensors.gnss.pos_noise_std_m"] == 1.5
+    assert np.array_equal(a["index"], np.arange(2000))
+    for k in a:
+        assert np.array_equal(a[k], b[k])
+    speed = a["wind.mean_speed_mps"]
+    assert speed.min() >= 3.0 and speed.max() <= 12.0 and speed.std() > 1.0
+    assert set(a["textures.ground"]) == {"asphalt", "grass", "dirt"}
+
+
+def test_batch_mode_structured_choices_roundtrip_without_pickle(tmp_path):
+    import sys
+
+    import numpy as np
+
+    sys.path.insert(0, "simulation/domain_randomization/scripts")
+    from apply_randomization import batch_row, load_batch
+
+    prof = tmp_path / "p.yaml"
+    prof.write_text(
+        "lights:\n"
+        "  preset: [{sun: 1}, {sun: 0.5, fog: true}, {sun: 0}]\n"
+        "  label: [a, 1, null]\n"
+        "  level: [1, 2, 3.5]\n"
+        "extras: {}\n"
+    )
+    out, outdir = tmp_path / "b.npz", tmp_path / "unused"
+    _run(
+        RUN
+        + ["--profile", str(prof), "--batch", "50", "--batch-out", str(out), "--out", str(outdir)]
+    )
+    assert not outdir.exists()  # batch mode only writes the batch file
+    with np.load(out) as z:  # allow_pickle=False
+        assert all(z[c].dtype != object for c in z.files)
+    cols, meta = load_batch(out)
+    assert meta["json_columns"] == ["lights.preset", "lights.label"]
+    assert cols["lights.level"].dtype == np.float64
+    row = batch_row(cols, meta, 0)
+    assert row["extras"] == {}
+    assert row["lights"]["preset"] in ({"sun": 1}, {"sun": 0.5, "fog": True}, {"sun": 0})
+    assert row["lights"]["label"] in ("a", 1, None)